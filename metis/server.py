@@ -1,4 +1,5 @@
 import traceback
+from multiprocessing import Queue
 
 from langgraph.checkpoint.postgres import PostgresSaver
 from sanic import Sanic
@@ -15,6 +16,7 @@ from src.core.sanic_plus.auth.api_auth import auth
 from src.core.sanic_plus.utils.config import YamlConfig
 from src.core.sanic_plus.utils.crypto import PasswordCrypto
 from src.core.ocr.pp_ocr import PPOcr
+from src.web.services.ingest_job_service import IngestWorker
 
 # 全局变量，延迟初始化
 crypto = None
@@ -81,6 +83,16 @@ def bootstrap() -> Sanic:
         logger.error(msg)
         return json({}, status=500)
 
+    # 文档导入任务队列与执行进程，HTTP worker 只负责提交任务
+    @app.main_process_start
+    async def create_ingest_queue(app, _):
+        app.shared_ctx.ingest_queue = Queue()
+
+    @app.main_process_ready
+    async def start_ingest_workers(app, _):
+        app.manager.manage("IngestWorker", IngestWorker.serve, {"job_queue": app.shared_ctx.ingest_queue},
+                           workers=core_settings.ingest_load_workers)
+
     # 配置启动钩子
     @app.before_server_start
     async def show_banner(app, loop):
@@ -106,6 +118,52 @@ def bootstrap() -> Sanic:
             pass
         logger.info("setup langgraph checkpoint finished")
 
+        from src.core.rag.naive_rag.pgvector.pgvector_schema import PgvectorSchema
+        try:
+            PgvectorSchema.setup()
+        except Exception as e:
+            logger.error(f"setup pgvector indexes failed: {e}")
+        logger.info("setup pgvector indexes finished")
+
+        from src.web.services.ingest_job_store import IngestJobStore
+        try:
+            IngestJobStore.setup()
+        except Exception as e:
+            logger.error(f"setup ingest job table failed: {e}")
+        logger.info("setup ingest job table finished")
+
+        from src.core.embed.embed_cache import EmbedCache
+        try:
+            EmbedCache.setup()
+            logger.info(f"cleanup embedding cache, deleted: {EmbedCache.cleanup()}")
+        except Exception as e:
+            logger.error(f"setup embedding cache table failed: {e}")
+        logger.info("setup embedding cache table finished")
+
+        from src.core.ocr.ocr_cache import OcrCache
+        try:
+            OcrCache.setup()
+            logger.info(f"cleanup ocr cache, deleted: {OcrCache.cleanup()}")
+        except Exception as e:
+            logger.error(f"setup ocr cache table failed: {e}")
+        logger.info("setup ocr cache table finished")
+
+    @app.command
+    def bench_pgvector(rounds: int = 30, doc_count: int = 2000, dim: int = 384, embed_latency: float = 0.05):
+        from src.core.rag.naive_rag.pgvector.pgvector_benchmark import run_pgvector_benchmark
+        run_pgvector_benchmark(rounds=int(rounds), doc_count=int(doc_count), dim=int(dim),
+                               embed_latency=float(embed_latency))
+
+    @app.command
+    def bench_textrank(sizes: str = '100,1000,10000', legacy_max: int = 1000):
+        from src.core.summarize.textrank.textrank_benchmark import run_textrank_benchmark
+        run_textrank_benchmark(sizes=[int(size) for size in sizes.split(',')], legacy_max=int(legacy_max))
+
+    @app.command
+    def bench_ocr(pages: int = 20, pdf_path: str = '', pool_size: int = 0):
+        from src.core.ocr.ocr_benchmark import run_ocr_benchmark
+        run_ocr_benchmark(pages=int(pages), pdf_path=pdf_path, pool_size=int(pool_size))
+
     @app.command
     async def download_models():
         logger.info("download HuggingFace Embed Models")
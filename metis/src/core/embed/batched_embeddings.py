@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from sanic.log import logger
+
+from src.core.embed.embed_cache import EmbedCache, content_hash
+from src.core.embed.embed_metrics import EmbedMetrics
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+class EmbedBatcher:
+    """把并发的向量化调用合并成批次
+
+    调用方的文本按 embed_batch_size 切分后入队，调度线程取出一项后在 embed_batch_wait_ms 内继续收集，
+    凑满一批或超时即交给模型；同一模型同时执行的批次数受 concurrency 限制，
+    没有空闲名额时新请求在队列中积累，名额释放后直接组成更大的批次。
+    合并的批次调用失败时，每个调用方的文本再单独调用一次，一个调用方的错误不影响其他调用方；
+    close() 后调度线程处理完已入队的文本即退出，之后的调用直接在调用方线程中执行
+    """
+
+    def __init__(self, embeddings: Embeddings, concurrency: int, metrics: EmbedMetrics):
+        self.embeddings = embeddings
+        self.metrics = metrics
+        self.batch_size = core_settings.embed_batch_size
+        self.wait = core_settings.embed_batch_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.slots = threading.Semaphore(concurrency)
+        self.executor = ThreadPoolExecutor(concurrency, thread_name_prefix='embed-batch')
+        self.closed = False
+        self.lock = threading.Lock()
+        threading.Thread(target=self._dispatch, daemon=True, name='embed-batcher').start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        futures = []
+        with self.lock:
+            if self.closed:
+                return self.embeddings.embed_documents(texts)
+            for start in range(0, len(texts), self.batch_size):
+                future = Future()
+                self.queue.put((texts[start:start + self.batch_size], future))
+                futures.append(future)
+
+        vectors = []
+        for future in futures:
+            vectors.extend(future.result())
+        return vectors
+
+    def close(self) -> None:
+        """停止合批：已入队的文本照常处理，调度线程退出后线程池随之关闭"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+
+    def _dispatch(self) -> None:
+        carry, stopping = None, False
+        while not stopping:
+            item = carry or self.queue.get()
+            carry = None
+            if item is None:
+                break
+            self.slots.acquire()
+
+            batch, size = [item], len(item[0])
+            try:
+                deadline = time.monotonic() + self.wait
+                while size < self.batch_size:
+                    try:
+                        item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    if size + len(item[0]) > self.batch_size:
+                        carry = item
+                        break
+                    batch.append(item)
+                    size += len(item[0])
+                self.executor.submit(self._run, batch)
+            except Exception as e:
+                # 调度线程不能退出，否则之后所有调用方都会一直等待
+                logger.exception(f"向量化合批调度失败 - 错误: {e}")
+                self._fail(batch, e)
+                self.slots.release()
+        self.executor.shutdown(wait=False)
+
+    def _run(self, batch) -> None:
+        try:
+            texts = [text for texts, _ in batch for text in texts]
+            start = time.perf_counter()
+            vectors = self.embeddings.embed_documents(texts)
+            self.metrics.record_batch(time.perf_counter() - start)
+
+            offset = 0
+            for texts, future in batch:
+                future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch, e)
+            else:
+                logger.warning(f"向量化批次失败，逐个调用方重试 - 调用数: {len(batch)}, 错误: {e}")
+                self._run_each(batch)
+        finally:
+            self.slots.release()
+
+    def _run_each(self, batch) -> None:
+        """合并的批次失败后逐个调用方重试，只有自身文本失败的调用方收到异常"""
+        for texts, future in batch:
+            if future.done():
+                continue
+            try:
+                future.set_result(self.embeddings.embed_documents(texts))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def _fail(batch, e: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+
+
+class BatchedEmbeddings(Embeddings):
+    """EmbedBuilder 返回的向量化模型：内容哈希缓存 + 并发合批 + 吞吐统计
+
+    查询向量也经过合批，OpenAIEmbeddings 与 HuggingFaceEmbeddings 的 embed_query 与 embed_documents 结果一致
+    """
+
+    def __init__(self, embeddings: Embeddings, model_key: str, concurrency: int):
+        self.embeddings = embeddings
+        self.model_key = model_key
+        self.cache = EmbedCache(model_key)
+        self.metrics = EmbedMetrics(model_key)
+        self.batcher = EmbedBatcher(embeddings, concurrency, self.metrics)
+
+    def close(self) -> None:
+        self.batcher.close()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, persistent=True)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], persistent=False)[0]
+
+    def _embed(self, texts: List[str], persistent: bool) -> List[List[float]]:
+        if not texts:
+            return []
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(hashes, persistent)
+
+        # 未命中的文本去重后交给模型
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            embedded = dict(zip(missing, self.batcher.embed(list(missing.values()))))
+            self.cache.put_many(embedded, persistent)
+            vectors.update(embedded)
+
+        self.metrics.record_request(len(texts), len(missing))
+        return [vectors[key] for key in hashes]
@@ -0,0 +1,138 @@
+"""BatchedEmbeddings 测试：使用假向量化模型，不依赖模型服务与数据库"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.core.embed.batched_embeddings import BatchedEmbeddings
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+class FakeEmbeddings(Embeddings):
+    """文本的向量为 [长度, 首字符编码]，包含 bad 的文本调用失败"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.lock:
+            self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if any('bad' in text for text in texts):
+            raise RuntimeError("向量化失败")
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    @staticmethod
+    def vector(text: str) -> List[float]:
+        return [float(len(text)), float(ord(text[0]))]
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(core_settings, 'embed_cache_persistent', False)
+    monkeypatch.setattr(core_settings, 'embed_batch_size', 64)
+    monkeypatch.setattr(core_settings, 'embed_batch_wait_ms', 50)
+
+
+def _embeddings(fake, concurrency=1):
+    return BatchedEmbeddings(fake, model_key=f"test:{time.time_ns()}", concurrency=concurrency)
+
+
+def test_concurrent_calls_are_merged_into_one_batch():
+    fake = FakeEmbeddings()
+    embeddings = _embeddings(fake)
+    texts = [[f"doc{i}-{j}" for j in range(3)] for i in range(8)]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(embeddings.embed_documents, texts))
+
+    assert results == [[fake.vector(text) for text in group] for group in texts]
+    assert len(fake.calls) < len(texts)
+    assert sorted(text for call in fake.calls for text in call) == sorted(text for group in texts for text in group)
+
+
+def test_order_is_preserved_across_batches(monkeypatch):
+    monkeypatch.setattr(core_settings, 'embed_batch_size', 4)
+    fake = FakeEmbeddings()
+    texts = [f"{'x' * i}{i}" for i in range(1, 11)]
+
+    assert _embeddings(fake).embed_documents(texts) == [fake.vector(text) for text in texts]
+    assert all(len(call) <= 4 for call in fake.calls)
+
+
+def test_duplicate_texts_are_embedded_once():
+    fake = FakeEmbeddings()
+    texts = ["a", "bb", "a", "ccc", "bb"]
+
+    assert _embeddings(fake).embed_documents(texts) == [fake.vector(text) for text in texts]
+    assert [text for call in fake.calls for text in call] == ["a", "bb", "ccc"]
+
+
+def test_second_call_hits_cache():
+    fake = FakeEmbeddings()
+    embeddings = _embeddings(fake)
+    embeddings.embed_documents(["a", "bb"])
+
+    assert embeddings.embed_documents(["bb", "a"]) == [fake.vector("bb"), fake.vector("a")]
+    assert embeddings.embed_query("a") == fake.vector("a")
+    assert len(fake.calls) == 1
+
+
+def test_failed_caller_does_not_fail_batch():
+    """同批的其他调用方拿到结果，只有包含失败文本的调用方收到异常，且失败结果不进缓存"""
+    fake = FakeEmbeddings(delay=0.05)
+    embeddings = _embeddings(fake)
+
+    # 第一批占用唯一的名额，之后的调用在队列中积累并合成一批
+    with ThreadPoolExecutor(4) as pool:
+        first = pool.submit(embeddings.embed_documents, ["warmup"])
+        time.sleep(0.01)
+        good = pool.submit(embeddings.embed_documents, ["good1", "good2"])
+        bad = pool.submit(embeddings.embed_documents, ["bad"])
+        other = pool.submit(embeddings.embed_documents, ["good3"])
+
+        assert first.result() == [fake.vector("warmup")]
+        assert good.result() == [fake.vector("good1"), fake.vector("good2")]
+        assert other.result() == [fake.vector("good3")]
+        with pytest.raises(RuntimeError):
+            bad.result()
+
+    assert ["good1", "good2"] in fake.calls
+    with pytest.raises(RuntimeError):
+        embeddings.embed_documents(["bad"])
+
+
+def test_dispatcher_survives_submit_error(monkeypatch):
+    """调度线程提交批次出错时调用方收到异常，之后的调用不会一直等待"""
+    fake = FakeEmbeddings()
+    embeddings = _embeddings(fake)
+    executor = embeddings.batcher.executor
+    submit = executor.submit
+    errors = [RuntimeError("线程池不可用")]
+
+    def flaky_submit(*args, **kwargs):
+        if errors:
+            raise errors.pop()
+        return submit(*args, **kwargs)
+
+    monkeypatch.setattr(executor, 'submit', flaky_submit)
+    with pytest.raises(RuntimeError):
+        embeddings.embed_documents(["a"])
+    assert embeddings.embed_documents(["a"]) == [fake.vector("a")]
+
+
+def test_closed_batcher_embeds_directly():
+    fake = FakeEmbeddings()
+    embeddings = _embeddings(fake)
+    embeddings.close()
+
+    assert embeddings.embed_documents(["a", "bb"]) == [fake.vector("a"), fake.vector("bb")]
+    assert fake.calls == [["a", "bb"]]
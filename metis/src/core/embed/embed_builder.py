@@ -1,13 +1,30 @@
+import threading
+from collections import OrderedDict
+
 from langchain_openai import OpenAIEmbeddings
 
+from src.core.embed.batched_embeddings import BatchedEmbeddings
+from src.core.sanic_plus.env.core_settings import core_settings
 from src.core.sanic_plus.utils.gpu_utils import GpuUtils
 
 
 class EmbedBuilder:
+    """向量化模型注册表：同一模型配置在进程内只创建一次，返回带缓存与合批的 BatchedEmbeddings
+
+    远程模型按 (协议, 模型, api_key, 地址) 区分，轮换密钥或新增配置都会产生新的实例，
+    最多保留 core_settings.embed_remote_instance_limit 个，超出时关闭最久未使用的实例（停止合批线程与线程池）
+    """
+
     _embed_instances = {}
+    _remote_instances = OrderedDict()
+    _lock = threading.Lock()
 
     @classmethod
     def get_local_embed_instance(cls, protocol: str):
+        embeddings = cls._embed_instances.get(protocol)
+        if embeddings is not None:
+            return embeddings
+
         model_device = GpuUtils.choose_model_device()
 
         # local-gpu模式下，使用GPU
@@ -20,25 +37,47 @@ class EmbedBuilder:
         if model_type == 'huggingface_embedding':
             from langchain_huggingface import HuggingFaceEmbeddings
 
-            cls._embed_instances[protocol] = HuggingFaceEmbeddings(
-                model_name=model_name,
-                model_kwargs={'device': model_device},
-                encode_kwargs={'normalize_embeddings': False},
-                cache_folder="./models"
-            )
+            with cls._lock:
+                if protocol not in cls._embed_instances:
+                    cls._embed_instances[protocol] = BatchedEmbeddings(
+                        HuggingFaceEmbeddings(
+                            model_name=model_name,
+                            model_kwargs={'device': model_device},
+                            encode_kwargs={'normalize_embeddings': False},
+                            cache_folder="./models"
+                        ),
+                        model_key=f"{model_type}:{model_name}",
+                        concurrency=core_settings.embed_local_concurrency,
+                    )
             return cls._embed_instances[protocol]
 
         return None
 
-    @staticmethod
-    def get_embed(protocol: str, model_name: str = '', model_api_key: str = '', model_base_url: str = ''):
+    @classmethod
+    def get_embed(cls, protocol: str, model_name: str = '', model_api_key: str = '', model_base_url: str = ''):
         if protocol.startswith('local:'):
-            return EmbedBuilder.get_local_embed_instance(protocol)
-        else:
-            embeddings = OpenAIEmbeddings(
-                model=model_name,
-                api_key=model_api_key,
-                base_url=model_base_url,
-                timeout=300,  # 5分钟超时，适应批量嵌入操作
-            )
-            return embeddings
+            return cls.get_local_embed_instance(protocol)
+
+        key = (protocol, model_name, model_api_key, model_base_url)
+        evicted = []
+        with cls._lock:
+            embeddings = cls._remote_instances.get(key)
+            if embeddings is None:
+                embeddings = BatchedEmbeddings(
+                    OpenAIEmbeddings(
+                        model=model_name,
+                        api_key=model_api_key,
+                        base_url=model_base_url,
+                        timeout=300,  # 5分钟超时，适应批量嵌入操作
+                    ),
+                    model_key=f"{model_base_url}:{model_name}",
+                    concurrency=core_settings.embed_remote_concurrency,
+                )
+                cls._remote_instances[key] = embeddings
+            cls._remote_instances.move_to_end(key)
+            while len(cls._remote_instances) > max(core_settings.embed_remote_instance_limit, 1):
+                evicted.append(cls._remote_instances.popitem(last=False)[1])
+        # 仍持有被淘汰实例的调用方不受影响：已入队的文本照常完成，之后的调用不再合批
+        for instance in evicted:
+            instance.close()
+        return embeddings
@@ -0,0 +1,33 @@
+"""EmbedBuilder 测试：远程模型实例数量有上限，淘汰的实例关闭合批线程"""
+import pytest
+
+from src.core.embed import embed_builder
+from src.core.embed.batched_embeddings_test import FakeEmbeddings
+from src.core.embed.embed_builder import EmbedBuilder
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+@pytest.fixture(autouse=True)
+def fake_remote(monkeypatch):
+    monkeypatch.setattr(embed_builder, 'OpenAIEmbeddings', lambda **kwargs: FakeEmbeddings())
+    monkeypatch.setattr(core_settings, 'embed_cache_persistent', False)
+    monkeypatch.setattr(core_settings, 'embed_remote_instance_limit', 2)
+    monkeypatch.setattr(EmbedBuilder, '_remote_instances', embed_builder.OrderedDict())
+
+
+def test_same_config_is_reused():
+    first = EmbedBuilder.get_embed('openai', 'm', 'key', 'http://a')
+    assert EmbedBuilder.get_embed('openai', 'm', 'key', 'http://a') is first
+
+
+def test_least_recently_used_instance_is_closed():
+    first = EmbedBuilder.get_embed('openai', 'm', 'key1', 'http://a')
+    second = EmbedBuilder.get_embed('openai', 'm', 'key2', 'http://a')
+    EmbedBuilder.get_embed('openai', 'm', 'key1', 'http://a')
+    EmbedBuilder.get_embed('openai', 'm', 'key3', 'http://a')
+
+    assert len(EmbedBuilder._remote_instances) == 2
+    assert second.batcher.closed
+    assert not first.batcher.closed
+    # 仍持有被淘汰实例的调用方可以继续使用
+    assert second.embed_documents(["a"]) == [FakeEmbeddings.vector("a")]
@@ -0,0 +1,161 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+from sanic.log import logger
+from sqlalchemy import text
+
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
+from src.core.sanic_plus.env.core_settings import core_settings
+
+# 写入缓存时清理过期向量的最小间隔（秒）
+EMBED_CACHE_CLEANUP_INTERVAL = 3600
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class EmbedCache:
+    """按 模型 + 文本内容哈希 缓存向量
+
+    - 进程内 LRU，所有模型共用 core_settings.embed_cache_size 条
+    - 文档向量持久化到 PostgreSQL 的 metis_embedding_cache 表，重复导入或内容相同的分块不再调用模型；
+      检索的查询向量只进内存缓存，避免每次检索都写库；
+      超过 core_settings.embed_cache_retention_days 天未被读取的向量由 cleanup() 删除，
+      写入时每小时最多清理一次；从数据库读到的向量刷新 last_used_at（每条每天最多刷新一次），
+      只命中内存缓存时不刷新
+    向量以 float32 保存，与 pgvector 的存储精度一致；持久化读写失败只记录日志，不影响向量化
+    """
+
+    _memory = OrderedDict()
+    _lock = threading.Lock()
+    _table_ready = False
+    _cleaned_at = None
+
+    def __init__(self, model_key: str):
+        self.model_key = model_key
+
+    @classmethod
+    def setup(cls) -> None:
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS metis_embedding_cache (
+                    model VARCHAR(512) NOT NULL,
+                    content_hash CHAR(64) NOT NULL,
+                    embedding BYTEA NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (model, content_hash)
+                )
+            """))
+            conn.execute(text(
+                "ALTER TABLE metis_embedding_cache ADD COLUMN IF NOT EXISTS "
+                "last_used_at TIMESTAMPTZ NOT NULL DEFAULT now()"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS metis_embedding_cache_last_used_at_idx "
+                "ON metis_embedding_cache (last_used_at)"))
+        cls._table_ready = True
+
+    @classmethod
+    def cleanup(cls) -> int:
+        """删除超过 core_settings.embed_cache_retention_days 天未被读取的向量，返回删除条数"""
+        cls._cleaned_at = time.monotonic()
+        if core_settings.embed_cache_retention_days <= 0:
+            return 0
+        if not cls._table_ready:
+            cls.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            result = conn.execute(text(
+                "DELETE FROM metis_embedding_cache WHERE last_used_at < now() - make_interval(days => :days)"
+            ), {'days': core_settings.embed_cache_retention_days})
+        return result.rowcount
+
+    @staticmethod
+    def persistent_enabled() -> bool:
+        return core_settings.embed_cache_persistent and bool(core_settings.db_uri)
+
+    def get_many(self, hashes: List[str], persistent: bool) -> Dict[str, List[float]]:
+        """返回命中缓存的 {内容哈希: 向量}"""
+        found = {}
+        with self._lock:
+            for key in hashes:
+                vector = self._memory.get((self.model_key, key))
+                if vector is not None:
+                    self._memory.move_to_end((self.model_key, key))
+                    found[key] = vector.tolist()
+
+        missing = [key for key in set(hashes) if key not in found]
+        if missing and persistent and self.persistent_enabled():
+            try:
+                loaded = self._load(missing)
+            except Exception as e:
+                logger.warning(f"向量缓存读取失败 - 模型: {self.model_key}, 错误: {e}")
+                loaded = {}
+            self._remember(loaded)
+            found.update({key: vector.tolist() for key, vector in loaded.items()})
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]], persistent: bool) -> None:
+        arrays = {key: np.asarray(vector, dtype=np.float32) for key, vector in vectors.items()}
+        self._remember(arrays)
+        if arrays and persistent and self.persistent_enabled():
+            try:
+                self._save(arrays)
+            except Exception as e:
+                logger.warning(f"向量缓存写入失败 - 模型: {self.model_key}, 错误: {e}")
+            self._cleanup_if_due()
+
+    def _cleanup_if_due(self) -> None:
+        if self._cleaned_at is not None and time.monotonic() - self._cleaned_at < EMBED_CACHE_CLEANUP_INTERVAL:
+            return
+        try:
+            deleted = self.cleanup()
+        except Exception as e:
+            logger.warning(f"向量缓存清理失败 - 错误: {e}")
+            return
+        if deleted:
+            logger.info(f"向量缓存清理 - 删除: {deleted}")
+
+    def _remember(self, arrays: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in arrays.items():
+                self._memory[(self.model_key, key)] = vector
+                self._memory.move_to_end((self.model_key, key))
+            while len(self._memory) > core_settings.embed_cache_size:
+                self._memory.popitem(last=False)
+
+    def _load(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        if not self._table_ready:
+            self.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT content_hash, embedding FROM metis_embedding_cache "
+                "WHERE model = :model AND content_hash = ANY(:hashes)"
+            ), {'model': self.model_key, 'hashes': hashes})
+            loaded = {row[0]: np.frombuffer(row[1], dtype=np.float32) for row in rows}
+            if loaded:
+                # 命中的向量刷新最后使用时间，一天内已刷新过的不再写库
+                conn.execute(text(
+                    "UPDATE metis_embedding_cache SET last_used_at = now() "
+                    "WHERE model = :model AND content_hash = ANY(:hashes) "
+                    "AND last_used_at < now() - interval '1 day'"
+                ), {'model': self.model_key, 'hashes': list(loaded)})
+            return loaded
+
+    def _save(self, arrays: Dict[str, np.ndarray]) -> None:
+        if not self._table_ready:
+            self.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO metis_embedding_cache (model, content_hash, embedding) "
+                "VALUES (:model, :content_hash, :embedding) ON CONFLICT DO NOTHING"
+            ), [{'model': self.model_key, 'content_hash': key, 'embedding': vector.tobytes()}
+                for key, vector in arrays.items()])
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from sanic.log import logger
+
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+class EmbedMetrics:
+    """单个模型的向量化统计（进程内），按 embed_metrics_log_interval 定期输出日志
+
+    - requested: 请求向量化的文本数；embedded: 实际交给模型的文本数，缓存命中与请求内重复的文本不计入
+    - hit_rate = 1 - embedded / requested
+    - texts_per_second: 统计周期内每秒完成的文本数；model_texts_per_second: 模型调用期间每秒处理的文本数
+    """
+
+    def __init__(self, model_key: str):
+        self.model_key = model_key
+        self.lock = threading.Lock()
+        self._reset(time.monotonic())
+
+    def _reset(self, now: float) -> None:
+        self.started = now
+        self.requested = 0
+        self.embedded = 0
+        self.batches = 0
+        self.model_seconds = 0.0
+
+    def record_request(self, requested: int, embedded: int) -> None:
+        with self.lock:
+            self.requested += requested
+            self.embedded += embedded
+        self._maybe_log()
+
+    def record_batch(self, seconds: float) -> None:
+        with self.lock:
+            self.batches += 1
+            self.model_seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            return {
+                'model': self.model_key,
+                'requested': self.requested,
+                'embedded': self.embedded,
+                'batches': self.batches,
+                'hit_rate': round(1 - self.embedded / self.requested, 4) if self.requested else 0.0,
+                'avg_batch_size': round(self.embedded / self.batches, 2) if self.batches else 0.0,
+                'texts_per_second': round(self.requested / elapsed, 2),
+                'model_texts_per_second': round(self.embedded / self.model_seconds, 2) if self.model_seconds else 0.0,
+            }
+
+    def _maybe_log(self) -> None:
+        now = time.monotonic()
+        if now - self.started < core_settings.embed_metrics_log_interval:
+            return
+        stats = self.snapshot()
+        with self.lock:
+            if now - self.started < core_settings.embed_metrics_log_interval:
+                return
+            self._reset(now)
+        logger.info(
+            f"向量化统计 - 模型: {stats['model']}, 文本数: {stats['requested']}, 模型处理: {stats['embedded']}, "
+            f"缓存命中率: {stats['hit_rate']:.2%}, 吞吐: {stats['texts_per_second']}条/秒, "
+            f"模型吞吐: {stats['model_texts_per_second']}条/秒, 平均批大小: {stats['avg_batch_size']}")
@@ -1,5 +1,4 @@
 import base64
-import tempfile
 
 import docx
 from langchain_core.documents import Document
@@ -49,28 +48,18 @@ class DocLoader:
                 docs.append(Document(self.table_to_md(table),
                                      metadata={"format": "table"}))
 
-        # 提取图片并使用OCR识别
+        # 提取图片并使用OCR识别，文档中的图片一次提交给OCR
         if self.ocr is not None:
             logger.info(f"解析任务[{self.file_path}]启用了OCR识别,开始提取图片")
-            for rel in document.part.rels.values():
-                if "image" in rel.target_ref:
-                    image_data = rel.target_part.blob
-                    try:
-                        image_base64 = base64.b64encode(
-                            image_data).decode('utf-8')
-                        with tempfile.NamedTemporaryFile(suffix=".png", delete=True) as temp_img:
-                            temp_img.write(image_data)
-                            temp_img.flush()
-                            ocr_result = self.ocr.predict(temp_img.name)
-                            docs.append(
-                                Document(ocr_result,
-                                         metadata={
-                                             "format": "image", "image_base64": image_base64
-                                         })
-                            )
-                    except Exception as e:
-                        logger.error(f"处理图片失败: {e}")
-                        continue
+            images = [rel.target_part.blob for rel in document.part.rels.values() if "image" in rel.target_ref]
+            for image_data, ocr_result in zip(images, self.ocr.predict_batch(images)):
+                image_base64 = base64.b64encode(image_data).decode('utf-8')
+                docs.append(
+                    Document(ocr_result,
+                             metadata={
+                                 "format": "image", "image_base64": image_base64
+                             })
+                )
 
         return docs
 
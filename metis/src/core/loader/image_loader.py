@@ -15,10 +15,10 @@ class ImageLoader:
     def load(self):
         logger.info(f"解析图片: {self.path}")
         docs = []
-        result = self.ocr.predict(self.path)
-
         with open(self.path, "rb") as image_file:
-            image_base64 = base64.b64encode(image_file.read()).decode('utf-8')
+            image_bytes = image_file.read()
+        result = self.ocr.predict(image_bytes)
+        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
 
         doc = Document(page_content=result, metadata={"format": "image", "image_base64": image_base64})
         docs.append(doc)
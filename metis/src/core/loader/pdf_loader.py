@@ -1,20 +1,133 @@
 import base64
+import bisect
+import multiprocessing
+import os
 import re
-import tempfile
-from io import BytesIO
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
 
 import fitz
-import pandas as pd
 from langchain_core.documents import Document
-from tabula.io import read_pdf
 from tqdm import tqdm
 from sanic.log import logger
 
 from src.core.ocr.base_ocr import BaseOCR
+from src.core.sanic_plus.env.core_settings import core_settings
+
+# 每个页面解析任务处理的连续页数，任务内只打开一次文档
+PDF_PAGES_PER_TASK = 8
+
+# get_text("dict") 默认会把图片内容一并解码进结果，提取文本时不需要
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+class TableAreaIndex:
+    """单页表格区域的区间索引
+
+    表格按上边界 y0 排序，并记录前缀最大的下边界 y1：查询时二分找到 y0 小于文本块下边界的表格，
+    再从后往前检查，前缀最大 y1 不超过文本块上边界时即可停止
+    """
+
+    def __init__(self, bboxes):
+        self.bboxes = sorted(bboxes, key=lambda bbox: bbox[1])
+        self.tops = [bbox[1] for bbox in self.bboxes]
+        self.max_bottoms = list(accumulate((bbox[3] for bbox in self.bboxes), max))
+
+    def overlaps(self, bbox) -> bool:
+        x0, y0, x1, y1 = bbox
+        for i in range(bisect.bisect_left(self.tops, y1) - 1, -1, -1):
+            if self.max_bottoms[i] <= y0:
+                return False
+            tx0, _, tx1, ty1 = self.bboxes[i]
+            if x0 < tx1 and x1 > tx0 and y0 < ty1:
+                return True
+        return False
+
+
+def _parse_pages(file_path: str, start: int, end: int, extract_images: bool) -> List[Dict[str, Any]]:
+    """解析 [start, end) 页：每页只做一次表格检测，表格区域同时用于跳过文本和生成表格内容
+
+    在页面解析进程中执行，返回每页的文本、表格 Markdown 和图片内容，OCR 由调用方统一处理
+    """
+    pages = []
+    with fitz.open(file_path) as pdf:
+        for page_number in range(start, end):
+            page = pdf[page_number]
+            try:
+                tables = page.find_tables().tables
+            except Exception as e:
+                logger.error(f"检测PDF表格失败 - 页码: {page_number + 1}, 错误: {e}")
+                tables = []
+
+            table_contents = []
+            for table in tables:
+                try:
+                    table_contents.append(table.to_pandas().to_markdown(index=False))
+                except Exception as e:
+                    logger.error(f"解析PDF表格失败 - 页码: {page_number + 1}, 错误: {e}")
+
+            pages.append({
+                "page": page_number + 1,
+                "text": _extract_text(page, TableAreaIndex([table.bbox for table in tables])),
+                "tables": table_contents,
+                "images": _extract_images(pdf, page) if extract_images else [],
+            })
+    return pages
+
+
+def _extract_text(page, table_index: TableAreaIndex) -> str:
+    """提取页面文本，跳过表格区域"""
+    try:
+        page_dict = page.get_text("dict", flags=TEXT_FLAGS)
+        text_blocks = [
+            span["text"].strip()
+            for block in page_dict["blocks"]
+            if block["type"] == 0 and not table_index.overlaps(block["bbox"])
+            for line in block["lines"]
+            for span in line["spans"]
+            if span["text"].strip()
+        ]
+
+        if text_blocks:
+            return " ".join(PDFLoader.remove_unicode_chars(text) for text in text_blocks).strip()
+        return ""
+    except Exception as e:
+        logger.error(f"提取页面文本失败: {e}")
+        return ""
+
+
+def _extract_images(pdf, page) -> List[bytes]:
+    images = []
+    for image in page.get_images():
+        try:
+            images.append(pdf.extract_image(image[0])["image"])
+        except Exception as e:
+            logger.error(f"提取图片失败: {e}")
+    return images
+
+
+def _exit_with_parent() -> None:
+    """页面解析进程的初始化函数：父进程退出（包括被 SIGTERM 结束）后随之退出，避免遗留子进程"""
+    def watch():
+        multiprocessing.parent_process().join()
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True, name='pdf-page-watch-parent').start()
 
 
 class PDFLoader:
+    """PDF 加载器
+
+    页面按 PDF_PAGES_PER_TASK 页一组交给页面解析进程池（core_settings.pdf_page_workers 个进程，不超过 CPU 核数）
+    并行解析，结果按页码顺序合并；当前进程不允许创建子进程（Sanic worker 等守护进程）、只有一个 CPU 核
+    或只有一组页面时在当前进程解析
+    """
+
+    _page_executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
 
     def __init__(self, file_path, ocr: BaseOCR, mode: str = 'full'):
         """
@@ -29,103 +142,64 @@ class PDFLoader:
         self.ocr = ocr
         self.mode = mode
 
-    def remove_unicode_chars(self, text):
+    @staticmethod
+    def remove_unicode_chars(text):
         return re.sub(r'\\u[fF]{1}[0-9a-fA-F]{3}', '', text)
 
-    def _get_table_areas(self, pdf):
-        """获取所有页面的表格区域"""
-        table_areas = []
-        for page in tqdm(pdf, desc=f"检测PDF表格区域[{self.file_path}]"):
-            # 使用 fitz 的表格检测功能
-            tables = page.find_tables()
-            if tables and tables.tables:
-                for table in tables.tables:
-                    # 保存表格的边界框
-                    table_areas.append((page.number, table.bbox))
-        return table_areas
-
-    def _is_in_table_area(self, page_num, bbox, table_areas):
-        """检查文本块是否在任何表格区域内"""
-        try:
-            x0, y0, x1, y1 = bbox
-            for page_number, table_bbox in table_areas:
-                if page_num == page_number:
-                    tx0, ty0, tx1, ty1 = table_bbox
-                    # 检查重叠
-                    if x0 < tx1 and x1 > tx0 and y0 < ty1 and y1 > ty0:
-                        return True
-            return False
-        except Exception as e:
-            return False
-
-    def _extract_page_text(self, page, table_areas):
-        """提取页面文本，跳过表格区域"""
-        try:
-            page_dict = page.get_text("dict")
-            text_blocks = [
-                span["text"].strip()
-                for block in page_dict["blocks"]
-                if block["type"] == 0 and not self._is_in_table_area(page.number, block["bbox"], table_areas)
-                for line in block["lines"]
-                for span in line["spans"]
-                if span["text"].strip()
-            ]
-
-            if text_blocks:
-                return " ".join(self.remove_unicode_chars(text) for text in text_blocks).strip()
-            return ""
-        except Exception as e:
-            logger.error(f"提取页面文本失败: {e}")
-            return ""
+    @staticmethod
+    def enable_page_workers() -> None:
+        """允许当前进程创建页面解析进程池，只在独立的文档导入进程启动时调用一次
 
-    def _parse_images(self, pdf):
-        """解析PDF中的图片内容"""
+        Sanic 以守护进程启动托管进程，守护进程不能创建子进程，这里取消当前进程的守护标记；
+        页面解析进程通过 _exit_with_parent 在当前进程退出后自行退出，不依赖守护进程的回收机制。
+        HTTP worker 不调用，仍在当前进程解析页面
+        """
+        multiprocessing.current_process().daemon = False
+
+    @classmethod
+    def get_page_executor(cls) -> Optional[ProcessPoolExecutor]:
+        workers = min(core_settings.pdf_page_workers, os.cpu_count() or 1)
+        if workers <= 1 or multiprocessing.current_process().daemon:
+            return None
+        with cls._lock:
+            if cls._page_executor is None:
+                cls._page_executor = ProcessPoolExecutor(workers,
+                                                         mp_context=multiprocessing.get_context('spawn'),
+                                                         initializer=_exit_with_parent)
+            return cls._page_executor
+
+    def _parse_pages(self, page_count: int) -> List[Dict[str, Any]]:
+        parse = partial(_parse_pages, self.file_path, extract_images=bool(self.ocr))
+        ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+                  for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+
+        executor = self.get_page_executor() if len(ranges) > 1 else None
+        if executor is None:
+            results = (parse(start, end) for start, end in ranges)
+        else:
+            results = executor.map(parse, *zip(*ranges))
+
+        pages = []
+        with tqdm(total=page_count, desc=f"解析PDF页面[{self.file_path}]") as progress:
+            for result in results:
+                pages.extend(result)
+                progress.update(len(result))
+        return pages
+
+    def _parse_images(self, pages: List[Dict[str, Any]]) -> List[Document]:
+        """解析PDF中的图片内容，整个文档的图片一次提交给OCR，不落盘"""
         docs = []
         if not self.ocr:
             logger.info(f"[{self.file_path}]未配置OCR,跳过图片解析")
             return docs
 
-        for page_number in tqdm(range(1, len(pdf) + 1), desc=f"解析PDF图片[{self.file_path}]"):
-            page = pdf[page_number - 1]
-            for image_number, image in enumerate(page.get_images(), start=1):
-                try:
-                    xref_value = image[0]
-                    base_image = pdf.extract_image(xref_value)
-                    image_bytes = base_image["image"]
-
-                    image_base64 = base64.b64encode(
-                        image_bytes).decode('utf-8')
-
-                    with tempfile.NamedTemporaryFile(delete=True, suffix=".png") as tmp_file:
-                        tmp_file.write(image_bytes)
-                        predict_result = self.ocr.predict(tmp_file.name)
-                        metadata = {
-                            "format": "image", "page": page_number, "image_base64": image_base64}
-                        docs.append(
-                            Document(predict_result, metadata=metadata))
-                except Exception as e:
-                    logger.error(f"解析图片失败: {e}")
-
-        return docs
-
-    def _parse_tables(self):
-        """解析PDF中的表格"""
-        docs = []
-        try:
-            with BytesIO(open(self.file_path, 'rb').read()) as pdf_file:
-                tables = read_pdf(pdf_file, pages='all')
-                page_numbers = read_pdf(
-                    pdf_file, pages='all', output_format='json')
-
-                for i, (table, page_info) in enumerate(zip(tables, page_numbers)):
-                    page_num = page_info.get('page_number', i + 1)
-                    table_docs = Document(
-                        pd.DataFrame(table).to_markdown(index=False),
-                        metadata={"format": "table", "page": page_num}
-                    )
-                    docs.append(table_docs)
-        except Exception as e:
-            logger.error(f"解析PDF表格失败: {e}", exc_info=True)
+        images = [(page["page"], image_bytes) for page in pages for image_bytes in page["images"]]
+        predict_results = self.ocr.predict_batch([image_bytes for _, image_bytes in images])
+        for (page_number, image_bytes), predict_result in zip(images, predict_results):
+            metadata = {
+                "format": "image", "page": page_number,
+                "image_base64": base64.b64encode(image_bytes).decode('utf-8')}
+            docs.append(Document(predict_result, metadata=metadata))
 
         return docs
 
@@ -134,40 +208,33 @@ class PDFLoader:
         docs = []
 
         with fitz.open(self.file_path) as pdf:
-            # 解析图片内容
-            docs.extend(self._parse_images(pdf))
-
-            # 获取所有表格区域
-            table_areas = self._get_table_areas(pdf)
-
-            # 解析文本，根据模式处理
-            try:
-                if self.mode == 'full':
-                    # 整个文档作为一个Document
-                    full_text = ""
-                    for page in tqdm(pdf, desc=f"解析PDF文本[{self.file_path}]"):
-                        page_text = self._extract_page_text(page, table_areas)
-                        if page_text:
-                            full_text += page_text + " "
-
-                    if full_text.strip():
-                        docs.append(Document(full_text.strip()))
-
-                elif self.mode == 'page':
-                    # 每页一个Document
-                    for page_number, page in enumerate(tqdm(pdf, desc=f"按页解析PDF文本[{self.file_path}]"), 1):
-                        page_text = self._extract_page_text(page, table_areas)
-                        if page_text:
-                            docs.append(Document(
-                                page_text,
-                                metadata={"format": "text",
-                                          "page": page_number}
-                            ))
-            except Exception as e:
-                logger.error(f"解析PDF文本失败: {e}", exc_info=True)
-
-            # 解析表格
-            docs.extend(self._parse_tables())
-
-            logger.info(f'成功解析PDF文件：{self.file_path}，共提取 {len(docs)} 个文档片段')
-            return docs
+            page_count = len(pdf)
+        pages = self._parse_pages(page_count)
+
+        # 解析图片内容
+        docs.extend(self._parse_images(pages))
+
+        # 解析文本，根据模式处理
+        if self.mode == 'full':
+            # 整个文档作为一个Document
+            full_text = " ".join(page["text"] for page in pages if page["text"])
+            if full_text.strip():
+                docs.append(Document(full_text.strip()))
+
+        elif self.mode == 'page':
+            # 每页一个Document
+            for page in pages:
+                if page["text"]:
+                    docs.append(Document(
+                        page["text"],
+                        metadata={"format": "text",
+                                  "page": page["page"]}
+                    ))
+
+        # 解析表格
+        for page in pages:
+            for table in page["tables"]:
+                docs.append(Document(table, metadata={"format": "table", "page": page["page"]}))
+
+        logger.info(f'成功解析PDF文件：{self.file_path}，共提取 {len(docs)} 个文档片段')
+        return docs
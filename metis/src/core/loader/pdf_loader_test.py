@@ -0,0 +1,26 @@
+"""PDFLoader 表格区域索引测试：与逐个表格比较的结果一致"""
+import random
+
+import pytest
+
+from src.core.loader.pdf_loader import TableAreaIndex
+
+
+def _overlaps(bbox, table_bboxes):
+    x0, y0, x1, y1 = bbox
+    return any(x0 < tx1 and x1 > tx0 and y0 < ty1 and y1 > ty0 for tx0, ty0, tx1, ty1 in table_bboxes)
+
+
+def _random_bbox(rng):
+    x0, y0 = rng.uniform(0, 600), rng.uniform(0, 800)
+    return x0, y0, x0 + rng.uniform(1, 200), y0 + rng.uniform(1, 150)
+
+
+@pytest.mark.parametrize("tables_num", [0, 1, 3, 20])
+def test_table_area_index_matches_linear_scan(tables_num):
+    rng = random.Random(tables_num)
+    table_bboxes = [_random_bbox(rng) for _ in range(tables_num)]
+    index = TableAreaIndex(table_bboxes)
+    for _ in range(2000):
+        bbox = _random_bbox(rng)
+        assert index.overlaps(bbox) == _overlaps(bbox, table_bboxes)
@@ -1,22 +1,28 @@
+import base64
 from typing import List
 from langchain_core.documents import Document
 from sanic.log import logger
 from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
 from tqdm import tqdm
 from langchain_core.document_loaders import BaseLoader
 
+from src.core.ocr.base_ocr import BaseOCR
+
 
 class PPTLoader(BaseLoader):
-    def __init__(self, file_path, load_mode):
+    def __init__(self, file_path, load_mode, ocr: BaseOCR = None):
         """
         初始化PPT加载器
 
         Args:
             file_path: PPT文件路径
             load_mode: 加载模式，"full"表示将所有幻灯片合并为一个文档，"page"表示每个幻灯片作为单独文档
+            ocr: OCR处理器，为空时不解析幻灯片中的图片
         """
         self.file_path = file_path
         self.load_mode = load_mode
+        self.ocr = ocr
 
     def load(self) -> List[Document]:
         """加载PPT文件并返回文档列表"""
@@ -26,6 +32,8 @@ class PPTLoader(BaseLoader):
 
         # 用于全文模式的文本累积器
         full_text = "" if self.load_mode == "full" else None
+        # (幻灯片编号, 图片内容)，全部幻灯片解析完后一次提交给OCR
+        images = []
 
         for slide_number, slide in tqdm(enumerate(prs.slides, start=1), desc=f"解析[{self.file_path}]的幻灯片"):
             # 用于单页模式的文本累积器
@@ -46,6 +54,10 @@ class PPTLoader(BaseLoader):
                     # 表格总是作为单独文档
                     docs.append(Document(table_content, metadata={"format": "table"}))
 
+                # 收集图片
+                if self.ocr is not None and shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                    images.append((slide_number, shape.image.blob))
+
             # 对于页面模式，每页内容作为单独文档
             if self.load_mode == "page" and page_text.strip():
                 docs.append(Document(page_text.strip(), metadata={"slide_number": slide_number}))
@@ -54,6 +66,14 @@ class PPTLoader(BaseLoader):
         if self.load_mode == "full" and full_text.strip():
             docs.append(Document(full_text.strip()))
 
+        if images:
+            logger.info(f"解析任务[{self.file_path}]启用了OCR识别,共[{len(images)}]张图片")
+            ocr_results = self.ocr.predict_batch([image for _, image in images])
+            for (slide_number, image), ocr_result in zip(images, ocr_results):
+                docs.append(Document(ocr_result, metadata={
+                    "format": "image", "slide_number": slide_number,
+                    "image_base64": base64.b64encode(image).decode('utf-8')}))
+
         return docs
 
     def _extract_text_from_frame(self, text_frame):
@@ -1,3 +1,25 @@
+from typing import List, Union
+
+
 class BaseOCR:
-    def predict(self, file_path: str) -> str:
+    def predict(self, file: Union[str, bytes]) -> str:
+        """识别图片中的文字，file 为图片路径或图片内容"""
         pass
+
+    def predict_batch(self, files: List[Union[str, bytes]]) -> List[str]:
+        """批量识别，结果与 files 一一对应；支持多图推理的后端可以覆盖此方法"""
+        return [self.predict(file) for file in files]
+
+    @staticmethod
+    def read_image(file: Union[str, bytes]) -> bytes:
+        if isinstance(file, (bytes, bytearray)):
+            return bytes(file)
+        with open(file, "rb") as image:
+            return image.read()
+
+    @staticmethod
+    def describe(file: Union[str, bytes]) -> str:
+        """日志中展示的图片描述：路径原样输出，图片内容只输出大小"""
+        if isinstance(file, (bytes, bytearray)):
+            return f"<{len(file)} bytes>"
+        return file
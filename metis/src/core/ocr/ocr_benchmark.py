@@ -0,0 +1,93 @@
+"""OCR 基准（仅 CPU）
+
+在扫描版 PDF 的整页图片上对比 PaddleOCR 的三种用法：
+- legacy: 单个 PaddleOCR 实例逐张识别，每张图片先写入临时文件
+- engine: OcrEngine，模型池并行识别（缓存为空）
+- cached: 同一文档再次识别，结果全部来自缓存
+
+未指定 pdf_path 时生成一份扫描版样例：每页文字先渲染成图片，再作为整页图片写入 PDF。
+基准只使用内存缓存，不读写 metis_ocr_cache 表
+"""
+import os
+import tempfile
+import time
+from typing import List
+
+import fitz
+from sanic.log import logger
+
+from src.core.ocr.ocr_engine import OcrEngine
+from src.core.ocr.ocr_manager import OcrManager
+from src.core.ocr.pp_ocr import PPOcr
+from src.core.sanic_plus.env.core_settings import core_settings
+
+SAMPLE_LINES = [
+    "第{page}页 运维巡检报告",
+    "主机 CPU 使用率 {value}%，内存使用率 {value2}%",
+    "磁盘 /data 剩余空间 {value3} GB，建议清理历史日志",
+    "告警 {value} 条，已处理 {value2} 条，待处理 {value3} 条",
+    "结论：系统运行正常，下次巡检时间为下周一",
+]
+
+
+def build_scanned_pdf(path: str, pages: int) -> None:
+    """生成扫描版 PDF：每页只有一张 150 DPI 的整页图片"""
+    with fitz.open() as scanned:
+        for number in range(1, pages + 1):
+            with fitz.open() as source:
+                page = source.new_page()
+                for i, line in enumerate(SAMPLE_LINES):
+                    text = line.format(page=number, value=number * 7 % 100, value2=number * 13 % 100,
+                                       value3=number * 17 % 100)
+                    page.insert_text((60, 80 + i * 40), text, fontname="china-s", fontsize=16)
+                image = page.get_pixmap(dpi=150).tobytes("png")
+
+            scanned_page = scanned.new_page()
+            scanned_page.insert_image(scanned_page.rect, stream=image)
+        scanned.save(path)
+
+
+def extract_images(pdf_path: str) -> List[bytes]:
+    with fitz.open(pdf_path) as pdf:
+        return [pdf.extract_image(image[0])["image"] for page in pdf for image in page.get_images()]
+
+
+def _legacy_predict(images: List[bytes]) -> List[str]:
+    ocr = PPOcr(use_gpu=False)
+    results = []
+    for image in images:
+        with tempfile.NamedTemporaryFile(delete=True, suffix=".png") as tmp_file:
+            tmp_file.write(image)
+            tmp_file.flush()
+            results.append(ocr.predict(tmp_file.name))
+    return results
+
+
+def run_ocr_benchmark(pages: int = 20, pdf_path: str = '', pool_size: int = 0) -> None:
+    core_settings.ocr_cache_persistent = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if not pdf_path:
+            pdf_path = os.path.join(tmp_dir, "scanned.pdf")
+            build_scanned_pdf(pdf_path, pages)
+        images = extract_images(pdf_path)
+
+        pool_size = pool_size or OcrManager.local_pool_size()
+        logger.info(f"OCR 基准 - 文件: {pdf_path}, 图片数: {len(images)}, 模型池大小: {pool_size}")
+
+        start = time.perf_counter()
+        legacy_results = _legacy_predict(images)
+        legacy_seconds = time.perf_counter() - start
+
+        engine = OcrEngine(lambda: PPOcr(use_gpu=False), ocr_key=f"benchmark:{time.time()}", pool_size=pool_size)
+        start = time.perf_counter()
+        engine_results = engine.predict_batch(images)
+        engine_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached_results = engine.predict_batch(images)
+        cached_seconds = time.perf_counter() - start
+
+    logger.info(f"OCR 基准 - legacy: {legacy_seconds:.2f}s, engine: {engine_seconds:.2f}s "
+                f"({legacy_seconds / engine_seconds:.1f}x), cached: {cached_seconds:.3f}s, "
+                f"结果一致: {legacy_results == engine_results == cached_results}")
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+from sanic.log import logger
+from sqlalchemy import text
+
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
+from src.core.sanic_plus.env.core_settings import core_settings
+
+# 写入缓存时清理过期识别结果的最小间隔（秒）
+OCR_CACHE_CLEANUP_INTERVAL = 3600
+
+
+class OcrCache:
+    """按 OCR 服务 + 图片内容哈希 缓存识别结果
+
+    - 进程内 LRU，所有 OCR 服务共用 core_settings.ocr_cache_size 条
+    - 持久化到 PostgreSQL 的 metis_ocr_cache 表，重复导入同一文档或不同文档中的相同图片不再识别；
+      超过 core_settings.ocr_cache_retention_days 天的结果由 cleanup() 删除，
+      写入时每小时最多清理一次
+    持久化读写失败只记录日志，不影响识别
+    """
+
+    _memory = OrderedDict()
+    _lock = threading.Lock()
+    _table_ready = False
+    _cleaned_at = None
+
+    def __init__(self, ocr_key: str):
+        self.ocr_key = ocr_key
+
+    @classmethod
+    def setup(cls) -> None:
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS metis_ocr_cache (
+                    ocr VARCHAR(512) NOT NULL,
+                    content_hash CHAR(64) NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (ocr, content_hash)
+                )
+            """))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS metis_ocr_cache_created_at_idx ON metis_ocr_cache (created_at)"))
+        cls._table_ready = True
+
+    @classmethod
+    def cleanup(cls) -> int:
+        """删除超过 core_settings.ocr_cache_retention_days 天的持久化识别结果，返回删除条数"""
+        cls._cleaned_at = time.monotonic()
+        if core_settings.ocr_cache_retention_days <= 0:
+            return 0
+        if not cls._table_ready:
+            cls.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            result = conn.execute(text(
+                "DELETE FROM metis_ocr_cache WHERE created_at < now() - make_interval(days => :days)"
+            ), {'days': core_settings.ocr_cache_retention_days})
+        return result.rowcount
+
+    @staticmethod
+    def persistent_enabled() -> bool:
+        return core_settings.ocr_cache_persistent and bool(core_settings.db_uri)
+
+    def get_many(self, hashes: List[str]) -> Dict[str, str]:
+        """返回命中缓存的 {图片内容哈希: 识别结果}"""
+        found = {}
+        with self._lock:
+            for key in hashes:
+                content = self._memory.get((self.ocr_key, key))
+                if content is not None:
+                    self._memory.move_to_end((self.ocr_key, key))
+                    found[key] = content
+
+        missing = [key for key in set(hashes) if key not in found]
+        if missing and self.persistent_enabled():
+            try:
+                loaded = self._load(missing)
+            except Exception as e:
+                logger.warning(f"OCR缓存读取失败 - OCR: {self.ocr_key}, 错误: {e}")
+                loaded = {}
+            self._remember(loaded)
+            found.update(loaded)
+        return found
+
+    def put_many(self, contents: Dict[str, str]) -> None:
+        self._remember(contents)
+        if contents and self.persistent_enabled():
+            try:
+                self._save(contents)
+            except Exception as e:
+                logger.warning(f"OCR缓存写入失败 - OCR: {self.ocr_key}, 错误: {e}")
+            self._cleanup_if_due()
+
+    def _cleanup_if_due(self) -> None:
+        if self._cleaned_at is not None and time.monotonic() - self._cleaned_at < OCR_CACHE_CLEANUP_INTERVAL:
+            return
+        try:
+            deleted = self.cleanup()
+        except Exception as e:
+            logger.warning(f"OCR缓存清理失败 - 错误: {e}")
+            return
+        if deleted:
+            logger.info(f"OCR缓存清理 - 删除: {deleted}")
+
+    def _remember(self, contents: Dict[str, str]) -> None:
+        with self._lock:
+            for key, content in contents.items():
+                self._memory[(self.ocr_key, key)] = content
+                self._memory.move_to_end((self.ocr_key, key))
+            while len(self._memory) > core_settings.ocr_cache_size:
+                self._memory.popitem(last=False)
+
+    def _load(self, hashes: List[str]) -> Dict[str, str]:
+        if not self._table_ready:
+            self.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT content_hash, content FROM metis_ocr_cache "
+                "WHERE ocr = :ocr AND content_hash = ANY(:hashes)"
+            ), {'ocr': self.ocr_key, 'hashes': hashes})
+            return {row[0]: row[1] for row in rows}
+
+    def _save(self, contents: Dict[str, str]) -> None:
+        if not self._table_ready:
+            self.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO metis_ocr_cache (ocr, content_hash, content) "
+                "VALUES (:ocr, :content_hash, :content) ON CONFLICT DO NOTHING"
+            ), [{'ocr': self.ocr_key, 'content_hash': key, 'content': content}
+                for key, content in contents.items()])
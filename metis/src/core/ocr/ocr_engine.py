@@ -0,0 +1,110 @@
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Union
+
+from sanic.log import logger
+
+from src.core.ocr.base_ocr import BaseOCR
+from src.core.ocr.ocr_cache import OcrCache
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+class OcrEngine(BaseOCR):
+    """OcrManager 返回的 OCR 服务：模型池 + 批量识别 + 图片内容哈希缓存
+
+    - 模型池：最多 pool_size 个 OCR 实例，按需创建后常驻进程，每个实例同一时刻只处理一个批次
+    - 批量识别：predict_batch 中未命中缓存的图片去重后分批（每批最多 ocr_batch_size 张），各批次在模型池上并行，
+      每批交给实例的 predict_batch，支持多图推理的后端可以在其中合并处理
+    - 缓存：识别结果按 OCR 服务 + 图片内容哈希缓存；批次识别失败时逐张重试，仍失败的图片返回空字符串且不缓存
+    """
+
+    def __init__(self, factory: Callable[[], BaseOCR], ocr_key: str, pool_size: int):
+        self.factory = factory
+        self.ocr_key = ocr_key
+        self.pool_size = max(pool_size, 1)
+        self.cache = OcrCache(ocr_key)
+        self.instances = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(self.pool_size, thread_name_prefix='ocr')
+
+    def predict(self, file: Union[str, bytes]) -> str:
+        return self.predict_batch([file])[0]
+
+    def predict_batch(self, files: List[Union[str, bytes]]) -> List[str]:
+        if not files:
+            return []
+        images = [self.read_image(file) for file in files]
+        hashes = [hashlib.sha256(image).hexdigest() for image in images]
+        contents = self.cache.get_many(hashes)
+
+        # 未命中的图片去重后分批识别
+        missing = {}
+        for key, image in zip(hashes, images):
+            if key not in contents:
+                missing.setdefault(key, image)
+        if missing:
+            keys = list(missing)
+            # 图片较少时减小批大小，让模型池中的实例都能分到图片
+            batch_size = max(min(core_settings.ocr_batch_size, -(-len(keys) // self.pool_size)), 1)
+            futures = [
+                (keys[start:start + batch_size],
+                 self.executor.submit(self._run, [missing[key] for key in keys[start:start + batch_size]]))
+                for start in range(0, len(keys), batch_size)
+            ]
+
+            recognized = {}
+            for batch_keys, future in futures:
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"OCR识别失败 - OCR: {self.ocr_key}, 图片数: {len(batch_keys)}, 错误: {e}")
+                    continue
+                recognized.update((key, result) for key, result in zip(batch_keys, results) if result is not None)
+            self.cache.put_many(recognized)
+            contents.update(recognized)
+
+        logger.info(f"OCR识别 - OCR: {self.ocr_key}, 图片数: {len(files)}, 识别: {len(missing)}")
+        return [contents.get(key, '') for key in hashes]
+
+    def _run(self, images: List[bytes]) -> List[Optional[str]]:
+        ocr = self._acquire()
+        try:
+            try:
+                return ocr.predict_batch(images)
+            except Exception as e:
+                if len(images) == 1:
+                    raise
+                logger.warning(f"OCR批量识别失败，逐张重试 - OCR: {self.ocr_key}, 图片数: {len(images)}, 错误: {e}")
+
+            # 逐张识别，失败的图片结果为 None
+            results = []
+            for image in images:
+                try:
+                    results.append(ocr.predict(image))
+                except Exception as e:
+                    logger.error(f"OCR识别失败 - OCR: {self.ocr_key}, 错误: {e}")
+                    results.append(None)
+            return results
+        finally:
+            self.instances.put(ocr)
+
+    def _acquire(self) -> BaseOCR:
+        try:
+            return self.instances.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            create = self.created < self.pool_size
+            if create:
+                self.created += 1
+        if not create:
+            return self.instances.get()
+        try:
+            return self.factory()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
@@ -0,0 +1,75 @@
+"""OcrEngine 测试：使用假 OCR 后端，不依赖 PaddleOCR 与数据库"""
+import threading
+import time
+
+import pytest
+
+from src.core.ocr.base_ocr import BaseOCR
+from src.core.ocr.ocr_engine import OcrEngine
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+class FakeOCR(BaseOCR):
+    instances = 0
+    calls = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        with FakeOCR.lock:
+            FakeOCR.instances += 1
+
+    def predict(self, file) -> str:
+        image = self.read_image(file)
+        with FakeOCR.lock:
+            FakeOCR.calls.append(image)
+            FakeOCR.active += 1
+            FakeOCR.max_active = max(FakeOCR.max_active, FakeOCR.active)
+        time.sleep(0.01)
+        with FakeOCR.lock:
+            FakeOCR.active -= 1
+        if image.startswith(b'bad'):
+            raise RuntimeError("识别失败")
+        return image.decode().upper()
+
+
+@pytest.fixture(autouse=True)
+def fake_ocr(monkeypatch):
+    monkeypatch.setattr(core_settings, 'ocr_cache_persistent', False)
+    FakeOCR.instances, FakeOCR.calls, FakeOCR.active, FakeOCR.max_active = 0, [], 0, 0
+
+
+def _engine(pool_size=3):
+    return OcrEngine(FakeOCR, ocr_key=f"test:{time.time()}", pool_size=pool_size)
+
+
+def test_predict_batch_keeps_order_and_deduplicates():
+    images = [f"image{i % 5}".encode() for i in range(20)]
+    results = _engine().predict_batch(images)
+    assert results == [image.decode().upper() for image in images]
+    assert sorted(FakeOCR.calls) == sorted(set(images))
+
+
+def test_pool_is_bounded_and_reused():
+    engine = _engine(pool_size=3)
+    engine.predict_batch([f"image{i}".encode() for i in range(30)])
+    engine.predict_batch([f"other{i}".encode() for i in range(30)])
+    assert FakeOCR.instances <= 3
+    assert FakeOCR.max_active <= 3
+
+
+def test_results_are_cached():
+    engine = _engine()
+    engine.predict_batch([b"a", b"b"])
+    assert engine.predict(b"a") == "A"
+    assert len(FakeOCR.calls) == 2
+
+
+def test_failed_images_are_empty_and_not_cached():
+    engine = _engine(pool_size=1)
+    assert engine.predict_batch([b"bad", b"ok"]) == ["", "OK"]
+    calls = FakeOCR.calls.count(b"bad")
+    assert engine.predict_batch([b"bad", b"ok"]) == ["", "OK"]
+    assert FakeOCR.calls.count(b"bad") == calls + 1
+    assert FakeOCR.calls.count(b"ok") == 1
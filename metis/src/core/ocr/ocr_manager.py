@@ -1,30 +1,69 @@
+import hashlib
+import threading
 from typing import Optional
 from sanic.log import logger
 
 from src.core.ocr.azure_ocr import AzureOCR
+from src.core.ocr.ocr_engine import OcrEngine
 from src.core.ocr.olm_ocr import OlmOcr
 from src.core.ocr.pp_ocr import PPOcr
+from src.core.sanic_plus.env.core_settings import core_settings
 
 
 class OcrManager:
+    """OCR 服务注册表：同一 OCR 配置在进程内只创建一个 OcrEngine，模型实例在其模型池中常驻"""
+
+    _engines = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def local_pool_size() -> int:
+        """本地模型池大小：每个 PaddleOCR 实例都常驻一份完整模型，默认只保留一个，更大的池需显式配置"""
+        return max(core_settings.ocr_local_pool_size, 1)
+
     @classmethod
     def load_ocr(cls, ocr_type: str,
                  olm_base_url: Optional[str], olm_api_key: Optional[str], olm_model: Optional[str],
-                 azure_base_url: Optional[str], azure_api_key: Optional[str]):
-        ocr = None
+                 azure_base_url: Optional[str], azure_api_key: Optional[str]) -> Optional[OcrEngine]:
         logger.debug(f"加载OCR服务，类型: {ocr_type}")
 
+        if ocr_type == 'pp_ocr':
+            key = (ocr_type,)
+        elif ocr_type == 'olm_ocr':
+            key = (ocr_type, olm_base_url, olm_api_key, olm_model)
+        elif ocr_type == 'azure_ocr':
+            key = (ocr_type, azure_base_url, azure_api_key)
+        else:
+            return None
+
+        engine = cls._engines.get(key)
+        if engine is None:
+            with cls._lock:
+                engine = cls._engines.get(key)
+                if engine is None:
+                    engine = cls._create_engine(ocr_type, olm_base_url, olm_api_key, olm_model,
+                                                azure_base_url, azure_api_key)
+                    cls._engines[key] = engine
+        return engine
+
+    @staticmethod
+    def key_fingerprint(api_key: Optional[str]) -> str:
+        """API Key 的指纹，用于区分不同凭据下的识别结果缓存，缓存表中不保存明文"""
+        return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def _create_engine(cls, ocr_type, olm_base_url, olm_api_key, olm_model, azure_base_url, azure_api_key):
         if ocr_type == 'pp_ocr':
             logger.debug("初始化PP-OCR服务")
-            ocr = PPOcr()
+            return OcrEngine(PPOcr, ocr_key='pp_ocr', pool_size=cls.local_pool_size())
 
         if ocr_type == 'olm_ocr':
             logger.debug(f"初始化OLM-OCR服务，模型: {olm_model}")
-            ocr = OlmOcr(base_url=olm_base_url,
-                         api_key=olm_api_key, model=olm_model)
-
-        if ocr_type == 'azure_ocr':
-            logger.debug(f"初始化Azure-OCR服务，endpoint: {azure_base_url}")
-            ocr = AzureOCR(api_key=azure_api_key, endpoint=azure_base_url)
+            return OcrEngine(lambda: OlmOcr(base_url=olm_base_url, api_key=olm_api_key, model=olm_model),
+                             ocr_key=f"olm_ocr:{olm_base_url}:{olm_model}:{cls.key_fingerprint(olm_api_key)}",
+                             pool_size=core_settings.ocr_remote_concurrency)
 
-        return ocr
+        logger.debug(f"初始化Azure-OCR服务，endpoint: {azure_base_url}")
+        return OcrEngine(lambda: AzureOCR(azure_ocr_endpoint=azure_base_url, azure_ocr_key=azure_api_key),
+                         ocr_key=f"azure_ocr:{azure_base_url}:{cls.key_fingerprint(azure_api_key)}",
+                         pool_size=core_settings.ocr_remote_concurrency)
@@ -2,17 +2,18 @@ import base64
 import requests
 import json
 
+from src.core.ocr.base_ocr import BaseOCR
 
-class OlmOcr:
+
+class OlmOcr(BaseOCR):
     def __init__(self, base_url: str, api_key: str, model="olmOCR-7B-0225-preview"):
         self.base_url = base_url
         self.api_key = api_key
         self.model = model
 
-    def predict(self, file_path: str) -> str:
+    def predict(self, file) -> str:
         # 读取图片并转换为base64编码
-        with open(file_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        base64_image = base64.b64encode(self.read_image(file)).decode('utf-8')
 
         # 构建请求体
         payload = {
@@ -57,13 +58,11 @@ class OlmOcr:
             data=json.dumps(payload)
         )
 
-        # 解析响应
-        if response.status_code == 200:
-            result = response.json()
-            # 提取文本内容
-            if "choices" in result and len(result["choices"]) > 0:
-                return result["choices"][0]["message"]["content"]
-            else:
-                return "无法识别文本"
-        else:
-            return f"请求失败，状态码: {response.status_code}, 响应: {response.text}"
+        # 解析响应，失败时抛出异常，由 OcrEngine 记录日志且不缓存结果
+        if response.status_code != 200:
+            raise RuntimeError(f"请求失败，状态码: {response.status_code}, 响应: {response.text}")
+        result = response.json()
+        # 提取文本内容
+        if "choices" not in result or len(result["choices"]) == 0:
+            raise RuntimeError("无法识别文本")
+        return result["choices"][0]["message"]["content"]
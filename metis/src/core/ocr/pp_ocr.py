@@ -3,34 +3,31 @@ from src.core.ocr.base_ocr import BaseOCR
 
 
 class PPOcr(BaseOCR):
-    _ocr_engine = None
+    """PaddleOCR，每个实例持有一个独立的 PaddleOCR 模型；实例不是线程安全的，由 OcrEngine 的模型池复用"""
 
-    @classmethod
-    def get_engine(cls):
-        if cls._ocr_engine is None:
-            from paddleocr import PaddleOCR
-            import paddle
+    def __init__(self, use_gpu: bool = None):
+        from paddleocr import PaddleOCR
+        import paddle
 
-            gpu_available = paddle.device.is_compiled_with_cuda()
+        if use_gpu is None:
+            use_gpu = paddle.device.is_compiled_with_cuda()
 
-            logger.info(f"初始化PaddleOCR,GPU可用性为:{gpu_available}")
-            cls._ocr_engine = PaddleOCR(table=True, show_log=True,
-                                        lang='ch', use_angle_cls=True,
-                                        use_gpu=gpu_available,
-                                        det_model_dir='models/pp_ocr_det',
-                                        rec_model_dir='models/pp_ocr_rec',
-                                        cls_model_dir='models/pp_ocr_cls')
-        return cls._ocr_engine
-
-    def __init__(self):
-        self.ocr_engine = self.get_engine()
+        logger.info(f"初始化PaddleOCR,GPU可用性为:{use_gpu}")
+        self.ocr_engine = PaddleOCR(table=True, show_log=True,
+                                    lang='ch', use_angle_cls=True,
+                                    use_gpu=use_gpu,
+                                    det_model_dir='models/pp_ocr_det',
+                                    rec_model_dir='models/pp_ocr_rec',
+                                    cls_model_dir='models/pp_ocr_cls')
 
     def predict(self, file) -> str:
-        logger.info(f"使用PaddleOCR识别图片:[{file}]")
+        # PaddleOCR 同时支持图片路径和图片内容（bytes）
+        logger.info(f"使用PaddleOCR识别图片:[{self.describe(file)}]")
         result = self.ocr_engine.ocr(file, cls=True)
         recognized_texts = ''
         if result:
             for lines in result:
-                for line in lines:
+                # 没有检测到文字的图片结果为 None
+                for line in lines or []:
                     recognized_texts += line[1][0] + ''
         return recognized_texts
@@ -0,0 +1,127 @@
+"""pgvector 检索延迟基准
+
+对比两种流程在本地 PostgreSQL + pgvector 上的延迟：
+- legacy: 每类检索新建 PGVector（新 Engine、建表检查、建集合），查询文本各向量化一次，原生 SQL 每次新建连接
+- pooled: PgvectorRag 当前实现，共用连接池和向量存储，查询只向量化一次，naive 与 QA 并发检索，
+  过滤条件和距离表达式命中 PgvectorSchema 建立的索引
+
+Embedding 使用带固定延迟的确定性假模型，模拟远程 Embedding 服务的调用耗时，结果只反映数据库与流程开销
+"""
+import statistics
+import time
+import uuid
+from typing import Callable, List
+
+import psycopg
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGVector
+from sanic.log import logger
+
+from src.core.rag.naive_rag.pgvector.pgvector_rag import PgvectorRag
+from src.core.rag.naive_rag.pgvector.pgvector_schema import PgvectorSchema
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
+from src.core.sanic_plus.env.core_settings import core_settings
+from src.web.entity.rag.base.document_count_request import DocumentCountRequest
+from src.web.entity.rag.base.document_retriever_request import DocumentRetrieverRequest
+from src.web.entity.rag.base.index_delete_request import IndexDeleteRequest
+
+
+class LatencyFakeEmbedding(DeterministicFakeEmbedding):
+    """每次调用固定延迟的假 Embedding 模型"""
+    latency: float = 0.05
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def _legacy_search(embeddings, req: DocumentRetrieverRequest) -> List[Document]:
+    """旧流程：每类检索新建向量存储并各自向量化查询"""
+    results = []
+    for is_doc, k in (("1", req.k), ("0", req.qa_size)):
+        vector_store = PGVector(
+            embeddings=embeddings,
+            collection_name=req.index_name,
+            connection=core_settings.db_uri,
+            use_jsonb=True,
+        )
+        try:
+            results.extend(vector_store.similarity_search_with_relevance_scores(
+                req.search_query, k=k, score_threshold=req.score_threshold or 0.0,
+                filter={"is_doc": {"$eq": is_doc}}
+            ))
+        finally:
+            vector_store._engine.dispose()
+    return results
+
+
+def _legacy_count(req: DocumentCountRequest) -> int:
+    """旧流程：每条 SQL 新建数据库连接"""
+    uri = core_settings.db_uri.replace('postgresql+psycopg://', 'postgresql://')
+    with psycopg.connect(uri) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*) FROM langchain_pg_embedding e "
+                "JOIN langchain_pg_collection c ON e.collection_id = c.uuid WHERE c.name = %(index_name)s",
+                {'index_name': req.index_name}
+            )
+            return cur.fetchone()[0]
+
+
+def _measure(func: Callable, rounds: int) -> List[float]:
+    func()  # 预热
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def _report(name: str, durations: List[float]) -> None:
+    durations = sorted(durations)
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    logger.info(f"{name:<16} mean: {statistics.mean(durations):8.2f}ms  "
+                f"p50: {statistics.median(durations):8.2f}ms  p95: {p95:8.2f}ms")
+
+
+def run_pgvector_benchmark(rounds: int = 30, doc_count: int = 2000, dim: int = 384,
+                           embed_latency: float = 0.05, index_name: str = 'bench_pgvector') -> None:
+    embeddings = LatencyFakeEmbedding(size=dim, latency=embed_latency)
+    rag = PgvectorRag(embeddings=embeddings)
+
+    logger.info(f"pgvector 基准测试 - 文档数: {doc_count}, 维度: {dim}, 轮数: {rounds}, "
+                f"Embedding 延迟: {embed_latency * 1000:.0f}ms")
+    rag.delete_index(IndexDeleteRequest(index_name=index_name))
+    vector_store = PgvectorStoreManager.get_store(index_name, id(embeddings), lambda: embeddings)
+    vector_store.create_collection()
+    docs = [
+        Document(
+            page_content=f"benchmark document {i} about service {i % 97} alarm {i % 13}",
+            metadata={"is_doc": "1" if i % 4 else "0", "knowledge_id": str(i % 50), "chunk_id": str(uuid.uuid4())}
+        )
+        for i in range(doc_count)
+    ]
+    for start in range(0, doc_count, 500):
+        batch = docs[start:start + 500]
+        vector_store.add_documents(batch, ids=[doc.metadata["chunk_id"] for doc in batch])
+    PgvectorSchema.setup()
+
+    try:
+        search_req = DocumentRetrieverRequest(
+            index_name=index_name, search_query="service 42 alarm 7", k=5, score_threshold=0.0,
+            enable_naive_rag=True, enable_qa_rag=True, qa_size=5,
+        )
+        count_req = DocumentCountRequest(index_name=index_name, query='')
+
+        _report("legacy search", _measure(lambda: _legacy_search(embeddings, search_req), rounds))
+        _report("pooled search", _measure(lambda: rag.search(search_req), rounds))
+        _report("legacy count", _measure(lambda: _legacy_count(count_req), rounds))
+        _report("pooled count", _measure(lambda: rag.count_index_document(count_req), rounds))
+    finally:
+        rag.delete_index(IndexDeleteRequest(index_name=index_name))
@@ -1,9 +1,11 @@
-import copy
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 
-import psycopg
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_postgres import PGVector
 from sanic.log import logger
 
@@ -19,8 +21,14 @@ from src.web.entity.rag.base.document_metadata_update_request import DocumentMet
 from src.web.entity.rag.base.document_retriever_request import DocumentRetrieverRequest
 from src.web.entity.rag.base.index_delete_request import IndexDeleteRequest
 from src.core.rag.base_rag import BaseRag
+from src.core.rag.naive_rag.pgvector.pgvector_schema import PgvectorSchema, metadata_field, metadata_key_literal
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
 from src.core.rag.naive_rag.recall_strategies.recall_strategy_factory import RecallStrategyFactory
 
+# naive 与 QA 检索并发执行使用的线程池
+_search_executor = ThreadPoolExecutor(max_workers=core_settings.pgvector_search_workers,
+                                      thread_name_prefix="pgvector-search")
+
 
 class PgvectorRag(BaseRag):
     """基于PostgreSQL + pgvector的RAG实现
@@ -32,8 +40,12 @@ class PgvectorRag(BaseRag):
     - 完整的CRUD操作
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        """
+        Args:
+            embeddings: 固定使用的 Embedding 模型，为空时按请求中的模型配置创建（基准测试时传入）
+        """
+        self.embeddings = embeddings
 
     # ==================== 核心搜索功能 ====================
 
@@ -41,6 +53,8 @@ class PgvectorRag(BaseRag):
     def search(self, req: DocumentRetrieverRequest) -> List[Document]:
         """搜索符合条件的文档
 
+        查询文本只向量化一次，naive 与 QA 两类检索复用同一向量并发执行
+
         Args:
             req: 文档检索请求，包含搜索参数和过滤条件
 
@@ -50,36 +64,64 @@ class PgvectorRag(BaseRag):
         logger.info(
             f"文档搜索开始 - 索引: {req.index_name}, naive_rag: {req.enable_naive_rag}, qa_rag: {req.enable_qa_rag}")
 
-        results = []
+        rag_types = [rag_type for rag_type, enabled in
+                     (('naive', req.enable_naive_rag), ('qa', req.enable_qa_rag)) if enabled]
+        if not rag_types:
+            return []
 
-        if req.enable_naive_rag:
-            naive_results = self._search_by_type(req, 'naive')
-            results.extend(naive_results)
+        try:
+            req.validate_search_params()
+            vector_store = self._get_vector_store(req)
+            query_embedding = vector_store.embeddings.embed_query(req.search_query)
+        except Exception as e:
+            logger.error(f"向量搜索异常 - 索引: {req.index_name}, 错误: {e}")
+            return []
 
-        if req.enable_qa_rag:
-            qa_results = self._search_by_type(req, 'qa')
-            results.extend(qa_results)
+        # 其余类型提交到线程池，第一个类型在当前线程执行
+        futures = [_search_executor.submit(self._search_by_type, req, rag_type, vector_store, query_embedding)
+                   for rag_type in rag_types[1:]]
+        results = self._search_by_type(req, rag_types[0], vector_store, query_embedding)
+        for future in futures:
+            results.extend(future.result())
 
         logger.info(
             f"文档搜索完成 - 索引: {req.index_name}, 结果数: {len(results)}")
         return results
 
+    def _get_vector_store(self, req) -> PGVector:
+        """获取缓存的向量存储"""
+        if self.embeddings is not None:
+            return PgvectorStoreManager.get_store(req.index_name, id(self.embeddings), lambda: self.embeddings)
+
+        embed_key = (req.embed_model_base_url, req.embed_model_name, req.embed_model_api_key)
+        return PgvectorStoreManager.get_store(
+            req.index_name,
+            embed_key,
+            lambda: EmbedBuilder.get_embed(
+                req.embed_model_base_url,
+                req.embed_model_name,
+                req.embed_model_api_key,
+                req.embed_model_base_url
+            )
+        )
+
     @timeit("分类搜索")
-    def _search_by_type(self, req: DocumentRetrieverRequest, rag_type: str) -> List[Document]:
+    def _search_by_type(self, req: DocumentRetrieverRequest, rag_type: str, vector_store: PGVector,
+                        query_embedding: List[float]) -> List[Document]:
         """按类型执行搜索"""
         logger.debug(f"搜索执行开始 - 类型: {rag_type}, 索引: {req.index_name}")
 
-        search_req = copy.deepcopy(req)
-        search_req.metadata_filter = search_req.metadata_filter or {}
-
+        metadata_filter = dict(req.metadata_filter or {})
+        update = {'metadata_filter': metadata_filter}
         if rag_type == 'naive':
-            search_req.metadata_filter['is_doc'] = "1"
+            metadata_filter['is_doc'] = "1"
         elif rag_type == 'qa':
-            search_req.metadata_filter['is_doc'] = "0"
-            search_req.k = req.qa_size
+            metadata_filter['is_doc'] = "0"
+            update['k'] = req.qa_size
+        search_req = req.model_copy(update=update)
 
         try:
-            results = self._perform_search(search_req)
+            results = self._perform_search(search_req, vector_store, query_embedding)
             results = self._process_search_results(results, req, rag_type)
 
             logger.debug(
@@ -91,67 +133,98 @@ class PgvectorRag(BaseRag):
             return []
 
     @timeit("向量搜索")
-    def _perform_search(self, req: DocumentRetrieverRequest) -> List[Document]:
+    def _perform_search(self, req: DocumentRetrieverRequest, vector_store: PGVector,
+                        query_embedding: List[float]) -> List[Document]:
         """执行向量搜索
 
         Args:
             req: 文档检索请求
+            vector_store: 向量存储
+            query_embedding: 查询文本的向量
 
         Returns:
             搜索结果文档列表
         """
         try:
-            req.validate_search_params()
-
-            embedding = EmbedBuilder.get_embed(
-                req.embed_model_base_url,
-                req.embed_model_name,
-                req.embed_model_api_key,
-                req.embed_model_base_url
-            )
-
-            vector_store = PGVector(
-                embeddings=embedding,
-                collection_name=req.index_name,
-                connection=core_settings.db_uri,
-                use_jsonb=True,
-            )
-
-            search_kwargs = {"k": req.k}
-            if req.metadata_filter:
-                pgvector_filter = self._convert_metadata_filter(
-                    req.metadata_filter)
-                if pgvector_filter:
-                    search_kwargs["filter"] = pgvector_filter
-
             # 执行搜索
             if req.search_type == "mmr":
-                return self._execute_mmr_search(vector_store, req, search_kwargs)
+                return self._execute_mmr_search(vector_store, req, query_embedding)
             else:
-                return self._execute_similarity_search(vector_store, req, search_kwargs)
+                return self._execute_similarity_search(vector_store, req, query_embedding)
 
         except Exception as e:
             logger.error(f"向量搜索异常 - 索引: {req.index_name}, 错误: {e}")
             return []
 
-    def _execute_mmr_search(self, vector_store: PGVector, req: DocumentRetrieverRequest, search_kwargs: dict) -> List[Document]:
-        """执行MMR搜索"""
-        search_kwargs.update({
-            "fetch_k": req.get_effective_fetch_k(),
-            "lambda_mult": req.lambda_mult
-        })
-
-        # 先获取带分数的相似度搜索结果用于MMR
-        candidate_docs_with_scores = vector_store.similarity_search_with_relevance_scores(
-            req.search_query,
-            k=req.get_effective_fetch_k(),
-            score_threshold=req.score_threshold or 0.0,
-            filter=search_kwargs.get("filter")
+    def _build_vector_query(self, req: DocumentRetrieverRequest, query_embedding: List[float], k: int,
+                            with_embedding: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """构建向量检索SQL
+
+        距离表达式与过滤条件和 PgvectorSchema 中的索引定义保持一致：
+        向量按维度转换为 vector(N) 并限定 vector_dims，元数据键以常量写入
+        """
+        dimension = len(query_embedding)
+        params = {
+            'index_name': req.index_name,
+            'query_embedding': json.dumps([float(value) for value in query_embedding]),
+            'k': k,
+        }
+        where_clauses = [
+            "e.collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %(index_name)s)",
+            f"vector_dims(e.embedding) = {dimension}",
+        ]
+        metadata_condition = self._build_metadata_filter(req.metadata_filter, params)
+        if metadata_condition:
+            where_clauses.append(metadata_condition)
+
+        embedding_column = ", e.embedding::text AS embedding" if with_embedding else ""
+        query = f"""
+            SELECT e.id, e.document, e.cmetadata{embedding_column},
+                   (e.embedding::vector({dimension})) <=> %(query_embedding)s::vector({dimension}) AS distance
+            FROM langchain_pg_embedding e
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY distance
+            LIMIT %(k)s
+        """
+        return query, params
+
+    def _query_by_vector(self, req: DocumentRetrieverRequest, query_embedding: List[float], k: int,
+                         with_embedding: bool = False) -> List[Dict]:
+        """按向量检索，返回按距离升序的记录"""
+        query, params = self._build_vector_query(req, query_embedding, k, with_embedding)
+        rows = self._execute_query(query, params, settings=PgvectorSchema.search_settings(k))
+        if len(rows) < k and not PgvectorSchema.iterative_scan_supported():
+            # pgvector 0.8 以下没有迭代扫描，HNSW 候选被集合与元数据条件过滤后可能不足 k 条，改为精确检索
+            rows = self._execute_query(query, params, settings=PgvectorSchema.search_settings(k, exact=True))
+        return rows
+
+    @staticmethod
+    def _row_to_document(row: Dict) -> Document:
+        return Document(id=str(row['id']), page_content=row['document'], metadata=row['cmetadata'] or {})
+
+    def _execute_mmr_search(self, vector_store: PGVector, req: DocumentRetrieverRequest,
+                            query_embedding: List[float]) -> List[Document]:
+        """执行MMR搜索，候选集与 MMR 选择在同一次查询中完成"""
+        rows = self._query_by_vector(req, query_embedding, req.get_effective_fetch_k(), with_embedding=True)
+        selected = maximal_marginal_relevance(
+            np.array(query_embedding, dtype=np.float32),
+            [json.loads(row['embedding']) for row in rows],
+            k=req.k,
+            lambda_mult=req.lambda_mult,
         )
 
-        # 执行MMR搜索
-        results = vector_store.max_marginal_relevance_search(
-            req.search_query, **search_kwargs)
+        # 距离转换为相似度分数，低于阈值的按排序位置计算近似分数
+        relevance_score_fn = vector_store._select_relevance_score_fn()
+        score_threshold = req.score_threshold or 0.0
+        results = []
+        candidate_docs_with_scores = []
+        for index in selected:
+            row = rows[index]
+            doc = self._row_to_document(row)
+            results.append(doc)
+            score = relevance_score_fn(row['distance'])
+            if score >= score_threshold:
+                candidate_docs_with_scores.append((doc, score))
 
         # 为MMR结果设置相似度分数
         self._set_mmr_scores(results, candidate_docs_with_scores)
@@ -162,19 +235,19 @@ class PgvectorRag(BaseRag):
         logger.debug(f"MMR搜索完成 - 结果数: {len(results)}")
         return results
 
-    def _execute_similarity_search(self, vector_store: PGVector, req: DocumentRetrieverRequest, search_kwargs: dict) -> List[Document]:
+    def _execute_similarity_search(self, vector_store: PGVector, req: DocumentRetrieverRequest,
+                                   query_embedding: List[float]) -> List[Document]:
         """执行相似度搜索"""
-        results_with_scores = vector_store.similarity_search_with_relevance_scores(
-            req.search_query,
-            k=req.k,
-            score_threshold=req.score_threshold or 0.0,
-            filter=search_kwargs.get("filter")
-        )
+        rows = self._query_by_vector(req, query_embedding, req.k)
 
+        relevance_score_fn = vector_store._select_relevance_score_fn()
+        score_threshold = req.score_threshold or 0.0
         results = []
-        for doc, score in results_with_scores:
-            if not hasattr(doc, 'metadata'):
-                doc.metadata = {}
+        for row in rows:
+            score = relevance_score_fn(row['distance'])
+            if score < score_threshold:
+                continue
+            doc = self._row_to_document(row)
             doc.metadata['similarity_score'] = float(score)
             doc.metadata['search_method'] = 'similarity'
             results.append(doc)
@@ -221,64 +294,62 @@ class PgvectorRag(BaseRag):
 
     # ==================== 数据库连接和查询 ====================
 
-    def _get_psycopg_uri(self) -> str:
-        """将SQLAlchemy格式的URI转换为psycopg支持的格式"""
-        uri = core_settings.db_uri
-        # 移除SQLAlchemy方言前缀，如 postgresql+psycopg:// -> postgresql://
-        if uri.startswith('postgresql+psycopg://'):
-            uri = uri.replace('postgresql+psycopg://', 'postgresql://')
-        elif uri.startswith('postgres+psycopg://'):
-            uri = uri.replace('postgres+psycopg://', 'postgresql://')
-        return uri
-
     @timeit("SQL更新执行")
     def _execute_update_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> int:
         """执行UPDATE/DELETE等非查询SQL，返回影响的行数"""
+        conn = PgvectorStoreManager.get_engine().raw_connection()
         try:
-            with psycopg.connect(self._get_psycopg_uri()) as conn:
-                with conn.cursor() as cur:
-                    cur.execute(query, params or {})
-                    affected_rows = cur.rowcount
-                    conn.commit()
-
-                    # 记录影响行数
-                    param_keys = list(params.keys()) if params else []
-                    logger.info(
-                        f"SQL更新详情 - 影响行数: {affected_rows}, 参数键: {param_keys}")
-                    return affected_rows
+            with conn.cursor() as cur:
+                cur.execute(query, params or {})
+                affected_rows = cur.rowcount
+                conn.commit()
+
+                # 记录影响行数
+                param_keys = list(params.keys()) if params else []
+                logger.info(
+                    f"SQL更新详情 - 影响行数: {affected_rows}, 参数键: {param_keys}")
+                return affected_rows
         except Exception as e:
             # 隐藏敏感参数，只记录参数键名
             param_keys = list(params.keys()) if params else []
             logger.error(f"SQL更新异常详情 - 参数键: {param_keys}")
             raise
+        finally:
+            # 归还连接池，未提交的事务由连接池回滚
+            conn.close()
 
     @timeit("SQL查询执行")
-    def _execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
-        """执行SQL查询"""
+    def _execute_query(self, query: str, params: Optional[Dict[str, Any]] = None,
+                       settings: Optional[List[str]] = None) -> List[Dict]:
+        """执行SQL查询，settings 为查询前在同一事务内执行的 SET LOCAL 语句"""
+        conn = PgvectorStoreManager.get_engine().raw_connection()
         try:
-            with psycopg.connect(self._get_psycopg_uri()) as conn:
-                with conn.cursor() as cur:
-                    cur.execute(query, params or {})
-                    conn.commit()
-
-                    result_count = 0
-                    if cur.description:
-                        columns = [desc[0] for desc in cur.description]
-                        results = [dict(zip(columns, row))
-                                   for row in cur.fetchall()]
-                        result_count = len(results)
-                    else:
-                        results = []
-
-                    # 记录查询结果数
-                    param_keys = list(params.keys()) if params else []
-                    logger.info(
-                        f"SQL查询详情 - 结果数: {result_count}, 参数键: {param_keys}")
-                    return results
+            with conn.cursor() as cur:
+                for setting in settings or []:
+                    cur.execute(setting)
+                cur.execute(query, params or {})
+                conn.commit()
+
+                result_count = 0
+                if cur.description:
+                    columns = [desc[0] for desc in cur.description]
+                    results = [dict(zip(columns, row))
+                               for row in cur.fetchall()]
+                    result_count = len(results)
+                else:
+                    results = []
+
+                # 记录查询结果数
+                param_keys = list(params.keys()) if params else []
+                logger.info(
+                    f"SQL查询详情 - 结果数: {result_count}, 参数键: {param_keys}")
+                return results
         except Exception as e:
             param_keys = list(params.keys()) if params else []
             logger.error(f"SQL查询异常详情 - 参数键: {param_keys}")
             raise
+        finally:
+            conn.close()
 
     # ==================== 工具方法 ====================
 
@@ -309,47 +380,38 @@ class PgvectorRag(BaseRag):
         return list(set(all_chunk_ids))  # 去重
 
     def _build_metadata_filter(self, metadata_filter: dict, params: Dict[str, Any]) -> str:
-        """构建元数据过滤条件"""
+        """构建元数据过滤条件
+
+        元数据键转义后以常量写入 SQL（cmetadata->>'key'），与 PgvectorSchema 建立的表达式索引匹配；
+        值仍以参数传入
+        """
         if not metadata_filter:
             return ""
 
         conditions = []
-        for key, value in metadata_filter.items():
-            param_key = f"metadata_{key}".replace(".", "_")
+        for index, (key, value) in enumerate(metadata_filter.items()):
+            param_key = f"metadata_{index}"
 
             if key.endswith("__exists"):
                 field_key = key.replace("__exists", "")
-                conditions.append(
-                    f"e.cmetadata ? %(metadata_{field_key}_exists)s")
-                params[f"metadata_{field_key}_exists"] = field_key
+                conditions.append(f"e.cmetadata ? {metadata_key_literal(field_key)}")
             elif key.endswith("__missing"):
                 field_key = key.replace("__missing", "")
-                conditions.append(
-                    f"NOT (e.cmetadata ? %(metadata_{field_key}_missing)s)")
-                params[f"metadata_{field_key}_missing"] = field_key
+                conditions.append(f"NOT (e.cmetadata ? {metadata_key_literal(field_key)})")
             elif key.endswith("__like"):
                 field_key = key.replace("__like", "")
-                conditions.append(
-                    f"e.cmetadata->>%({param_key}_field)s LIKE %({param_key}_value)s")
-                params[f"{param_key}_field"] = field_key
-                params[f"{param_key}_value"] = str(value)
+                conditions.append(f"{metadata_field(field_key)} LIKE %({param_key})s")
+                params[param_key] = str(value)
             elif key.endswith("__ilike"):
                 field_key = key.replace("__ilike", "")
-                conditions.append(
-                    f"e.cmetadata->>%({param_key}_field)s ILIKE %({param_key}_value)s")
-                params[f"{param_key}_field"] = field_key
-                params[f"{param_key}_value"] = str(value)
+                conditions.append(f"{metadata_field(field_key)} ILIKE %({param_key})s")
+                params[param_key] = str(value)
             elif key.endswith("__not_blank"):
                 field_key = key.replace("__not_blank", "")
-                conditions.append(
-                    f"(e.cmetadata ? %(metadata_{field_key}_not_blank_exists)s AND TRIM(e.cmetadata->>%(metadata_{field_key}_not_blank_field)s) != '')")
-                params[f"metadata_{field_key}_not_blank_exists"] = field_key
-                params[f"metadata_{field_key}_not_blank_field"] = field_key
+                conditions.append(f"TRIM({metadata_field(field_key)}) != ''")
             else:
-                conditions.append(
-                    f"e.cmetadata->>%({param_key}_field)s = %({param_key}_value)s")
-                params[f"{param_key}_field"] = key
-                params[f"{param_key}_value"] = str(value)
+                conditions.append(f"{metadata_field(key)} = %({param_key})s")
+                params[param_key] = str(value)
 
         return "(" + " AND ".join(conditions) + ")" if conditions else ""
 
@@ -457,6 +519,7 @@ class PgvectorRag(BaseRag):
             query = "DELETE FROM langchain_pg_collection WHERE name = %(collection_name)s"
             affected_rows = self._execute_update_query(
                 query, {'collection_name': req.index_name})
+            PgvectorStoreManager.evict(req.index_name)
 
             if affected_rows > 0:
                 logger.info(
@@ -479,10 +542,10 @@ class PgvectorRag(BaseRag):
         if sort_order not in ["ASC", "DESC"]:
             sort_order = "DESC"
 
-        if req.sort_field:
-            order_clause = f"ORDER BY (e.cmetadata->>'{req.sort_field}')::timestamp {sort_order}"
-        else:
-            order_clause = f"ORDER BY (e.cmetadata->>'created_time')::timestamp {sort_order}"
+        sort_field = req.sort_field or 'created_time'
+
+        def order_clause(alias: str) -> str:
+            return f"ORDER BY ({metadata_field(sort_field, alias)})::timestamp {sort_order}"
 
         # 分页参数
         limit_clause = ""
@@ -492,24 +555,25 @@ class PgvectorRag(BaseRag):
             params['offset'] = offset
             limit_clause = "LIMIT %(limit)s OFFSET %(offset)s"
 
-        # 构建完整查询
+        # 先分页再统计每个分块关联的 QA 数量，QA 统计走 base_chunk_id 表达式索引
         return f"""
-        SELECT e.id, e.document, e.cmetadata,
+        SELECT page.id, page.document, page.cmetadata,
                COALESCE(qa_stats.qa_count, 0) as qa_count
-        FROM langchain_pg_embedding e
-        JOIN langchain_pg_collection c ON e.collection_id = c.uuid
-        LEFT JOIN (
-            SELECT qa.cmetadata->>'base_chunk_id' as base_chunk_id,
-                   COUNT(*) as qa_count
+        FROM (
+            SELECT e.id, e.document, e.cmetadata
+            FROM langchain_pg_embedding e
+            JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+            WHERE {where_clause}
+            {order_clause('e')}
+            {limit_clause}
+        ) page
+        LEFT JOIN LATERAL (
+            SELECT COUNT(*) as qa_count
             FROM langchain_pg_embedding qa
-            WHERE qa.cmetadata->>'base_chunk_id' IS NOT NULL 
-              AND qa.cmetadata->>'base_chunk_id' != ''
+            WHERE qa.cmetadata->>'base_chunk_id' = page.id::text
               AND qa.cmetadata ? 'qa_answer'
-            GROUP BY qa.cmetadata->>'base_chunk_id'
-        ) qa_stats ON qa_stats.base_chunk_id = e.id::text
-        WHERE {where_clause}
-        {order_clause}
-        {limit_clause}
+        ) qa_stats ON TRUE
+        {order_clause('page')}
         """
 
     @timeit("文档列表查询")
@@ -630,23 +694,9 @@ class PgvectorRag(BaseRag):
             logger.info(
                 f"覆盖模式清理完成 - 索引: {req.index_name}, 清理记录: {affected_rows}")
 
-        embedding = EmbedBuilder.get_embed(
-            req.embed_model_base_url,
-            req.embed_model_name,
-            req.embed_model_api_key,
-            req.embed_model_base_url
-        )
-
-        vector_store = PGVector(
-            embeddings=embedding,
-            collection_name=req.index_name,
-            connection=core_settings.db_uri,
-            use_jsonb=True,
-        )
-
         try:
-            chunk_ids = [doc.metadata["chunk_id"] for doc in req.docs]
-            vector_store.add_documents(req.docs, ids=chunk_ids)
+            embeddings = self.embed_documents(req)
+            chunk_ids = self.store_embeddings(req, embeddings)
 
             logger.info(
                 f"文档导入成功 - 索引: {req.index_name}, 导入数量: {len(req.docs)}")
@@ -656,6 +706,26 @@ class PgvectorRag(BaseRag):
                 f"文档导入失败 - 索引: {req.index_name}, 错误: {e}")
             raise
 
+    def embed_documents(self, req: DocumentIngestRequest) -> List[List[float]]:
+        """向量化待导入的文档"""
+        vector_store = self._get_vector_store(req)
+        return vector_store.embeddings.embed_documents([doc.page_content for doc in req.docs])
+
+    def store_embeddings(self, req: DocumentIngestRequest, embeddings: List[List[float]]) -> List[str]:
+        """写入已向量化的文档，返回 chunk_id 列表"""
+        vector_store = self._get_vector_store(req)
+        # 覆盖模式或其他进程删除索引后集合已不存在，写入前确保集合存在
+        vector_store.create_collection()
+
+        chunk_ids = [doc.metadata["chunk_id"] for doc in req.docs]
+        vector_store.add_embeddings(
+            [doc.page_content for doc in req.docs], embeddings,
+            metadatas=[doc.metadata for doc in req.docs], ids=chunk_ids)
+        if embeddings:
+            # 新出现的向量维度在后台线程补建索引，不阻塞导入
+            PgvectorSchema.schedule(len(embeddings[0]))
+        return chunk_ids
+
     # ==================== 搜索结果处理 ====================
 
     def _process_search_results(self, results: List[Document], req: DocumentRetrieverRequest, rag_type: str) -> List[Document]:
@@ -676,33 +746,6 @@ class PgvectorRag(BaseRag):
 
         return results
 
-    def _convert_metadata_filter(self, metadata_filter: dict) -> dict:
-        """将内部元数据过滤格式转换为pgvector支持的格式"""
-        if not metadata_filter:
-            return {}
-
-        pgvector_filter = {}
-        for key, value in metadata_filter.items():
-            if key.endswith("__exists"):
-                field = key.replace("__exists", "")
-                pgvector_filter[field] = {"$ne": None}
-            elif key.endswith("__missing"):
-                field = key.replace("__missing", "")
-                pgvector_filter[field] = {"$eq": None}
-            elif key.endswith("__like"):
-                field = key.replace("__like", "")
-                pgvector_filter[field] = {"$like": value}
-            elif key.endswith("__ilike"):
-                field = key.replace("__ilike", "")
-                pgvector_filter[field] = {"$ilike": value}
-            elif key.endswith("__not_blank"):
-                field = key.replace("__not_blank", "")
-                pgvector_filter[field] = {"$ne": ""}
-            else:
-                pgvector_filter[key] = {"$eq": value}
-
-        return pgvector_filter
-
     # ==================== 重排序和召回处理 ====================
 
     @timeit("重排序")
@@ -0,0 +1,187 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from sanic.log import logger
+from sqlalchemy import text
+
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
+
+# 检索、更新、删除常用的过滤键，各建一个表达式索引；is_doc 区分度低，和集合一起建联合索引
+METADATA_INDEX_KEYS = ['knowledge_id', 'chunk_id', 'base_chunk_id', 'qa_pairs_id']
+
+# HNSW 索引支持的最大向量维度
+HNSW_MAX_DIMENSION = 2000
+
+
+def quote_literal(value: str) -> str:
+    """按 PostgreSQL quote_literal 的规则转义为 SQL 字符串常量（standard_conforming_strings 开启）"""
+    if '\x00' in value:
+        raise ValueError(f"Invalid metadata key: {value!r}")
+    return "'" + value.replace("'", "''") + "'"
+
+
+def metadata_key_literal(key: str) -> str:
+    """元数据键的 SQL 字符串常量：以常量而不是参数写入，cmetadata->>'key' 才能与表达式索引匹配；
+    检索语句以 %(name)s 传参执行，常量中的 % 需写成 %%"""
+    return quote_literal(key).replace('%', '%%')
+
+
+def metadata_field(key: str, alias: str = 'e') -> str:
+    """元数据字段的文本表达式，与表达式索引的定义一致"""
+    return f"{alias}.cmetadata->>{metadata_key_literal(key)}"
+
+
+class PgvectorSchema:
+    """langchain_pg_embedding 的元数据索引与向量索引
+
+    - 集合 + is_doc 的联合索引，覆盖所有检索都带的集合条件
+    - 常用过滤键的表达式索引 (cmetadata->>'key')，base_chunk_id 索引同时用于统计分块关联的 QA 数量
+    - 按向量维度建立 HNSW 部分索引：embedding 列不限定维度，
+      索引建立在 (embedding::vector(N)) 上并限定 vector_dims(embedding) = N，检索 SQL 使用相同的表达式
+
+    索引均以 CREATE INDEX CONCURRENTLY IF NOT EXISTS 创建，不阻塞写入，可重复执行。
+    并发建索引中断（进程退出、连接断开）会留下 INVALID 索引，IF NOT EXISTS 会跳过它，
+    因此创建前先删除不在构建中的 INVALID 同名索引再重建。
+    sync_db 调用 setup 建立索引；导入写入后通过 schedule 在后台线程为新出现的向量维度补建，不阻塞导入
+    """
+
+    _metadata_indexed = False
+    _vector_dimensions = set()
+    _scheduled_dimensions = set()
+    _background: Optional[ThreadPoolExecutor] = None
+    _vector_version: Optional[Tuple[int, ...]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def vector_index_name(dimension: int) -> str:
+        return f"ix_embedding_hnsw_{int(dimension)}"
+
+    @staticmethod
+    def metadata_index_statements() -> Iterable[Tuple[str, str]]:
+        """(索引名, 建索引语句)"""
+        yield ("ix_embedding_collection_is_doc",
+               "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embedding_collection_is_doc "
+               "ON langchain_pg_embedding (collection_id, (cmetadata->>'is_doc'))")
+        for key in METADATA_INDEX_KEYS:
+            yield (f"ix_embedding_meta_{key}",
+                   f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embedding_meta_{key} "
+                   f"ON langchain_pg_embedding ((cmetadata->>{quote_literal(key)}))")
+
+    @classmethod
+    def vector_index_statement(cls, dimension: int) -> str:
+        dimension = int(dimension)
+        return (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {cls.vector_index_name(dimension)} "
+                f"ON langchain_pg_embedding USING hnsw ((embedding::vector({dimension})) vector_cosine_ops) "
+                f"WHERE vector_dims(embedding) = {dimension}")
+
+    @staticmethod
+    def _invalid_indexes(conn, names: List[str]) -> List[str]:
+        """返回 INVALID 的索引，正在并发构建（同样是 INVALID）的索引不在其中"""
+        return [row[0] for row in conn.execute(text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = ANY(:names) AND NOT i.indisvalid "
+            "AND i.indexrelid NOT IN (SELECT index_relid FROM pg_stat_progress_create_index)"
+        ), {'names': names})]
+
+    @classmethod
+    def _create_indexes(cls, indexes: Iterable[Tuple[str, str]]) -> None:
+        """创建索引，先删除同名的 INVALID 索引；CONCURRENTLY 不能在事务中执行，使用自动提交连接"""
+        indexes = list(indexes)
+        engine = PgvectorStoreManager.get_engine()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for name in cls._invalid_indexes(conn, [name for name, _ in indexes]):
+                logger.warning(f"pgvector 索引无效，删除后重建 - {name}")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            for _, statement in indexes:
+                logger.info(f"pgvector 索引检查 - {statement}")
+                conn.execute(text(statement))
+
+    @classmethod
+    def setup(cls) -> None:
+        """建立元数据索引，并为已有数据的每种向量维度建立 HNSW 索引；表尚未创建时跳过，由首次导入时补建"""
+        engine = PgvectorStoreManager.get_engine()
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass('langchain_pg_embedding')")).scalar() is None:
+                logger.info("langchain_pg_embedding 尚未创建，跳过 pgvector 索引检查")
+                return
+            dimensions = [row[0] for row in conn.execute(text(
+                "SELECT DISTINCT vector_dims(embedding) FROM langchain_pg_embedding WHERE embedding IS NOT NULL"
+            ))]
+
+        cls.ensure_metadata_indexes()
+        for dimension in dimensions:
+            cls.ensure_vector_index(dimension)
+
+    @classmethod
+    def ensure_metadata_indexes(cls) -> None:
+        """确保元数据索引存在，每个进程只检查一次"""
+        if cls._metadata_indexed:
+            return
+        cls._create_indexes(cls.metadata_index_statements())
+        cls._metadata_indexed = True
+
+    @classmethod
+    def ensure_vector_index(cls, dimension: int) -> None:
+        """确保该维度的 HNSW 索引存在，进程内已确认的维度不再检查"""
+        dimension = int(dimension)
+        if dimension in cls._vector_dimensions:
+            return
+        if dimension > HNSW_MAX_DIMENSION:
+            logger.warning(f"向量维度 {dimension} 超过 HNSW 上限 {HNSW_MAX_DIMENSION}，跳过向量索引")
+        else:
+            cls._create_indexes([(cls.vector_index_name(dimension), cls.vector_index_statement(dimension))])
+        with cls._lock:
+            cls._vector_dimensions.add(dimension)
+
+    @classmethod
+    def schedule(cls, dimension: int) -> None:
+        """在后台线程补建元数据索引和该维度的 HNSW 索引，进程内已确认或已在排队的维度直接返回"""
+        dimension = int(dimension)
+        with cls._lock:
+            if dimension in cls._vector_dimensions or dimension in cls._scheduled_dimensions:
+                return
+            cls._scheduled_dimensions.add(dimension)
+            if cls._background is None:
+                cls._background = ThreadPoolExecutor(1, thread_name_prefix='pgvector-index')
+        cls._background.submit(cls._ensure_indexes, dimension)
+
+    @classmethod
+    def _ensure_indexes(cls, dimension: int) -> None:
+        """后台补建索引，失败只记录日志，下次写入该维度时重试"""
+        try:
+            cls.ensure_metadata_indexes()
+            cls.ensure_vector_index(dimension)
+        except Exception as e:
+            logger.warning(f"向量索引创建失败 - 维度: {dimension}, 错误: {e}")
+        finally:
+            with cls._lock:
+                cls._scheduled_dimensions.discard(dimension)
+
+    @classmethod
+    def vector_version(cls) -> Tuple[int, ...]:
+        """pgvector 扩展版本，用于判断是否支持 hnsw.iterative_scan（0.8.0 起）"""
+        if cls._vector_version is None:
+            engine = PgvectorStoreManager.get_engine()
+            with engine.connect() as conn:
+                version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+            cls._vector_version = tuple(int(part) for part in re.findall(r'\d+', version or '0'))
+        return cls._vector_version
+
+    @classmethod
+    def iterative_scan_supported(cls) -> bool:
+        return cls.vector_version() >= (0, 8, 0)
+
+    @classmethod
+    def search_settings(cls, k: int, exact: bool = False) -> list:
+        """向量检索前在事务内设置的参数：带过滤条件的 HNSW 检索需要足够的候选数，
+        支持时开启迭代扫描，避免过滤后结果不足 k 条。
+        exact 为 True 时不使用 HNSW 索引（HNSW 不支持位图扫描，关闭索引扫描后集合与元数据条件仍走 B-tree 位图扫描），
+        对满足条件的全部向量精确计算距离，用于不支持迭代扫描时过滤后结果不足 k 条的重查"""
+        if exact:
+            return ["SET LOCAL enable_indexscan = off"]
+        statements = [f"SET LOCAL hnsw.ef_search = {max(40, min(int(k) * 2, 1000))}"]
+        if cls.iterative_scan_supported():
+            statements.append("SET LOCAL hnsw.iterative_scan = strict_order")
+        return statements
@@ -0,0 +1,118 @@
+"""pgvector 索引回归测试
+
+在真实的 PostgreSQL + pgvector 上建立索引，用 EXPLAIN 确认 PgvectorRag 生成的检索与过滤 SQL 能命中索引。
+未配置 DB_URI 时跳过
+"""
+import uuid
+
+import psycopg
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.core.rag.naive_rag.pgvector.pgvector_rag import PgvectorRag
+from src.core.rag.naive_rag.pgvector.pgvector_schema import PgvectorSchema
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
+from src.core.sanic_plus.env.core_settings import core_settings
+from src.web.entity.rag.base.document_retriever_request import DocumentRetrieverRequest
+from src.web.entity.rag.base.index_delete_request import IndexDeleteRequest
+
+pytestmark = pytest.mark.skipif(not core_settings.db_uri, reason="未配置 DB_URI")
+
+DIMENSION = 8
+
+
+@pytest.fixture(scope="module")
+def rag():
+    embeddings = DeterministicFakeEmbedding(size=DIMENSION)
+    rag = PgvectorRag(embeddings=embeddings)
+    index_name = f"pgvector_schema_test_{uuid.uuid4().hex[:8]}"
+
+    vector_store = PgvectorStoreManager.get_store(index_name, id(embeddings), lambda: embeddings)
+    vector_store.create_collection()
+    docs = []
+    for i in range(500):
+        metadata = {"is_doc": "1" if i % 5 else "0", "knowledge_id": str(i % 50), "chunk_id": str(uuid.uuid4())}
+        if i % 5 == 0:
+            base_chunk_id = docs[-1].metadata["chunk_id"] if docs else ""
+            metadata.update({"qa_answer": f"answer {i}", "base_chunk_id": base_chunk_id})
+        docs.append(Document(page_content=f"document {i} about service {i % 97}", metadata=metadata))
+    vector_store.add_documents(docs, ids=[doc.metadata["chunk_id"] for doc in docs])
+    PgvectorSchema.setup()
+    rag._execute_update_query("ANALYZE langchain_pg_embedding")
+
+    rag.index_name = index_name
+    yield rag
+    rag.delete_index(IndexDeleteRequest(index_name=index_name))
+
+
+def _explain(query: str, params: dict) -> str:
+    """关闭顺序扫描和排序后取执行计划，只要存在可用索引，规划器就会选择它"""
+    engine = PgvectorStoreManager.get_engine()
+    conn = engine.raw_connection()
+    try:
+        with psycopg.ClientCursor(conn.driver_connection) as cur:
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute("SET LOCAL enable_sort = off")
+            cur.execute(f"EXPLAIN {query}", params)
+            plan = "\n".join(row[0] for row in cur.fetchall())
+        conn.rollback()
+        return plan
+    finally:
+        conn.close()
+
+
+def test_vector_search_uses_hnsw_index(rag):
+    req = DocumentRetrieverRequest(index_name=rag.index_name, search_query="service 42", k=5,
+                                   metadata_filter={"is_doc": "1"})
+    query, params = rag._build_vector_query(req, rag.embeddings.embed_query(req.search_query), req.k)
+    plan = _explain(query, params)
+    assert PgvectorSchema.vector_index_name(DIMENSION) in plan, plan
+
+
+def test_metadata_filter_uses_expression_index(rag):
+    params = {}
+    condition = rag._build_metadata_filter({"knowledge_id": "7"}, params)
+    plan = _explain(f"SELECT e.id FROM langchain_pg_embedding e WHERE {condition}", params)
+    assert "ix_embedding_meta_knowledge_id" in plan, plan
+
+
+def test_collection_filter_uses_collection_index(rag):
+    params = {}
+    condition = rag._build_metadata_filter({"is_doc": "0"}, params)
+    params["index_name"] = rag.index_name
+    plan = _explain(
+        "SELECT COUNT(*) FROM langchain_pg_embedding e JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
+        f"WHERE c.name = %(index_name)s AND {condition}",
+        params,
+    )
+    assert "ix_embedding_collection_is_doc" in plan, plan
+
+
+def test_qa_count_uses_base_chunk_index(rag):
+    plan = _explain(
+        "SELECT COUNT(*) FROM langchain_pg_embedding qa "
+        "WHERE qa.cmetadata->>'base_chunk_id' = %(chunk_id)s AND qa.cmetadata ? 'qa_answer'",
+        {"chunk_id": str(uuid.uuid4())},
+    )
+    assert "ix_embedding_meta_base_chunk_id" in plan, plan
+
+
+def test_metadata_filter_accepts_any_key(rag):
+    """非 ASCII、含引号或 % 的元数据键转义后写入，不报错也不影响索引键"""
+    params = {}
+    condition = rag._build_metadata_filter({"分类": "a", "it's": "b", "50%": "c", "knowledge_id": "7"}, params)
+    assert rag._execute_query(f"SELECT e.id FROM langchain_pg_embedding e WHERE {condition}", params) == []
+
+    plan = _explain(f"SELECT e.id FROM langchain_pg_embedding e WHERE {condition}", params)
+    assert "ix_embedding_meta_knowledge_id" in plan, plan
+
+
+def test_filtered_search_without_iterative_scan_returns_k(rag, monkeypatch):
+    """不支持迭代扫描时，过滤后结果不足 k 条改为精确检索"""
+    monkeypatch.setattr(PgvectorSchema, "_vector_version", (0, 7, 4))
+    req = DocumentRetrieverRequest(index_name=rag.index_name, search_query="service 42", k=10,
+                                   metadata_filter={"knowledge_id": "7"})
+    rows = rag._query_by_vector(req, rag.embeddings.embed_query(req.search_query), req.k)
+    assert len(rows) == 10
+    assert all(row["cmetadata"]["knowledge_id"] == "7" for row in rows)
@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from langchain_core.embeddings import Embeddings
+from langchain_postgres import PGVector
+from sanic.log import logger
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from src.core.sanic_plus.env.core_settings import core_settings
+
+
+class PgvectorStoreManager:
+    """pgvector 连接池与向量存储缓存
+
+    - 同一数据库地址在进程内共用一个 SQLAlchemy Engine（自带连接池），
+      向量检索和原生 SQL 都从这个连接池取连接
+    - PGVector 按 (索引名, Embedding 模型) 缓存，避免每次检索都重新建表检查、建集合
+    """
+
+    _engines = {}
+    _stores = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_engine(cls, db_uri: str = '') -> Engine:
+        db_uri = db_uri or core_settings.db_uri
+        engine = cls._engines.get(db_uri)
+        if engine is None:
+            with cls._lock:
+                engine = cls._engines.get(db_uri)
+                if engine is None:
+                    engine = create_engine(
+                        db_uri,
+                        pool_size=core_settings.db_pool_size,
+                        max_overflow=core_settings.db_max_overflow,
+                        pool_recycle=core_settings.db_pool_recycle,
+                        pool_pre_ping=True,
+                    )
+                    cls._engines[db_uri] = engine
+        return engine
+
+    @classmethod
+    def get_store(cls, index_name: str, embed_key: Hashable,
+                  embedding_factory: Callable[[], Embeddings]) -> PGVector:
+        """获取索引对应的向量存储，embed_key 标识 Embedding 模型，未命中时调用 embedding_factory 创建"""
+        key = (index_name, embed_key)
+        with cls._lock:
+            store = cls._stores.get(key)
+            if store is not None:
+                cls._stores.move_to_end(key)
+                return store
+
+        store = PGVector(
+            embeddings=embedding_factory(),
+            collection_name=index_name,
+            connection=cls.get_engine(),
+            use_jsonb=True,
+        )
+        with cls._lock:
+            cls._stores[key] = store
+            cls._stores.move_to_end(key)
+            while len(cls._stores) > core_settings.pgvector_store_cache_size:
+                cls._stores.popitem(last=False)
+        logger.debug(f"向量存储缓存新增 - 索引: {index_name}, 缓存数: {len(cls._stores)}")
+        return store
+
+    @classmethod
+    def evict(cls, index_name: str) -> None:
+        """索引被删除后清理对应的向量存储缓存"""
+        with cls._lock:
+            for key in [key for key in cls._stores if key[0] == index_name]:
+                del cls._stores[key]
@@ -5,6 +5,51 @@ class CoreSettings(BaseSettings):
     mode: str = 'PROD'
     secret_key: str = ''
     db_uri: str = ''
+    # PostgreSQL 连接池，同一 db_uri 在进程内共用
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle: int = 1800
+    # pgvector 向量存储缓存数量（按索引和 Embedding 模型缓存）与并发检索线程数
+    pgvector_store_cache_size: int = 128
+    pgvector_search_workers: int = 8
+    # 文档导入任务：导入进程数（每个进程同一时刻加载/OCR 一个文件），
+    # 每个导入进程内分块、向量化、写入的线程数，以及向量化批大小
+    ingest_load_workers: int = 2
+    ingest_chunk_workers: int = 2
+    ingest_embed_workers: int = 4
+    ingest_store_workers: int = 2
+    ingest_embed_batch_size: int = 64
+    # 导入任务超时（秒）：导入进程按 heartbeat 间隔刷新执行中任务的心跳，
+    # 超过 stale 时间未刷新（导入进程已退出）或排队超过 pending 时间的任务标记为失败，
+    # 同步导入请求最多等待 wait 时间
+    ingest_job_heartbeat_interval: int = 30
+    ingest_job_stale_timeout: int = 300
+    ingest_job_pending_timeout: int = 3600
+    ingest_job_wait_timeout: int = 1800
+    # OCR：本地模型（PaddleOCR）池大小（每个实例常驻一份模型，内存充足时再调大）、
+    # 远程 OCR 服务并发数、每批最多图片数、内存缓存条数、
+    # 是否在 PostgreSQL 中持久化识别结果、持久化结果保留天数（0 表示不清理）
+    ocr_local_pool_size: int = 1
+    ocr_remote_concurrency: int = 4
+    ocr_batch_size: int = 4
+    ocr_cache_size: int = 2000
+    ocr_cache_persistent: bool = True
+    ocr_cache_retention_days: int = 30
+    # PDF 页面解析进程数（不超过 CPU 核数），小于等于 1 时在加载文件的进程内逐页解析
+    pdf_page_workers: int = 4
+    # 向量化服务：合批大小与等待时间、每个模型同时执行的批次数、
+    # 进程内保留的远程模型配置数（超出时关闭最久未使用的配置）、内存缓存条数、
+    # 是否在 PostgreSQL 中持久化文档向量、持久化向量未被读取的保留天数（0 表示不清理）、
+    # 统计日志间隔
+    embed_batch_size: int = 64
+    embed_batch_wait_ms: int = 5
+    embed_remote_concurrency: int = 4
+    embed_local_concurrency: int = 1
+    embed_remote_instance_limit: int = 16
+    embed_cache_size: int = 20000
+    embed_cache_persistent: bool = True
+    embed_cache_retention_days: int = 30
+    embed_metrics_log_interval: int = 60
     elasticsearch_url: str = ''
     elasticsearch_password: str = ''
     admin_password: str = ''
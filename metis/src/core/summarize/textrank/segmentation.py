@@ -38,13 +38,17 @@ class WordSegmentation(object):
         use_stop_words         -- 若为True，则利用停止词集合来过滤（去掉停止词）
         use_speech_tags_filter -- 是否基于词性进行过滤。若为True，则使用self.default_speech_tag_filter过滤。否则，不过滤。
         """
-        text = util.as_text(text)
-        jieba_result = pseg.cut(text)
+        return self.filter(self.cut(text), lower=lower, use_stop_words=use_stop_words,
+                           use_speech_tags_filter=use_speech_tags_filter)
+
+    def cut(self, text):
+        """jieba 分词并标注词性，结果可交给 filter 按不同条件重复过滤，不必再次分词"""
+        return list(pseg.cut(util.as_text(text)))
 
+    def filter(self, jieba_result, lower=True, use_stop_words=True, use_speech_tags_filter=False):
+        """过滤 cut 的结果，参数含义同 segment"""
         if use_speech_tags_filter is True:
             jieba_result = [w for w in jieba_result if w.flag in self.default_speech_tag_filter]
-        else:
-            jieba_result = [w for w in jieba_result]
 
         # 去除特殊符号
         word_list = [w.word.strip() for w in jieba_result if w.flag != 'x']
@@ -110,19 +114,18 @@ class Segmentation(object):
     def segment(self, text, lower=False):
         text = util.as_text(text)
         sentences = self.ss.segment(text)
-        words_no_filter = self.ws.segment_sentences(sentences=sentences,
-                                                    lower=lower,
-                                                    use_stop_words=False,
-                                                    use_speech_tags_filter=False)
-        words_no_stop_words = self.ws.segment_sentences(sentences=sentences,
-                                                        lower=lower,
-                                                        use_stop_words=True,
-                                                        use_speech_tags_filter=False)
-
-        words_all_filters = self.ws.segment_sentences(sentences=sentences,
-                                                      lower=lower,
-                                                      use_stop_words=True,
-                                                      use_speech_tags_filter=True)
+        words_no_filter = []
+        words_no_stop_words = []
+        words_all_filters = []
+        # 每个句子只分词一次，三种过滤结果都从同一次分词得到
+        for sentence in sentences:
+            jieba_result = self.ws.cut(sentence)
+            words_no_filter.append(self.ws.filter(jieba_result, lower=lower, use_stop_words=False,
+                                                  use_speech_tags_filter=False))
+            words_no_stop_words.append(self.ws.filter(jieba_result, lower=lower, use_stop_words=True,
+                                                      use_speech_tags_filter=False))
+            words_all_filters.append(self.ws.filter(jieba_result, lower=lower, use_stop_words=True,
+                                                    use_speech_tags_filter=True))
 
         return util.AttrDict(
             sentences=sentences,
@@ -1,6 +1,7 @@
 import math
-import networkx as nx
+
 import numpy as np
+import scipy.sparse as sp
 
 sentence_delimiters = ['?', '!', ';', '？', '！', '。', '；', '……', '…', '\n']
 allow_speech_tags = ['an', 'i', 'j', 'l', 'n', 'nr', 'nrfg', 'ns', 'nt', 'nz', 't', 'v', 'vd', 'vn', 'eng']
@@ -75,6 +76,67 @@ def get_similarity(word_list1, word_list2):
     return co_occur_num / denominator
 
 
+def get_similarity_matrix(word_lists):
+    """一次计算所有句子两两之间的 get_similarity，返回 scipy.sparse.csr_matrix。
+
+    句子转成 句子 × 单词 的 0/1 稀疏矩阵 B，B @ B.T 即两两共现的不同单词数，再除以 log(len1) + log(len2)；
+    共现数或分母为 0 的句子对不出现在结果中，与 get_similarity 返回 0 一致。
+
+    Keyword arguments:
+    word_lists  --  二维列表，子列表代表句子，由单词组成
+    """
+    sentences_num = len(word_lists)
+    vocabulary = {}
+    rows, cols = [], []
+    for row, word_list in enumerate(word_lists):
+        for word in dict.fromkeys(word_list):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    presence = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(sentences_num, len(vocabulary)))
+    co_occur = (presence @ presence.T).tocoo()
+
+    # 空句子与任何句子都没有共现，取 log(1) 只为避免 log(0)
+    lengths = np.array([max(len(word_list), 1) for word_list in word_lists], dtype=float)
+    log_lengths = np.log(lengths)
+    denominator = log_lengths[co_occur.row] + log_lengths[co_occur.col]
+    keep = np.abs(denominator) >= 1e-12
+    return sp.csr_matrix((co_occur.data[keep] / denominator[keep], (co_occur.row[keep], co_occur.col[keep])),
+                         shape=(sentences_num, sentences_num))
+
+
+def pagerank(graph, alpha=0.85, max_iter=100, tol=1.0e-6):
+    """在稀疏带权邻接矩阵上做幂迭代 PageRank，返回各节点得分（np.ndarray）。
+
+    计算方式与 networkx.pagerank 一致：按行归一化得到转移概率，没有出边的节点把得分均匀分给所有节点，
+    两次迭代的 L1 误差小于 N * tol 时收敛；达到 max_iter 仍未收敛时返回最后一次迭代的结果。
+
+    Keyword arguments:
+    graph     --  N × N 的邻接矩阵（scipy.sparse 或 numpy），graph[i, j] 为 i 到 j 的边权重
+    alpha     --  阻尼系数
+    max_iter  --  最大迭代次数
+    tol       --  收敛阈值
+    """
+    nodes_num = graph.shape[0]
+    if nodes_num == 0:
+        return np.zeros(0)
+
+    graph = sp.csr_matrix(graph, dtype=float)
+    out_weights = np.asarray(graph.sum(axis=1)).ravel()
+    dangling = out_weights == 0
+    inverse = np.zeros(nodes_num)
+    inverse[~dangling] = 1.0 / out_weights[~dangling]
+    # 转置后 x @ A 变为 A.T @ x，按行存储便于稀疏矩阵乘向量
+    transition = (sp.diags(inverse) @ graph).T.tocsr()
+
+    scores = np.full(nodes_num, 1.0 / nodes_num)
+    for _ in range(max_iter):
+        last = scores
+        scores = alpha * (transition @ last + last[dangling].sum() / nodes_num) + (1 - alpha) / nodes_num
+        if np.abs(scores - last).sum() < nodes_num * tol:
+            break
+    return scores
+
+
 def sort_words(vertex_source, edge_source, window=2, pagerank_config={'alpha': 0.85, }):
     """将单词按关键程度从大到小排序
 
@@ -97,18 +159,20 @@ def sort_words(vertex_source, edge_source, window=2, pagerank_config={'alpha': 0
                 index_word[words_number] = word
                 words_number += 1
 
-    graph = np.zeros((words_number, words_number))
-
+    edges = set()
     for word_list in _edge_source:
         for w1, w2 in combine(word_list, window):
             if w1 in word_index and w2 in word_index:
                 index1 = word_index[w1]
                 index2 = word_index[w2]
-                graph[index1][index2] = 1.0
-                graph[index2][index1] = 1.0
-    nx_graph = nx.from_numpy_array(graph)
-    scores = nx.pagerank(nx_graph, **pagerank_config)  # this is a dict
-    sorted_scores = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+                edges.add((index1, index2))
+                edges.add((index2, index1))
+    rows = [index1 for index1, _ in edges]
+    cols = [index2 for _, index2 in edges]
+    graph = sp.csr_matrix((np.ones(len(edges)), (rows, cols)), shape=(words_number, words_number))
+
+    scores = pagerank(graph, **pagerank_config)
+    sorted_scores = sorted(enumerate(scores.tolist()), key=lambda item: item[1], reverse=True)
     for index, score in sorted_scores:
         item = AttrDict(word=index_word[index], weight=score)
         sorted_words.append(item)
@@ -128,17 +192,20 @@ def sort_sentences(sentences, words, sim_func=get_similarity, pagerank_config={'
     sorted_sentences = []
     _source = words
     sentences_num = len(_source)
-    graph = np.zeros((sentences_num, sentences_num))
-
-    for x in range(sentences_num):  # 使用内置的 range
-        for y in range(x, sentences_num):  # 使用内置的 range
-            similarity = sim_func(_source[x], _source[y])
-            graph[x, y] = similarity
-            graph[y, x] = similarity
 
-    nx_graph = nx.from_numpy_array(graph)
-    scores = nx.pagerank(nx_graph, **pagerank_config)  # this is a dict
-    sorted_scores = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if sim_func is get_similarity:
+        graph = get_similarity_matrix(_source)
+    else:
+        # 自定义相似度函数只能逐对计算
+        graph = np.zeros((sentences_num, sentences_num))
+        for x in range(sentences_num):  # 使用内置的 range
+            for y in range(x, sentences_num):  # 使用内置的 range
+                similarity = sim_func(_source[x], _source[y])
+                graph[x, y] = similarity
+                graph[y, x] = similarity
+
+    scores = pagerank(graph, **pagerank_config)
+    sorted_scores = sorted(enumerate(scores.tolist()), key=lambda item: item[1], reverse=True)
 
     for index, score in sorted_scores:
         item = AttrDict(index=index, sentence=sentences[index], weight=score)
@@ -0,0 +1,56 @@
+"""TextRank 稀疏实现回归测试
+
+在参考语料上对比 util 的稀疏相似度矩阵、幂迭代 PageRank 与原先逐对计算 + networkx 的结果
+"""
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.core.summarize.textrank import util
+from src.core.summarize.textrank.textrank_benchmark import build_corpus, legacy_sort_sentences
+
+REFERENCE_WORDS = [
+    ['文本', '摘要', '抽取', '关键', '句子'],
+    ['句子', '相似度', '共现', '单词', '数量'],
+    ['图', '节点', '句子', '边', '相似度'],
+    ['PageRank', '迭代', '计算', '节点', '得分'],
+    ['得分', '高', '句子', '作为', '摘要'],
+    ['摘要'],
+    [],
+    ['停用词', '过滤', '词性', '过滤'],
+    ['文本', '文本', '文本'],
+    ['jieba', '分词', '词性', '标注'],
+]
+
+
+@pytest.mark.parametrize("words", [REFERENCE_WORDS, build_corpus(300, vocabulary_size=500)])
+def test_similarity_matrix_matches_pairwise(words):
+    matrix = util.get_similarity_matrix(words).toarray()
+    for x in range(len(words)):
+        for y in range(len(words)):
+            assert matrix[x, y] == pytest.approx(util.get_similarity(words[x], words[y]))
+
+
+@pytest.mark.parametrize("words", [REFERENCE_WORDS, build_corpus(300, vocabulary_size=500)])
+def test_sort_sentences_matches_networkx(words):
+    sentences = [''.join(word_list) for word_list in words]
+    ranked = [item.index for item in util.sort_sentences(sentences, words)]
+    assert ranked == legacy_sort_sentences(words)
+
+
+def test_sort_words_matches_networkx():
+    words = build_corpus(200, vocabulary_size=300)
+    word_index = {}
+    for word_list in words:
+        for word in word_list:
+            word_index.setdefault(word, len(word_index))
+    graph = np.zeros((len(word_index), len(word_index)))
+    for word_list in words:
+        for w1, w2 in util.combine(word_list, 2):
+            graph[word_index[w1], word_index[w2]] = graph[word_index[w2], word_index[w1]] = 1.0
+    scores = nx.pagerank(nx.from_numpy_array(graph))
+
+    result = util.sort_words(words, words)
+    for item in result:
+        assert item.weight == pytest.approx(scores[word_index[item.word]])
+    assert [item.weight for item in result] == pytest.approx(sorted(scores.values(), reverse=True))
@@ -1,13 +1,10 @@
+import asyncio
 import json as js
-import tempfile
 from typing import Dict, Any
 
-from sanic.log import logger
 from sanic import Blueprint, json
 from sanic_ext import validate
 
-from src.core.loader.raw_loader import RawLoader
-from src.core.loader.website_loader import WebSiteLoader
 from src.core.sanic_plus.auth.api_auth import auth
 from src.web.entity.rag.base.document_count_request import DocumentCountRequest
 from src.web.entity.rag.base.document_delete_request import DocumentDeleteRequest
@@ -15,7 +12,10 @@ from src.web.entity.rag.base.document_list_request import DocumentListRequest
 from src.web.entity.rag.base.document_metadata_update_request import DocumentMetadataUpdateRequest
 from src.web.entity.rag.base.document_retriever_request import DocumentRetrieverRequest
 from src.web.entity.rag.base.index_delete_request import IndexDeleteRequest
+from src.web.entity.rag.base.ingest_job_request import IngestJobRequest
 from src.core.rag.naive_rag.pgvector.pgvector_rag import PgvectorRag
+from src.web.services.ingest_job_service import IngestJobService, INGEST_JOB_FINISHED
+from src.web.services.ingest_job_store import INGEST_JOB_SUCCESS
 from src.web.services.rag_service import RagService
 
 naive_rag_api_router = Blueprint("naive_rag_api_router", url_prefix="/rag")
@@ -27,6 +27,7 @@ def _parse_common_ingest_params(request) -> Dict[str, Any]:
     """解析 ingest 接口的公共参数"""
     return {
         'is_preview': request.form.get('preview', 'false').lower() == 'true',
+        'async_job': request.form.get('async_job', 'false').lower() == 'true',
         'chunk_mode': request.form.get('chunk_mode'),
         'metadata': js.loads(request.form.get('metadata', '{}')),
         'knowledge_base_id': request.form.get('knowledge_base_id'),
@@ -37,35 +38,31 @@ def _parse_common_ingest_params(request) -> Dict[str, Any]:
     }
 
 
-def _process_documents_pipeline(docs, title, params, content_type, request):
+def _parse_form(request) -> Dict[str, Any]:
+    """表单参数转为普通字典，供导入进程中的加载器、分块器读取"""
+    return {key: request.form.get(key) for key in request.form}
+
+
+async def _process_documents_pipeline(request, source, params):
     """
     统一的文档处理流水线
 
+    加载、OCR、分块、向量化和写入都不在事件循环中执行：
+    - 预览模式在线程中加载并分块，直接返回分块结果
+    - 正式导入提交为导入任务；async_job=true 时立即返回 job_id，
+      否则等待任务结束后返回分块数；任务失败返回 500，
+      等待超时返回 504（任务继续执行）
+
     Args:
-        docs: 原始文档列表
-        title: 文档标题
-        params: 从 _parse_common_ingest_params 获取的参数字典
-        content_type: 内容类型描述（用于日志）
         request: HTTP请求对象
+        source: 文档来源，包含来源类型、标题、内容类型描述（用于日志）和表单参数
+        params: 从 _parse_common_ingest_params 获取的参数字典
 
     Returns:
         JSON响应
     """
-    # 处理文档元数据
-    docs = RagService.prepare_documents_metadata(
-        docs,
-        is_preview=params['is_preview'],
-        title=title,
-        knowledge_id=params['knowledge_id']
-    )
-
-    # 执行文档分块并记录日志
-    chunked_docs = RagService.perform_chunking(
-        docs, params['chunk_mode'], request, params['is_preview'], content_type
-    )
-
-    # 处理预览模式
     if params['is_preview']:
+        chunked_docs = await IngestJobService.preview(source, params)
         return json({
             "status": "success",
             "message": "",
@@ -73,19 +70,18 @@ def _process_documents_pipeline(docs, title, params, content_type, request):
             "chunks_size": len(chunked_docs)
         })
 
-    # 执行文档存储
-    logger.debug(
-        f"开始存储{content_type}{len(chunked_docs)}个文档分块，将自动添加created_time字段")
-    RagService.store_documents_to_pg(
-        chunked_docs=chunked_docs,
-        knowledge_base_id=params['knowledge_base_id'],
-        embed_model_base_url=params['embed_model_base_url'],
-        embed_model_api_key=params['embed_model_api_key'],
-        embed_model_name=params['embed_model_name'],
-        metadata=params['metadata']
-    )
+    job_id = await IngestJobService.submit(request.app, source, params)
+    if params['async_job']:
+        return json({"status": "success", "message": "", "job_id": job_id})
 
-    return json({"status": "success", "message": "", "chunks_size": len(chunked_docs)})
+    job = await IngestJobService.wait(job_id)
+    if job is not None and job['status'] not in INGEST_JOB_FINISHED:
+        message = "导入任务等待超时，可通过 ingest_job_status 查询进度"
+        return json({"status": "error", "message": message, "job_id": job_id}, status=504)
+    if job is None or job['status'] != INGEST_JOB_SUCCESS:
+        message = (job['error'] or job['status']) if job else "导入任务不存在"
+        return json({"status": "error", "message": message, "job_id": job_id}, status=500)
+    return json({"status": "success", "message": "", "chunks_size": job['total_chunks'], "job_id": job_id})
 
 
 @naive_rag_api_router.post("/naive_rag_test")
@@ -112,42 +108,15 @@ async def count_index_document(request, body: DocumentCountRequest):
 @auth.login_required
 async def custom_content_ingest(request):
     """自定义内容摄取接口"""
-    content = request.form.get('content')
+    source = {
+        'type': 'content',
+        'content': request.form.get('content'),
+        'title': "自定义内容",
+        'content_type': "自定义内容",
+        'form': _parse_form(request),
+    }
     params = _parse_common_ingest_params(request)
-
-    # 加载自定义内容
-    loader = RawLoader(content)
-    docs = loader.load()
-
-    # 对于自定义内容，如果不是预览模式，需要手动处理分块
-    if not params['is_preview']:
-        # 处理文档元数据
-        docs = RagService.prepare_documents_metadata(
-            docs,
-            is_preview=params['is_preview'],
-            title="自定义内容",
-            knowledge_id=params['knowledge_id']
-        )
-
-        # 执行文档分块
-        chunker = RagService.get_chunker(params['chunk_mode'], request)
-        chunked_docs = chunker.chunk(docs)
-
-        # 执行文档存储
-        logger.debug(
-            f"开始存储{len(chunked_docs)}个文档分块，将自动添加created_time字段以支持时间排序")
-        RagService.store_documents_to_pg(
-            chunked_docs=chunked_docs,
-            knowledge_base_id=params['knowledge_base_id'],
-            embed_model_base_url=params['embed_model_base_url'],
-            embed_model_api_key=params['embed_model_api_key'],
-            embed_model_name=params['embed_model_name'],
-            metadata=params['metadata']
-        )
-        return json({"status": "success", "message": "", "chunks_size": len(chunked_docs)})
-    else:
-        # 预览模式使用统一流水线
-        return _process_documents_pipeline(docs, "自定义内容", params, "自定义内容", request)
+    return await _process_documents_pipeline(request, source, params)
 
 
 @naive_rag_api_router.post("/website_ingest")
@@ -155,15 +124,16 @@ async def custom_content_ingest(request):
 async def website_ingest(request):
     """网站内容摄取接口"""
     url = request.form.get('url')
-    max_depth = int(request.form.get('max_depth', 1))
+    source = {
+        'type': 'website',
+        'url': url,
+        'max_depth': int(request.form.get('max_depth', 1)),
+        'title': url,
+        'content_type': "网站内容",
+        'form': _parse_form(request),
+    }
     params = _parse_common_ingest_params(request)
-
-    # 加载网站内容
-    loader = WebSiteLoader(url, max_depth)
-    docs = loader.load()
-
-    # 使用统一的文档处理流水线
-    return _process_documents_pipeline(docs, url, params, "网站内容", request)
+    return await _process_documents_pipeline(request, source, params)
 
 
 @naive_rag_api_router.post("/file_ingest")
@@ -185,20 +155,38 @@ async def file_ingest(request):
             "message": f"不支持的文件类型。支持的类型: {', '.join(allowed_types)}"
         })
 
-    load_mode = request.form.get('load_mode', 'full')
+    # 临时文件由加载阶段删除
+    source = {
+        'type': 'file',
+        'path': await asyncio.to_thread(IngestJobService.save_upload, file.body, file_extension),
+        'extension': file_extension,
+        'load_mode': request.form.get('load_mode', 'full'),
+        'title': file.name,
+        'content_type': "文件内容",
+        'form': _parse_form(request),
+    }
+    return await _process_documents_pipeline(request, source, params)
 
-    with tempfile.NamedTemporaryFile(delete=True, suffix=f'.{file_extension}') as temp_file:
-        temp_file.write(file.body)
-        temp_file.flush()
-        temp_path = temp_file.name
 
-        # 加载文件内容
-        loader = RagService.get_file_loader(
-            temp_path, file_extension, load_mode, request)
-        docs = loader.load()
+@naive_rag_api_router.post("/ingest_job_status")
+@auth.login_required
+@validate(json=IngestJobRequest)
+async def ingest_job_status(request, body: IngestJobRequest):
+    """查询导入任务的状态与进度"""
+    job = await IngestJobService.get(body.job_id)
+    if job is None:
+        return json({"status": "error", "message": "导入任务不存在"}, status=404)
+    return json({"status": "success", "message": "", "job": job})
 
-        # 使用统一的文档处理流水线
-        return _process_documents_pipeline(docs, file.name, params, "文件内容", request)
+
+@naive_rag_api_router.post("/cancel_ingest_job")
+@auth.login_required
+@validate(json=IngestJobRequest)
+async def cancel_ingest_job(request, body: IngestJobRequest):
+    """取消未结束的导入任务，已写入的分块会被清理"""
+    if not await IngestJobService.cancel(body.job_id):
+        return json({"status": "error", "message": "导入任务不存在或已结束"}, status=404)
+    return json({"status": "success", "message": ""})
 
 
 @naive_rag_api_router.post("/delete_index")
@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+
+class IngestJobRequest(BaseModel):
+    job_id: str
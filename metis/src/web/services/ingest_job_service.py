@@ -0,0 +1,297 @@
+import asyncio
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+from sanic.log import logger
+
+from src.core.loader.pdf_loader import PDFLoader
+from src.core.loader.raw_loader import RawLoader
+from src.core.loader.website_loader import WebSiteLoader
+from src.core.rag.naive_rag.pgvector.pgvector_rag import PgvectorRag
+from src.core.sanic_plus.env.core_settings import core_settings
+from src.web.entity.rag.base.document_delete_request import DocumentDeleteRequest
+from src.web.entity.rag.base.document_ingest_request import DocumentIngestRequest
+from src.web.services.ingest_job_store import (IngestJobStore, INGEST_JOB_CANCELLED, INGEST_JOB_FAILED,
+                                               INGEST_JOB_RUNNING, INGEST_JOB_SUCCESS)
+from src.web.services.rag_service import RagService
+
+# 同步模式下等待任务结束时轮询任务状态的间隔（秒）
+INGEST_JOB_POLL_INTERVAL = 1
+
+INGEST_JOB_FINISHED = (INGEST_JOB_SUCCESS, INGEST_JOB_FAILED, INGEST_JOB_CANCELLED)
+
+
+class IngestJobCancelled(Exception):
+    """任务已被取消或已结束，停止处理"""
+
+
+def load_documents(source: Dict[str, Any]) -> List[Document]:
+    """加载阶段：读取文件（含 OCR）、网站或自定义内容，文件加载后删除临时文件"""
+    if source['type'] == 'file':
+        try:
+            loader = RagService.get_file_loader(
+                source['path'], source['extension'], source['load_mode'], source['form'])
+            return loader.load()
+        finally:
+            if os.path.exists(source['path']):
+                os.remove(source['path'])
+    if source['type'] == 'website':
+        return WebSiteLoader(source['url'], source['max_depth']).load()
+    return RawLoader(source['content']).load()
+
+
+def chunk_documents(docs: List[Document], source: Dict[str, Any], params: Dict[str, Any]) -> List[Document]:
+    """分块阶段：补充文档元数据后按分块模式分块"""
+    docs = RagService.prepare_documents_metadata(
+        docs,
+        is_preview=params['is_preview'],
+        title=source['title'],
+        knowledge_id=params['knowledge_id']
+    )
+    return RagService.perform_chunking(
+        docs, params['chunk_mode'], source['form'], params['is_preview'], source['content_type'])
+
+
+class IngestWorker:
+    """文档导入任务执行进程
+
+    由 Sanic 作为托管进程启动（core_settings.ingest_load_workers 个），从共享队列中取任务，
+    流水线为 加载（含 OCR）→ 分块 → 向量化 → 写入：
+    - 加载与 OCR 是 CPU 密集型，在进程主线程中执行，每个进程同一时刻只加载一个文件
+    - 分块、向量化、写入各有独立的线程池，并发数分别由 ingest_chunk_workers /
+      ingest_embed_workers / ingest_store_workers 限制；
+      分块后按 ingest_embed_batch_size 分批，前一批写入时后一批已在向量化
+    - 主线程把加载完成的任务交给后续阶段后立即加载下一个任务，
+      加载与向量化互不阻塞；
+      已加载未完成的任务数受限，避免后续阶段积压
+    - 心跳线程按 ingest_job_heartbeat_interval 刷新本进程执行中的任务，
+      并把其他进程遗留的过期任务标记为失败
+    """
+
+    def __init__(self):
+        self.rag = PgvectorRag()
+        self.chunk_executor = ThreadPoolExecutor(core_settings.ingest_chunk_workers,
+                                                 thread_name_prefix='ingest-chunk')
+        self.embed_executor = ThreadPoolExecutor(core_settings.ingest_embed_workers,
+                                                 thread_name_prefix='ingest-embed')
+        self.store_executor = ThreadPoolExecutor(core_settings.ingest_store_workers,
+                                                 thread_name_prefix='ingest-store')
+        self.inflight = threading.BoundedSemaphore(
+            core_settings.ingest_chunk_workers + core_settings.ingest_embed_workers)
+        # 本进程执行中的任务，由心跳线程刷新
+        self.active_jobs = set()
+        self.active_lock = threading.Lock()
+
+    @classmethod
+    def serve(cls, job_queue) -> None:
+        """托管进程入口，PDF 页面解析在本进程的进程池中并行，见 PDFLoader.enable_page_workers"""
+        PDFLoader.enable_page_workers()
+        cls().run(job_queue)
+
+    def run(self, job_queue) -> None:
+        threading.Thread(target=self._heartbeat, daemon=True, name='ingest-heartbeat').start()
+        while True:
+            job = job_queue.get()
+            self.inflight.acquire()
+            with self.active_lock:
+                self.active_jobs.add(job['job_id'])
+            try:
+                docs = self._load(job)
+            except Exception as e:
+                self._release(job)
+                self._finish(job, INGEST_JOB_FAILED, error=str(e))
+                continue
+            if docs is None:
+                self._release(job)
+                continue
+            threading.Thread(target=self._process, args=(job, docs), daemon=True).start()
+
+    def _release(self, job: Dict[str, Any]) -> None:
+        with self.active_lock:
+            self.active_jobs.discard(job['job_id'])
+        self.inflight.release()
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(core_settings.ingest_job_heartbeat_interval)
+            with self.active_lock:
+                job_ids = list(self.active_jobs)
+            try:
+                if job_ids:
+                    IngestJobStore.touch(job_ids)
+                expired = IngestJobStore.expire_stale(core_settings.ingest_job_stale_timeout,
+                                                      core_settings.ingest_job_pending_timeout)
+                if expired:
+                    logger.warning(f"导入任务超时，已标记为失败 - 任务数: {expired}")
+            except Exception as e:
+                logger.error(f"导入任务心跳更新失败 - 错误: {e}")
+
+    def _load(self, job: Dict[str, Any]) -> Optional[List[Document]]:
+        source = job['source']
+        if not IngestJobStore.update(job['job_id'], status=INGEST_JOB_RUNNING, stage='loading'):
+            logger.info(f"导入任务已取消，跳过 - 任务: {job['job_id']}")
+            if source['type'] == 'file' and os.path.exists(source['path']):
+                os.remove(source['path'])
+            return None
+        logger.info(f"导入任务开始加载 - 任务: {job['job_id']}, 来源: {source['title']}")
+        return load_documents(source)
+
+    def _process(self, job: Dict[str, Any], docs: List[Document]) -> None:
+        job_id, params = job['job_id'], job['params']
+        embed_futures, store_futures = [], []
+        try:
+            self._update(job_id, stage='chunking')
+            chunked_docs = self.chunk_executor.submit(chunk_documents, docs, job['source'], params).result()
+            RagService.prepare_chunk_metadata(chunked_docs, params['metadata'])
+            self._update(job_id, stage='embedding', total_chunks=len(chunked_docs))
+
+            batch_size = core_settings.ingest_embed_batch_size
+            requests = [
+                DocumentIngestRequest(
+                    index_name=params['knowledge_base_id'],
+                    docs=chunked_docs[start:start + batch_size],
+                    embed_model_base_url=params['embed_model_base_url'],
+                    embed_model_api_key=params['embed_model_api_key'],
+                    embed_model_name=params['embed_model_name'],
+                )
+                for start in range(0, len(chunked_docs), batch_size)
+            ]
+            embed_futures.extend(self.embed_executor.submit(self.rag.embed_documents, req) for req in requests)
+
+            # 按批次顺序，向量化完成即提交写入，写入与后续批次的向量化并行
+            embedded = 0
+            for req, embed_future in zip(requests, embed_futures):
+                embeddings = embed_future.result()
+                embedded += len(req.docs)
+                self._update(job_id, embedded_chunks=embedded)
+                store_futures.append(self.store_executor.submit(self.rag.store_embeddings, req, embeddings))
+
+            stored = 0
+            for req, store_future in zip(requests, store_futures):
+                store_future.result()
+                stored += len(req.docs)
+                self._update(job_id, stage='storing', stored_chunks=stored)
+
+            self._finish(job, INGEST_JOB_SUCCESS, stage='done')
+            logger.info(f"导入任务完成 - 任务: {job_id}, 分块数: {len(chunked_docs)}")
+        except IngestJobCancelled:
+            logger.info(f"导入任务已取消 - 任务: {job_id}")
+            self._rollback(job, embed_futures, store_futures)
+        except Exception as e:
+            logger.exception(f"导入任务失败 - 任务: {job_id}, 错误: {e}")
+            self._rollback(job, embed_futures, store_futures)
+            self._finish(job, INGEST_JOB_FAILED, error=str(e))
+        finally:
+            self._release(job)
+
+    @staticmethod
+    def _update(job_id: str, **fields) -> None:
+        if not IngestJobStore.update(job_id, **fields):
+            raise IngestJobCancelled()
+
+    @staticmethod
+    def _finish(job: Dict[str, Any], status: str, **fields) -> None:
+        try:
+            IngestJobStore.update(job['job_id'], status=status, **fields)
+        except Exception as e:
+            logger.error(f"导入任务状态更新失败 - 任务: {job['job_id']}, 错误: {e}")
+
+    def _rollback(self, job: Dict[str, Any], embed_futures: list, store_futures: list) -> None:
+        """取消未开始的批次，等待已开始的写入结束后删除本任务写入的分块
+
+        避免重试时重复写入
+        """
+        for future in embed_futures:
+            future.cancel()
+        chunk_ids = []
+        for future in store_futures:
+            try:
+                chunk_ids.extend(future.result())
+            except Exception:
+                pass
+        if chunk_ids:
+            self.rag.delete_document(DocumentDeleteRequest(chunk_ids=chunk_ids, knowledge_ids=[], keep_qa=True))
+            logger.info(f"导入任务回滚 - 任务: {job['job_id']}, 删除分块: {len(chunk_ids)}")
+
+
+class IngestJobService:
+    """提交与查询文档导入任务
+
+    任务放入 Sanic 主进程创建的共享队列（app.shared_ctx.ingest_queue），
+    由 IngestWorker 托管进程执行；
+    单进程模式下没有共享队列，改为在当前进程的后台线程中执行。
+    查询任务时先检查心跳，导入进程退出后遗留的任务标记为失败，不会一直处于执行中
+    """
+
+    _local_queue = None
+    _local_lock = threading.Lock()
+
+    @staticmethod
+    def save_upload(body: bytes, extension: str) -> str:
+        """上传文件写入临时文件，由加载阶段负责删除"""
+        fd, path = tempfile.mkstemp(suffix=f'.{extension}', prefix='metis_ingest_')
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(body)
+        return path
+
+    @classmethod
+    def _get_queue(cls, app):
+        job_queue = getattr(app.shared_ctx, 'ingest_queue', None)
+        if job_queue is not None:
+            return job_queue
+        with cls._local_lock:
+            if cls._local_queue is None:
+                cls._local_queue = queue.Queue()
+                threading.Thread(target=IngestWorker().run, args=(cls._local_queue,), daemon=True,
+                                 name='ingest-worker').start()
+        return cls._local_queue
+
+    @classmethod
+    async def submit(cls, app, source: Dict[str, Any], params: Dict[str, Any]) -> str:
+        """提交导入任务，返回任务 ID"""
+        job_id = str(uuid.uuid4())
+        await asyncio.to_thread(IngestJobStore.create, job_id, params['knowledge_id'], params['knowledge_base_id'])
+        cls._get_queue(app).put({'job_id': job_id, 'source': source, 'params': params})
+        logger.info(f"导入任务已提交 - 任务: {job_id}, 来源: {source['title']}")
+        return job_id
+
+    @classmethod
+    async def wait(cls, job_id: str) -> Optional[Dict[str, Any]]:
+        """等待任务结束并返回任务状态，不占用事件循环
+
+        超过 core_settings.ingest_job_wait_timeout 秒仍未结束时返回当前状态，任务继续执行
+        """
+        deadline = time.monotonic() + core_settings.ingest_job_wait_timeout
+        while True:
+            job = await cls.get(job_id)
+            if job is None or job['status'] in INGEST_JOB_FINISHED or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(INGEST_JOB_POLL_INTERVAL)
+
+    @staticmethod
+    async def preview(source: Dict[str, Any], params: Dict[str, Any]) -> List[Document]:
+        """预览只加载与分块，不落库，在线程中执行"""
+        def _preview():
+            return chunk_documents(load_documents(source), source, params)
+
+        return await asyncio.to_thread(_preview)
+
+    @staticmethod
+    async def get(job_id: str) -> Optional[Dict[str, Any]]:
+        def _get():
+            IngestJobStore.expire_stale(core_settings.ingest_job_stale_timeout,
+                                        core_settings.ingest_job_pending_timeout, job_id)
+            return IngestJobStore.get(job_id)
+
+        return await asyncio.to_thread(_get)
+
+    @staticmethod
+    async def cancel(job_id: str) -> bool:
+        return await asyncio.to_thread(IngestJobStore.cancel, job_id)
@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.core.rag.naive_rag.pgvector.pgvector_store_manager import PgvectorStoreManager
+
+INGEST_JOB_PENDING = 'pending'
+INGEST_JOB_RUNNING = 'running'
+INGEST_JOB_SUCCESS = 'success'
+INGEST_JOB_FAILED = 'failed'
+INGEST_JOB_CANCELLED = 'cancelled'
+
+INGEST_JOB_FIELDS = ('stage', 'status', 'total_chunks', 'embedded_chunks', 'stored_chunks', 'error')
+
+
+class IngestJobStore:
+    """文档导入任务状态，保存在 PostgreSQL 中，多个 Sanic worker 与导入进程共享
+
+    任务进入 success / failed / cancelled 后不再更新，update 返回 False 时执行方应停止处理；
+    执行中的任务由导入进程定时 touch 刷新 updated_at，
+    expire_stale 把心跳中断或排队过久的任务标记为失败
+    """
+
+    _table_ready = False
+
+    @classmethod
+    def setup(cls) -> None:
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS metis_ingest_job (
+                    id VARCHAR(64) PRIMARY KEY,
+                    knowledge_id VARCHAR(255),
+                    index_name VARCHAR(255),
+                    status VARCHAR(32) NOT NULL,
+                    stage VARCHAR(32) NOT NULL,
+                    total_chunks INTEGER NOT NULL DEFAULT 0,
+                    embedded_chunks INTEGER NOT NULL DEFAULT 0,
+                    stored_chunks INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """))
+        cls._table_ready = True
+
+    @classmethod
+    def create(cls, job_id: str, knowledge_id: Optional[str], index_name: Optional[str]) -> None:
+        if not cls._table_ready:
+            cls.setup()
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO metis_ingest_job (id, knowledge_id, index_name, status, stage) "
+                "VALUES (:id, :knowledge_id, :index_name, :status, 'queued')"
+            ), {'id': job_id, 'knowledge_id': knowledge_id, 'index_name': index_name, 'status': INGEST_JOB_PENDING})
+
+    @staticmethod
+    def update(job_id: str, **fields) -> bool:
+        """更新进行中的任务，任务已结束（包括被取消）时返回 False"""
+        fields = {key: value for key, value in fields.items() if key in INGEST_JOB_FIELDS}
+        assignments = ", ".join(f"{key} = :{key}" for key in fields)
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            result = conn.execute(text(
+                f"UPDATE metis_ingest_job SET {assignments}{', ' if assignments else ''}updated_at = now() "
+                "WHERE id = :job_id AND status IN ('pending', 'running')"
+            ), {**fields, 'job_id': job_id})
+            return result.rowcount > 0
+
+    @staticmethod
+    def touch(job_ids: List[str]) -> None:
+        """刷新执行中任务的心跳"""
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE metis_ingest_job SET updated_at = now() WHERE id = ANY(:job_ids) AND status = :status"
+            ), {'job_ids': job_ids, 'status': INGEST_JOB_RUNNING})
+
+    @staticmethod
+    def expire_stale(stale_timeout: int, pending_timeout: int, job_id: Optional[str] = None) -> int:
+        """把过期任务标记为失败，返回标记的任务数
+
+        过期任务：执行中超过 stale_timeout 秒没有心跳，或排队超过 pending_timeout 秒；
+        指定 job_id 时只检查该任务
+        """
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            result = conn.execute(text(
+                "UPDATE metis_ingest_job SET status = :failed, error = :error, updated_at = now() "
+                "WHERE ((status = :running AND updated_at < now() - make_interval(secs => :stale_timeout)) "
+                "OR (status = :pending AND updated_at < now() - make_interval(secs => :pending_timeout))) "
+                "AND (CAST(:job_id AS VARCHAR) IS NULL OR id = :job_id)"
+            ), {'failed': INGEST_JOB_FAILED, 'running': INGEST_JOB_RUNNING, 'pending': INGEST_JOB_PENDING,
+                'error': "导入任务超时：导入进程已退出或任务排队过久",
+                'stale_timeout': stale_timeout, 'pending_timeout': pending_timeout, 'job_id': job_id})
+            return result.rowcount
+
+    @staticmethod
+    def cancel(job_id: str) -> bool:
+        """取消未结束的任务，返回是否取消成功"""
+        engine = PgvectorStoreManager.get_engine()
+        with engine.begin() as conn:
+            result = conn.execute(text(
+                "UPDATE metis_ingest_job SET status = :status, updated_at = now() "
+                "WHERE id = :job_id AND status IN ('pending', 'running')"
+            ), {'status': INGEST_JOB_CANCELLED, 'job_id': job_id})
+            return result.rowcount > 0
+
+    @staticmethod
+    def get(job_id: str) -> Optional[Dict[str, Any]]:
+        engine = PgvectorStoreManager.get_engine()
+        with engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT id, knowledge_id, index_name, status, stage, total_chunks, embedded_chunks, "
+                "stored_chunks, error, created_at, updated_at FROM metis_ingest_job WHERE id = :job_id"
+            ), {'job_id': job_id}).mappings().first()
+        if row is None:
+            return None
+        job = dict(row)
+        job['job_id'] = job.pop('id')
+        job['progress'] = round(job['stored_chunks'] / job['total_chunks'], 4) if job['total_chunks'] else 0
+        job['created_at'] = job['created_at'].isoformat()
+        job['updated_at'] = job['updated_at'].isoformat()
+        return job
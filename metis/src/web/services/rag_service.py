@@ -74,15 +74,7 @@ class RagService:
         logger.debug(
             f"""存储文档到PostgreSQL, 知识库ID: {knowledge_base_id}, 模型名称: {embed_model_name},分块数: {len(chunked_docs)} """)
 
-        # 自动添加创建时间
-        for doc in chunked_docs:
-            created_time = datetime.now().isoformat()
-            doc.metadata['created_time'] = created_time
-
-        # 应用额外的元数据
-        if metadata:
-            for doc in chunked_docs:
-                doc.metadata.update(metadata)
+        cls.prepare_chunk_metadata(chunked_docs, metadata)
 
         # 构建存储请求
         pgvector_store_request = DocumentIngestRequest(
@@ -107,14 +99,30 @@ class RagService:
             raise
 
     @classmethod
-    def perform_chunking(cls, docs, chunk_mode, request, is_preview, content_type):
+    def prepare_chunk_metadata(cls, chunked_docs, metadata=None):
+        """
+        为待存储的分块添加创建时间和额外的元数据
+        """
+        # 自动添加创建时间
+        for doc in chunked_docs:
+            created_time = datetime.now().isoformat()
+            doc.metadata['created_time'] = created_time
+
+        # 应用额外的元数据
+        if metadata:
+            for doc in chunked_docs:
+                doc.metadata.update(metadata)
+        return chunked_docs
+
+    @classmethod
+    def perform_chunking(cls, docs, chunk_mode, form, is_preview, content_type):
         """
         执行文档分块并记录相关日志
 
         Args:
             docs: 文档列表
             chunk_mode: 分块模式
-            request: HTTP请求对象
+            form: 请求表单参数（request.form 或同结构的字典）
             is_preview: 是否为预览模式
             content_type: 内容类型
 
@@ -125,7 +133,7 @@ class RagService:
         logger.debug(
             f"{content_type}分块 [{mode}], 模式: {chunk_mode}, 文档数: {len(docs)}")
 
-        chunker = RagService.get_chunker(chunk_mode, request)
+        chunker = RagService.get_chunker(chunk_mode, form)
         chunked_docs = chunker.chunk(docs)
         logger.debug(
             f"{content_type}分块完成, 输入文档: {len(docs)}, 输出分块: {len(chunked_docs)}")
@@ -183,13 +191,14 @@ class RagService:
         return docs
 
     @classmethod
-    def get_chunker(cls, chunk_mode, request=None):
+    def get_chunker(cls, chunk_mode, form=None):
         """
-        根据分块模式返回相应的分块器
+        根据分块模式返回相应的分块器，分块参数从表单 form 中读取
         """
+        form = form or {}
         logger.debug(f"初始化分块器，模式: {chunk_mode}")
         if chunk_mode == 'fixed_size':
-            chunk_size = int(request.form.get('chunk_size', 256))
+            chunk_size = int(form.get('chunk_size', 256))
             logger.debug(f"使用固定大小分块，大小: {chunk_size}")
             return FixedSizeChunk(chunk_size=chunk_size)
 
@@ -198,18 +207,18 @@ class RagService:
             return FullChunk()
 
         elif chunk_mode == 'recursive':
-            chunk_size = int(request.form.get('chunk_size', 256))
-            chunk_overlap = int(request.form.get('chunk_overlap', 128))
+            chunk_size = int(form.get('chunk_size', 256))
+            chunk_overlap = int(form.get('chunk_overlap', 128))
             logger.debug(f"使用递归分块，大小: {chunk_size}, 重叠: {chunk_overlap}")
             return RecursiveChunk(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
         elif chunk_mode == 'semantic':
-            semantic_chunk_model = request.form.get('semantic_chunk_model')
-            semantic_chunk_model_base_url = request.form.get(
+            semantic_chunk_model = form.get('semantic_chunk_model')
+            semantic_chunk_model_base_url = form.get(
                 'semantic_chunk_model_base_url')
             logger.debug(
                 f"使用语义分块，模型: {semantic_chunk_model}, URL: {semantic_chunk_model_base_url}")
-            semantic_chunk_model_api_key = request.form.get(
+            semantic_chunk_model_api_key = form.get(
                 'semantic_chunk_model_api_key')
             embeddings = EmbedBuilder.get_embed(protocol=semantic_chunk_model_base_url, model_name=semantic_chunk_model,
                                                 model_api_key=semantic_chunk_model_api_key,
@@ -221,26 +230,27 @@ class RagService:
             raise ValueError(error_msg)
 
     @classmethod
-    def get_file_loader(cls, file_path, file_extension, load_mode, request=None):
+    def get_file_loader(cls, file_path, file_extension, load_mode, form=None):
         """
         根据文件类型选择适当的加载器
-        在内部初始化OCR，支持paddle_ocr、olm_ocr、azure_ocr
+        在内部初始化OCR，支持paddle_ocr、olm_ocr、azure_ocr，OCR 参数从表单 form 中读取
         """
+        form = form or {}
         logger.debug(f"为文件 {file_path} (类型: {file_extension}) 初始化加载器")
         # 初始化OCR
-        ocr = OcrManager.load_ocr(ocr_type=request.form.get('ocr_type'),
-                                  olm_base_url=request.form.get(
+        ocr = OcrManager.load_ocr(ocr_type=form.get('ocr_type'),
+                                  olm_base_url=form.get(
                                       'olm_base_url'),
-                                  olm_api_key=request.form.get('olm_api_key'),
-                                  olm_model=request.form.get('olm_model'),
-                                  azure_base_url=request.form.get(
+                                  olm_api_key=form.get('olm_api_key'),
+                                  olm_model=form.get('olm_model'),
+                                  azure_base_url=form.get(
                                       'azure_base_url'),
-                                  azure_api_key=request.form.get('azure_api_key'))
+                                  azure_api_key=form.get('azure_api_key'))
 
         if file_extension in ['docx', 'doc']:
             return DocLoader(file_path, ocr, load_mode)
         elif file_extension in ['pptx', 'ppt']:
-            return PPTLoader(file_path, load_mode)
+            return PPTLoader(file_path, load_mode, ocr)
         elif file_extension == 'txt':
             return TextLoader(file_path, load_mode)
         elif file_extension in ['jpg', 'png', 'jpeg']:
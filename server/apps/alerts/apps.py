@@ -20,6 +20,8 @@ class AlertsConfig(AppConfig):
             # 注册告警源适配器
             adapters()
             import apps.alerts.nats  # noqa
+            from apps.alerts.common.source_adapter.pipeline import connect_signals
+            connect_signals()
 
 
 def adapters():
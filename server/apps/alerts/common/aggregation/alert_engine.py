@@ -4,14 +4,15 @@
 # @Author: windyzhao
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Callable, Tuple, Any
+from typing import Dict, List, Callable, Tuple, Any, Optional, Set
 from dataclasses import dataclass
 import hashlib
 import json
 
+from apps.alerts.common.aggregation.incremental import fingerprint_column, split_by_instance
 from apps.alerts.constants import AlertStatus
 from apps.alerts.models import Alert
-from apps.alerts.utils.util import generate_instance_fingerprint
+from apps.alerts.utils.util import generate_instance_fingerprints
 from apps.core.logger import alert_logger as logger
 
 
@@ -107,6 +108,9 @@ class RuleEngine:
     # 定义实例分组字段
     INSTANCE_GROUP_FIELDS = ['item', 'resource_id', 'resource_type', 'alert_source']
 
+    # 批量查询活跃告警时每次 fingerprint__in 的指纹数量
+    ALERT_QUERY_BATCH_SIZE = 500
+
     def __init__(self, window_size: str = "10min"):
         self.window_size = pd.to_timedelta(window_size)  # 事件处理窗口
         self.rules: Dict[str, AlertRule] = {}
@@ -432,13 +436,15 @@ class RuleEngine:
 
         return condition
 
-    def group_events_by_instance(self, events: pd.DataFrame, fields: List = []) -> Dict[str, pd.DataFrame]:
+    def group_events_by_instance(self, events: pd.DataFrame, fields: List = [],
+                                 dirty: Optional[Set[str]] = None) -> Dict[str, pd.DataFrame]:
         """
         按实例分组事件数据
 
         Args:
             events: 原始事件DataFrame
             fields: 用于生成实例指纹的字段列表（可选）
+            dirty: 需要评估的实例指纹，为空时评估全部实例
 
         Returns:
             按实例指纹分组的事件字典
@@ -454,19 +460,24 @@ class RuleEngine:
             for field in missing_fields:
                 events[field] = 'unknown'
 
-        # 生成实例指纹
-        events['instance_fingerprint'] = events.apply(
-            lambda row: generate_instance_fingerprint(row.to_dict(), fields),
-            axis=1
-        )
+        # 生成实例指纹：增量窗口已按聚合键预先计算的直接复用，
+        # 否则按字段组合向量化计算
+        column = fingerprint_column(fields or [])
+        if column in events.columns and not events[column].isna().any():
+            events['instance_fingerprint'] = events[column]
+        else:
+            events['instance_fingerprint'] = generate_instance_fingerprints(events, fields)
+
+        events, skipped = split_by_instance(events, 'instance_fingerprint', dirty)
+        if skipped:
+            logger.debug(f"Skipped {skipped} unchanged instances")
 
         # 按实例指纹分组
         grouped_events = {}
-        for fingerprint, group_df in events.groupby('instance_fingerprint'):
+        events = events.sort_values(by='received_at', ascending=True, kind='stable')
+        for fingerprint, group_df in events.groupby('instance_fingerprint', sort=True):
             # **关键修复：保留 instance_fingerprint 列，而不是删除它**
             clean_group = group_df.reset_index(drop=True)
-            # 按照时间排序
-            clean_group = clean_group.sort_values(by='received_at', ascending=True)
 
             # 确保分组不为空
             if not clean_group.empty:
@@ -477,22 +488,12 @@ class RuleEngine:
         logger.info(f"Grouped {len(events)} events into {len(grouped_events)} instances")
         return grouped_events
 
-    def _check_instance_alert_status(self, instance_fingerprint: str, rule: AlertRule) -> Tuple[bool, List[Dict], str]:
-        """
-        检查实例是否已有活跃告警
-
-        Args:
-            instance_fingerprint: 实例指纹
-            rule: 告警规则
-
-        Returns:
-            (是否需要创建新告警, 相关告警列表, 操作类型)
-        """
-        # 查询该实例是否已有活跃告警
+    @staticmethod
+    def _alert_query_conditions(rule: AlertRule) -> Dict:
+        """活跃告警的查询条件（不含指纹）"""
         query_conditions = {
             # 'rule_name': rule.name,
             'status__in': AlertStatus.ACTIVATE_STATUS,
-            'fingerprint': instance_fingerprint,  # 使用实例指纹查询
             'rule_id': rule.rule_id,  # 使用规则ID查询
         }
 
@@ -502,14 +503,65 @@ class RuleEngine:
             current_time = pd.Timestamp.now()
             query_conditions['created_at__gte'] = current_time - aggregation_window
 
-        related_alerts = self._query_alerts_from_db(query_conditions)
+        return query_conditions
 
+    def _aged_alert_fingerprints(self, rule: AlertRule) -> Set[str]:
+        """
+        活跃告警已超出规则聚合时间窗口的实例指纹
+
+        这些实例的评估结果随时间变化（由更新告警变为新建告警），
+        即使事件没有变化，增量窗口下每轮也要重新评估
+        """
+        query_conditions = self._alert_query_conditions(rule)
+        created_after = query_conditions.pop('created_at__gte', None)
+        if created_after is None:
+            return set()
+        return set(
+            Alert.objects.filter(created_at__lt=created_after, **query_conditions)
+            .values_list('fingerprint', flat=True)
+        )
+
+    def _check_instance_alert_status(self, instance_fingerprint: str, rule: AlertRule) -> Tuple[bool, List[Dict], str]:
+        """
+        检查实例是否已有活跃告警
+
+        Args:
+            instance_fingerprint: 实例指纹
+            rule: 告警规则
+
+        Returns:
+            (是否需要创建新告警, 相关告警列表, 操作类型)
+        """
+        alerts_map = self._bulk_query_instance_alerts([instance_fingerprint], rule)
+        return self._instance_alert_status(alerts_map.get(instance_fingerprint, []))
+
+    @staticmethod
+    def _instance_alert_status(related_alerts: List[Dict]) -> Tuple[bool, List[Dict], str]:
         if not related_alerts:
             return True, [], "create_new"
         else:
             # 已有活跃告警，更新现有告警
             return False, related_alerts, "update_existing"
 
+    def _bulk_query_instance_alerts(self, instance_fingerprints: List[str], rule: AlertRule) -> Dict[str, List[Dict]]:
+        """
+        批量查询多个实例在该规则下的活跃告警，按指纹分组
+
+        Args:
+            instance_fingerprints: 实例指纹列表
+            rule: 告警规则
+
+        Returns:
+            {实例指纹: 相关告警列表}，没有活跃告警的实例不在结果中
+        """
+        query_conditions = self._alert_query_conditions(rule)
+        alerts_map = {}
+        for i in range(0, len(instance_fingerprints), self.ALERT_QUERY_BATCH_SIZE):
+            query_conditions['fingerprint__in'] = instance_fingerprints[i:i + self.ALERT_QUERY_BATCH_SIZE]
+            for alert in self._query_alerts_from_db(query_conditions):
+                alerts_map.setdefault(alert['fingerprint'], []).append(alert)
+        return alerts_map
+
     @staticmethod
     def _query_alerts_from_db(query_conditions: Dict) -> List[Dict]:
         """
@@ -524,12 +576,16 @@ class RuleEngine:
         alerts = Alert.objects.filter(**query_conditions).values()
         return list(alerts)
 
-    def _process_instance_events(self, events: pd.DataFrame) -> List[Dict[str, Dict[str, Any]]]:
+    def _process_instance_events(self, events: pd.DataFrame,
+                                 dirty_resolver: Callable[[List[str]], Optional[Set[str]]] = None) -> List[
+        Dict[str, Dict[str, Any]]]:
         """
         处理单个实例的事件
 
         Args:
             events: 单个实例的事件数据
+            dirty_resolver: 按聚合键返回需要重新评估的实例指纹，
+                返回None或未提供时评估全部实例
 
         Returns:
             该实例的规则处理结果
@@ -543,28 +599,55 @@ class RuleEngine:
             aggregation_key = self.rules[rule_id].aggregation_key if rule_id in self.rules else []
 
             # **关键：按实例分组处理**
-            grouped_events = self.group_events_by_instance(events, fields=aggregation_key)
+            dirty = dirty_resolver(aggregation_key) if dirty_resolver else None
+            if dirty is not None:
+                dirty = dirty | self._aged_alert_fingerprints(rule)
+            grouped_events = self.group_events_by_instance(events, fields=aggregation_key, dirty=dirty)
 
             if not grouped_events:
                 logger.info("No events to process after grouping")
                 continue
 
-            # 对每个实例分别应用规则
+            # 对每个实例分别应用规则（这样保证了持续条件等规则的正确性）
+            evaluated = []
             for instance_fingerprint, instance_events in grouped_events.items():
                 logger.debug(f"Processing {len(instance_events)} events for instance: {instance_fingerprint}")
+                try:
+                    evaluated.append((instance_fingerprint, instance_events, rule.condition(instance_events), None))
+                except Exception as e:
+                    evaluated.append((instance_fingerprint, instance_events, None, e))
+
+            # 触发的实例一次性查询活跃告警，避免逐实例查询数据库
+            triggered_fingerprints = [item[0] for item in evaluated if item[2] is not None and item[2][0]]
+            alerts_map, query_error = {}, None
+            if triggered_fingerprints:
+                try:
+                    alerts_map = self._bulk_query_instance_alerts(triggered_fingerprints, rule)
+                except Exception as e:
+                    if dirty_resolver:
+                        # 增量窗口下跳过的实例不会再评估，查询失败时整轮失败，由下一轮重新评估
+                        raise
+                    query_error = e
+
+            for instance_fingerprint, instance_events, condition_result, error in evaluated:
                 results = {}
 
                 try:
-                    # 对单个实例应用规则（这样保证了持续条件等规则的正确性）
-                    triggered, event_groups = rule.condition(instance_events)
+                    if error is not None:
+                        raise error
+
+                    triggered, event_groups = condition_result
 
                     if triggered:
+                        if query_error is not None:
+                            raise query_error
+
                         # 展平事件ID列表
                         flat_event_ids = [event_id for group in event_groups for event_id in group]
 
                         # 检查是否需要创建新告警（基于实例指纹）
-                        should_create_new, related_alerts, operation_type = self._check_instance_alert_status(
-                            instance_fingerprint, rule
+                        should_create_new, related_alerts, operation_type = self._instance_alert_status(
+                            alerts_map.get(instance_fingerprint, [])
                         )
 
                         results[rule_id] = {
@@ -591,9 +674,12 @@ class RuleEngine:
 
         return result_list
 
-    def process_events(self, events: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    def process_events(self, events: pd.DataFrame,
+                       dirty_resolver: Callable[[List[str]], Optional[Set[str]]] = None) -> Dict[str, Dict[str, Any]]:
         """
         处理事件并返回告警结果（按实例分组处理）
+
+        增量窗口会提供 dirty_resolver，事件集合和告警状态都未变化的实例这里跳过
         """
 
         results = {}
@@ -605,7 +691,7 @@ class RuleEngine:
         events['alert_source'] = events['source__name']
 
         # 按实例分组事件 分别应用规则
-        rule_instance_results = self._process_instance_events(events)
+        rule_instance_results = self._process_instance_events(events, dirty_resolver)
 
         for instance_events in rule_instance_results:
             # 合并结果
@@ -2,6 +2,7 @@
 # @File: alert_processor.py
 # @Time: 2025/5/21 11:03
 # @Author: windyzhao
+import json
 import uuid
 
 import pandas as pd
@@ -16,9 +17,10 @@ from apps.alerts.common.rules.db_rule_manager import DatabaseRuleManager
 from apps.alerts.common.rules.rule_manager import get_rule_manager
 from apps.alerts.common.rules.alert_rules import format_alert_message
 from apps.alerts.constants import AlertStatus, LevelType, EventStatus
+from apps.alerts.common.aggregation.incremental import IncrementalEventWindow
 from apps.alerts.common.aggregation.window_types import WindowType, WindowConfig, WindowCalculator
 from apps.alerts.models import Event, Alert, Level, AggregationRules, CorrelationRules, SessionWindow
-from apps.alerts.utils.util import generate_instance_fingerprint
+from apps.alerts.utils.util import generate_instance_fingerprints
 from apps.core.logger import alert_logger as logger
 
 
@@ -49,6 +51,10 @@ class AlertProcessor:
         self._target_correlation_rules = None
         self._rule_manager_initialized = False
 
+        # 本轮处理成功的增量窗口，告警保存成功后再提交窗口状态
+        self._window_commits = []
+        self._save_failed = False
+
     @staticmethod
     def _get_event_level_list():
         """获取事件级别映射"""
@@ -57,8 +63,8 @@ class AlertProcessor:
                 "level_id", flat=True))
         return instance
 
-    def get_events_for_correlation_rule(self, correlation_rule: CorrelationRules) -> pd.DataFrame:
-        """根据关联规则的窗口配置获取事件数据"""
+    def _get_correlation_window_start(self, correlation_rule: CorrelationRules):
+        """根据关联规则的窗口配置计算查询起始时间"""
         # 根据窗口类型确定查询时间范围
         if correlation_rule.window_type == 'sliding':
             # 滑动窗口：查询窗口大小内的数据
@@ -77,6 +83,11 @@ class AlertProcessor:
             # 默认使用滑动窗口逻辑
             window_delta = WindowCalculator.parse_time_str(correlation_rule.window_size)
             start_time = self.now - window_delta
+        return start_time
+
+    def get_events_for_correlation_rule(self, correlation_rule: CorrelationRules) -> pd.DataFrame:
+        """根据关联规则的窗口配置获取事件数据"""
+        start_time = self._get_correlation_window_start(correlation_rule)
 
         instances = Event.objects.filter(
             received_at__gte=start_time,
@@ -86,6 +97,56 @@ class AlertProcessor:
 
         return pd.DataFrame(list(instances))
 
+    def get_incremental_events_for_correlation_rule(self, correlation_rule: CorrelationRules,
+                                                    aggregation_rules: List[AggregationRules]) -> Tuple[
+        pd.DataFrame, Any]:
+        """
+        增量获取关联规则窗口内的事件
+
+        窗口范围与 get_events_for_correlation_rule 相同，
+        但只从数据库读取上一轮之后新接收的事件，
+        并为规则的聚合键预先计算好实例指纹；
+        事件集合与告警状态都没有变化的实例不在脏实例中，本轮不重新评估。
+        规则条件或启停变化时重建窗口，全部实例重新评估
+
+        Returns:
+            (窗口内可参与计算的事件, 按聚合键返回脏实例指纹的函数, 提交窗口状态的函数)
+        """
+        start_time = self._get_correlation_window_start(correlation_rule)
+        aggregation_keys = [self.rule_manager.get_aggregation_key(rule.rule_id) for rule in aggregation_rules]
+        aggregation_keys = [key for key in aggregation_keys if key]
+        window = IncrementalEventWindow(
+            key=f"correlation-{correlation_rule.id}",
+            fields=self.event_fields,
+            config_key=(
+                correlation_rule.window_type,
+                correlation_rule.window_size,
+                correlation_rule.updated_at,
+                self.default_window_size,
+                tuple(tuple(key) for key in aggregation_keys),
+                tuple(
+                    (rule.id, rule.updated_at, json.dumps(rule.condition, sort_keys=True, default=str))
+                    for rule in aggregation_rules
+                ),
+            ),
+            base_queryset=Event.objects.filter(source__is_active=True),
+            # exclude(status=SHIELD, alert__status__in=...) 的补集
+            excluded_queryset=Event.objects.filter(
+                status=EventStatus.SHIELD, alert__status__in=AlertStatus.ACTIVATE_STATUS
+            ).distinct(),
+        )
+        state = window.refresh(start_time, self.now)
+        for aggregation_key in aggregation_keys:
+            window.ensure_fingerprints(state, aggregation_key)
+
+        def dirty_resolver(fields):
+            return window.dirty_fingerprints(state, fields)
+
+        def commit():
+            window.commit(state)
+
+        return window.eligible_events(state), dirty_resolver, commit
+
     def get_events(self, rule_config: WindowConfig = None) -> pd.DataFrame:
         """向后兼容的事件获取方法"""
         if rule_config and rule_config.window_type != WindowType.SLIDING:
@@ -316,6 +377,7 @@ class AlertProcessor:
 
                 except Exception as err:
                     import traceback
+                    self._save_failed = True
                     logger.error("Error processing alert: {}".format(traceback.format_exc()))
 
         return result
@@ -353,6 +415,7 @@ class AlertProcessor:
 
                 except Exception as err:
                     import traceback
+                    self._save_failed = True
                     logger.error(f"Error updating alert {fingerprint}: {traceback.format_exc()}")
 
     def get_rule_statistics(self) -> Dict[str, Any]:
@@ -555,8 +618,20 @@ class AlertProcessor:
         if update_alert_list:
             self.update_alerts(alerts=update_alert_list)
 
+        self.commit_windows()
+
+    def commit_windows(self) -> None:
+        """告警全部保存成功后提交增量窗口状态，否则下一轮从上一次提交的状态重新评估"""
+        commits, self._window_commits = self._window_commits, []
+        if self._save_failed:
+            logger.warning(f"告警保存失败，{len(commits)} 个增量窗口本轮不提交")
+            return
+        for commit in commits:
+            commit()
+
     def _process_events_with_aggregation_rules(self, events: pd.DataFrame,
-                                               aggregation_rules: List[AggregationRules]) -> Tuple[
+                                               aggregation_rules: List[AggregationRules],
+                                               dirty_resolver=None) -> Tuple[
         List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         使用聚合规则处理事件
@@ -564,6 +639,7 @@ class AlertProcessor:
         Args:
             events: 事件数据
             aggregation_rules: 聚合规则列表
+            dirty_resolver: 增量窗口提供的脏实例查询函数，为空时评估全部实例
             
         Returns:
             Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: (新建告警列表, 更新告警列表)
@@ -574,7 +650,7 @@ class AlertProcessor:
         try:
 
             # 使用规则管理器执行规则检测
-            rule_results = self.rule_manager.execute_rules(events)
+            rule_results = self.rule_manager.execute_rules(events, dirty_resolver)
 
             # 处理规则执行结果
             for rule_id, rule_result in rule_results.items():
@@ -624,6 +700,9 @@ class AlertProcessor:
 
         except Exception as e:
             logger.error(f"处理聚合规则失败: {str(e)}")
+            if dirty_resolver:
+                # 增量窗口本轮失败，不提交窗口状态
+                raise
 
         return format_alert_list, update_alert_list
 
@@ -641,8 +720,16 @@ class AlertProcessor:
                     continue
 
                 # 获取事件数据
-                events = self.get_events_for_correlation_rule(correlation_rule)
+                dirty_resolver, commit = None, None
+                if IncrementalEventWindow.enabled():
+                    events, dirty_resolver, commit = self.get_incremental_events_for_correlation_rule(
+                        correlation_rule, list(aggregation_rules)
+                    )
+                else:
+                    events = self.get_events_for_correlation_rule(correlation_rule)
                 if events.empty:
+                    if commit:
+                        self._window_commits.append(commit)
                     continue
 
                 # 检查是否需要处理会话关闭逻辑
@@ -653,10 +740,12 @@ class AlertProcessor:
 
                 if not window_events.empty:
                     window_alerts, window_updates = self._process_events_with_aggregation_rules(
-                        window_events, list(aggregation_rules)
+                        window_events, list(aggregation_rules), dirty_resolver
                     )
                     format_alert_list.extend(window_alerts)
                     update_alert_list.extend(window_updates)
+                    if commit:
+                        self._window_commits.append(commit)
 
                     logger.info(
                         f"关联规则 {correlation_rule.name} 产生告警: {len(window_alerts)} 个新告警, {len(window_updates)} 个更新")
@@ -700,10 +789,7 @@ class AlertProcessor:
 
             events['alert_source'] = events['source__name']
             # 生成实例指纹
-            events['instance_fingerprint'] = events.apply(
-                lambda row: generate_instance_fingerprint(row.to_dict(), aggregation_key),
-                axis=1
-            )
+            events['instance_fingerprint'] = generate_instance_fingerprints(events, aggregation_key)
             event_fingerprints = events.to_dict('records')
             event_fingerprints = {i["instance_fingerprint"]: i for i in event_fingerprints if i["value"] == 1}
 
@@ -0,0 +1,232 @@
+# -- coding: utf-8 --
+"""
+增量事件窗口
+
+原实现每次聚合任务都把窗口内的全部事件重新读成DataFrame，
+再对每条规则逐行生成指纹、全量分组。这里为每个关联规则维护进程内的窗口状态：
+- 只按水位线读取新接收的事件，过期事件随窗口滑动从内存剔除
+- 每个聚合键的实例指纹在事件进入窗口时向量化计算一次，之后复用
+- 记录本轮需要重新评估的实例（脏实例）：有事件新增、剔除或可用性变化的实例，
+  以及告警状态发生变化（如手动关闭、分派）的实例，规则只重新评估这些实例
+
+状态按进程保存，Celery prefork 的每个子进程各自预热；
+首次运行、规则配置变化或水位线落后于窗口起点时全量加载。
+refresh() 只返回推进后的状态，本轮规则评估和告警保存都成功后再调用 commit() 保存；
+失败时保存的仍是上一轮的状态，下一轮从旧水位线重新计算，本轮的脏实例不会丢失。
+"""
+import dataclasses
+import datetime
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+from django.conf import settings
+from django.db.models import QuerySet
+
+from apps.alerts.models import Alert, AlertSource
+from apps.alerts.utils.util import generate_instance_fingerprints
+from apps.core.logger import alert_logger as logger
+
+# received_at 由 auto_now_add 生成，长事务可能晚于水位线提交，
+# 读取新事件时回看一段时间并按 event_id 去重；读取状态变化的告警时同样回看
+DEFAULT_WATERMARK_LAG = datetime.timedelta(seconds=60)
+
+
+def fingerprint_column(fields: List[str]) -> str:
+    return "_fp:" + ",".join(fields)
+
+
+@dataclass
+class EventWindowState:
+    """单个关联规则的窗口状态"""
+    config_key: tuple
+    events: pd.DataFrame
+    watermark: Optional[datetime.datetime] = None
+    excluded_ids: Set[str] = field(default_factory=set)
+    # 本轮发生变化的事件ID（新增、剔除、可用性变化），用于计算脏实例
+    changed_ids: Set[str] = field(default_factory=set)
+    # 本轮剔除出窗口的事件所属实例，按指纹列记录
+    removed_fingerprints: Dict[str, Set[str]] = field(default_factory=dict)
+    # 上一轮之后有更新（状态变化）的告警指纹，告警指纹即实例指纹
+    changed_alert_fingerprints: Set[str] = field(default_factory=set)
+    full_reload: bool = True
+
+
+class IncrementalEventWindow:
+    """
+    关联规则的增量事件窗口
+
+    Args:
+        key: 状态键，通常为关联规则ID
+        fields: 读取的事件字段
+        config_key: 影响窗口内容的配置（窗口类型、大小、聚合键等），变化时重建状态
+        base_queryset: 窗口事件的基础过滤（不含时间范围和排除条件）
+        excluded_queryset: 需要排除的事件（如已屏蔽且已关联活跃告警），只取 event_id
+    """
+
+    _states: Dict[str, EventWindowState] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, key: str, fields: List[str], config_key: tuple, base_queryset: QuerySet,
+                 excluded_queryset: QuerySet):
+        self.key = key
+        self.fields = fields
+        self.config_key = config_key
+        self.base_queryset = base_queryset
+        self.excluded_queryset = excluded_queryset
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return getattr(settings, "ALERT_INCREMENTAL_WINDOW_ENABLED", True)
+
+    @classmethod
+    def reset(cls, key: str = None):
+        """清理窗口状态，key为空时清理全部"""
+        with cls._lock:
+            if key is None:
+                cls._states.clear()
+            else:
+                cls._states.pop(key, None)
+
+    def _empty_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=self.fields)
+
+    def _fetch(self, start_time, end_time) -> pd.DataFrame:
+        rows = self.base_queryset.filter(received_at__gte=start_time, received_at__lt=end_time).values(*self.fields)
+        frame = pd.DataFrame(list(rows))
+        return frame if not frame.empty else self._empty_frame()
+
+    @staticmethod
+    def _fetch_changed_alert_fingerprints(since) -> Set[str]:
+        """上一轮之后有更新的告警指纹
+
+        手动关闭、分派、自动恢复等都会更新告警，其实例需要重新评估
+        """
+        return set(Alert.objects.filter(updated_at__gte=since).values_list("fingerprint", flat=True))
+
+    def _fetch_excluded_ids(self, start_time, end_time) -> Set[str]:
+        return set(
+            self.excluded_queryset.filter(received_at__gte=start_time, received_at__lt=end_time)
+            .values_list("event_id", flat=True)
+        )
+
+    def refresh(self, start_time, end_time) -> EventWindowState:
+        """把窗口推进到 [start_time, end_time)，返回更新后的状态；状态在 commit() 后才生效"""
+        lag = getattr(settings, "ALERT_WINDOW_WATERMARK_LAG", DEFAULT_WATERMARK_LAG)
+        with self._lock:
+            state = self._states.get(self.key)
+
+        if state is None or state.config_key != self.config_key or state.watermark is None \
+                or state.watermark - lag < start_time:
+            events = self._fetch(start_time, end_time)
+            state = EventWindowState(config_key=self.config_key, events=events, watermark=end_time)
+            state.changed_ids = set(events["event_id"]) if not events.empty else set()
+        else:
+            active_sources = set(AlertSource.objects.filter(is_active=True).values_list("id", flat=True))
+            since = state.watermark - lag
+            new_events = self._fetch(since, end_time)
+            # 在副本上推进，已保存的状态保持不变
+            state = dataclasses.replace(state)
+            self.advance(state, start_time, end_time, new_events, active_sources)
+            # 告警状态变化会改变实例的评估结果：例如告警被手动关闭后，
+            # 窗口内的事件应产生新告警，即使实例的事件集合没有变化也要重新评估
+            state.changed_alert_fingerprints = self._fetch_changed_alert_fingerprints(since)
+
+        # 可用性（屏蔽、关联活跃告警）可能在事件入窗后改变，对比排除集合的差异
+        self.apply_exclusions(state, self._fetch_excluded_ids(start_time, end_time))
+
+        logger.debug(
+            f"增量窗口 {self.key}: 窗口事件 {len(state.events)}, 变化事件 {len(state.changed_ids)}, "
+            f"变化告警 {len(state.changed_alert_fingerprints)}, 全量加载 {state.full_reload}"
+        )
+        return state
+
+    def commit(self, state: EventWindowState) -> None:
+        """本轮处理成功后保存窗口状态"""
+        with self._lock:
+            self._states[self.key] = state
+
+    @staticmethod
+    def advance(state: EventWindowState, start_time, end_time, new_events: pd.DataFrame,
+                active_sources: Set[int]) -> EventWindowState:
+        """在内存中滑动窗口：剔除过期事件、追加新事件，并记录发生变化的事件"""
+        state.full_reload = False
+        state.changed_ids = set()
+        state.removed_fingerprints = {}
+        state.changed_alert_fingerprints = set()
+        events = state.events
+
+        # 1. 剔除滑出窗口以及数据源被停用的事件
+        if not events.empty:
+            keep = (events["received_at"] >= start_time) & events["source_id"].isin(active_sources)
+            removed = events[~keep]
+            if not removed.empty:
+                for column in (c for c in events.columns if c.startswith("_fp:")):
+                    state.removed_fingerprints[column] = set(removed[column].dropna())
+                events = events[keep]
+
+        # 2. 追加新事件，回看区间内已存在的事件按 event_id 去重
+        if not new_events.empty:
+            if not events.empty:
+                new_events = new_events[~new_events["event_id"].isin(events["event_id"])]
+            if not new_events.empty:
+                state.changed_ids.update(new_events["event_id"])
+                events = new_events if events.empty else pd.concat([events, new_events], ignore_index=True)
+
+        state.events = events.reset_index(drop=True)
+        state.watermark = end_time
+        return state
+
+    @staticmethod
+    def apply_exclusions(state: EventWindowState, excluded_ids: Set[str]) -> EventWindowState:
+        state.changed_ids.update(excluded_ids.symmetric_difference(state.excluded_ids))
+        state.excluded_ids = excluded_ids
+        return state
+
+    @staticmethod
+    def eligible_events(state: EventWindowState) -> pd.DataFrame:
+        events = state.events
+        if events.empty or not state.excluded_ids:
+            return events.copy()
+        return events[~events["event_id"].isin(state.excluded_ids)].reset_index(drop=True)
+
+    @staticmethod
+    def ensure_fingerprints(state: EventWindowState, fields: List[str]) -> str:
+        """为状态中的事件补齐指定聚合键的指纹列，已有指纹的事件不重复计算"""
+        column = fingerprint_column(fields)
+        events = state.events
+        if events.empty:
+            events[column] = pd.Series(dtype=object)
+            return column
+        events["alert_source"] = events["source__name"]
+        if column not in events.columns:
+            events[column] = generate_instance_fingerprints(events, fields)
+        else:
+            missing = events[column].isna()
+            if missing.any():
+                events.loc[missing, column] = generate_instance_fingerprints(events[missing], fields)
+        return column
+
+    @classmethod
+    def dirty_fingerprints(cls, state: EventWindowState, fields: List[str]) -> Optional[Set[str]]:
+        """返回本轮需要重新评估的实例指纹，全量加载时返回None表示全部评估"""
+        if state.full_reload:
+            return None
+        column = cls.ensure_fingerprints(state, fields)
+        dirty = set(state.events.loc[state.events["event_id"].isin(state.changed_ids), column])
+        # 滑出窗口的事件已不在状态中，其所属实例在剔除时记录
+        dirty.update(state.removed_fingerprints.get(column, set()))
+        # 告警状态变化的实例
+        dirty.update(state.changed_alert_fingerprints)
+        return dirty
+
+
+def split_by_instance(events: pd.DataFrame, column: str, dirty: Optional[Set[str]] = None) -> Tuple[
+        pd.DataFrame, int]:
+    """只保留脏实例的事件，返回过滤后的事件和跳过的实例数"""
+    if dirty is None or events.empty:
+        return events, 0
+    mask = events[column].isin(dirty)
+    skipped = events.loc[~mask, column].nunique()
+    return events[mask], skipped
@@ -3,12 +3,12 @@
 # @Time: 2025/6/10 17:43
 # @Author: windyzhao
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
-from django.db.models import Q
 from django.utils import timezone
 from django.db import transaction
 
+from apps.alerts.common.matcher import MatcherCache, record_from_instance
 from apps.alerts.error import AlertNotFoundError
 from apps.alerts.models import Alert, AlertAssignment, OperatorLog
 from apps.alerts.constants import AlertStatus, AlertAssignmentMatchType, LogAction, LogTargetType
@@ -17,6 +17,17 @@ from apps.alerts.service.reminder_service import ReminderService
 from apps.alerts.service.un_dispatch import UnDispatchService
 from apps.core.logger import alert_logger as logger
 
+# 字段映射到模型字段
+ASSIGNMENT_FIELD_MAPPING = {
+    "source_id": "source_name",
+    "level_id": "level",
+    "resource_type": "resource_type",
+    "resource_id": "resource_id",
+    "content": "content",
+    "title": "title",
+    "alert_id": "alert_id"
+}
+
 
 class AlertAssignmentOperator:
     """
@@ -57,20 +68,18 @@ class AlertAssignmentOperator:
     }
     """
 
+    # 进程内缓存编译后的分派规则，策略修改后按更新时间重新编译
+    matchers = MatcherCache(ASSIGNMENT_FIELD_MAPPING)
+
     def __init__(self, alert_id_list: List[str]):
         self.alert_id_list = alert_id_list
         self.alerts = self.get_alert_map()
         if not self.alerts:
             raise AlertNotFoundError("No alerts found for the provided alert_id_list")
-        # 字段映射到模型字段
-        self.field_mapping = {
-            "source_id": "source_name",
-            "level_id": "level",
-            "resource_type": "resource_type",
-            "resource_id": "resource_id",
-            "content": "content",
-            "title": "title",
-            "alert_id": "alert_id"
+        self.field_mapping = ASSIGNMENT_FIELD_MAPPING
+        self.alert_records = {
+            alert_id: record_from_instance(alert, self.field_mapping.values())
+            for alert_id, alert in self.alerts.items()
         }
 
     def get_alert_map(self) -> Dict[int, Alert]:
@@ -99,6 +108,7 @@ class AlertAssignmentOperator:
 
         # 获取所有活跃的分派策略
         active_assignments = AlertAssignment.objects.filter(is_active=True).order_by('created_at')
+        self.matchers.prune(assignment.id for assignment in active_assignments)
 
         results = {
             "total_alerts": len(self.alerts),
@@ -176,19 +186,17 @@ class AlertAssignmentOperator:
         Returns:
             匹配的告警ID列表
         """
-        # 先过滤未分派状态的告警
-        base_queryset = Alert.objects.filter(
-            alert_id__in=self.alert_id_list,
-            status=AlertStatus.UNASSIGNED
-        )
-
-        # 排除已分派的告警
-        if excluded_ids:
-            base_queryset = base_queryset.exclude(id__in=excluded_ids)
+        # 先过滤未分派状态的告警，排除已分派的告警（分派结果中记录的是 alert_id），在内存中完成匹配
+        excluded_ids = excluded_ids or set()
+        candidates = [
+            alert for alert in self.alerts.values()
+            if alert.status == AlertStatus.UNASSIGNED and alert.id not in excluded_ids
+            and alert.alert_id not in excluded_ids
+        ]
 
         # 首先按照Alert的created_at时间过滤符合分派策略时间范围的告警
         time_matched_alert_ids = []
-        for alert in base_queryset:
+        for alert in candidates:
             if self._check_time_range(assignment.config, alert.created_at):
                 time_matched_alert_ids.append(alert.id)
 
@@ -196,103 +204,17 @@ class AlertAssignmentOperator:
             logger.debug(f"No alerts match time range for assignment {assignment.id}")
             return []
 
-        # 重新构建查询集，只包含时间范围匹配的告警
-        time_filtered_queryset = Alert.objects.filter(id__in=time_matched_alert_ids)
-
         if assignment.match_type == AlertAssignmentMatchType.ALL:
             # 全部匹配，返回所有时间范围匹配且未分派的告警
             return time_matched_alert_ids
 
         elif assignment.match_type == AlertAssignmentMatchType.FILTER:
-            # 过滤匹配，使用ORM查询
-            return self._orm_filter_alerts(time_filtered_queryset, assignment.match_rules or [])
+            # 过滤匹配，使用编译后的匹配规则
+            matcher = self.matchers.get(assignment)
+            return matcher.filter((alert_id, self.alert_records[alert_id]) for alert_id in time_matched_alert_ids)
 
         return []
 
-    def _orm_filter_alerts(self, queryset, match_rules: List[List[Dict[str, Any]]]) -> List[int]:
-        """
-        使用ORM查询过滤匹配规则的告警
-        
-        Args:
-            queryset: 基础查询集
-            match_rules: 匹配规则 [[{},{}],[{},{}]]
-            
-        Returns:
-            匹配的告警ID列表
-        """
-        if not match_rules:
-            return list(queryset.values_list('id', flat=True))
-
-        # 最外层是或关系
-        final_q = Q()
-
-        for rule_group in match_rules:
-            if not rule_group:
-                continue
-
-            # 里层是且关系
-            group_q = Q()
-            group_has_valid_rules = False
-
-            for rule in rule_group:
-                rule_q = self._build_single_rule_q(rule)
-                if rule_q:
-                    group_has_valid_rules = True
-                    if not group_q:
-                        group_q = rule_q
-                    else:
-                        group_q &= rule_q
-
-            # 只有当组内有有效规则时才添加到最终查询
-            if group_has_valid_rules and group_q:
-                if not final_q:
-                    final_q = group_q
-                else:
-                    final_q |= group_q
-
-        if final_q:
-            queryset = queryset.filter(final_q)
-        else:
-            # 如果没有有效的规则，返回空结果集
-            queryset = queryset.none()
-
-        return list(queryset.values_list('id', flat=True))
-
-    def _build_single_rule_q(self, rule: Dict[str, Any]) -> Optional[Q]:
-        """
-        构建单个规则的Q对象
-        Args:
-            rule: 单个匹配规则
-        Returns:
-            Q对象或None
-        """
-        key = rule.get("key", "")
-        operator = rule.get("operator", "eq")
-        value = rule.get("value", "")
-        model_field = self.field_mapping.get(key)
-        if not model_field:
-            logger.warning(f"Unknown field key: {key}")
-            return None
-
-        try:
-            if operator == "eq":
-                return Q(**{model_field: value})
-            elif operator == "ne":
-                return ~Q(**{model_field: value})
-            elif operator == "contains":
-                return Q(**{f"{model_field}__icontains": value})
-            elif operator == "not_contains":
-                return ~Q(**{f"{model_field}__icontains": value})
-            elif operator == "re":
-                return Q(**{f"{model_field}__regex": value})
-            else:
-                logger.warning(f"Unknown operator: {operator}")
-                return None
-
-        except Exception as e:
-            logger.error(f"Error building Q object for rule: {str(e)}")
-            return None
-
     def _batch_execute_assignment(self, alert_ids: List[int], assignment: AlertAssignment) -> List[Dict[str, Any]]:
         """
         批量执行告警分派操作
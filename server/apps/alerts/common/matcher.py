@@ -0,0 +1,165 @@
+# -- coding: utf-8 --
+"""
+屏蔽/分派策略的内存匹配器
+
+匹配规则编译一次后缓存在进程内（按策略ID和更新时间失效），新事件/告警批次完全在内存中匹配，
+只有最终的屏蔽/分派写操作访问数据库。语义与原 ORM 查询保持一致：
+- eq/ne 按字符串精确比较，ne 对空值返回真（对应 ~Q）
+- contains/not_contains 忽略大小写，空值不包含任何内容
+- re 使用正则搜索，空值不匹配；正则无法编译时整个策略不匹配任何数据（原查询会在数据库报错）
+- 最外层规则组是或关系，组内规则是且关系；未知字段或操作符的规则忽略，没有有效规则时不匹配任何数据
+"""
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from apps.core.logger import alert_logger as logger
+
+
+def _normalize(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class RuleMatcher:
+    """
+    编译后的匹配规则
+
+    Args:
+        match_rules: 匹配规则 [[{},{}],[{},{}]]
+        field_mapping: 规则key到记录字段的映射
+    """
+
+    def __init__(self, match_rules: List[List[Dict[str, Any]]], field_mapping: Dict[str, str]):
+        self.match_all = not match_rules
+        self.broken = False
+        # 含精确匹配条件的规则组按 (字段, 值) 建哈希索引，其余规则组逐个检查
+        self._eq_index: Dict[str, Dict[Optional[str], List[int]]] = {}
+        self._scan_groups: List[int] = []
+        self._groups: List[List[Callable[[Dict[str, Any]], bool]]] = []
+
+        for rule_group in match_rules or []:
+            if not rule_group:
+                continue
+            predicates, index_key = [], None
+            for rule in rule_group:
+                compiled = self._compile_rule(rule, field_mapping)
+                if compiled is None:
+                    continue
+                predicate, eq_key = compiled
+                predicates.append(predicate)
+                if index_key is None and eq_key is not None:
+                    index_key = eq_key
+            if not predicates:
+                continue
+            group_index = len(self._groups)
+            self._groups.append(predicates)
+            if index_key is None:
+                self._scan_groups.append(group_index)
+            else:
+                field, value = index_key
+                self._eq_index.setdefault(field, {}).setdefault(value, []).append(group_index)
+
+    def _compile_rule(self, rule: Dict[str, Any], field_mapping: Dict[str, str]) -> Optional[
+            Tuple[Callable[[Dict[str, Any]], bool], Optional[Tuple[str, Optional[str]]]]]:
+        key = rule.get("key", "")
+        operator = rule.get("operator", "eq")
+        value = rule.get("value", "")
+        field = field_mapping.get(key)
+        if not field:
+            logger.warning(f"Unknown field key: {key}")
+            return None
+
+        if operator in ("eq", "ne"):
+            expected = _normalize(value)
+
+            def equals(record, _field=field, _expected=expected):
+                return _normalize(record.get(_field)) == _expected
+
+            if operator == "eq":
+                return equals, (field, expected)
+            return lambda record: not equals(record), None
+
+        if operator in ("contains", "not_contains"):
+            needle = str(value).upper()
+
+            def contains(record, _field=field, _needle=needle):
+                actual = record.get(_field)
+                return actual is not None and _needle in str(actual).upper()
+
+            if operator == "contains":
+                return contains, None
+            return lambda record: not contains(record), None
+
+        if operator == "re":
+            try:
+                pattern = re.compile(str(value))
+            except re.error as e:
+                logger.error(f"Invalid regex {value} for rule: {e}")
+                self.broken = True
+                return None
+
+            def regex(record, _field=field, _pattern=pattern):
+                actual = record.get(_field)
+                return actual is not None and _pattern.search(str(actual)) is not None
+
+            return regex, None
+
+        logger.warning(f"Unknown operator: {operator}")
+        return None
+
+    def match(self, record: Dict[str, Any]) -> bool:
+        if self.broken:
+            return False
+        if self.match_all:
+            return True
+
+        candidates = list(self._scan_groups)
+        for field, index in self._eq_index.items():
+            candidates.extend(index.get(_normalize(record.get(field)), ()))
+
+        for group_index in candidates:
+            if all(predicate(record) for predicate in self._groups[group_index]):
+                return True
+        return False
+
+    def filter(self, records: Iterable[Tuple[int, Dict[str, Any]]]) -> List[int]:
+        """返回匹配的记录ID"""
+        return [record_id for record_id, record in records if self.match(record)]
+
+
+class MatcherCache:
+    """按策略缓存编译后的匹配器，策略更新时间变化（即策略被修改）时重新编译"""
+
+    def __init__(self, field_mapping: Dict[str, str]):
+        self.field_mapping = field_mapping
+        self._matchers: Dict[int, Tuple[Any, Any, RuleMatcher]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, policy) -> RuleMatcher:
+        version = (policy.updated_at, policy.match_type)
+        with self._lock:
+            cached = self._matchers.get(policy.id)
+            if cached and cached[0] == version and cached[1] == policy.match_rules:
+                return cached[2]
+        matcher = RuleMatcher(policy.match_rules or [], self.field_mapping)
+        with self._lock:
+            self._matchers[policy.id] = (version, policy.match_rules, matcher)
+        return matcher
+
+    def prune(self, active_ids: Iterable[int]) -> None:
+        """清理已删除或停用的策略"""
+        active_ids = set(active_ids)
+        with self._lock:
+            for policy_id in [i for i in self._matchers if i not in active_ids]:
+                self._matchers.pop(policy_id, None)
+
+
+def record_from_instance(instance, fields: Iterable[str]) -> Dict[str, Any]:
+    """按字段路径（支持 source__source_id 形式）读取模型实例的字段值"""
+    record = {}
+    for field in fields:
+        value = instance
+        for attr in field.split("__"):
+            value = getattr(value, attr, None) if value is not None else None
+        record[field] = value
+    return record
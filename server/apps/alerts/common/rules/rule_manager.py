@@ -154,8 +154,8 @@ class RuleManager:
             logger.error(f"删除规则失败 {rule_name}: {e}")
             return False
 
-    def execute_rules(self, events_df) -> Dict[str, RuleExecutionResult]:
-        """执行所有规则"""
+    def execute_rules(self, events_df, dirty_resolver=None) -> Dict[str, RuleExecutionResult]:
+        """执行所有规则，dirty_resolver 用于增量窗口只评估事件有变化的实例"""
         if not self.window_config or not self.window_config.rules:
             logger.error("没有可用的规则")
             return {}
@@ -167,7 +167,7 @@ class RuleManager:
         try:
             logger.info(
                 f"开始执行 {self.window_config.window_type} 窗口类型的规则，共有 {len(self.window_config.rules)} 条规则")
-            results = self.engine.process_events(events_df)
+            results = self.engine.process_events(events_df, dirty_resolver)
 
             # 转换为RuleExecutionResult格式
             formatted_results = {}
@@ -186,6 +186,9 @@ class RuleManager:
 
         except Exception as e:
             logger.error(f"执行规则失败: {e}")
+            if dirty_resolver:
+                # 增量窗口需要知道本轮失败，不保存窗口状态，下一轮重新评估
+                raise
             return {}
 
     def get_rule_statistics(self) -> Dict[str, Any]:
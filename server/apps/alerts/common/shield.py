@@ -7,15 +7,26 @@
 """
 import datetime
 from typing import List, Dict, Any
-from django.db.models import Q
 from django.utils import timezone
 from django.db import transaction
 
+from apps.alerts.common.matcher import MatcherCache, record_from_instance
 from apps.alerts.error import ShieldNotFoundError, EventNotFoundError
 from apps.alerts.models import AlertShield, Event
 from apps.alerts.constants import AlertShieldMatchType, EventStatus
 from apps.core.logger import alert_logger as logger
 
+# 字段映射到模型字段
+SHIELD_FIELD_MAPPING = {
+    "source_id": "source__source_id",
+    "level_id": "level",
+    "resource_type": "resource_type",
+    "resource_id": "resource_id",
+    "content": "description",
+    "title": "title",
+    "event_id": "event_id"
+}
+
 
 class EventShieldOperator(object):
     """
@@ -23,6 +34,9 @@ class EventShieldOperator(object):
     符合条件的事件和在规定时间内产生的事件将被屏蔽，屏蔽后不会触发通知或其他处理流程。
     """
 
+    # 进程内缓存编译后的屏蔽规则，策略修改后按更新时间重新编译
+    matchers = MatcherCache(SHIELD_FIELD_MAPPING)
+
     def __init__(self, event_id_list: List[str]):
         self.active_shields = self.get_shields()
         if not self.active_shields:
@@ -32,21 +46,16 @@ class EventShieldOperator(object):
         self.events = self.get_event_map()
         if not self.events:
             raise EventNotFoundError()
-        # 字段映射到模型字段
-        self.field_mapping = {
-            "source_id": "source__source_id",
-            "level_id": "level",
-            "resource_type": "resource_type",
-            "resource_id": "resource_id",
-            "content": "description",
-            "title": "title",
-            "event_id": "event_id"
+        self.field_mapping = SHIELD_FIELD_MAPPING
+        self.event_records = {
+            event_id: record_from_instance(event, self.field_mapping.values())
+            for event_id, event in self.events.items()
         }
 
     def get_event_map(self) -> Dict[int, Event]:
         """获取事件实例映射"""
         result = {}
-        events = Event.objects.filter(event_id__in=self.event_id_list)
+        events = Event.objects.filter(event_id__in=self.event_id_list).select_related("source")
         self.event_received_at = events[0].received_at if events else timezone.now()
         for event in events:
             result[event.id] = event
@@ -75,6 +84,7 @@ class EventShieldOperator(object):
             }
 
         # 获取所有活跃的屏蔽策略，并预先过滤时间范围
+        self.matchers.prune(shield.id for shield in self.active_shields)
         self.active_shields = self._get_time_matched_shields()
 
         results = {
@@ -142,111 +152,23 @@ class EventShieldOperator(object):
         Returns:
             匹配的事件ID列表
         """
-        # 先过滤活跃状态的事件（未关闭且未屏蔽的事件才需要屏蔽）
-        base_queryset = Event.objects.filter(
-            event_id__in=self.event_id_list,
-            status=EventStatus.PENDING  # 只屏蔽开放和已确认的事件
-        )
-
-        # 排除已屏蔽的事件
-        if excluded_ids:
-            base_queryset = base_queryset.exclude(id__in=excluded_ids)
+        # 先过滤活跃状态的事件（未关闭且未屏蔽的事件才需要屏蔽），在内存中完成匹配
+        excluded_ids = excluded_ids or set()
+        candidates = [
+            (event_id, self.event_records[event_id]) for event_id, event in self.events.items()
+            if event.status == EventStatus.PENDING and event_id not in excluded_ids  # 只屏蔽开放和已确认的事件
+        ]
 
         if shield.match_type == AlertShieldMatchType.ALL:
             # 全部匹配，返回所有活跃的事件
-            return list(base_queryset.values_list('id', flat=True))
+            return [event_id for event_id, _ in candidates]
 
         elif shield.match_type == AlertShieldMatchType.FILTER:
-            # 过滤匹配，使用ORM查询
-            return self._orm_filter_events(base_queryset, shield.match_rules or [])
+            # 过滤匹配，使用编译后的匹配规则
+            return self.matchers.get(shield).filter(candidates)
 
         return []
 
-    def _orm_filter_events(self, queryset, match_rules: List[List[Dict[str, Any]]]) -> List[int]:
-        """
-        使用ORM查询过滤匹配规则的事件
-
-        Args:
-            queryset: 基础查询集
-            match_rules: 匹配规则 [[{},{}],[{},{}]]
-
-        Returns:
-            匹配的事件ID列表
-        """
-        if not match_rules:
-            return list(queryset.values_list('id', flat=True))
-
-        # 最外层是或关系
-        final_q = Q()
-
-        for rule_group in match_rules:
-            if not rule_group:
-                continue
-
-            # 里层是且关系
-            group_q = Q()
-            group_has_valid_rules = False
-
-            for rule in rule_group:
-                rule_q = self._build_single_rule_q(rule)
-                if rule_q:
-                    group_has_valid_rules = True
-                    if not group_q:
-                        group_q = rule_q
-                    else:
-                        group_q &= rule_q
-
-            # 只有当组内有有效规则时才添加到最终查询
-            if group_has_valid_rules and group_q:
-                if not final_q:
-                    final_q = group_q
-                else:
-                    final_q |= group_q
-
-        if final_q:
-            queryset = queryset.filter(final_q)
-        else:
-            # 如果没有有效的规则，返回空结果集
-            queryset = queryset.none()
-
-        return list(queryset.values_list('id', flat=True))
-
-    def _build_single_rule_q(self, rule: Dict[str, Any]) -> Q | None:
-        """
-        构建单个规则的Q对象
-        Args:
-            rule: 单个匹配规则
-        Returns:
-            Q对象或None
-        """
-        key = rule.get("key", "")
-        operator = rule.get("operator", "eq")
-        value = rule.get("value", "")
-        model_field = self.field_mapping.get(key)
-
-        if not model_field:
-            logger.warning(f"Unknown field key: {key}")
-            return None
-
-        try:
-            if operator == "eq":
-                return Q(**{model_field: value})
-            elif operator == "ne":
-                return ~Q(**{model_field: value})
-            elif operator == "contains":
-                return Q(**{f"{model_field}__icontains": value})
-            elif operator == "not_contains":
-                return ~Q(**{f"{model_field}__icontains": value})
-            elif operator == "re":
-                return Q(**{f"{model_field}__regex": value})
-            else:
-                logger.warning(f"Unknown operator: {operator}")
-                return None
-
-        except Exception as e:
-            logger.error(f"Error building Q object for rule: {str(e)}")
-            return None
-
     def _batch_execute_shield(self, event_ids: List[int], shield: AlertShield) -> List[Dict[str, Any]]:
         """
         批量执行事件屏蔽操作
@@ -263,10 +185,10 @@ class EventShieldOperator(object):
         try:
             with transaction.atomic():
                 # 先获取要屏蔽的事件信息，用于记录结果
-                events_to_shield = Event.objects.filter(
+                events_to_shield = list(Event.objects.filter(
                     id__in=event_ids,
                     status=EventStatus.PENDING
-                ).values('id', 'event_id')
+                ).values('id', 'event_id'))
 
                 # 批量更新事件状态
                 updated_count = Event.objects.filter(
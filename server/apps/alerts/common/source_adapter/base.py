@@ -10,12 +10,10 @@ from typing import Dict, Any, List
 from django.utils import timezone
 
 from apps.alerts.common.shield import execute_shield_check_for_events
-from apps.alerts.constants import LevelType
-from apps.alerts.init_constants import INIT_ALERT_ENRICH
-from apps.alerts.models import AlertSource, Event, Level, SystemSetting
+from apps.alerts.common.source_adapter.pipeline import CMDBEnricher, EventIngestPipeline, get_enable_enrich, \
+    get_event_levels
+from apps.alerts.models import AlertSource, Event
 from apps.alerts.common.source_adapter import logger
-from apps.alerts.utils.util import split_list
-from apps.rpc.cmdb import CMDB
 
 
 class AlertSourceAdapter(ABC):
@@ -37,20 +35,12 @@ class AlertSourceAdapter(ABC):
         是否开启告警丰富
         默认不开启
         """
-        instance = SystemSetting.objects.filter(key=INIT_ALERT_ENRICH).first()
-        if not instance:
-            return False
-        return instance.value.get("enable", False)
+        return get_enable_enrich()
 
     @staticmethod
     def get_event_level() -> tuple:
         """获取事件级别"""
-        instance = list(
-            Level.objects.filter(level_type=LevelType.EVENT).order_by("level_id").values_list(
-                "level_id", flat=True)
-        )
-
-        return str(max(instance)), [str(i) for i in instance]
+        return get_event_levels()
 
     @abstractmethod
     def authenticate(self, *args, **kwargs) -> bool:
@@ -103,17 +93,12 @@ class AlertSourceAdapter(ABC):
             data["start_time"] = timezone.now()
 
     def create_events(self, add_events):
-        """将原始告警数据转换为Event对象"""
-        events = []
-        for add_event in add_events:
-            try:
-                event = self._transform_alert_to_event(add_event)
-                self.add_base_fields(event, add_event)
-                events.append(event)
-            except Exception as e:
-                logger.error(f"Failed to transform alert: {add_event}, error: {e}")
-        bulk_events = self.bulk_save_events(events)
-        return bulk_events
+        """将原始告警数据转换为Event对象，经接入流水线批量丰富、入库，返回按批次分组的事件"""
+        return list(self.stream_events(add_events))
+
+    def stream_events(self, add_events):
+        """按批次流式接入事件，每批入库后产出"""
+        return EventIngestPipeline(self).run(add_events)
 
     def add_base_fields(self, event: Event, alert: Dict[str, Any]):
         """添加基础字段"""
@@ -121,16 +106,6 @@ class AlertSourceAdapter(ABC):
         event.raw_data = alert
         event.event_id = f"EVENT-{uuid.uuid4().hex}"
 
-    @staticmethod
-    def bulk_save_events(events: List[Event]):
-        """批量保存事件"""
-        if events:
-            bulk_create_events = split_list(events, 100)
-            for event_batch in bulk_create_events:
-                Event.objects.bulk_create(event_batch, ignore_conflicts=True)  # 跳过唯一性约束
-            logger.info(f"Bulk saved {len(events)} events.")
-            return bulk_create_events
-
     def rich_event(self, event: dict):
         """告警丰富"""
         if not self.enable_rich_event:
@@ -144,29 +119,9 @@ class AlertSourceAdapter(ABC):
     def enrich_event(event):
         """
         对单个事件进行丰富处理
-        查询cmdb nats获取信息
+        查询cmdb nats获取信息，结果与批量丰富共用缓存
         """
-        params = {}
-        resource_type = event.get("resource_type", None)
-        if not resource_type:
-            return
-        params["model_id"] = resource_type
-        resource_id = event.get("resource_id", None)
-        resource_name = event.get("resource_name", None)
-        if resource_id:
-            params["_id"] = resource_id
-        elif resource_name:
-            params["inst_name"] = resource_name
-        else:
-            return
-
-        try:
-            cmdb_instance = CMDB().search_instances(params=params)
-            # 将cmdb实例信息添加到事件中
-            event["labels"].update(cmdb_instance)
-        except Exception as err:
-            import traceback
-            logger.error(f"CMDB search_instances failed: {traceback.format_exc()}")
+        CMDBEnricher().enrich([event])
 
     def _transform_alert_to_event(self, add_event: Dict[str, Any]) -> Event:
         """将单个告警数据转换为Event对象"""
@@ -203,8 +158,9 @@ class AlertSourceAdapter(ABC):
         """使适配器实例可调用"""
         if not events:
             events = self.events
-        bulk_events = self.create_events(events)
-        self.event_operator(bulk_events)
+        # 每批入库后立即做自动屏蔽，不必等全部事件处理完
+        for event_batch in self.stream_events(events):
+            self.event_operator([event_batch])
 
 
 class AlertSourceAdapterFactory:
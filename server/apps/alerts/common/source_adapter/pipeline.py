@@ -0,0 +1,224 @@
+# -- coding: utf-8 --
+"""
+告警源事件接入流水线
+
+原实现逐条转换事件，开启告警丰富时每条事件同步调用一次 CMDB search_instances，
+每次构建适配器还会查询一次系统设置与事件级别。这里按批次分阶段处理：
+1. 解析与字段映射
+2. 收集批次内去重后的资源键，先查缓存，未命中的通过一次批量 CMDB 查询补齐并写回缓存
+3. 构造 Event 并批量入库，按批次交给后续的自动屏蔽
+"""
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.alerts.constants import LevelType
+from apps.alerts.init_constants import INIT_ALERT_ENRICH
+from apps.alerts.models import Event, Level, SystemSetting
+from apps.alerts.common.source_adapter import logger
+from apps.core.utils.local_cache import LocalTTLCache
+from apps.rpc.cmdb import CMDB
+
+INGEST_CONFIG_CACHE_KEY = "alerts:ingest:{}"
+ENRICH_CACHE_KEY = "alerts:enrich:{}"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def get_enable_enrich() -> bool:
+    """是否开启告警丰富，结果缓存，系统设置变更时清理"""
+    key = INGEST_CONFIG_CACHE_KEY.format("enable_enrich")
+    value = cache.get(key)
+    if value is None:
+        instance = SystemSetting.objects.filter(key=INIT_ALERT_ENRICH).first()
+        value = bool(instance.value.get("enable", False)) if instance else False
+        cache.set(key, value, _setting("ALERT_INGEST_CONFIG_CACHE_TTL", 60))
+    return value
+
+
+def get_event_levels() -> Tuple[str, List[str]]:
+    """事件级别（最低级别, 全部级别），结果缓存，级别变更时清理"""
+    key = INGEST_CONFIG_CACHE_KEY.format("event_levels")
+    levels = cache.get(key)
+    if levels is None:
+        levels = [
+            str(i) for i in
+            Level.objects.filter(level_type=LevelType.EVENT).order_by("level_id").values_list("level_id", flat=True)
+        ]
+        cache.set(key, levels, _setting("ALERT_INGEST_CONFIG_CACHE_TTL", 60))
+    return str(max(int(i) for i in levels)), levels
+
+
+def clear_ingest_config_cache(**kwargs):
+    cache.delete_many([INGEST_CONFIG_CACHE_KEY.format("enable_enrich"), INGEST_CONFIG_CACHE_KEY.format("event_levels")])
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    for model in (SystemSetting, Level):
+        post_save.connect(clear_ingest_config_cache, sender=model, dispatch_uid=f"ingest_config_save_{model.__name__}")
+        post_delete.connect(clear_ingest_config_cache, sender=model,
+                            dispatch_uid=f"ingest_config_delete_{model.__name__}")
+
+
+class CMDBEnricher:
+    """
+    批量告警丰富
+    资源按 (模型, 实例ID) 或 (模型, 实例名称) 去重，查询结果（包括未找到的空结果）按 TTL 两级缓存：
+    进程内LRU + Django共享缓存（未配置 Redis 时 locmem 默认只保留300个键，主要依赖进程内缓存）
+    """
+
+    local = LocalTTLCache(_setting("ALERT_ENRICH_LOCAL_CACHE_SIZE", 10000))
+
+    def __init__(self, batch_size: int = None, ttl: int = None):
+        self.batch_size = batch_size or _setting("ALERT_ENRICH_BATCH_SIZE", 500)
+        self.ttl = ttl or _setting("ALERT_ENRICH_CACHE_TTL", 300)
+
+    @staticmethod
+    def resource_query(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """与单条丰富的查询条件一致：优先按实例ID，其次按实例名称"""
+        resource_type = event.get("resource_type", None)
+        if not resource_type:
+            return None
+        resource_id = event.get("resource_id", None)
+        resource_name = event.get("resource_name", None)
+        if resource_id:
+            return {"model_id": resource_type, "_id": resource_id}
+        if resource_name:
+            return {"model_id": resource_type, "inst_name": resource_name}
+        return None
+
+    @staticmethod
+    def cache_key(query: Dict[str, Any]) -> str:
+        raw = f"{query['model_id']}\x1f{query.get('_id', '')}\x1f{query.get('inst_name', '')}"
+        return ENRICH_CACHE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+    def resolve(self, queries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """按缓存键批量获取 CMDB 实例信息，查询失败的资源不写缓存"""
+        resolved = {}
+        for key in queries:
+            instance = self.local.get(key)
+            if instance is not None:
+                resolved[key] = instance
+
+        missing = [key for key in queries if key not in resolved]
+        if missing:
+            try:
+                shared = cache.get_many(missing)
+            except Exception as e:
+                logger.warning(f"Failed to read enrich cache: {e}")
+                shared = {}
+            for key, instance in shared.items():
+                self.local.set(key, instance, self.ttl)
+            resolved.update(shared)
+
+        missing = [key for key in queries if key not in resolved]
+        for i in range(0, len(missing), self.batch_size):
+            keys = missing[i:i + self.batch_size]
+            try:
+                instances = CMDB().search_instances_batch(queries=[queries[key] for key in keys])
+            except Exception as e:
+                logger.error(f"CMDB search_instances_batch failed: {e}")
+                continue
+            fetched = {key: instance or {} for key, instance in zip(keys, instances)}
+            resolved.update(fetched)
+            for key, instance in fetched.items():
+                self.local.set(key, instance, self.ttl)
+            try:
+                cache.set_many(fetched, self.ttl)
+            except Exception as e:
+                logger.warning(f"Failed to write enrich cache: {e}")
+        return resolved
+
+    def enrich(self, events: List[Dict[str, Any]]) -> None:
+        """将 CMDB 实例信息合并到事件的 labels"""
+        event_keys = []
+        queries = {}
+        for event in events:
+            query = self.resource_query(event)
+            key = self.cache_key(query) if query else None
+            if key:
+                queries[key] = query
+            event_keys.append(key)
+
+        if not queries:
+            return
+
+        resolved = self.resolve(queries)
+        for event, key in zip(events, event_keys):
+            instance = resolved.get(key) if key else None
+            if instance:
+                event.setdefault("labels", {}).update(instance)
+
+
+class EventIngestPipeline:
+    """
+    事件接入流水线，按批次流式处理原始告警，每批依次完成映射、丰富、入库
+
+    Args:
+        adapter: 告警源适配器，提供字段映射与告警源信息
+        batch_size: 每批处理的事件数
+    """
+
+    def __init__(self, adapter, batch_size: int = None):
+        self.adapter = adapter
+        self.batch_size = batch_size or _setting("ALERT_INGEST_BATCH_SIZE", 500)
+        self.enricher = CMDBEnricher() if adapter.enable_rich_event else None
+
+    def _chunks(self, raw_events: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        chunk = []
+        for raw_event in raw_events:
+            chunk.append(raw_event)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def map_events(self, raw_events: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """阶段1：字段映射，映射失败的事件记录日志后丢弃"""
+        mapped = []
+        for raw_event in raw_events:
+            try:
+                mapped.append((raw_event, self.adapter.mapping_fields_to_event(raw_event)))
+            except Exception as e:
+                logger.error(f"Failed to transform alert: {raw_event}, error: {e}")
+        return mapped
+
+    def enrich_events(self, mapped: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        """阶段2：批量告警丰富"""
+        if not self.enricher:
+            return
+        try:
+            self.enricher.enrich([data for _, data in mapped])
+        except Exception as e:
+            logger.error(f"Failed to enrich events: {e}")
+
+    def build_events(self, mapped: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Event]:
+        """阶段3：构造 Event 对象"""
+        events = []
+        for raw_event, data in mapped:
+            try:
+                event = Event(**data)
+                self.adapter.add_base_fields(event, raw_event)
+                events.append(event)
+            except Exception as e:
+                logger.error(f"Failed to transform alert: {raw_event}, error: {e}")
+        return events
+
+    def run(self, raw_events: Iterable[Dict[str, Any]]) -> Iterator[List[Event]]:
+        """逐批处理并入库，产出每批已保存的事件"""
+        for chunk in self._chunks(raw_events):
+            mapped = self.map_events(chunk)
+            self.enrich_events(mapped)
+            events = self.build_events(mapped)
+            if not events:
+                continue
+            Event.objects.bulk_create(events, batch_size=self.batch_size, ignore_conflicts=True)  # 跳过唯一性约束
+            logger.info(f"Bulk saved {len(events)} events.")
+            yield events
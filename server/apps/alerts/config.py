@@ -2,6 +2,8 @@
 # @File: config.py
 # @Time: 2025/5/9 14:56
 # @Author: windyzhao
+import os
+
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
@@ -22,3 +24,10 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(minute='0', hour='*'),  # 每小时执行
     }
 }
+
+# 事件接入：每批处理的事件数、告警丰富批量查询CMDB的资源数、缓存时间（秒）及进程内缓存条数、系统设置与事件级别的缓存时间（秒）
+ALERT_INGEST_BATCH_SIZE = int(os.getenv("ALERT_INGEST_BATCH_SIZE", 500))
+ALERT_ENRICH_BATCH_SIZE = int(os.getenv("ALERT_ENRICH_BATCH_SIZE", 500))
+ALERT_ENRICH_CACHE_TTL = int(os.getenv("ALERT_ENRICH_CACHE_TTL", 300))
+ALERT_ENRICH_LOCAL_CACHE_SIZE = int(os.getenv("ALERT_ENRICH_LOCAL_CACHE_SIZE", 10000))
+ALERT_INGEST_CONFIG_CACHE_TTL = int(os.getenv("ALERT_INGEST_CONFIG_CACHE_TTL", 60))
@@ -0,0 +1,102 @@
+from unittest import mock
+
+import pytest
+
+from apps.alerts.common.assignment import AlertAssignmentOperator
+from apps.alerts.common.shield import EventShieldOperator
+from apps.alerts.constants import AlertAssignmentMatchType, AlertShieldMatchType, AlertStatus, EventStatus
+from apps.alerts.models import Alert, AlertAssignment, AlertShield, AlertSource, Event, OperatorLog
+
+
+def create_test_alerts():
+    """创建测试告警：级别 0 的两条会被分派，级别 1 的一条不匹配"""
+    alerts = []
+    for index, level in enumerate(["0", "0", "1"]):
+        alerts.append(Alert.objects.create(
+            alert_id=f"test-alert-{index}",
+            level=level,
+            title=f"测试告警{index}",
+            content="CPU 使用率过高",
+            fingerprint=f"fingerprint{index}",
+            source_name="prometheus",
+        ))
+    return alerts
+
+
+def create_test_events():
+    """创建测试事件：级别 0 的两条会被屏蔽，级别 1 的一条不匹配"""
+    source = AlertSource.objects.create(name="prometheus", source_id="prometheus", source_type="prometheus")
+    events = []
+    for index, level in enumerate(["0", "0", "1"]):
+        events.append(Event.objects.create(
+            source=source,
+            raw_data={},
+            title=f"测试事件{index}",
+            description="CPU 使用率过高",
+            level=level,
+            start_time="2025-01-01T00:00:00Z",
+            event_id=f"test-event-{index}",
+            resource_id=f"host-{index}",
+            status=EventStatus.PENDING,
+        ))
+    return events
+
+
+@pytest.mark.django_db
+def test_execute_auto_assignment():
+    alerts = create_test_alerts()
+    assignment = AlertAssignment.objects.create(
+        name="测试分派策略",
+        match_type=AlertAssignmentMatchType.FILTER,
+        match_rules=[[{"key": "level_id", "operator": "eq", "value": "0"}]],
+        personnel=["test_user"],
+        notify_channels=[],
+        notification_frequency={},
+        config={},
+        is_active=True,
+    )
+
+    with mock.patch("apps.alerts.service.alter_operator.get_default_notify_params", return_value=("email", None)), \
+            mock.patch("apps.alerts.common.assignment.ReminderService._send_reminder_notification") as notify:
+        result = AlertAssignmentOperator([alert.alert_id for alert in alerts]).execute_auto_assignment()
+
+    assert result["total_alerts"] == 3
+    assert result["assigned_alerts"] == 2
+    assert result["failed_alerts"] == 0
+    assert notify.call_count == 2
+    assert {item["assignment_id"] for item in result["assignment_results"]} == {assignment.id}
+
+    statuses = dict(Alert.objects.values_list("alert_id", "status"))
+    assert statuses == {
+        "test-alert-0": AlertStatus.PENDING,
+        "test-alert-1": AlertStatus.PENDING,
+        "test-alert-2": AlertStatus.UNASSIGNED,
+    }
+    assert Alert.objects.get(alert_id="test-alert-0").operator == ["test_user"]
+    assert OperatorLog.objects.filter(operator_object="告警处理-自动分派").count() == 2
+
+
+@pytest.mark.django_db
+def test_execute_shield_check():
+    events = create_test_events()
+    shield = AlertShield.objects.create(
+        name="测试屏蔽策略",
+        match_type=AlertShieldMatchType.FILTER,
+        match_rules=[[{"key": "level_id", "operator": "eq", "value": "0"}]],
+        suppression_time={},
+        is_active=True,
+    )
+
+    result = EventShieldOperator([event.event_id for event in events]).execute_shield_check()
+
+    assert result["total_events"] == 3
+    assert result["shielded_events"] == 2
+    assert result["unshielded_events"] == 1
+    assert {item["shield_id"] for item in result["shield_results"]} == {shield.id}
+
+    statuses = dict(Event.objects.values_list("event_id", "status"))
+    assert statuses == {
+        "test-event-0": EventStatus.SHIELD,
+        "test-event-1": EventStatus.SHIELD,
+        "test-event-2": EventStatus.PENDING,
+    }
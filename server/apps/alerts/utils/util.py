@@ -9,6 +9,7 @@ import base64
 from functools import wraps
 from typing import Dict, Any, List
 
+import pandas as pd
 from django.utils.crypto import get_random_string
 
 from apps.core.backends import logger
@@ -122,3 +123,52 @@ def generate_instance_fingerprint(event_data: Dict[str, Any], fields: List = [])
     fingerprint = hashlib.md5(sorted_data.encode('utf-8')).hexdigest()
 
     return fingerprint
+
+
+def generate_instance_fingerprints(events: pd.DataFrame, fields: List = None) -> pd.Series:
+    """
+    批量生成实例指纹，结果与逐行调用 generate_instance_fingerprint 一致
+
+    先按列做字符串归一化，再对去重后的字段组合计算MD5，
+    哈希次数取决于实例数而不是事件数
+
+    Args:
+        events: 事件DataFrame
+        fields: 用于生成指纹的字段列表
+
+    Returns:
+        与 events 同索引的指纹Series
+    """
+    if not fields:
+        fields = ['item', 'resource_id', 'resource_type', 'alert_source']
+
+    if events.empty:
+        return pd.Series([], index=events.index, dtype=object)
+
+    normalized = []
+    for field in fields:
+        if field not in events.columns:
+            normalized.append(pd.Series('unknown', index=events.index))
+            continue
+        column = events[field]
+        values = column.astype(str).str.strip()
+        missing = column.isna()
+        if missing.any():
+            # 与逐行计算保持一致：None按空值处理，NaN按字符串'nan'处理
+            is_none = column[missing].map(lambda value: value is None).astype(bool)
+            values = values.mask(is_none.reindex(column.index, fill_value=False), '')
+            values = values.mask(missing & ~is_none.reindex(column.index, fill_value=False), 'nan')
+        normalized.append(values.mask(values == '', 'unknown'))
+
+    combined = normalized[0]
+    for values in normalized[1:]:
+        combined = combined + '\x1f' + values
+    codes, uniques = pd.factorize(combined, sort=False)
+
+    hashes = []
+    for unique in uniques:
+        fingerprint_data = dict(zip(fields, unique.split('\x1f')))
+        sorted_data = json.dumps(fingerprint_data, sort_keys=True, ensure_ascii=False)
+        hashes.append(hashlib.md5(sorted_data.encode('utf-8')).hexdigest())
+
+    return pd.Series(pd.Index(hashes).take(codes), index=events.index, dtype=object)
@@ -73,3 +73,27 @@ def sync_periodic_update_task_status():
                                         exec_time__lt=five_minutes_ago).update(
         exec_status=CollectRunStatusType.ERROR)
     logger.info("==开始周期执行修改采集状态完成==, rows={}".format(rows))
+
+
+@shared_task
+def instance_import_job_task(job_id):
+    """
+    实例导入任务
+    """
+    from apps.cmdb.services.instance_job import InstanceJobManage
+
+    logger.info("==开始实例导入任务== job_id={}".format(job_id))
+    InstanceJobManage.run_import(job_id)
+    logger.info("==实例导入任务执行结束== job_id={}".format(job_id))
+
+
+@shared_task
+def instance_export_job_task(job_id):
+    """
+    实例导出任务
+    """
+    from apps.cmdb.services.instance_job import InstanceJobManage
+
+    logger.info("==开始实例导出任务== job_id={}".format(job_id))
+    InstanceJobManage.run_export(job_id)
+    logger.info("==实例导出任务执行结束== job_id={}".format(job_id))
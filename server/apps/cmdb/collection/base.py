@@ -4,12 +4,18 @@
 # @Author: windyzhao
 from abc import ABCMeta, abstractmethod
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, List
 
-import requests
-
-from apps.cmdb.constants import VICTORIAMETRICS_HOST
+from apps.cmdb.constants import COLLECT_QUERY_PAGE_SIZE, VICTORIAMETRICS_HOST, VICTORIAMETRICS_POOL_SIZE
 from apps.cmdb.models import CollectModels
 from apps.core.logger import cmdb_logger as logger
+from apps.core.utils.http_session import get_pooled_session
+
+
+def page_metric_sqls(metrics: List[str], metric_sql: Callable[[str], str]) -> Iterator[str]:
+    """按指标分页的查询语句，每页最多 COLLECT_QUERY_PAGE_SIZE 个指标"""
+    for i in range(0, len(metrics), COLLECT_QUERY_PAGE_SIZE):
+        yield " or ".join(metric_sql(m) for m in metrics[i:i + COLLECT_QUERY_PAGE_SIZE])
 
 
 def timestamp_gt_one_day_ago(collect_timestamp):
@@ -32,11 +38,17 @@ class Collection:
 
     def query(self, sql, timeout=60):
         """查询数据"""
-        resp = requests.post(self.url, data={"query": sql}, timeout=timeout)
+        resp = get_pooled_session(VICTORIAMETRICS_POOL_SIZE).post(self.url, data={"query": sql}, timeout=timeout)
         if resp.status_code != 200:
             raise Exception(f"request error！{resp.text}")
         return resp.json()
 
+    def iter_query(self, sqls: Iterable[str], timeout=60) -> Iterator[dict]:
+        """逐页查询并逐条产出序列，同一时间只保留一页的响应"""
+        for sql in sqls:
+            data = self.query(sql, timeout=timeout)
+            yield from data.get("data", {}).get("result", [])
+
 
 class CollectBase(metaclass=ABCMeta):
     """
@@ -74,10 +86,17 @@ class CollectBase(metaclass=ABCMeta):
         """格式化指标"""
         raise NotImplementedError
 
-    @abstractmethod
+    def metric_sql(self, metric):
+        """单个指标的查询语句"""
+        return metric
+
     def prom_sql(self):
         """Prometheus查询语句"""
-        raise NotImplementedError
+        return " or ".join(self.metric_sql(m) for m in self._metrics)
+
+    def page_sqls(self) -> Iterator[str]:
+        """按指标分页的查询语句，每页最多 COLLECT_QUERY_PAGE_SIZE 个指标"""
+        return page_metric_sqls(list(self._metrics), self.metric_sql)
 
     def get_collect_inst(self):
         instance = CollectModels.objects.get(id=self.task_id)
@@ -85,14 +104,14 @@ class CollectBase(metaclass=ABCMeta):
 
     @property
     def model_id(self):
-        instance = self.get_collect_inst()
-        return instance.model_id
+        # 采集任务的模型在一次采集中不会变化，只查询一次
+        if "_model_id" not in self.__dict__:
+            self._model_id = self.get_collect_inst().model_id
+        return self._model_id
 
     def query_data(self):
-        """查询数据"""
-        sql = self.prom_sql()
-        data = Collection().query(sql)
-        return data.get("data", [])
+        """查询数据，按指标分页查询，result 为逐页拉取的序列迭代器，format_data 只需遍历一次"""
+        return {"resultType": "vector", "result": Collection().iter_query(self.page_sqls())}
 
     def run(self):
         """执行"""
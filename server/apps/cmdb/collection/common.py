@@ -1,8 +1,14 @@
+import hashlib
+import json
+from collections import defaultdict
+
 from dotenv import load_dotenv
 
-from apps.cmdb.constants import INSTANCE, INSTANCE_ASSOCIATION
+from apps.cmdb.constants import COLLECT_HASH, INSTANCE, INSTANCE_ASSOCIATION
 from apps.cmdb.graph.neo4j import Neo4jClient
 from apps.cmdb.services.model import ModelManage
+from apps.core.exceptions.base_app_exception import BaseAppException
+from apps.core.logger import cmdb_logger as logger
 
 load_dotenv()
 
@@ -21,8 +27,12 @@ class Management:
         self.unique_keys = unique_keys
         self.check_attr_map = self.get_check_attr_map()
         self.task_id = task_id
+        self.unchanged_list = []
         self.old_map, self.new_map = self.format_data()
         self.add_list, self.update_list, self.delete_list = self.contrast(self.old_map, self.new_map)
+        logger.info(f"collect contrast model={self.model_id} task={self.task_id} add={len(self.add_list)} "
+                    f"update={len(self.update_list)} delete={len(self.delete_list)} "
+                    f"unchanged={len(self.unchanged_list)}")
 
     def get_check_attr_map(self):
         attrs = ModelManage.search_model_attr(self.model_id)
@@ -48,18 +58,41 @@ class Management:
             new_map[key] = info
         return old_map, new_map
 
+    def content_hash(self, info):
+        """采集数据（含关联）与纳管参数的内容哈希，用于判断实例自上次采集后是否变化"""
+        content = dict(
+            data={k: v for k, v in info.items() if k not in ("_id", COLLECT_HASH)},
+            organization=self.organization,
+            collect_task=self.task_id,
+        )
+        return hashlib.md5(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+    def is_unchanged(self, old_info, info):
+        """
+        采集内容哈希与上次写入的一致，且可编辑属性与当前实例一致（未被手动修改）时无需更新
+        """
+        if old_info.get(COLLECT_HASH) != info[COLLECT_HASH]:
+            return False
+        return all(old_info.get(attr_id) == info[attr_id] for attr_id in self.check_attr_map["editable"]
+                   if attr_id in info)
+
     def contrast(self, old_map, new_map):
         """数据对比
         数据删除逻辑：
         查询不到数据：不动cmdb数据，查询到数据，对比删除
+        数据更新逻辑：内容未变化的实例不再写入，只刷新采集时间
         """
         add_list, update_list, delete_list = [], [], []
         for key, info in new_map.items():
             info["model_id"] = self.model_id
+            info[COLLECT_HASH] = self.content_hash(info)
             if key not in old_map:
                 add_list.append(info)
             else:
                 info.update(_id=old_map[key]["_id"])
+                if self.is_unchanged(old_map[key], info):
+                    self.unchanged_list.append(info)
+                    continue
                 update_list.append(info)
         if getattr(self.collect_plugin, "_MODEL_ID", None) is not None:
             # 如果插件有定义模型ID，则需要删除cmdb数据
@@ -76,36 +109,83 @@ class Management:
         if not inst_list:
             return result
 
+        assos_list = []
+        for instance_info in inst_list:
+            assos_list.append(instance_info.pop("assos", []))
+            instance_info.update(
+                model_id=self.model_id,
+                organization=self.organization,
+                collect_task=self.task_id,
+                auto_collect=True,
+                collect_time=self.collect_time,
+            )
+
         with Neo4jClient() as ag:
             exist_items, _ = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": self.model_id}])
-            for instance_info in inst_list:
-                assos = instance_info.pop("assos", [])
-                try:
-                    instance_info.update(
-                        model_id=self.model_id,
-                        organization=self.organization,
-                        collect_task=self.task_id,
-                        auto_collect=True,
-                        collect_time=self.collect_time,
-                    )
-                    entity = ag.create_entity(INSTANCE, instance_info, self.check_attr_map, exist_items)
-                    # 创建关联
-                    assos_result = self.setting_assos(entity, assos)
-                    exist_items.append(entity)
-                    result["success"].append(dict(inst_info=entity, assos_result=assos_result))
-                except Exception as e:
-                    result["failed"].append({"instance_info": instance_info, "error": getattr(e, "message", e)})
+            # 批量校验并创建实例
+            entities = ag.bulk_create_entity(INSTANCE, inst_list, self.check_attr_map, exist_items)
+
+        created = []
+        for instance_info, assos, (entity, error) in zip(inst_list, assos_list, entities):
+            if error is not None:
+                result["failed"].append({"instance_info": instance_info, "error": getattr(error, "message", error)})
+                continue
+            created.append((entity, assos))
+
+        # 批量创建关联
+        assos_results = self.bulk_setting_assos(created)
+        for (entity, _), assos_result in zip(created, assos_results):
+            result["success"].append(dict(inst_info=entity, assos_result=assos_result))
 
         return result
 
+    @staticmethod
+    def unique_value(value):
+        """唯一属性值的索引键，不可哈希的值（如列表）按序列化结果比较"""
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            return json.dumps(value, sort_keys=True, default=str)
+
+    def build_unique_index(self, exist_items):
+        """唯一属性索引 {属性: {值: {实例ID}}}"""
+        unique_index = {attr_id: defaultdict(set) for attr_id in self.check_attr_map["is_only"]}
+        for item in exist_items:
+            for attr_id, values in unique_index.items():
+                if attr_id in item:
+                    values[self.unique_value(item[attr_id])].add(item["_id"])
+        return unique_index
+
+    def check_unique(self, unique_index, exist_map, instance_info):
+        """更新时校验唯一属性（排除实例自身），通过后把实例的新值写入索引"""
+        inst_id = instance_info["_id"]
+        not_only_attr = [
+            attr_id for attr_id, values in unique_index.items()
+            if attr_id in instance_info and values.get(self.unique_value(instance_info[attr_id]), set()) - {inst_id}
+        ]
+        if not_only_attr:
+            raise BaseAppException("".join(f"{self.check_attr_map['is_only'][i]} exist；" for i in not_only_attr))
+
+        old_info = exist_map.get(inst_id, {})
+        for attr_id, values in unique_index.items():
+            if attr_id not in instance_info:
+                continue
+            if attr_id in old_info:
+                values[self.unique_value(old_info[attr_id])].discard(inst_id)
+            values[self.unique_value(instance_info[attr_id])].add(inst_id)
+
     def update_inst(self, inst_list):
-        """更新实例"""
+        """更新实例，校验在内存中完成，通过校验的实例批量写入"""
         result = {"success": [], "failed": []}
         if not inst_list:
             return result
 
+        rows, pending = [], []
         with Neo4jClient() as ag:
             exist_items, _ = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": self.model_id}])
+            exist_map = {i["_id"]: i for i in exist_items}
+            unique_index = self.build_unique_index(exist_items)
             for instance_info in inst_list:
                 try:
                     instance_info.update(
@@ -116,22 +196,48 @@ class Management:
                         collect_time=self.collect_time,
                     )
                     assos = instance_info.pop("assos", [])
-                    exist_items = [i for i in exist_items if i["_id"] != instance_info["_id"]]
-                    entity = ag.set_entity_properties(
-                        INSTANCE, [instance_info["_id"]], instance_info, self.check_attr_map, exist_items
-                    )
-                    # 更新关联
-                    assos_result = self.setting_assos(
-                        dict(model_id=self.model_id, _id=entity[0]["_id"], inst_name=entity[0]["inst_name"]), assos)
-                    exist_items.append(entity[0])
-                    result["success"].append(dict(inst_info=entity[0], assos_result=assos_result))
+                    self.check_unique(unique_index, exist_map, instance_info)
+                    ag.check_required_attr(instance_info, self.check_attr_map["is_required"], is_update=True)
+                    properties = ag.get_editable_attr(instance_info, self.check_attr_map["editable"])
+                    if not properties:
+                        raise BaseAppException("properties is empty")
+                    properties[COLLECT_HASH] = instance_info[COLLECT_HASH]
+                    rows.append(dict(index=len(pending), id=instance_info["_id"], properties=properties))
+                    pending.append((instance_info, assos))
                 except Exception as e:
                     result["failed"].append({"instance_info": instance_info, "error": getattr(e, "message", e)})
+
+            nodes = ag.bulk_update_entity(INSTANCE, rows) if rows else {}
+
+        updated = []
+        for index, (instance_info, assos) in enumerate(pending):
+            node = nodes.get(index)
+            if node is None:
+                result["failed"].append({"instance_info": instance_info, "error": "update entity error"})
+                continue
+            updated.append((node, assos))
+
+        # 批量更新关联
+        assos_results = self.bulk_setting_assos(updated)
+        for (node, _), assos_result in zip(updated, assos_results):
+            result["success"].append(dict(inst_info=node, assos_result=assos_result))
         return result
 
+    def touch_inst(self, inst_list):
+        """内容未变化的实例只批量刷新采集时间，不计入更新结果"""
+        if not inst_list:
+            return
+        rows = [dict(index=index, id=instance_info["_id"], properties={"collect_time": self.collect_time})
+                for index, instance_info in enumerate(inst_list)]
+        try:
+            with Neo4jClient() as ag:
+                ag.bulk_update_entity(INSTANCE, rows)
+        except Exception as e:
+            logger.warning(f"refresh collect time failed model={self.model_id} task={self.task_id}: {e}")
+
     @staticmethod
     def delete_inst(inst_list):
-        """删除实例"""
+        """删除实例，一次删除全部实例，失败时退回逐个删除"""
 
         result = {"success": [], "failed": []}
 
@@ -139,6 +245,13 @@ class Management:
             return result
 
         with Neo4jClient() as ag:
+            try:
+                ag.batch_delete_entity(INSTANCE, [int(i["_id"]) for i in inst_list])
+                result["success"].extend(inst_list)
+                return result
+            except Exception as e:
+                logger.warning(f"batch delete instance failed, fallback to single delete: {e}")
+
             for instance_info in inst_list:
                 try:
                     ag.detach_delete_entity(INSTANCE, instance_info["_id"])
@@ -159,45 +272,66 @@ class Management:
         )
         return asso_info
 
-    def setting_assos(self, src_info, dst_list):
-        """设置关联关系"""
-        assos_result = {"success": [], "failed": []}
-        for dst_info in dst_list:
-            dst_id = None
+    def bulk_setting_assos(self, items):
+        """
+        批量设置关联关系，items 为 [(源实例, 关联的目标实例列表)]，返回与 items 一一对应的关联结果
+        目标实例按 (模型, 实例名称) 一次查出，关联通过 bulk_create_edge 批量创建
+        """
+        assos_results = [{"success": [], "failed": []} for _ in items]
+        dst_keys = {(dst_info["model_id"], dst_info["inst_name"]) for _, dst_list in items for dst_info in dst_list}
+        if not dst_keys:
+            return assos_results
+
+        def failed(index, dst_id, src_info, dst_info, error):
+            asso_info = self.set_asso_info(dst_id, src_info, dst_info)
+            asso_info["src_inst_name"] = src_info["inst_name"]
+            asso_info["dst_inst_name"] = dst_info["inst_name"]
+            asso_info.update({"src_info": src_info, "dst_info": dst_info,
+                              "error": str(getattr(error, "message", error))})
+            assos_results[index]["failed"].append(asso_info)
+
+        with Neo4jClient() as ag:
             try:
-                with Neo4jClient() as ag:
-                    dst_entity, _ = ag.query_entity(
-                        INSTANCE,
-                        [
-                            {"field": "model_id", "type": "str=", "value": dst_info["model_id"]},
-                            {"field": "inst_name", "type": "str=", "value": dst_info["inst_name"]},
-                        ],
-                    )
-                    if not dst_entity:
-                        raise Exception(f"target instance {dst_info['model_id']}:{dst_info['inst_name']} not found")
+                dst_ids = ag.query_entity_ids_by_inst_names(INSTANCE, list(dst_keys))
+            except Exception as e:
+                for index, (src_info, dst_list) in enumerate(items):
+                    for dst_info in dst_list:
+                        failed(index, None, src_info, dst_info, e)
+                return assos_results
 
-                    dst_id = dst_entity[0]["_id"]
+            edges = []
+            for index, (src_info, dst_list) in enumerate(items):
+                for dst_info in dst_list:
+                    dst_id = dst_ids.get((dst_info["model_id"], dst_info["inst_name"]))
+                    if dst_id is None:
+                        failed(index, None, src_info, dst_info,
+                               f"target instance {dst_info['model_id']}:{dst_info['inst_name']} not found")
+                        continue
                     asso_info = self.set_asso_info(dst_id, src_info, dst_info)
-                    ag.create_edge(
-                        INSTANCE_ASSOCIATION, src_info["_id"], INSTANCE, dst_id, INSTANCE, asso_info, "model_asst_id"
-                    )
-                    asso_info["src_inst_name"] = src_info["inst_name"]
-                    asso_info["dst_inst_name"] = dst_info["inst_name"]
-                    assos_result["success"].append(asso_info)
-            except Exception as e:
-                asso_info = self.set_asso_info(dst_id, src_info, dst_info)
-                asso_info["src_inst_name"] = src_info["inst_name"]
-                asso_info["dst_inst_name"] = dst_info["inst_name"]
-                asso_info.update({"src_info": src_info, "dst_info": dst_info, "error": str(getattr(e, "message", e))})
-                assos_result["failed"].append(asso_info)
-        return assos_result
+                    edges.append((index, src_info, dst_info, dst_id, asso_info))
+
+            created = ag.bulk_create_edge(
+                INSTANCE_ASSOCIATION, INSTANCE, INSTANCE, [i[-1] for i in edges], "model_asst_id",
+                src_key="src_inst_id", dst_key="dst_inst_id",
+            ) if edges else []
+
+        for (index, src_info, dst_info, dst_id, asso_info), (edge, error) in zip(edges, created):
+            if edge is None:
+                failed(index, dst_id, src_info, dst_info, error)
+                continue
+            asso_info["src_inst_name"] = src_info["inst_name"]
+            asso_info["dst_inst_name"] = dst_info["inst_name"]
+            assos_results[index]["success"].append(asso_info)
+        return assos_results
 
     def update(self):
         update_result = self.update_inst(self.update_list)
+        self.touch_inst(self.unchanged_list)
         return dict(add={"success": [], "failed": []}, update=update_result, delete={"success": [], "failed": []})
 
     def controller(self):
         delete_result = self.delete_inst(self.delete_list)
         add_result = self.add_inst(self.add_list)
         update_result = self.update_inst(self.update_list)
+        self.touch_inst(self.unchanged_list)
         return dict(add=add_result, update=update_result, delete=delete_result)
@@ -4,7 +4,7 @@ from collections import defaultdict
 from datetime import datetime, timezone
 from typing import Type
 
-from apps.cmdb.collection.base import timestamp_gt_one_day_ago, CollectBase, Collection
+from apps.cmdb.collection.base import timestamp_gt_one_day_ago, CollectBase, Collection, page_metric_sqls
 from apps.cmdb.collection.common import Management
 from apps.cmdb.collection.constants import (
     COLLECTION_METRICS,
@@ -147,11 +147,10 @@ class CollectK8sMetrics:
         return metrics
 
     def query_data(self):
-        """查询数据"""
-        sql = " or ".join(
-            "{}{{instance_id=\"{}\"}}".format(j, self.cluster_name) for m in COLLECTION_METRICS.values() for j in m)
-        data = Collection().query(sql)
-        return data.get("data", [])
+        """查询数据，按指标分页查询，result 为逐页拉取的序列迭代器"""
+        metrics = [j for m in COLLECTION_METRICS.values() for j in m]
+        sqls = page_metric_sqls(metrics, lambda metric: "{}{{instance_id=\"{}\"}}".format(metric, self.cluster_name))
+        return {"resultType": "vector", "result": Collection().iter_query(sqls)}
 
     def format_data(self, data):
         """格式化数据"""
@@ -698,10 +697,8 @@ class CollectVmwareMetrics(CollectBase):
 
         return mapping
 
-    def prom_sql(self):
-        sql = " or ".join(
-            "{}{{instance_id=\"{}\"}}".format(m, f"{self.task_id}_{self.inst_name}") for m in self._metrics)
-        return sql
+    def metric_sql(self, metric):
+        return "{}{{instance_id=\"{}\"}}".format(metric, f"{self.task_id}_{self.inst_name}")
 
     def format_data(self, data):
         """格式化数据"""
@@ -779,10 +776,6 @@ class CollectNetworkMetrics(CollectBase):
     def _metrics(self):
         return NETWORK_COLLECT
 
-    def prom_sql(self):
-        sql = " or ".join(m for m in self._metrics)
-        return sql
-
     @staticmethod
     def get_oid_map():
         result = OidMapping.objects.all().values()
@@ -1043,10 +1036,6 @@ class ProtocolCollectMetrics(CollectBase):
         data = PROTOCOL_METRIC_MAP[self.model_id]
         return data
 
-    def prom_sql(self):
-        sql = " or ".join(m for m in self._metrics)
-        return sql
-
     @staticmethod
     def set_mysql_inst_name(data, *args, **kwargs):
         # {ip}-mysql-{port}
@@ -1146,10 +1135,6 @@ class AliyunCollectMetrics(CollectBase):
     #         "{}{{instance_id=\"{}\"}}".format(m, f"{self.task_id}_{self.inst_name}") for m in self._metrics)
     #     return sql
 
-    def prom_sql(self):
-        sql = " or ".join(m for m in self._metrics)
-        return sql
-
     def check_task_id(self, instance_id):
         # 只要是同一个account 就认为是同一个task 为了保证不同的区域的数据能在同一个地方采集上来
         # TODO 做下架需要修改逻辑 保证task_id
@@ -1395,10 +1380,8 @@ class HostCollectMetrics(CollectBase):
         data = HOST_COLLECT_METRIC
         return data
 
-    def prom_sql(self):
-        sql = " or ".join(
-            "{}{{instance_id=\"{}\"}}".format(m, f"{self.task_id}_{self.inst_name}") for m in self._metrics)
-        return sql
+    def metric_sql(self, metric):
+        return "{}{{instance_id=\"{}\"}}".format(metric, f"{self.task_id}_{self.inst_name}")
 
     @property
     def model_field_mapping(self):
@@ -1682,10 +1665,6 @@ class MiddlewareCollectMetrics(CollectBase):
                     result.append(data)
             self.result[self.model_id] = result
 
-    def prom_sql(self):
-        sql = " or ".join(m for m in self._metrics)
-        return sql
-
 
 class QCloudCollectMetrics(CollectBase):
     _MODEL_ID = "qcloud"
@@ -1698,10 +1677,6 @@ class QCloudCollectMetrics(CollectBase):
     def _metrics(self):
         return QCLOUD_COLLECT_CLUSTER
 
-    def prom_sql(self):
-        sql = " or ".join(m for m in self._metrics)
-        return sql
-
     @staticmethod
     def set_instance_inst_name(data, *args, **kwargs):
         if not data.get("resource_name"):
@@ -2134,7 +2109,3 @@ class DBCollectCollectMetrics(CollectBase):
                 if data:
                     result.append(data)
             self.result[self.model_id] = result
-
-    def prom_sql(self):
-        sql = " or ".join(m for m in self._metrics)
-        return sql
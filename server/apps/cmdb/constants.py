@@ -43,6 +43,11 @@ MODEL = "model"
 # 实例标签
 INSTANCE = "instance"
 
+# 实例全文索引
+INSTANCE_FULLTEXT_INDEX = "instance_fulltext"
+# 值不是字符串的属性类型，Neo4j 全文索引只索引字符串，这些属性在全文检索时单独扫描
+FULLTEXT_SCAN_ATTR_TYPES = {"int", "float", "bool", "organization", "user", "list"}
+
 # 模型关联标签
 MODEL_ASSOCIATION = "model_association"
 
@@ -251,6 +256,38 @@ class CollectDriverTypes(object):
     )
 
 
+class InstanceJobType(object):
+    """
+    实例导入导出任务类型
+    """
+
+    IMPORT = "import"
+    EXPORT = "export"
+
+    CHOICE = (
+        (IMPORT, "导入"),
+        (EXPORT, "导出"),
+    )
+
+
+class InstanceJobStatus(object):
+    """
+    实例导入导出任务状态
+    """
+
+    PENDING = 0
+    RUNNING = 1
+    SUCCESS = 2
+    ERROR = 3
+
+    CHOICE = (
+        (PENDING, "等待执行"),
+        (RUNNING, "执行中"),
+        (SUCCESS, "成功"),
+        (ERROR, "失败"),
+    )
+
+
 # 采集对象树
 COLLECT_OBJ_TREE = [
     {
@@ -345,6 +382,9 @@ COLLECT_OBJ_TREE = [
 # ====== 配置采集 ======
 
 VICTORIAMETRICS_HOST = os.getenv("VICTORIAMETRICS_HOST", "")
+VICTORIAMETRICS_POOL_SIZE = int(os.getenv("CMDB_VICTORIAMETRICS_POOL_SIZE", 10))  # 采集查询的连接池大小
+COLLECT_QUERY_PAGE_SIZE = int(os.getenv("CMDB_COLLECT_QUERY_PAGE_SIZE", 20))  # 采集时每次查询的指标数
+COLLECT_HASH = "collect_hash"  # 实例上记录的最近一次采集内容哈希
 
 STARGAZER_URL = os.getenv("STARGAZER_URL", "http://stargazer:8083")
 # ===== 实例权限 =====
@@ -353,3 +393,26 @@ PERMISSION_TASK = "task"  # 采集任务
 PERMISSION_MODEL = "model"  # 模型
 OPERATE = "Operate"
 VIEW = "View"
+
+# ===== 图数据库连接池 =====
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("CMDB_NEO4J_POOL_SIZE", 50))  # 每个进程的最大连接数
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("CMDB_NEO4J_ACQUISITION_TIMEOUT", 60))  # 获取连接超时（秒）
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("CMDB_NEO4J_CONNECTION_LIFETIME", 3600))  # 连接最长存活时间（秒）
+NEO4J_SLOW_ACQUISITION_SECONDS = float(os.getenv("CMDB_NEO4J_SLOW_ACQUISITION", 1))  # 获取连接超过该时间记录告警日志
+
+# ===== 图数据库批量写入 =====
+NEO4J_BATCH_SIZE = int(os.getenv("CMDB_NEO4J_BATCH_SIZE", 1000))  # 每条 UNWIND 语句携带的行数
+
+# ===== 实例拓扑 =====
+TOPO_MAX_DEPTH = int(os.getenv("CMDB_TOPO_MAX_DEPTH", 10))  # 拓扑查询默认展开的层数
+TOPO_MAX_NODES = int(os.getenv("CMDB_TOPO_MAX_NODES", 2000))  # 单次拓扑查询返回的实体上限
+
+# ===== 模型元数据缓存 =====
+MODEL_SCHEMA_CACHE_TTL = int(os.getenv("CMDB_MODEL_SCHEMA_CACHE_TTL", 300))  # 进程内缓存的最长时间（秒）
+MODEL_SCHEMA_CACHE_SIZE = int(os.getenv("CMDB_MODEL_SCHEMA_CACHE_SIZE", 2048))  # 进程内缓存的最大条目数
+
+# ===== 实例导入导出 =====
+IMPORT_CHUNK_SIZE = int(os.getenv("CMDB_IMPORT_CHUNK_SIZE", 500))  # 导入时每批校验、写入的行数
+EXPORT_PAGE_SIZE = int(os.getenv("CMDB_EXPORT_PAGE_SIZE", 1000))  # 导出时每次查询的实例数
+IMPORT_RESULT_MESSAGE_LIMIT = int(os.getenv("CMDB_IMPORT_RESULT_MESSAGE_LIMIT", 1000))  # 导入任务保留的明细条数
+INSTANCE_JOB_STALE_SECONDS = int(os.getenv("CMDB_INSTANCE_JOB_STALE_SECONDS", 600))  # 执行中的任务超过该时间无进展可重新执行
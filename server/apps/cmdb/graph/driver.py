@@ -0,0 +1,152 @@
+"""
+进程内共享的 Neo4j 驱动
+
+驱动内部维护连接池，创建驱动需要完成 Bolt 握手和路由表发现，因此每个进程只创建一次，
+所有 Neo4jClient 共用同一个驱动，各自只打开轻量的会话。
+Celery prefork 等 fork 出的子进程不会复用父进程的驱动（父子进程共享 socket 会互相干扰），
+而是在子进程中首次使用时重新创建。
+"""
+import atexit
+import os
+import threading
+import time
+from typing import Optional
+
+from neo4j import Driver, GraphDatabase
+
+from apps.cmdb.constants import (
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+    NEO4J_MAX_CONNECTION_LIFETIME,
+    NEO4J_MAX_CONNECTION_POOL_SIZE,
+    NEO4J_SLOW_ACQUISITION_SECONDS,
+)
+from apps.core.logger import cmdb_logger as logger
+
+
+class PoolMetrics:
+    """连接池指标：获取连接的等待时间、使用中的会话数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.acquisitions = 0
+        self.acquisition_wait_total = 0.0
+        self.acquisition_wait_max = 0.0
+        self.sessions_opened = 0
+        self.sessions_in_use = 0
+        self.sessions_in_use_max = 0
+
+    def record_acquisition(self, wait: float):
+        with self._lock:
+            self.acquisitions += 1
+            self.acquisition_wait_total += wait
+            self.acquisition_wait_max = max(self.acquisition_wait_max, wait)
+
+    def session_opened(self):
+        with self._lock:
+            self.sessions_opened += 1
+            self.sessions_in_use += 1
+            self.sessions_in_use_max = max(self.sessions_in_use_max, self.sessions_in_use)
+
+    def session_closed(self):
+        with self._lock:
+            self.sessions_in_use -= 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return dict(
+                acquisitions=self.acquisitions,
+                acquisition_wait_avg=self.acquisition_wait_total / self.acquisitions if self.acquisitions else 0.0,
+                acquisition_wait_max=self.acquisition_wait_max,
+                sessions_opened=self.sessions_opened,
+                sessions_in_use=self.sessions_in_use,
+                sessions_in_use_max=self.sessions_in_use_max,
+            )
+
+
+class Neo4jDriverRegistry:
+    """按进程懒加载的驱动注册表"""
+
+    def __init__(self):
+        self._driver: Optional[Driver] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.metrics = PoolMetrics()
+
+    def get_driver(self) -> Driver:
+        pid = os.getpid()
+        if self._driver is not None and self._pid == pid:
+            return self._driver
+        with self._lock:
+            if self._driver is None or self._pid != pid:
+                self._driver = self._create_driver()
+                self._pid = pid
+        return self._driver
+
+    def _create_driver(self) -> Driver:
+        driver = GraphDatabase.driver(
+            os.getenv("NEO4J_URI"),
+            auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")),
+            max_connection_pool_size=NEO4J_MAX_CONNECTION_POOL_SIZE,
+            connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+        )
+        self._instrument_pool(driver)
+        logger.info(f"neo4j driver created, pid={os.getpid()}, pool_size={NEO4J_MAX_CONNECTION_POOL_SIZE}")
+        return driver
+
+    def _instrument_pool(self, driver: Driver):
+        """包装连接池的 acquire 统计获取连接的等待时间，驱动内部结构不符时跳过统计"""
+        pool = getattr(driver, "_pool", None)
+        acquire = getattr(pool, "acquire", None)
+        if acquire is None:
+            return
+
+        def timed_acquire(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return acquire(*args, **kwargs)
+            finally:
+                wait = time.perf_counter() - start
+                self.metrics.record_acquisition(wait)
+                if wait >= NEO4J_SLOW_ACQUISITION_SECONDS:
+                    logger.warning(f"neo4j connection acquisition took {wait:.3f}s, pool: {self.pool_status()}")
+
+        pool.acquire = timed_acquire
+
+    def pool_status(self) -> dict:
+        """连接池中的连接数（使用中/空闲），驱动尚未创建时为空"""
+        pool = getattr(self._driver, "_pool", None) if self._pid == os.getpid() else None
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {}
+        with pool.lock:
+            in_use = sum(connection.in_use for address in connections for connection in connections[address])
+            total = sum(len(connections[address]) for address in connections)
+        return dict(connections_in_use=in_use, connections_idle=total - in_use, max_size=NEO4J_MAX_CONNECTION_POOL_SIZE)
+
+    def stats(self) -> dict:
+        return {**self.metrics.to_dict(), **self.pool_status()}
+
+    def reset_after_fork(self):
+        """子进程丢弃继承来的驱动（不关闭，避免影响父进程的连接），下次使用时重新创建"""
+        self._driver = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.metrics = PoolMetrics()
+
+    def close(self):
+        with self._lock:
+            if self._driver is not None and self._pid == os.getpid():
+                self._driver.close()
+            self._driver = None
+            self._pid = None
+
+
+neo4j_driver_registry = Neo4jDriverRegistry()
+atexit.register(neo4j_driver_registry.close)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=neo4j_driver_registry.reset_after_fork)
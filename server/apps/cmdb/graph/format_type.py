@@ -81,6 +81,11 @@ def id_eq(param):
     return f"id(n) = {value}"
 
 
+def id_gt(param):
+    value = param["value"]
+    return f"id(n) > {int(value)}"
+
+
 def user_in(param):
     field = param["field"]
     value = param["value"]
@@ -109,6 +114,7 @@ FORMAT_TYPE = {
     "list[]": format_list_in,
     "id=": id_eq,
     "id[]": id_in,
+    "id>": id_gt,
     "user[]": user_in,
     "user=": user_eq,
 }
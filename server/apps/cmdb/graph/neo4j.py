@@ -1,38 +1,120 @@
 import os
 import json
+import re
 from typing import List, Union
 
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
 from neo4j.graph import Path
 
-from apps.cmdb.constants import INSTANCE, ModelConstraintKey
+from apps.cmdb.constants import (
+    ENCRYPTED_KEY,
+    FULLTEXT_SCAN_ATTR_TYPES,
+    INSTANCE,
+    INSTANCE_ASSOCIATION,
+    INSTANCE_FULLTEXT_INDEX,
+    MODEL,
+    ModelConstraintKey,
+    NEO4J_BATCH_SIZE,
+    TOPO_MAX_DEPTH,
+    TOPO_MAX_NODES,
+)
+from apps.cmdb.graph.driver import neo4j_driver_registry
 from apps.cmdb.graph.format_type import FORMAT_TYPE
+from apps.cmdb.graph.topology import TopologyBuilder
 from apps.core.exceptions.base_app_exception import BaseAppException
 from apps.core.logger import cmdb_logger as logger
 
 load_dotenv()
 
+# 可能出现在数字、布尔值或ID列表文本中的检索内容，才需要扫描非字符串属性
+FULLTEXT_SCAN_SEARCH_PATTERN = re.compile(r"^(?=.*\d)[0-9.eE+\-]+$|^(true|false)$", re.IGNORECASE)
+
+
+class UniqueAttrIndex:
+    """
+    唯一属性的哈希索引，代替 check_unique_attr 对已有数据的逐条比较，校验结果与报错信息保持一致；
+    不可哈希的值（如列表）单独保存，按原方式逐个比较
+    """
+
+    def __init__(self, check_attr_map: dict, exist_items: list):
+        self.check_attr_map = check_attr_map
+        self.has_items = False
+        self.values = {attr: set() for attr in check_attr_map}
+        self.unhashable_values = {attr: [] for attr in check_attr_map}
+        # 逐条比较时缺少唯一属性会抛出 KeyError：第一条已有数据与待校验数据缺少的属性按属性顺序报错，
+        # 之后的已有数据缺少属性时，报第一条缺少属性的数据所缺的第一个属性
+        self.first_missing_attrs = set()
+        self.later_missing_attr = None
+        for item in exist_items:
+            self.add(item)
+
+    def add(self, item: dict):
+        missing_attrs = [attr for attr in self.check_attr_map if attr not in item]
+        if not self.has_items:
+            self.first_missing_attrs = set(missing_attrs)
+        elif missing_attrs and self.later_missing_attr is None:
+            self.later_missing_attr = missing_attrs[0]
+        self.has_items = True
+        for attr in self.check_attr_map:
+            if attr not in item:
+                continue
+            try:
+                self.values[attr].add(item[attr])
+            except TypeError:
+                self.unhashable_values[attr].append(item[attr])
+
+    def exists(self, attr: str, value) -> bool:
+        try:
+            if value in self.values[attr]:
+                return True
+        except TypeError:
+            pass
+        return any(exist_value == value for exist_value in self.unhashable_values[attr])
+
+    def check(self, item: dict):
+        """校验唯一属性"""
+        if not self.has_items:
+            return
+        for attr in self.check_attr_map:
+            if attr in self.first_missing_attrs or attr not in item:
+                raise KeyError(attr)
+        if self.later_missing_attr is not None:
+            raise KeyError(self.later_missing_attr)
+
+        not_only_attr = [attr for attr in self.check_attr_map if self.exists(attr, item[attr])]
+        if not not_only_attr:
+            return
+        raise BaseAppException("".join(f"{self.check_attr_map[attr]} exist；" for attr in not_only_attr))
+
 
 class Neo4jClient:
+    # 当前进程是否已确认实例全文索引存在
+    fulltext_index_ready = False
+    # 不在全文索引中的非字符串属性，随全文索引一起同步
+    fulltext_scan_properties = []
+
     def __init__(self):
-        self.driver = GraphDatabase.driver(
-            os.getenv("NEO4J_URI"),
-            auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")),
-        )
+        # 驱动（连接池）由进程内共享，这里只负责会话
+        self.driver = neo4j_driver_registry.get_driver()
         self.session = None
 
     def close(self):
-        """关闭连接"""
+        """关闭会话，连接归还连接池"""
         if self.session:
             self.session.close()
-        if self.driver:
-            self.driver.close()
+            self.session = None
+            neo4j_driver_registry.metrics.session_closed()
 
     def __enter__(self):
         self.session = self.driver.session()
+        neo4j_driver_registry.metrics.session_opened()
         return self
 
+    @staticmethod
+    def pool_stats() -> dict:
+        """当前进程的连接池指标"""
+        return neo4j_driver_registry.stats()
+
     def __exit__(self, exc_type, exc_value, traceback):
         self.close()
 
@@ -208,26 +290,89 @@ class Neo4jClient:
 
         return self.edge_to_dict(edge)
 
-    def batch_create_entity(
+    @staticmethod
+    def _run_unwind(tx, query: str, rows: list):
+        """按 NEO4J_BATCH_SIZE 分批以 $rows 参数执行 UNWIND 语句"""
+        for start in range(0, len(rows), NEO4J_BATCH_SIZE):
+            yield from tx.run(query, rows=rows[start:start + NEO4J_BATCH_SIZE])
+
+    def bulk_create_entity(
             self,
             label: str,
             properties_list: list,
             check_attr_map: dict,
             exist_items: list,
             operator: str = None,
+            unique_index: UniqueAttrIndex = None,
     ):
-        """批量创建实体"""
-        results = []
+        """
+        批量创建实体，返回每条数据的 (实体, 异常)
+        唯一属性与必填项在内存中校验（批次内已通过校验的数据同样参与唯一校验），
+        通过校验的数据使用参数化 UNWIND 在同一事务中分批创建，批量写入失败时退回逐条创建；
+        分批导入时传入预先构建的 unique_index 跨批次复用，不再按 exist_items 重建
+        """
+        if unique_index is None:
+            unique_index = UniqueAttrIndex(check_attr_map.get("is_only", {}), exist_items)
+        results = [None] * len(properties_list)
+        valid_indexes = []
         for index, properties in enumerate(properties_list):
-            result = {}
             try:
-                entity = self._create_entity(label, properties, check_attr_map, exist_items, operator)
-                result.update(data=entity, success=True, message="")
-                exist_items.append(entity)
+                if not label:
+                    raise BaseAppException("label is empty")
+                unique_index.check(properties)
+                self.check_required_attr(properties, check_attr_map.get("is_required", {}))
             except Exception as e:
-                message = f"article {index + 1} data, {e}"
-                result.update(message=message, success=False, data=properties)
-            results.append(result)
+                results[index] = (None, e)
+                continue
+            if operator:
+                properties.update(_creator=operator)
+            unique_index.add(properties)
+            valid_indexes.append(index)
+
+        if not valid_indexes:
+            return results
+
+        rows = [dict(index=index, properties=properties_list[index]) for index in valid_indexes]
+        try:
+            with self.session.begin_transaction() as tx:
+                records = self._run_unwind(
+                    tx, f"UNWIND $rows AS row CREATE (n:{label}) SET n = row.properties RETURN row.index AS index, n",
+                    rows,
+                )
+                entities = {record["index"]: self.entity_to_dict((record["n"],)) for record in records}
+        except Exception as e:
+            logger.warning(f"bulk create entity failed, fallback to single create: {e}")
+            for index in valid_indexes:
+                try:
+                    entity = self._create_entity(label, properties_list[index], check_attr_map, exist_items)
+                    results[index] = (entity, None)
+                    exist_items.append(entity)
+                except Exception as err:
+                    results[index] = (None, err)
+            return results
+
+        for index in valid_indexes:
+            results[index] = (entities[index], None)
+            exist_items.append(entities[index])
+        return results
+
+    def batch_create_entity(
+            self,
+            label: str,
+            properties_list: list,
+            check_attr_map: dict,
+            exist_items: list,
+            operator: str = None,
+            unique_index: UniqueAttrIndex = None,
+    ):
+        """批量创建实体"""
+        results = []
+        entities = self.bulk_create_entity(label, properties_list, check_attr_map, exist_items, operator, unique_index)
+        for index, (properties, (entity, error)) in enumerate(zip(properties_list, entities)):
+            if error is None:
+                results.append(dict(data=entity, success=True, message=""))
+            else:
+                results.append(dict(message=f"article {index + 1} data, {error}", success=False, data=properties))
         return results
 
     def batch_create_edge(
@@ -238,20 +383,101 @@ class Neo4jClient:
             edge_list: list,
             check_asst_key: str,
     ):
-        """批量创建边"""
+        """
+        批量创建边
+        """
         results = []
+        edges = self.bulk_create_edge(label, a_label, b_label, edge_list, check_asst_key)
+        for index, (edge, error) in enumerate(edges):
+            if edge is not None:
+                results.append(dict(data=edge, success=True))
+                continue
+            results.append(dict(message=f"article {index + 1} data, {error}", success=False))
+        return results
+
+    def bulk_create_edge(
+            self,
+            label: str,
+            a_label: str,
+            b_label: str,
+            edge_list: list,
+            check_asst_key: str,
+            src_key: str = "src_id",
+            dst_key: str = "dst_id",
+    ):
+        """
+        批量创建边，返回每条数据的 (边, 异常)，src_key/dst_key 为边数据中源/目标实体ID的字段
+        已存在的边通过一次 UNWIND 查询得出（批次内重复的边同样视为已存在），
+        新边在同一事务中分批创建，批量写入失败时退回逐条创建
+        """
+        errors = {}
+        rows = []
+        first_indexes = {}
+        duplicate_indexes = {}
         for index, edge_info in enumerate(edge_list):
-            result = {}
             try:
-                a_id = edge_info["src_id"]
-                b_id = edge_info["dst_id"]
-                edge = self._create_edge(label, a_id, a_label, b_id, b_label, edge_info, check_asst_key)
-                result.update(data=edge, success=True)
+                if not label:
+                    raise BaseAppException("label is empty")
+                row = dict(
+                    index=index,
+                    src_id=int(edge_info[src_key]),
+                    dst_id=int(edge_info[dst_key]),
+                    check_value=str(edge_info.get(check_asst_key)),
+                    properties=edge_info,
+                )
             except Exception as e:
-                message = f"article {index + 1} data, {e}"
-                result.update(message=message, success=False)
-            results.append(result)
-        return results
+                errors[index] = e
+                continue
+            # 原查询不区分边的方向，批次内重复的边只处理第一条，其余按第一条的结果判定
+            nodes = frozenset((row["src_id"], row["dst_id"])) if a_label == b_label else (row["src_id"], row["dst_id"])
+            edge_key = (nodes, row["check_value"])
+            if edge_key in first_indexes:
+                duplicate_indexes[index] = first_indexes[edge_key]
+                continue
+            first_indexes[edge_key] = index
+            rows.append(row)
+
+        edges = {}
+        try:
+            with self.session.begin_transaction() as tx:
+                exist_indexes = {
+                    record["index"] for record in self._run_unwind(
+                        tx,
+                        f"UNWIND $rows AS row MATCH (a:{a_label})-[e]-(b:{b_label}) WHERE id(a) = row.src_id AND id(b) = row.dst_id AND e.{check_asst_key} = row.check_value RETURN DISTINCT row.index AS index",  # noqa
+                        rows,
+                    )
+                }
+                for index in exist_indexes:
+                    errors[index] = BaseAppException("edge already exists")
+                rows = [row for row in rows if row["index"] not in exist_indexes]
+                records = self._run_unwind(
+                    tx,
+                    f"UNWIND $rows AS row MATCH (a:{a_label}) WHERE id(a) = row.src_id WITH a, row MATCH (b:{b_label}) WHERE id(b) = row.dst_id CREATE (a)-[e:{label}]->(b) SET e = row.properties RETURN row.index AS index, e",  # noqa
+                    rows,
+                )
+                edges = {record["index"]: self.edge_to_dict((record["e"],)) for record in records}
+        except Exception as e:
+            logger.warning(f"bulk create edge failed, fallback to single create: {e}")
+            for row in rows:
+                index = row["index"]
+                try:
+                    edges[index] = self._create_edge(
+                        label, row["src_id"], a_label, row["dst_id"], b_label, row["properties"], check_asst_key
+                    )
+                except Exception as err:
+                    errors[index] = err
+
+        for index, first_index in duplicate_indexes.items():
+            first_error = errors.get(first_index)
+            if first_index in edges or getattr(first_error, "message", None) == "edge already exists":
+                errors[index] = BaseAppException("edge already exists")
+            elif first_error is not None:
+                errors[index] = first_error
+
+        return [
+            (edges[index], None) if index in edges else (None, errors.get(index, "src or dst entity not found"))
+            for index in range(len(edge_list))
+        ]
 
     def format_search_params(self, params: list, param_type: str = "AND"):
         """
@@ -273,6 +499,7 @@ class Neo4jClient:
 
         id=: {"field": "id", "type": "id=", "value": 115} -> "n(id) = 115"
         id[]: {"field": "id", "type": "id[]", "value": [115,116]} -> "n(id) IN [115,116]"
+        id>: {"field": "id", "type": "id>", "value": 115} -> "n(id) > 115"
 
         list[]: {"field": "test", "type": "list[]", "value": [1,2]} -> "ANY(x IN value WHERE x IN n.test)"
         """
@@ -310,9 +537,10 @@ class Neo4jClient:
             param_type="AND",
             permission_params: str = "",
             permission_or_creator_filter: dict = None,
+            with_count: bool = True,
     ):
         """
-        查询实体
+        查询实体，分页查询时 with_count 为 False 则不统计总数（逐页遍历时无需每页统计）
         """
         label_str = f":{label}" if label else ""
 
@@ -355,7 +583,8 @@ class Neo4jClient:
         count_str = f"MATCH (n{label_str}) {params_str} RETURN COUNT(n) AS count"
         count = None
         if page:
-            count = self.session.run(count_str).single()["count"]
+            if with_count:
+                count = self.session.run(count_str).single()["count"]
             sql_str += f" SKIP {page['skip']} LIMIT {page['limit']}"
 
         objs = self.session.run(sql_str)
@@ -389,6 +618,56 @@ class Neo4jClient:
             return []
         return self.entity_to_list(objs)
 
+    def query_entity_ids_by_inst_names(self, label: str, keys: list) -> dict:
+        """按 (模型ID, 实例名称) 批量查询实体ID，同名实体取ID最小的一个，返回 {(模型ID, 实例名称): 实体ID}"""
+        rows = [dict(model_id=model_id, inst_name=inst_name) for model_id, inst_name in keys]
+        result = {}
+        with self.session.begin_transaction() as tx:
+            for record in self._run_unwind(
+                    tx,
+                    f"UNWIND $rows AS row MATCH (n:{label}) "
+                    "WHERE n.model_id = row.model_id AND n.inst_name = row.inst_name "
+                    "RETURN row.model_id AS model_id, row.inst_name AS inst_name, min(id(n)) AS id",
+                    rows,
+            ):
+                result[(record["model_id"], record["inst_name"])] = record["id"]
+        return result
+
+    def query_asso_inst_names(self, label: str, inst_ids: list, model_asst_ids: list) -> dict:
+        """
+        批量查询实例在指定模型关联下的对端实例名称，代替逐个实例查询关联
+        返回 {实例ID: {模型关联ID: [对端实例名称]}}
+        """
+        result = {}
+        if not inst_ids or not model_asst_ids:
+            return result
+        objs = self.session.run(
+            f"MATCH (n:{label}) WHERE id(n) IN $ids "
+            f"MATCH (n)-[e:{INSTANCE_ASSOCIATION}]-(m) WHERE e.model_asst_id IN $model_asst_ids "
+            "RETURN id(n) AS id, e.model_asst_id AS model_asst_id, m.inst_name AS inst_name ORDER BY id(e)",
+            ids=[int(i) for i in inst_ids],
+            model_asst_ids=list(model_asst_ids),
+        )
+        for record in objs:
+            result.setdefault(record["id"], {}).setdefault(record["model_asst_id"], []).append(record["inst_name"])
+        return result
+
+    def query_entity_by_attr_values(self, label: str, model_id: str, attr_values: dict) -> list:
+        """
+        查询模型下任一属性的值在给定列表中的实体，attr_values 为 {属性ID: [值]}
+        属性ID来自模型定义，值通过参数传入
+        """
+        attr_values = {attr: values for attr, values in attr_values.items() if values}
+        if not attr_values:
+            return []
+        conditions = " OR ".join(f"n.{attr} IN $values[{index}]" for index, attr in enumerate(attr_values))
+        objs = self.session.run(
+            f"MATCH (n:{label}) WHERE n.model_id = $model_id AND ({conditions}) RETURN n ORDER BY id(n)",
+            model_id=model_id,
+            values=list(attr_values.values()),
+        )
+        return self.entity_to_list(objs)
+
     def query_edge(
             self,
             label: str,
@@ -525,23 +804,60 @@ class Neo4jClient:
         inst_objs = self.session.run(sql_str)
         return inst_objs
 
-    def query_topo(self, label: str, inst_id: int):
-        """查询实例拓扑"""
+    def query_topo(self, label: str, inst_id: int, max_depth: int = None, max_nodes: int = None,
+                   direction: str = None):
+        """
+        查询实例拓扑
+        从实例出发逐层（每层一次查询）向下游/上游展开，最多展开 max_depth 层、max_nodes 个实体；
+        未展开的实体在结果中标记 has_more，可以该实例为起点、max_depth=1 继续查询下一层
+        :param direction: src 只查下游，dst 只查上游，为空时都查询
+        """
+        max_depth = max_depth or TOPO_MAX_DEPTH
+        max_nodes = max_nodes or TOPO_MAX_NODES
+        result = dict(src_result={}, dst_result={})
+        if direction in (None, "src"):
+            result["src_result"] = self.traverse_topo(label, inst_id, True, max_depth, max_nodes)
+        if direction in (None, "dst"):
+            result["dst_result"] = self.traverse_topo(label, inst_id, False, max_depth, max_nodes)
+        return result
 
+    def traverse_topo(self, label: str, inst_id: int, entity_is_src: bool, max_depth: int, max_nodes: int):
+        """按层广度优先展开拓扑，每个实体只展开一次"""
         label_str = f":{label}" if label else ""
-        params_str = self.format_search_params([{"field": "id", "type": "id=", "value": inst_id}])
-        if params_str:
-            params_str = f"AND {params_str}"
-        src_objs = self.session.run(
-            f"MATCH p=(n{label_str})-[*]->(m{label_str}) WHERE NOT (m)-->() {params_str} RETURN p"
-        )
-        dst_objs = self.session.run(
-            f"MATCH p=(m{label_str})-[*]->(n{label_str}) WHERE NOT (m)<--() {params_str} RETURN p"
-        )
+        if entity_is_src:
+            match_str = f"MATCH (n{label_str})-[e]->(m{label_str})"
+        else:
+            match_str = f"MATCH (m{label_str})-[e]->(n{label_str})"
+        ring_query = f"{match_str} WHERE id(n) IN $ids RETURN id(n) AS parent, e, m"
+
+        entity_map, edge_map = {}, {}
+        # 超出实体上限而未展开的实体
+        expandable = set()
+        frontier, depth = [inst_id], 0
+        while frontier and depth < max_depth:
+            next_frontier = []
+            for record in self.session.run(ring_query, ids=frontier):
+                edge, node = record["e"], record["m"]
+                if node.id not in entity_map and node.id != inst_id:
+                    if len(entity_map) + 1 >= max_nodes:
+                        expandable.add(record["parent"])
+                        continue
+                    entity_map[node.id] = self.entity_to_dict((node,))
+                    next_frontier.append(node.id)
+                edge_map[edge.id] = self.edge_to_dict((edge,))
+            frontier, depth = next_frontier, depth + 1
+
+        if not edge_map:
+            return {}
 
-        return dict(
-            src_result=self.format_topo(inst_id, src_objs, True), dst_result=self.format_topo(inst_id, dst_objs, False)
-        )
+        entity_map[inst_id] = self.query_entity_by_id(inst_id)
+        # 到达层数上限的实体如果还有关联，同样标记为可继续展开
+        if frontier:
+            check_query = f"{match_str} WHERE id(n) IN $ids RETURN DISTINCT id(n) AS id"
+            expandable.update(record["id"] for record in self.session.run(check_query, ids=frontier))
+
+        builder = TopologyBuilder(entity_map.values(), edge_map.values(), entity_is_src, max_nodes)
+        return builder.build(inst_id, expandable)
 
     @staticmethod
     def get_topo_config() -> dict:
@@ -667,44 +983,8 @@ class Neo4jClient:
                         _id=relationship.id, _label=relationship.type, **relationship._properties
                     )
 
-        edges = list(edge_map.values())
-        # 去除自己指向自己的边
-        edges = [edge for edge in edges if edge["src_inst_id"] != edge["dst_inst_id"]]
-        entities = list(entity_map.values())
-
-        result = self.create_node(entity_map[start_id], edges, entities, entity_is_src)
-        return result
-
-    def create_node(self, entity, edges, entities, entity_is_src=True):
-        """entity作为目标"""
-        node = {
-            "_id": entity["_id"],
-            "model_id": entity["model_id"],
-            "inst_name": entity["inst_name"],
-            "children": [],
-        }
-
-        if entity_is_src:
-            entity_key, child_entity_key = "src", "dst"
-        else:
-            entity_key, child_entity_key = "dst", "src"
-
-        for edge in edges:
-            if edge[f"{entity_key}_inst_id"] == entity["_id"]:
-                child_entity = self.find_entity_by_id(edge[f"{child_entity_key}_inst_id"], entities)
-                if child_entity:
-                    child_node = self.create_node(child_entity, edges, entities, entity_is_src)
-                    child_node["model_asst_id"] = edge["model_asst_id"]
-                    child_node["asst_id"] = edge["asst_id"]
-                    node["children"].append(child_node)
-        return node
-
-    def find_entity_by_id(self, entity_id, entities):
-        """根据ID找实体"""
-        for entity in entities:
-            if entity["_id"] == entity_id:
-                return entity
-        return None
+        builder = TopologyBuilder(entity_map.values(), edge_map.values(), entity_is_src, TOPO_MAX_NODES)
+        return builder.build(start_id)
 
     @staticmethod
     def format_instance_permission_params(instance_permission_params: list, created: str = ""):
@@ -760,9 +1040,9 @@ class Neo4jClient:
 
         return {i[group_by_attr]: i["count"] for i in data}
 
-    def full_text(self, search: str, permission_params: str = "", instance_permission_params: list = {},
-                  created: str = ""):
-        """全文检索"""
+    def format_full_text_permission(self, permission_params: str = "", instance_permission_params: list = {},
+                                    created: str = ""):
+        """全文检索的权限条件"""
 
         # 构建基础权限条件（组织权限）
         base_condition = permission_params or ""
@@ -785,15 +1065,130 @@ class Neo4jClient:
             # 仅实例权限（包含创建人权限）
             permission_conditions.append(f"({instance_permission_str})")
 
-        final_permission_condition = " OR ".join(permission_conditions) if permission_conditions else ""
+        return " OR ".join(permission_conditions) if permission_conditions else ""
 
-        # 组合权限条件和全文检索条件
-        where_condition = f"({final_permission_condition}) AND" if final_permission_condition else ""
+    def fulltext_index_properties(self) -> tuple:
+        """
+        需要全文检索的实例属性：所有模型的属性，密码类属性除外
+        返回 (全部属性, 其中值不是字符串、检索时需要扫描的属性)
+        """
+        properties, scan_properties = set(), set()
+        for record in self.session.run(f"MATCH (n:{MODEL}) RETURN n.attrs AS attrs"):
+            try:
+                attrs = json.loads((record["attrs"] or "[]").replace('\\"', '"'))
+            except (TypeError, ValueError):
+                continue
+            for attr in attrs:
+                if attr.get("attr_type") == "pwd" or attr.get("attr_id") in ENCRYPTED_KEY:
+                    continue
+                properties.add(attr["attr_id"])
+                if attr.get("attr_type") in FULLTEXT_SCAN_ATTR_TYPES:
+                    scan_properties.add(attr["attr_id"])
+        return sorted(properties), sorted(scan_properties)
+
+    def ensure_fulltext_index(self, force: bool = False) -> bool:
+        """
+        创建实例全文索引，索引字段与模型属性不一致时重建
+        索引由 Neo4j 在实例写入时自动维护；模型属性变更后需要以 force=True 调用以同步索引字段
+        """
+        if Neo4jClient.fulltext_index_ready and not force:
+            return True
+
+        properties, Neo4jClient.fulltext_scan_properties = self.fulltext_index_properties()
+        exist_properties = None
+        for record in self.session.run("SHOW FULLTEXT INDEXES YIELD name, properties"):
+            if record["name"] == INSTANCE_FULLTEXT_INDEX:
+                exist_properties = sorted(record["properties"])
+
+        if exist_properties != properties:
+            if exist_properties is not None:
+                self.session.run(f"DROP INDEX {INSTANCE_FULLTEXT_INDEX} IF EXISTS")
+            if not properties:
+                return False
+            properties_str = ", ".join(f"n.`{i}`" for i in properties)
+            # cjk 分词器对中日韩文字按二元分词，其余文字按标准分词
+            self.session.run(
+                f"CREATE FULLTEXT INDEX {INSTANCE_FULLTEXT_INDEX} IF NOT EXISTS FOR (n:{INSTANCE}) ON EACH [{properties_str}] OPTIONS {{indexConfig: {{`fulltext.analyzer`: 'cjk'}}}}"  # noqa
+            )
+            logger.info(f"fulltext index {INSTANCE_FULLTEXT_INDEX} created on {len(properties)} properties")
+
+        Neo4jClient.fulltext_index_ready = True
+        return True
+
+    @staticmethod
+    def format_fulltext_query(search: str) -> str:
+        """检索内容转换为 Lucene 查询：短语匹配（中文按二元分词匹配）或包含匹配"""
+        escaped = re.sub(r'([+\-&|!(){}\[\]^"~*?:\\/])', r"\\\1", search.strip())
+        wildcard = re.sub(r"\s", lambda m: "\\" + m.group(0), escaped)
+        return f'"{escaped}" OR *{wildcard}*'
+
+    @staticmethod
+    def fulltext_match(search: str) -> tuple:
+        """
+        全文检索命中的实例 (Cypher, 参数)，结果为 n 与相关度 score
+        全文索引只包含字符串值，检索内容可能出现在数字、布尔值或ID列表中时，并上这些属性包含检索内容的实例
+        """
+        params = dict(index=INSTANCE_FULLTEXT_INDEX, query=Neo4jClient.format_fulltext_query(search))
+        query = "CALL db.index.fulltext.queryNodes($index, $query) YIELD node AS n, score"
+        scan_properties = Neo4jClient.fulltext_scan_properties
+        if not scan_properties or not FULLTEXT_SCAN_SEARCH_PATTERN.match(search.strip()):
+            return query, params
+        params.update(search=search, scan_properties=scan_properties)
+        scan_query = f"MATCH (n:{INSTANCE}) WHERE ANY(key IN $scan_properties WHERE (NOT n[key] IS NULL AND ANY(value IN n[key] WHERE toString(value) CONTAINS $search))) RETURN n, 0.0 AS score"  # noqa
+        return f"CALL {{ {query} RETURN n, score UNION {scan_query} }} WITH n, max(score) AS score", params
 
-        query = f"""MATCH (n:{INSTANCE}) WHERE {where_condition} ANY(key IN keys(n) WHERE (NOT n[key] IS NULL AND ANY(value IN n[key] WHERE toString(value) CONTAINS '{search}'))) RETURN n"""  # noqa
-        objs = self.session.run(query)
+    def full_text(self, search: str, permission_params: str = "", instance_permission_params: list = {},
+                  created: str = "", model_id: str = None, page: dict = None):
+        """
+        全文检索，通过实例全文索引查询，结果按相关度排序；非字符串属性的匹配见 fulltext_match
+        索引不可用（未创建或正在构建）时退回逐个实例扫描属性
+        """
+        final_permission_condition = self.format_full_text_permission(permission_params, instance_permission_params,
+                                                                      created)
+        conditions = [f"({final_permission_condition})"] if final_permission_condition else []
+        if model_id:
+            conditions.append("n.model_id = $model_id")
+        where_str = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        page_str = f" SKIP {int(page['skip'])} LIMIT {int(page['limit'])}" if page else ""
+
+        # 检索内容为空时匹配全部实例，直接走扫描
+        if search.strip():
+            try:
+                self.ensure_fulltext_index()
+                match_query, params = self.fulltext_match(search)
+                query = f"{match_query} {where_str} RETURN n ORDER BY score DESC{page_str}"
+                objs = self.session.run(query, model_id=model_id, **params)
+                return self.entity_to_list(objs)
+            except Exception as e:
+                logger.warning(f"fulltext index search failed, fallback to scan: {e}")
+
+        # 组合权限条件和全文检索条件
+        where_condition = " AND ".join(conditions + [""])
+        query = f"""MATCH (n:{INSTANCE}) WHERE {where_condition} ANY(key IN keys(n) WHERE (NOT n[key] IS NULL AND ANY(value IN n[key] WHERE toString(value) CONTAINS $search))) RETURN n ORDER BY ID(n){page_str}"""  # noqa
+        objs = self.session.run(query, search=search, model_id=model_id)
         return self.entity_to_list(objs)
 
+    def full_text_model_count(self, search: str, permission_params: str = "", instance_permission_params: list = {},
+                              created: str = ""):
+        """全文检索命中的实例按模型统计数量"""
+        final_permission_condition = self.format_full_text_permission(permission_params, instance_permission_params,
+                                                                      created)
+        where_str = f"WHERE ({final_permission_condition})" if final_permission_condition else ""
+        if search.strip():
+            try:
+                self.ensure_fulltext_index()
+                match_query, params = self.fulltext_match(search)
+                query = f"{match_query} {where_str} RETURN n.model_id AS model_id, COUNT(n) AS count"
+                objs = self.session.run(query, **params)
+                return {record["model_id"]: record["count"] for record in objs}
+            except Exception as e:
+                logger.warning(f"fulltext index count failed, fallback to scan: {e}")
+
+        where_condition = f"({final_permission_condition}) AND" if final_permission_condition else ""
+        query = f"""MATCH (n:{INSTANCE}) WHERE {where_condition} ANY(key IN keys(n) WHERE (NOT n[key] IS NULL AND ANY(value IN n[key] WHERE toString(value) CONTAINS $search))) RETURN n.model_id AS model_id, COUNT(n) AS count"""  # noqa
+        objs = self.session.run(query, search=search)
+        return {record["model_id"]: record["count"] for record in objs}
+
     def batch_save_entity(
             self,
             label: str,
@@ -801,41 +1196,86 @@ class Neo4jClient:
             check_attr_map: dict,
             exist_items: list,
             operator: str = None,
+            item_map: dict = None,
+            unique_index: UniqueAttrIndex = None,
     ):
-        """批量保存实体，支持新增与更新"""
+        """
+        批量保存实体，支持新增与更新，更新的节点使用 UNWIND 在同一事务中分批写入
+        分批导入时传入预先构建的 item_map（唯一键 -> 已有节点）与 unique_index，跨批次复用
+        """
         unique_key = check_attr_map.get(ModelConstraintKey.unique.value, {}).keys()
         add_nodes = []
         update_results = []
+        update_rows = []
         if unique_key:
             properties_map = {}
             for properties in properties_list:
-                properties_key = tuple([properties.get(k) for k in unique_key if k in properties])
                 # 对参数中的节点按唯一键进行去重
-                properties_map[properties_key] = properties
+                properties_map[self.unique_key(properties, unique_key)] = properties
             # 已有节点处理
-            item_map = {}
-            for item in exist_items:
-                item_key = tuple([item.get(k) for k in unique_key if k in item])
-                item_map[item_key] = item
+            if item_map is None:
+                item_map = {self.unique_key(item, unique_key): item for item in exist_items}
             for properties_key, properties in properties_map.items():
                 node = item_map.get(properties_key)
                 if node:
-                    # 节点更新
+                    # 节点更新，先校验必填项并取出可编辑属性
                     try:
-                        results = self.batch_update_entity_properties(label=label, entity_ids=[node.get("_id")],
-                                                                      properties=properties,
-                                                                      check_attr_map=check_attr_map)
-                        results["data"] = results["data"][0]
-                        update_results.append(results)
+                        self.check_required_attr(properties, check_attr_map.get("is_required", {}), is_update=True)
+                        editable_properties = self.get_editable_attr(properties, check_attr_map.get("editable", {}))
+                        if not editable_properties:
+                            raise BaseAppException("properties is empty")
                     except Exception as e:
                         logger.info(f"update entity error: {e}")
-                        update_results.append({"success": False, "data": properties,"message":"update entity error"})
-
+                        update_results.append({"success": False, "data": properties, "message": "update entity error"})
+                        continue
+                    update_rows.append(dict(index=len(update_results), id=node.get("_id"),
+                                            properties=editable_properties))
+                    # 先记为失败，更新成功后替换
+                    update_results.append({"success": False, "data": properties, "message": "update entity error"})
                 else:
                     # 暂存统一新增
                     add_nodes.append(properties)
         else:
             add_nodes = properties_list
+
+        if update_rows:
+            self._bulk_update_entity(label, update_rows, update_results)
+
         add_results = self.batch_create_entity(label=label, properties_list=add_nodes, check_attr_map=check_attr_map,
-                                               exist_items=exist_items, operator=operator)
+                                               exist_items=exist_items, operator=operator, unique_index=unique_index)
         return add_results, update_results
+
+    @staticmethod
+    def unique_key(item: dict, unique_attrs) -> tuple:
+        """按唯一属性取出实体的唯一键，用于新增/更新的判定"""
+        return tuple([item.get(k) for k in unique_attrs if k in item])
+
+    def _bulk_update_entity(self, label: str, update_rows: list, update_results: list):
+        """更新成功的结果按行下标写回 update_results"""
+        for index, node in self.bulk_update_entity(label, update_rows).items():
+            update_results[index] = {"data": node, "success": True, "message": ""}
+
+    def bulk_update_entity(self, label: str, update_rows: list) -> dict:
+        """
+        按节点ID批量更新属性，update_rows 为 [{"index": 行下标, "id": 节点ID, "properties": 属性}]
+        返回 {行下标: 更新后的节点}，批量写入失败时退回逐个更新，更新失败的行不在结果中
+        """
+        label_str = f":{label}" if label else ""
+        try:
+            with self.session.begin_transaction() as tx:
+                records = self._run_unwind(
+                    tx,
+                    f"UNWIND $rows AS row MATCH (n{label_str}) WHERE id(n) = row.id SET n += row.properties RETURN row.index AS index, n",  # noqa
+                    update_rows,
+                )
+                nodes = {record["index"]: self.entity_to_dict((record["n"],)) for record in records}
+        except Exception as e:
+            logger.warning(f"bulk update entity failed, fallback to single update: {e}")
+            nodes = {}
+            for row in update_rows:
+                try:
+                    node = self.batch_update_node_properties(label, [row["id"]], row["properties"])
+                    nodes[row["index"]] = self.entity_to_list(node)[0]
+                except Exception as err:
+                    logger.info(f"update entity error: {err}")
+        return nodes
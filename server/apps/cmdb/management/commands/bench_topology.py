@@ -0,0 +1,79 @@
+import random
+import time
+
+from django.core.management import BaseCommand
+
+from apps.cmdb.graph.topology import TopologyBuilder
+
+
+def legacy_find_entity_by_id(entity_id, entities):
+    for entity in entities:
+        if entity["_id"] == entity_id:
+            return entity
+    return None
+
+
+def legacy_create_node(entity, edges, entities, entity_is_src=True):
+    """逐边扫描 + 线性查找实体的原实现，用于对比耗时和结果"""
+    node = {
+        "_id": entity["_id"],
+        "model_id": entity["model_id"],
+        "inst_name": entity["inst_name"],
+        "children": [],
+    }
+    entity_key, child_entity_key = ("src", "dst") if entity_is_src else ("dst", "src")
+    for edge in edges:
+        if edge[f"{entity_key}_inst_id"] == entity["_id"]:
+            child_entity = legacy_find_entity_by_id(edge[f"{child_entity_key}_inst_id"], entities)
+            if child_entity:
+                child_node = legacy_create_node(child_entity, edges, entities, entity_is_src)
+                child_node["model_asst_id"] = edge["model_asst_id"]
+                child_node["asst_id"] = edge["asst_id"]
+                node["children"].append(child_node)
+    return node
+
+
+def build_graph(size, fan_out, rng):
+    """以 0 号实体为中心的分层拓扑（如集群-节点-工作负载），少量实体有两个上游"""
+    entities = [{"_id": i, "model_id": f"model_{i % 5}", "inst_name": f"inst-{i}"} for i in range(size)]
+    edges = []
+    for i in range(1, size):
+        parents = {(i - 1) // fan_out}
+        if i > fan_out and rng.random() < 0.02:
+            parents.add(rng.randrange(max(1, (i - 1) // fan_out - fan_out), (i - 1) // fan_out + 1))
+        for parent in parents:
+            edges.append({
+                "_id": size + len(edges),
+                "src_inst_id": parent,
+                "dst_inst_id": i,
+                "model_asst_id": f"model_{parent % 5}_contains_model_{i % 5}",
+                "asst_id": "contains",
+            })
+    rng.shuffle(edges)
+    return entities, edges
+
+
+class Command(BaseCommand):
+    help = "对比拓扑树构建原实现（O(E·N)）与索引实现的耗时（纯内存，不访问 Neo4j）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="1000,5000,50000", help="实体数量，逗号分隔")
+        parser.add_argument("--fan_out", type=int, default=50, help="每个实体的下游数量")
+        parser.add_argument("--legacy_max", type=int, default=5000, help="原实现只在不超过该实体数量时运行")
+
+    def handle(self, *args, **options):
+        for size in [int(i) for i in options["sizes"].split(",") if i]:
+            rng = random.Random(size)
+            entities, edges = build_graph(size, options["fan_out"], rng)
+
+            start = time.perf_counter()
+            tree = TopologyBuilder(entities, edges, entity_is_src=True).build(0)
+            indexed = time.perf_counter() - start
+            line = f"entities={size} edges={len(edges)} indexed={indexed:.3f}s"
+
+            if size <= options["legacy_max"]:
+                start = time.perf_counter()
+                legacy_tree = legacy_create_node(entities[0], edges, entities, entity_is_src=True)
+                legacy = time.perf_counter() - start
+                line += f" legacy={legacy:.3f}s speedup={legacy / indexed:.1f}x identical={legacy_tree == tree}"
+            self.stdout.write(line)
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.15 on 2026-10-18 10:00
+
+import django_minio_backend.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cmdb", "0009_alter_collectmodels_task_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstanceJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Created Time")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Updated Time")),
+                ("created_by", models.CharField(default="", max_length=32, verbose_name="Creator")),
+                ("updated_by", models.CharField(default="", max_length=32, verbose_name="Updater")),
+                ("domain", models.CharField(default="domain.com", max_length=100, verbose_name="Domain")),
+                (
+                    "updated_by_domain",
+                    models.CharField(default="domain.com", max_length=100, verbose_name="updated by domain"),
+                ),
+                (
+                    "job_type",
+                    models.CharField(
+                        choices=[("import", "导入"), ("export", "导出")], help_text="任务类型", max_length=16
+                    ),
+                ),
+                ("model_id", models.CharField(help_text="模型ID", max_length=64)),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "等待执行"), (1, "执行中"), (2, "成功"), (3, "失败")],
+                        default=0,
+                        help_text="任务状态",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        help_text="导入文件/导出结果",
+                        null=True,
+                        storage=django_minio_backend.models.MinioBackend(bucket_name="munchkin-private"),
+                        upload_to=django_minio_backend.models.iso_date_prefix,
+                    ),
+                ),
+                ("params", models.JSONField(default=dict, help_text="任务参数")),
+                ("total", models.PositiveIntegerField(default=0, help_text="数据总行数")),
+                ("processed", models.PositiveIntegerField(default=0, help_text="已处理行数")),
+                ("checkpoint", models.PositiveIntegerField(default=0, help_text="断点，已完成的数据行数")),
+                ("result", models.JSONField(default=dict, help_text="执行结果")),
+                ("error", models.TextField(blank=True, default="", help_text="异常信息")),
+            ],
+            options={
+                "verbose_name": "实例导入导出任务",
+            },
+        ),
+    ]
@@ -12,6 +12,7 @@ from apps.cmdb.constants import (
     SUBORDINATE_MODEL, INIT_MODEL_GROUP,
 )
 from apps.cmdb.graph.neo4j import Neo4jClient
+from apps.cmdb.services.model_schema import ModelSchemaCache
 from apps.cmdb.utils.base import get_default_group_id
 from apps.core.logger import cmdb_logger as logger
 
@@ -154,6 +155,15 @@ class ModelMigrate:
             import traceback
             logger.error(f"Error updating old models group: {traceback.format_exc()}")
 
+        ModelSchemaCache.invalidate()
+
+        try:
+            # 按初始化后的模型属性创建实例全文索引
+            with Neo4jClient() as ag:
+                ag.ensure_fulltext_index(force=True)
+        except Exception as err:  # noqa
+            logger.warning(f"Error creating fulltext index: {err}")
+
         return dict(
             classification=classification_resp,
             model=model_resp,
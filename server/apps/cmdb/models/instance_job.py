@@ -0,0 +1,59 @@
+from django.db import models
+from django.db.models import JSONField
+from django_minio_backend import MinioBackend, iso_date_prefix
+
+from apps.cmdb.constants import InstanceJobStatus, InstanceJobType
+from apps.core.models.maintainer_info import MaintainerInfo
+from apps.core.models.time_info import TimeInfo
+
+
+class InstanceJob(MaintainerInfo, TimeInfo):
+    """
+    实例导入导出任务
+    导入任务的 file 为上传的 Excel，导出任务的 file 为生成的 Excel；
+    checkpoint 记录已处理完成的数据行数，任务中断后重新执行时从断点继续
+    """
+
+    job_type = models.CharField(max_length=16, choices=InstanceJobType.CHOICE, help_text="任务类型")
+    model_id = models.CharField(max_length=64, help_text="模型ID")
+    status = models.PositiveSmallIntegerField(
+        default=InstanceJobStatus.PENDING, choices=InstanceJobStatus.CHOICE, help_text="任务状态"
+    )
+    file = models.FileField(
+        storage=MinioBackend(bucket_name="munchkin-private"),
+        upload_to=iso_date_prefix,
+        blank=True,
+        null=True,
+        help_text="导入文件/导出结果",
+    )
+    params = JSONField(default=dict, help_text="任务参数")
+    total = models.PositiveIntegerField(default=0, help_text="数据总行数")
+    processed = models.PositiveIntegerField(default=0, help_text="已处理行数")
+    checkpoint = models.PositiveIntegerField(default=0, help_text="断点，已完成的数据行数")
+    result = JSONField(default=dict, help_text="执行结果")
+    error = models.TextField(blank=True, default="", help_text="异常信息")
+
+    class Meta:
+        verbose_name = "实例导入导出任务"
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == InstanceJobStatus.SUCCESS else 0
+        return min(100, int(self.processed * 100 / self.total))
+
+    def to_dict(self):
+        return dict(
+            id=self.id,
+            job_type=self.job_type,
+            model_id=self.model_id,
+            status=self.status,
+            total=self.total,
+            processed=self.processed,
+            progress=self.progress,
+            result=self.result,
+            error=self.error,
+            created_by=self.created_by,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
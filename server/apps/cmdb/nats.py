@@ -114,3 +114,11 @@ def search_instances(params):
     instances, _ = InstanceManage.search_inst(model_id=model_id, inst_name=inst_name, _id=_id)
     result = instances[0] if instances else {}
     return result
+
+
+@nats_client.register
+def search_instances_batch(queries):
+    """
+        批量查询实例，返回与 queries 一一对应的实例，未找到时为 {}
+    """
+    return InstanceManage.search_inst_batch(queries)
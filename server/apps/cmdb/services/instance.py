@@ -1,4 +1,4 @@
-from apps.cmdb.constants import INSTANCE, INSTANCE_ASSOCIATION, OPERATOR_INSTANCE
+from apps.cmdb.constants import EXPORT_PAGE_SIZE, INSTANCE, INSTANCE_ASSOCIATION, OPERATOR_INSTANCE
 from apps.cmdb.graph.neo4j import Neo4jClient
 from apps.cmdb.models.change_record import CREATE_INST, CREATE_INST_ASST, DELETE_INST, DELETE_INST_ASST, UPDATE_INST
 from apps.cmdb.models.show_field import ShowField
@@ -24,6 +24,56 @@ class InstanceManage(object):
             inst_list, count = ag.query_entity(INSTANCE, params)
         return inst_list, count
 
+    @classmethod
+    def search_inst_batch(cls, queries: list):
+        """
+        批量查询实例，按模型合并为 id IN / inst_name IN 查询
+        queries: [{"model_id": "host", "_id": 1} 或 {"model_id": "host", "inst_name": "xx"}]
+        返回与 queries 一一对应的实例，未找到时为 {}
+        """
+        ids_map, names_map = {}, {}
+        for query in queries:
+            _id = query.get("_id")
+            if _id:
+                try:
+                    ids_map.setdefault(query["model_id"], set()).add(int(_id))
+                except (TypeError, ValueError):
+                    continue
+            elif query.get("inst_name"):
+                names_map.setdefault(query["model_id"], set()).add(query["inst_name"])
+
+        id_result, name_result = {}, {}
+        with Neo4jClient() as ag:
+            for model_id, ids in ids_map.items():
+                params = [
+                    {"field": "model_id", "type": "str=", "value": model_id},
+                    {"field": "id", "type": "id[]", "value": sorted(ids)},
+                ]
+                inst_list, _ = ag.query_entity(INSTANCE, params)
+                for inst in inst_list:
+                    id_result[(model_id, inst["_id"])] = inst
+            for model_id, names in names_map.items():
+                params = [
+                    {"field": "model_id", "type": "str=", "value": model_id},
+                    {"field": "inst_name", "type": "str[]", "value": sorted(names)},
+                ]
+                inst_list, _ = ag.query_entity(INSTANCE, params)
+                # 按ID升序返回，同名实例取第一个，与单个查询一致
+                for inst in inst_list:
+                    name_result.setdefault((model_id, inst["inst_name"]), inst)
+
+        result = []
+        for query in queries:
+            _id = query.get("_id")
+            if _id:
+                try:
+                    result.append(id_result.get((query["model_id"], int(_id)), {}))
+                except (TypeError, ValueError):
+                    result.append({})
+            else:
+                result.append(name_result.get((query["model_id"], query.get("inst_name")), {}))
+        return result
+
     @staticmethod
     def get_permission_params(user_groups, roles):
         """获取用户实例权限查询参数，用户用户查询实例"""
@@ -451,41 +501,12 @@ class InstanceManage(object):
         return results
 
     def inst_import_support_edit(self, model_id: str, file_stream: bytes, operator: str):
-        """实例导入-支持编辑"""
+        """实例导入-支持编辑，按批读取、写入，实例变更记录随每批写入"""
         attrs = ModelManage.search_model_attr_v2(model_id)
-        model_info = ModelManage.search_model_info(model_id)
 
-        with Neo4jClient() as ag:
-            exist_items, _ = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": model_id}])
-
-        _import = Import(model_id, attrs, exist_items, operator)
-        add_results, update_results, asso_result = _import.import_inst_list_support_edit(file_stream)
-
-        add_changes = [
-            dict(
-                inst_id=i["data"]["_id"],
-                model_id=i["data"]["model_id"],
-                before_data=i["data"],
-                model_object=OPERATOR_INSTANCE,
-                message=f"导入模型实例. 模型:{model_info['model_name']} 新增模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",
-            )
-            for i in add_results
-            if i["success"]
-        ]
-        exist_items__id_map = {i["_id"]: i for i in exist_items}
-        update_changes = [
-            dict(
-                inst_id=i["data"]["_id"],
-                model_id=i["data"]["model_id"],
-                before_data=exist_items__id_map[i["data"]["_id"]],
-                model_object=OPERATOR_INSTANCE,
-                message=f"导入模型实例. 模型:{model_info['model_name']} 更新模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",
-            )
-            for i in update_results if i["success"]
-        ]
-        batch_create_change_record(INSTANCE, CREATE_INST, add_changes, operator=operator)
-        batch_create_change_record(INSTANCE, UPDATE_INST, update_changes, operator=operator)
-        result_message = self.format_result_message(_import.import_result_message)
+        # 已有实例按批查询，不在这里加载模型的全部实例
+        import_result_message = Import(model_id, attrs, [], operator).import_inst_list_support_edit(file_stream)
+        result_message = self.format_result_message(import_result_message)
         return result_message
 
     @staticmethod
@@ -501,61 +522,91 @@ class InstanceManage(object):
         return add_mgs
 
     @staticmethod
-    def inst_export(model_id: str, ids: list, user_groups: list, roles: list, inst_names: list, created: str = "",
-                    attr_list: list = [], association_list: list = []):
-        """实例导出"""
-        attrs = ModelManage.search_model_attr_v2(model_id)
-        association = ModelManage.model_association_search(model_id)
+    def export_permission_condition(ag: Neo4jClient, model_id: str, user_groups: list, roles: list, inst_names: list,
+                                    created: str = ""):
+        """构建导出实例的权限过滤条件"""
+        # 构建权限参数
+        permission_params = InstanceManage.get_permission_params(user_groups, roles)
 
-        with Neo4jClient() as ag:
-            if ids:
-                # 如果指定了实例ID，直接查询这些实例
-                inst_list = ag.query_entity_by_ids(ids)
-            else:
-                # 构建权限参数
-                permission_params = InstanceManage.get_permission_params(user_groups, roles)
+        # 构建针对单个模型的实例权限参数
+        model_instance_permission_params = []
+        if inst_names:  # 如果有具体的实例名称限制
+            model_instance_permission_params = [{
+                'model_id': model_id,
+                'inst_names': inst_names
+            }]
+
+        # 使用Neo4j的权限过滤查询
+        instance_permission_str = ag.format_instance_permission_params(model_instance_permission_params, created)
+
+        # 如果有组织权限，所有条件都必须在组织权限范围内
+        if permission_params:
+            if instance_permission_str:
+                # 组织权限 AND (实例权限 OR 创建人权限)
+                return f"{permission_params} AND ({instance_permission_str})"
+            # 仅组织权限
+            return permission_params
+        # 仅实例权限（包含创建人权限），没有时不过滤
+        return instance_permission_str or ""
 
-                # 构建针对单个模型的实例权限参数
-                model_instance_permission_params = []
-                if inst_names:  # 如果有具体的实例名称限制
-                    model_instance_permission_params = [{
-                        'model_id': model_id,
-                        'inst_names': inst_names
-                    }]
-
-                # 构建查询参数
-                query_params = [{"field": "model_id", "type": "str=", "value": model_id}]
-
-                # 使用Neo4j的权限过滤查询
-                instance_permission_str = ag.format_instance_permission_params(model_instance_permission_params,
-                                                                               created)
-
-                # 如果有组织权限，所有条件都必须在组织权限范围内
-                if permission_params:
-                    if instance_permission_str:
-                        # 组织权限 AND (实例权限 OR 创建人权限)
-                        final_permission_condition = f"{permission_params} AND ({instance_permission_str})"
-                    else:
-                        # 仅组织权限
-                        final_permission_condition = permission_params
-                elif instance_permission_str:
-                    # 仅实例权限（包含创建人权限）
-                    final_permission_condition = instance_permission_str
-                else:
-                    final_permission_condition = ""
-
-                inst_list, _ = ag.query_entity(INSTANCE, query_params, permission_params=final_permission_condition)
+    @staticmethod
+    def iter_export_pages(model_id: str, ids: list, user_groups: list, roles: list, inst_names: list,
+                          created: str = "", page_size: int = EXPORT_PAGE_SIZE):
+        """
+        逐页查询待导出的实例，按实例ID递增翻页（避免 SKIP 越往后越慢）
+        指定了实例ID时按ID分页查询
+        """
+        if ids:
+            for start in range(0, len(ids), page_size):
+                with Neo4jClient() as ag:
+                    yield ag.query_entity_by_ids(ids[start:start + page_size])
+            return
 
+        with Neo4jClient() as ag:
+            permission_condition = InstanceManage.export_permission_condition(
+                ag, model_id, user_groups, roles, inst_names, created)
+        last_id = -1
+        while True:
+            # 构建查询参数
+            query_params = [
+                {"field": "model_id", "type": "str=", "value": model_id},
+                {"field": "id", "type": "id>", "value": last_id},
+            ]
+            with Neo4jClient() as ag:
+                inst_list, _ = ag.query_entity(
+                    INSTANCE, query_params, page={"skip": 0, "limit": page_size},
+                    permission_params=permission_condition, with_count=False,
+                )
+            if not inst_list:
+                return
+            yield inst_list
+            if len(inst_list) < page_size:
+                return
+            last_id = inst_list[-1]["_id"]
+
+    @staticmethod
+    def export_attrs(model_id: str, attr_list: list = [], association_list: list = []):
+        """导出的属性与关联"""
+        attrs = ModelManage.search_model_attr_v2(model_id)
+        association = ModelManage.model_association_search(model_id)
         attrs = [i for i in attrs if i["attr_id"] in attr_list] if attr_list else attrs
         association = [i for i in association if
                        i["model_asst_id"] in association_list] if association_list else []
-        return Export(attrs, model_id=model_id, association=association).export_inst_list(inst_list)
+        return attrs, association
 
     @staticmethod
-    def topo_search(inst_id: int):
-        """拓扑查询"""
+    def inst_export(model_id: str, ids: list, user_groups: list, roles: list, inst_names: list, created: str = "",
+                    attr_list: list = [], association_list: list = []):
+        """实例导出，返回导出文件的临时文件对象"""
+        attrs, association = InstanceManage.export_attrs(model_id, attr_list, association_list)
+        pages = InstanceManage.iter_export_pages(model_id, ids, user_groups, roles, inst_names, created)
+        return Export(attrs, model_id=model_id, association=association).export_inst_pages(pages)
+
+    @staticmethod
+    def topo_search(inst_id: int, depth: int = None, direction: str = None):
+        """拓扑查询，depth 为展开层数，direction 为 src/dst 时只查询一个方向（按层懒加载时使用）"""
         with Neo4jClient() as ag:
-            result = ag.query_topo(INSTANCE, inst_id)
+            result = ag.query_topo(INSTANCE, inst_id, max_depth=depth, direction=direction)
         return result
 
     @staticmethod
@@ -629,16 +680,29 @@ class InstanceManage(object):
         return data
 
     @classmethod
-    def fulltext_search(cls, user_groups: list, roles: list, search: str, rules: dict = {}, created: str = ""):
-        """全文检索"""
+    def fulltext_search(cls, user_groups: list, roles: list, search: str, rules: dict = {}, created: str = "",
+                        model_id: str = None, page: int = None, page_size: int = None):
+        """
+        全文检索，结果按相关度排序
+        传入 page 时分页返回命中实例、总数以及各模型的命中数量，否则返回全部命中实例
+        """
         permission_params = InstanceManage.get_permission_params(user_groups, roles)
 
         # 构建实例权限过滤参数
         instance_permission_params = cls.format_instance_permission_data(rules)
 
+        _page = dict(skip=(page - 1) * page_size, limit=page_size) if page else None
         with Neo4jClient() as ag:
             data = ag.full_text(search, permission_params=permission_params,
                                 instance_permission_params=instance_permission_params,
-                                created=created
+                                created=created,
+                                model_id=model_id,
+                                page=_page,
                                 )
-        return data
+            if not page:
+                return data
+            model_count = ag.full_text_model_count(search, permission_params=permission_params,
+                                                   instance_permission_params=instance_permission_params,
+                                                   created=created)
+        count = model_count.get(model_id, 0) if model_id else sum(model_count.values())
+        return dict(insts=data, count=count, model_count=model_count)
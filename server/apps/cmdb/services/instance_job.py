@@ -0,0 +1,186 @@
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.files import File
+from django.utils import timezone
+
+from apps.cmdb.constants import (
+    INSTANCE,
+    IMPORT_RESULT_MESSAGE_LIMIT,
+    INSTANCE_JOB_STALE_SECONDS,
+    InstanceJobStatus,
+    InstanceJobType,
+)
+from apps.cmdb.graph.neo4j import Neo4jClient
+from apps.cmdb.models.instance_job import InstanceJob
+from apps.cmdb.services.instance import InstanceManage
+from apps.cmdb.services.model import ModelManage
+from apps.cmdb.utils.export import Export
+from apps.cmdb.utils.Import import Import
+from apps.core.exceptions.base_app_exception import BaseAppException
+from apps.core.logger import cmdb_logger as logger
+
+
+class InstanceJobManage(object):
+    """
+    实例导入导出任务：由 celery 异步执行，进度与断点写入 InstanceJob
+    导入每批完成后记录断点，失败或中断后重新执行时从断点继续（中断的那一批会重新写入，已存在的实例按更新处理）；
+    导出无法在已生成的文件上续写，重新执行时从头生成
+    """
+
+    @staticmethod
+    def create_import_job(model_id: str, file, operator: str) -> InstanceJob:
+        from apps.cmdb.celery_tasks import instance_import_job_task
+
+        job = InstanceJob.objects.create(
+            job_type=InstanceJobType.IMPORT, model_id=model_id, file=file, created_by=operator, updated_by=operator
+        )
+        instance_import_job_task.delay(job.id)
+        return job
+
+    @staticmethod
+    def create_export_job(model_id: str, params: dict, operator: str) -> InstanceJob:
+        from apps.cmdb.celery_tasks import instance_export_job_task
+
+        job = InstanceJob.objects.create(
+            job_type=InstanceJobType.EXPORT, model_id=model_id, params=params, created_by=operator,
+            updated_by=operator,
+        )
+        instance_export_job_task.delay(job.id)
+        return job
+
+    @staticmethod
+    def get_job(job_id: int, operator: str) -> InstanceJob:
+        job = InstanceJob.objects.filter(id=job_id, created_by=operator).first()
+        if not job:
+            raise BaseAppException("job not found!")
+        return job
+
+    @staticmethod
+    def retry_job(job_id: int, operator: str) -> InstanceJob:
+        """重新执行失败或长时间无进展的任务，导入任务从断点继续"""
+        from apps.cmdb.celery_tasks import instance_export_job_task, instance_import_job_task
+
+        job = InstanceJobManage.get_job(job_id, operator)
+        stale_time = timezone.now() - timedelta(seconds=INSTANCE_JOB_STALE_SECONDS)
+        stale = job.status == InstanceJobStatus.RUNNING and job.updated_at < stale_time
+        if job.status != InstanceJobStatus.ERROR and not stale:
+            raise BaseAppException("job is not retryable!")
+        InstanceJob.objects.filter(id=job.id, status=job.status).update(
+            status=InstanceJobStatus.PENDING, error="", updated_at=timezone.now()
+        )
+        task = instance_import_job_task if job.job_type == InstanceJobType.IMPORT else instance_export_job_task
+        task.delay(job.id)
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def claim(job_id: int, job_type: str):
+        """将等待执行的任务置为执行中，已被其他 worker 领取或不存在时返回 None"""
+        claimed = InstanceJob.objects.filter(
+            id=job_id, job_type=job_type, status=InstanceJobStatus.PENDING
+        ).update(status=InstanceJobStatus.RUNNING, updated_at=timezone.now())
+        if not claimed:
+            logger.info(f"instance job {job_id} is not pending, skip")
+            return None
+        return InstanceJob.objects.get(id=job_id)
+
+    @staticmethod
+    def update_job(job_id: int, **kwargs):
+        InstanceJob.objects.filter(id=job_id).update(updated_at=timezone.now(), **kwargs)
+
+    @staticmethod
+    def fail_job(job_id: int, err: Exception):
+        logger.exception(f"instance job {job_id} failed: {err}")
+        InstanceJobManage.update_job(
+            job_id, status=InstanceJobStatus.ERROR, error=getattr(err, "message", "") or str(err)
+        )
+
+    @staticmethod
+    @contextmanager
+    def local_copy(field_file):
+        """对象存储中的文件分块复制到本地临时文件，read_only 模式读取需要可随机访问的文件"""
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as tmp:
+            with field_file.open("rb") as f:
+                for chunk in f.chunks():
+                    tmp.write(chunk)
+            tmp.flush()
+            yield tmp.name
+
+    @staticmethod
+    def merge_result(result: dict, import_result_message: dict) -> dict:
+        """断点续传时合并之前已导入部分的结果，明细最多保留 IMPORT_RESULT_MESSAGE_LIMIT 条"""
+        merged = {}
+        for key, value in import_result_message.items():
+            before = result.get(key, {})
+            merged[key] = dict(
+                success=before.get("success", 0) + value["success"],
+                error=before.get("error", 0) + value["error"],
+                data=(before.get("data", []) + value["data"])[:IMPORT_RESULT_MESSAGE_LIMIT],
+            )
+        return merged
+
+    @staticmethod
+    def run_import(job_id: int):
+        """执行导入任务，每批完成后记录进度与断点"""
+        job = InstanceJobManage.claim(job_id, InstanceJobType.IMPORT)
+        if not job:
+            return
+        try:
+            attrs = ModelManage.search_model_attr_v2(job.model_id)
+            # 已有实例按批查询，不在这里加载模型的全部实例
+            _import = Import(job.model_id, attrs, [], job.created_by, message_limit=IMPORT_RESULT_MESSAGE_LIMIT)
+            with InstanceJobManage.local_copy(job.file) as path:
+                total = _import.count_rows(path)
+                InstanceJobManage.update_job(job.id, total=total)
+                for processed in _import.import_chunks(path, skip=job.checkpoint):
+                    InstanceJobManage.update_job(
+                        job.id, processed=processed, checkpoint=processed, total=max(total, processed),
+                        result=InstanceJobManage.merge_result(job.result, _import.import_result_message),
+                    )
+            InstanceJobManage.update_job(job.id, status=InstanceJobStatus.SUCCESS)
+        except Exception as err:
+            InstanceJobManage.fail_job(job.id, err)
+
+    @staticmethod
+    def run_export(job_id: int):
+        """执行导出任务，逐页写入临时文件，完成后上传到对象存储"""
+        job = InstanceJobManage.claim(job_id, InstanceJobType.EXPORT)
+        if not job:
+            return
+        params = job.params
+        try:
+            attrs, association = InstanceManage.export_attrs(
+                job.model_id, params.get("attr_list", []), params.get("association_list", [])
+            )
+            pages = InstanceManage.iter_export_pages(
+                job.model_id, params.get("ids", []), params.get("user_groups", []), params.get("roles", []),
+                params.get("inst_names", []), params.get("created", ""),
+            )
+            InstanceJobManage.update_job(job.id, processed=0, total=InstanceJobManage.export_count(job))
+            file_stream = Export(attrs, model_id=job.model_id, association=association).export_inst_pages(
+                pages, progress=lambda exported: InstanceJobManage.update_job(job.id, processed=exported)
+            )
+            with file_stream:
+                job.file.save(f"{job.model_id}_export.xlsx", File(file_stream), save=False)
+            InstanceJobManage.update_job(job.id, file=job.file.name, status=InstanceJobStatus.SUCCESS)
+        except Exception as err:
+            InstanceJobManage.fail_job(job.id, err)
+
+    @staticmethod
+    def export_count(job: InstanceJob) -> int:
+        """导出的实例总数，用于计算进度"""
+        params = job.params
+        if params.get("ids"):
+            return len(params["ids"])
+        with Neo4jClient() as ag:
+            permission_condition = InstanceManage.export_permission_condition(
+                ag, job.model_id, params.get("user_groups", []), params.get("roles", []),
+                params.get("inst_names", []), params.get("created", ""),
+            )
+            _, count = ag.query_entity(
+                INSTANCE, [{"field": "model_id", "type": "str=", "value": job.model_id}],
+                page={"skip": 0, "limit": 0}, permission_params=permission_condition,
+            )
+        return count or 0
@@ -17,13 +17,23 @@ from apps.cmdb.graph.neo4j import Neo4jClient
 from apps.cmdb.language.service import SettingLanguage
 from apps.cmdb.models import UPDATE_INST, DELETE_INST, CREATE_INST
 from apps.cmdb.services.classification import ClassificationManage
+from apps.cmdb.services.model_schema import ModelSchemaCache
 from apps.cmdb.utils.change_record import create_change_record
 from apps.core.exceptions.base_app_exception import BaseAppException
+from apps.core.logger import cmdb_logger as logger
 from apps.core.services.user_group import UserGroup
 from apps.rpc.system_mgmt import SystemMgmt
 
 
 class ModelManage(object):
+    @staticmethod
+    def sync_fulltext_index(ag: Neo4jClient):
+        """模型属性变更后同步实例全文索引字段，失败时全文检索退回扫描，不影响模型操作"""
+        try:
+            ag.ensure_fulltext_index(force=True)
+        except Exception as e:  # noqa
+            logger.warning(f"sync fulltext index failed: {e}")
+
     @staticmethod
     def create_model(data: dict, username="admin"):
         """
@@ -48,6 +58,8 @@ class ModelManage(object):
                 ),
                 "classification_model_asst_id",
             )
+            ModelManage.sync_fulltext_index(ag)
+        ModelSchemaCache.invalidate()
         create_change_record(operator=username, model_id=data["model_id"], label="模型管理",
                              _type=CREATE_INST, message=f"创建模型. 模型名称: {data['model_name']}",
                              inst_id=result['_id'], model_object=OPERATOR_MODEL)
@@ -60,6 +72,7 @@ class ModelManage(object):
         """
         with Neo4jClient() as ag:
             ag.batch_delete_entity(MODEL, [id])
+        ModelSchemaCache.invalidate()
 
     @staticmethod
     def update_model(id: int, data: dict):
@@ -73,6 +86,7 @@ class ModelManage(object):
             # 排除当前正在更新的模型，避免自己和自己比较
             exist_items = [i for i in exist_items if i["_id"] != id]
             model = ag.set_entity_properties(MODEL, [id], data, UPDATE_MODEL_CHECK_ATTR_MAP, exist_items)
+        ModelSchemaCache.invalidate()
         return model[0]
 
     @staticmethod
@@ -146,6 +160,8 @@ class ModelManage(object):
                 raise BaseAppException("model attr repetition")
             attrs.append(attr_info)
             result = ag.set_entity_properties(MODEL, [model_info["_id"]], dict(attrs=json.dumps(attrs)), {}, [], False)
+            ModelManage.sync_fulltext_index(ag)
+        ModelSchemaCache.invalidate()
 
         attrs = ModelManage.parse_attrs(result[0].get("attrs", "[]"))
 
@@ -187,6 +203,8 @@ class ModelManage(object):
                 )
 
             result = ag.set_entity_properties(MODEL, [model_info["_id"]], dict(attrs=json.dumps(attrs)), {}, [], False)
+            ModelManage.sync_fulltext_index(ag)
+        ModelSchemaCache.invalidate()
 
         attrs = ModelManage.parse_attrs(result[0].get("attrs", "[]"))
 
@@ -227,6 +245,8 @@ class ModelManage(object):
             # 模型属性删除后，要删除对应模型实例的属性
             model_params = [{"field": "model_id", "type": "str=", "value": model_id}]
             ag.remove_entitys_properties(INSTANCE, model_params, [attr_id])
+            ModelManage.sync_fulltext_index(ag)
+        ModelSchemaCache.invalidate()
 
         create_change_record(operator=username, model_id=model_id, label="模型管理",
                              _type=DELETE_INST, message=f"删除模型属性. 模型名称: {model_info['model_name']}",
@@ -239,6 +259,10 @@ class ModelManage(object):
         """
         查询模型详情
         """
+        return ModelSchemaCache.get("model", model_id, lambda: ModelManage._search_model_info(model_id))
+
+    @staticmethod
+    def _search_model_info(model_id: str):
         query_data = {"field": "model_id", "type": "str=", "value": model_id}
         with Neo4jClient() as ag:
             models, _ = ag.query_entity(MODEL, [query_data])
@@ -334,6 +358,7 @@ class ModelManage(object):
                     raise BaseAppException("model association repetition")
                 else:
                     raise BaseAppException(e.message)
+        ModelSchemaCache.invalidate()
         return edge
 
     @staticmethod
@@ -343,12 +368,19 @@ class ModelManage(object):
         """
         with Neo4jClient() as ag:
             ag.delete_edge(id)
+        ModelSchemaCache.invalidate()
 
     @staticmethod
     def model_association_info_search(model_asst_id: str):
         """
         查询模型关联详情
         """
+        return ModelSchemaCache.get(
+            "association", model_asst_id, lambda: ModelManage._model_association_info_search(model_asst_id)
+        )
+
+    @staticmethod
+    def _model_association_info_search(model_asst_id: str):
         with Neo4jClient() as ag:
             query_data = {
                 "field": "model_asst_id",
@@ -365,6 +397,10 @@ class ModelManage(object):
         """
         查询模型所有的关联
         """
+        return ModelSchemaCache.get("associations", model_id, lambda: ModelManage._model_association_search(model_id))
+
+    @staticmethod
+    def _model_association_search(model_id: str):
         query_list = [
             {"field": "src_model_id", "type": "str=", "value": model_id},
             {"field": "dst_model_id", "type": "str=", "value": model_id},
@@ -429,6 +465,7 @@ class ModelManage(object):
                     [],
                     False
                 )
+        ModelSchemaCache.invalidate()
         return True
 
     @staticmethod
@@ -463,4 +500,5 @@ class ModelManage(object):
                         False
                     )
 
+        ModelSchemaCache.invalidate()
         return True
@@ -0,0 +1,69 @@
+import copy
+import time
+from typing import Any, Callable
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from apps.cmdb.constants import MODEL_SCHEMA_CACHE_SIZE, MODEL_SCHEMA_CACHE_TTL
+from apps.core.logger import cmdb_logger as logger
+from apps.core.utils.local_cache import LocalTTLCache
+
+MODEL_SCHEMA_VERSION_KEY = "cmdb:model_schema:version"
+
+
+class ModelSchemaCache:
+    """
+    模型元数据（模型详情、属性、关联定义）进程内缓存
+    缓存项带上写入时的版本号，模型、属性、关联变更时通过 invalidate() 更新共享缓存中的版本号，
+    各进程读取时发现版本不一致即重新查询；另有 TTL 兜底绕过 ModelManage 直接修改图数据库的情况
+    - 版本号必须跨进程可见：default 缓存是进程内缓存（未配置Redis时为locmem）时改用 db 缓存
+    - 版本号取当前时间（纳秒），版本键被淘汰后重新生成的版本号不会与旧缓存项相同
+    - 版本号读取失败时不使用缓存
+    """
+
+    local = LocalTTLCache(MODEL_SCHEMA_CACHE_SIZE)
+
+    @staticmethod
+    def shared():
+        default = caches["default"]
+        if isinstance(default, (LocMemCache, DummyCache)):
+            return caches["db"]
+        return default
+
+    @classmethod
+    def version(cls) -> int:
+        try:
+            shared = cls.shared()
+            version = shared.get(MODEL_SCHEMA_VERSION_KEY)
+            if version is None:
+                shared.add(MODEL_SCHEMA_VERSION_KEY, time.time_ns(), None)
+                version = shared.get(MODEL_SCHEMA_VERSION_KEY)
+            return version or 0
+        except Exception as e:
+            logger.warning(f"Failed to read model schema version: {e}")
+            return 0
+
+    @classmethod
+    def get(cls, kind: str, key: str, loader: Callable[[], Any]) -> Any:
+        """读取缓存，版本不一致或未命中时调用 loader 加载；空结果不缓存"""
+        version = cls.version()
+        local_key = f"{kind}:{key}"
+        cached = cls.local.get(local_key) if version else None
+        if cached is not None and cached[0] == version:
+            return copy.deepcopy(cached[1])
+
+        value = loader()
+        if version and value:
+            cls.local.set(local_key, (version, copy.deepcopy(value)), MODEL_SCHEMA_CACHE_TTL)
+        return value
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """模型元数据变更后调用，使所有进程的缓存失效"""
+        cls.local.clear()
+        try:
+            cls.shared().set(MODEL_SCHEMA_VERSION_KEY, time.time_ns(), None)
+        except Exception as e:
+            logger.warning(f"Failed to bump model schema version: {e}")
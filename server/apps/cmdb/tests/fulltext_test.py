@@ -0,0 +1,78 @@
+import json
+from unittest import mock
+
+import pytest
+
+from apps.cmdb.constants import INSTANCE_FULLTEXT_INDEX
+from apps.cmdb.graph.neo4j import Neo4jClient
+from apps.cmdb.services.model import ModelManage
+
+MODEL_ATTRS = [
+    {"attr_id": "inst_name", "attr_type": "str"},
+    {"attr_id": "port", "attr_type": "int"},
+    {"attr_id": "organization", "attr_type": "organization"},
+    {"attr_id": "password", "attr_type": "pwd"},
+]
+
+
+@pytest.fixture
+def scan_properties(monkeypatch):
+    monkeypatch.setattr(Neo4jClient, "fulltext_scan_properties", ["organization", "port"])
+
+
+def test_fulltext_index_properties():
+    """全文索引包含密码以外的属性，其中非字符串属性需要单独扫描"""
+    client = Neo4jClient.__new__(Neo4jClient)
+    client.session = mock.Mock()
+    client.session.run.return_value = [{"attrs": json.dumps(MODEL_ATTRS)}]
+
+    properties, scan_properties = client.fulltext_index_properties()
+
+    assert properties == ["inst_name", "organization", "port"]
+    assert scan_properties == ["organization", "port"]
+
+
+def test_fulltext_match_text_search_uses_index_only(scan_properties):
+    query, params = Neo4jClient.fulltext_match("mysql 主库")
+
+    assert query.startswith("CALL db.index.fulltext.queryNodes")
+    assert "UNION" not in query
+    assert params == {"index": INSTANCE_FULLTEXT_INDEX, "query": Neo4jClient.format_fulltext_query("mysql 主库")}
+
+
+@pytest.mark.parametrize("search", ["3306", "10.5", "true", "FALSE"])
+def test_fulltext_match_scans_non_string_properties(scan_properties, search):
+    """数字与布尔值不在全文索引中，检索内容可能出现在这些值中时并上扫描结果"""
+    query, params = Neo4jClient.fulltext_match(search)
+
+    assert "UNION" in query
+    assert query.endswith("WITH n, max(score) AS score")
+    assert params["scan_properties"] == ["organization", "port"]
+    assert params["search"] == search
+
+
+def test_fulltext_match_without_scan_properties(monkeypatch):
+    monkeypatch.setattr(Neo4jClient, "fulltext_scan_properties", [])
+    query, _ = Neo4jClient.fulltext_match("3306")
+    assert "UNION" not in query
+
+
+def test_update_model_attr_syncs_fulltext_index():
+    """修改模型属性与新增、删除一样同步全文索引字段"""
+    attrs = [{"attr_id": "port", "attr_name": "端口", "attr_type": "int", "attr_group": "default",
+              "is_required": False, "editable": True, "option": []}]
+    model_info = {"_id": 1, "model_id": "mysql", "model_name": "MySQL", "attrs": json.dumps(attrs)}
+    attr_info = dict(attrs[0], attr_name="监听端口")
+
+    with mock.patch("apps.cmdb.services.model.Neo4jClient") as client, \
+            mock.patch("apps.cmdb.services.model.ModelSchemaCache"), \
+            mock.patch("apps.cmdb.services.model.create_change_record"), \
+            mock.patch.object(ModelManage, "sync_fulltext_index") as sync_fulltext_index:
+        ag = client.return_value.__enter__.return_value
+        ag.query_entity.return_value = ([model_info], 1)
+        ag.set_entity_properties.side_effect = lambda label, ids, data, *args: [dict(model_info, **data)]
+
+        result = ModelManage.update_model_attr("mysql", attr_info)
+
+    sync_fulltext_index.assert_called_once_with(ag)
+    assert result["attr_name"] == "监听端口"
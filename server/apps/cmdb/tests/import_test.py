@@ -0,0 +1,109 @@
+from unittest import mock
+
+import openpyxl
+import pytest
+
+from apps.cmdb.constants import INSTANCE
+from apps.cmdb.graph.neo4j import Neo4jClient
+from apps.cmdb.utils.Import import Import
+
+MODEL_ID = "host"
+
+ATTRS = [
+    {"attr_id": "inst_name", "attr_name": "实例名称", "attr_type": "str", "is_only": True, "is_required": True,
+     "editable": True},
+    {"attr_id": "ip_addr", "attr_name": "IP地址", "attr_type": "str", "is_only": False, "is_required": False,
+     "editable": True},
+]
+
+
+def create_test_excel(path, rows):
+    """创建导入文件，前3行为字段名、字段类型、字段标识，None 为空行"""
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = MODEL_ID
+    sheet.append(["实例名称", "IP地址"])
+    sheet.append(["str", "str"])
+    sheet.append(["inst_name", "ip_addr"])
+    for row in rows:
+        sheet.append(row or [None, None])
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def importer():
+    with mock.patch.object(Import, "get_model_asso_map", return_value={}), \
+            mock.patch.object(Import, "prepare"), \
+            mock.patch.object(Import, "import_chunk") as import_chunk:
+        _import = Import(MODEL_ID, ATTRS, [], "admin")
+        yield _import, import_chunk
+
+
+def chunk_names(import_chunk):
+    return [[item["inst_name"] for item, _ in call.args[0]] for call in import_chunk.call_args_list]
+
+
+def test_import_chunks_boundary(importer, tmp_path):
+    """按 chunk_size 分批，空行计入已处理行数但不写入，最后不足一批的行单独写入"""
+    _import, import_chunk = importer
+    rows = [[f"host-{i}", f"10.0.0.{i}"] for i in range(7)]
+    rows[4] = None
+    path = create_test_excel(tmp_path / "host.xlsx", rows)
+
+    assert _import.count_rows(path) == 7
+    assert list(_import.import_chunks(path, chunk_size=3)) == [3, 6, 7]
+    assert chunk_names(import_chunk) == [
+        ["host-0", "host-1", "host-2"],
+        ["host-3", "host-5"],
+        ["host-6"],
+    ]
+
+
+def test_import_chunks_exact_multiple(importer, tmp_path):
+    """行数正好是 chunk_size 的整数倍时不产生多余的空批"""
+    _import, import_chunk = importer
+    path = create_test_excel(tmp_path / "host.xlsx", [[f"host-{i}", ""] for i in range(6)])
+
+    assert list(_import.import_chunks(path, chunk_size=3)) == [3, 6]
+    assert import_chunk.call_count == 2
+
+
+def test_import_chunks_resume_from_checkpoint(importer, tmp_path):
+    """从断点继续时跳过已处理的行，yield 的进度包含断点之前的行数"""
+    _import, import_chunk = importer
+    path = create_test_excel(tmp_path / "host.xlsx", [[f"host-{i}", ""] for i in range(7)])
+
+    assert list(_import.import_chunks(path, skip=3, chunk_size=3)) == [6, 7]
+    assert chunk_names(import_chunk) == [["host-3", "host-4", "host-5"], ["host-6"]]
+
+
+def test_import_chunks_sheet_mismatch(importer, tmp_path):
+    """工作表名称与模型ID不一致时不导入"""
+    _import, import_chunk = importer
+    path = create_test_excel(tmp_path / "host.xlsx", [["host-0", ""]])
+    _import.model_id = "mysql"
+
+    with pytest.raises(ValueError):
+        list(_import.import_chunks(path))
+    import_chunk.assert_not_called()
+
+
+def test_load_chunk_items_queries_chunk_keys():
+    """每批只按本批的唯一属性值与实例名称查询已有实例"""
+    exist_items = [{"_id": 10, "model_id": MODEL_ID, "inst_name": "host-1", "ip_addr": "10.0.0.1"}]
+    with mock.patch.object(Import, "get_model_asso_map", return_value={}), \
+            mock.patch("apps.cmdb.utils.Import.Neo4jClient") as client:
+        ag = client.return_value.__enter__.return_value
+        ag.query_entity_by_attr_values.return_value = exist_items
+        client.unique_key.side_effect = Neo4jClient.unique_key
+        _import = Import(MODEL_ID, ATTRS, [], "admin")
+        _import.model_has_items = True
+        _import.load_chunk_items([({"inst_name": "host-1"}, {}), ({"inst_name": "host-2"}, {})])
+
+    ag.query_entity_by_attr_values.assert_called_once_with(
+        INSTANCE, MODEL_ID, {"inst_name": ["host-1", "host-2"]}
+    )
+    assert _import.inst_name_id_map == {MODEL_ID: {"host-1": 10}}
+    assert _import.item_map == {("host-1",): exist_items[0]}
+    assert _import.unique_index.has_items
@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from apps.cmdb.constants import InstanceJobStatus, InstanceJobType
+from apps.cmdb.models.instance_job import InstanceJob
+from apps.cmdb.services.instance import InstanceManage
+from apps.cmdb.services.instance_job import InstanceJobManage
+from apps.core.exceptions.base_app_exception import BaseAppException
+
+
+class FakeImport(object):
+    """按断点逐批 yield 进度的导入，fail_at 为出错的批次进度"""
+
+    total = 7
+    chunk_size = 3
+    fail_at = None
+    skips = []
+
+    def __init__(self, *args, **kwargs):
+        self.import_result_message = {"add": {"success": 0, "error": 0, "data": []},
+                                      "update": {"success": 0, "error": 0, "data": []},
+                                      "asso": {"success": 0, "error": 0, "data": []}}
+
+    def count_rows(self, path):
+        return self.total
+
+    def import_chunks(self, path, skip=0):
+        FakeImport.skips.append(skip)
+        processed = skip
+        while processed < self.total:
+            processed = min(processed + self.chunk_size, self.total)
+            if processed == self.fail_at:
+                raise Exception("neo4j unavailable")
+            self.import_result_message["add"]["success"] = processed - skip
+            self.import_result_message["add"]["data"].append(f"chunk {processed}")
+            yield processed
+
+
+@contextmanager
+def fake_local_copy(field_file):
+    yield "/tmp/import.xlsx"
+
+
+@pytest.fixture
+def fake_import():
+    FakeImport.fail_at = None
+    FakeImport.skips = []
+    with mock.patch("apps.cmdb.services.instance_job.Import", FakeImport), \
+            mock.patch.object(InstanceJobManage, "local_copy", fake_local_copy), \
+            mock.patch("apps.cmdb.services.instance_job.ModelManage.search_model_attr_v2", return_value=[]):
+        yield FakeImport
+
+
+def create_import_job(**kwargs):
+    return InstanceJob.objects.create(job_type=InstanceJobType.IMPORT, model_id="host", created_by="admin",
+                                      updated_by="admin", **kwargs)
+
+
+@pytest.mark.django_db
+def test_run_import_records_checkpoint(fake_import):
+    job = create_import_job()
+
+    InstanceJobManage.run_import(job.id)
+
+    job.refresh_from_db()
+    assert job.status == InstanceJobStatus.SUCCESS
+    assert (job.total, job.processed, job.checkpoint) == (7, 7, 7)
+    assert job.progress == 100
+    assert job.result["add"]["success"] == 7
+    assert fake_import.skips == [0]
+
+
+@pytest.mark.django_db
+def test_run_import_resume_after_failure(fake_import):
+    """失败时保留最后完成的断点，重试后从断点继续，结果与之前已导入的部分合并"""
+    job = create_import_job()
+    fake_import.fail_at = 6
+
+    InstanceJobManage.run_import(job.id)
+
+    job.refresh_from_db()
+    assert job.status == InstanceJobStatus.ERROR
+    assert job.error == "neo4j unavailable"
+    assert (job.processed, job.checkpoint) == (3, 3)
+
+    fake_import.fail_at = None
+    with mock.patch("apps.cmdb.celery_tasks.instance_import_job_task") as task:
+        job = InstanceJobManage.retry_job(job.id, "admin")
+    task.delay.assert_called_once_with(job.id)
+    assert job.status == InstanceJobStatus.PENDING
+    assert job.error == ""
+
+    InstanceJobManage.run_import(job.id)
+
+    job.refresh_from_db()
+    assert job.status == InstanceJobStatus.SUCCESS
+    assert (job.processed, job.checkpoint) == (7, 7)
+    assert fake_import.skips == [0, 3]
+    assert job.result["add"]["success"] == 7
+    assert job.result["add"]["data"] == ["chunk 3", "chunk 6", "chunk 7"]
+
+
+@pytest.mark.django_db
+def test_claim_only_pending_job(fake_import):
+    """执行中或已完成的任务不会被再次领取"""
+    job = create_import_job(status=InstanceJobStatus.RUNNING)
+
+    InstanceJobManage.run_import(job.id)
+
+    assert fake_import.skips == []
+    assert InstanceJobManage.claim(job.id, InstanceJobType.EXPORT) is None
+
+
+@pytest.mark.django_db
+def test_retry_job_status():
+    """只有失败或长时间无进展的执行中任务可以重试，且只能由创建人操作"""
+    running = create_import_job(status=InstanceJobStatus.RUNNING)
+    success = create_import_job(status=InstanceJobStatus.SUCCESS)
+
+    with mock.patch("apps.cmdb.celery_tasks.instance_import_job_task") as task:
+        for job in [running, success]:
+            with pytest.raises(BaseAppException):
+                InstanceJobManage.retry_job(job.id, "admin")
+        with pytest.raises(BaseAppException):
+            InstanceJobManage.retry_job(running.id, "guest")
+
+        InstanceJob.objects.filter(id=running.id).update(updated_at=timezone.now() - timedelta(days=1))
+        job = InstanceJobManage.retry_job(running.id, "admin")
+
+    assert job.status == InstanceJobStatus.PENDING
+    task.delay.assert_called_once_with(running.id)
+
+
+def test_iter_export_pages_keyset():
+    """按实例ID递增翻页，每页以上一页最后一个ID为起点，页与页之间不重复不遗漏"""
+    instances = [{"_id": _id, "inst_name": f"host-{_id}"} for _id in [3, 5, 8, 13, 21, 34, 55]]
+    last_ids = []
+
+    def query_entity(label, params, page=None, **kwargs):
+        last_id = next(param["value"] for param in params if param["type"] == "id>")
+        last_ids.append(last_id)
+        items = [i for i in instances if i["_id"] > last_id]
+        return items[page["skip"]:page["skip"] + page["limit"]], None
+
+    with mock.patch("apps.cmdb.services.instance.Neo4jClient") as client, \
+            mock.patch.object(InstanceManage, "export_permission_condition", return_value=""):
+        client.return_value.__enter__.return_value.query_entity.side_effect = query_entity
+        pages = list(InstanceManage.iter_export_pages("host", [], [], [], [], page_size=3))
+
+    assert [[i["_id"] for i in page] for page in pages] == [[3, 5, 8], [13, 21, 34], [55]]
+    assert last_ids == [-1, 8, 34]
+
+
+def test_iter_export_pages_by_ids():
+    """指定实例ID时按ID分批查询"""
+    with mock.patch("apps.cmdb.services.instance.Neo4jClient") as client:
+        ag = client.return_value.__enter__.return_value
+        ag.query_entity_by_ids.side_effect = lambda ids: [{"_id": i} for i in ids]
+        pages = list(InstanceManage.iter_export_pages("host", [1, 2, 3, 4], [], [], [], page_size=3))
+
+    assert [[i["_id"] for i in page] for page in pages] == [[1, 2, 3], [4]]
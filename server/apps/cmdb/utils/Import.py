@@ -2,33 +2,50 @@ import ast
 
 import openpyxl
 
-from apps.cmdb.constants import INSTANCE, NEED_CONVERSION_TYPE, ORGANIZATION, USER, ENUM, MODEL_ASSOCIATION, MODEL, \
-    INSTANCE_ASSOCIATION
+from apps.cmdb.constants import INSTANCE, NEED_CONVERSION_TYPE, ORGANIZATION, USER, ENUM, INSTANCE_ASSOCIATION, \
+    OPERATOR_INSTANCE, IMPORT_CHUNK_SIZE
 from apps.cmdb.constants import ModelConstraintKey
-from apps.cmdb.graph.neo4j import Neo4jClient
-from apps.cmdb.models import CREATE_INST_ASST
+from apps.cmdb.graph.neo4j import Neo4jClient, UniqueAttrIndex
+from apps.cmdb.models import CREATE_INST, CREATE_INST_ASST, UPDATE_INST
 from apps.cmdb.services.model import ModelManage
-from apps.cmdb.utils.change_record import create_change_record_by_asso
+from apps.cmdb.utils.change_record import batch_create_change_record, batch_create_change_record_by_asso
 from apps.core.exceptions.base_app_exception import BaseAppException
 from apps.core.logger import cmdb_logger as logger
 
+# 数据从第4行开始，前3行为字段名、字段类型、字段标识
+DATA_START_ROW = 4
+
 
 class Import:
-    def __init__(self, model_id, attrs, exist_items, operator):
+    def __init__(self, model_id, attrs, exist_items, operator, message_limit: int = None):
         self.model_id = model_id
         self.attrs = attrs
         self.exist_items = exist_items
         self.operator = operator
+        # 结果明细最多保留的条数，None 为不限制（任务执行时限制，避免结果随文件大小增长）
+        self.message_limit = message_limit
+        self.check_attr_map = self.get_check_attr_map()
         self.inst_name_id_map = {}
         self.inst_id_name_map = {}
         self.import_result_message = {"add": {"success": 0, "error": 0, "data": []},
                                       "update": {"success": 0, "error": 0, "data": []},
                                       "asso": {"success": 0, "error": 0, "data": []}}
         self.model_asso_map = self.get_model_asso_map()
-
-    def format_excel_data(self, excel_meta: bytes):
-        """格式化excel"""
-
+        # 分批导入时每批按本批数据查询已有实例，构建本批使用的唯一属性索引与已有实例映射
+        self.unique_index = None
+        self.item_map = None
+        # 模型是否已有实例：没有实例时不校验唯一属性，与按全部实例构建索引时一致
+        self.model_has_items = None
+        self._model_name = None
+
+    @property
+    def model_name(self):
+        if self._model_name is None:
+            self._model_name = ModelManage.search_model_info(self.model_id).get("model_name", self.model_id)
+        return self._model_name
+
+    def get_field_maps(self):
+        """需要类型转换的字段、需要将名称转换为ID的字段"""
         need_val_to_id_field_map, need_update_type_field_map = {}, {}
 
         for attr_info in self.attrs:
@@ -38,70 +55,111 @@ class Import:
 
             if attr_info["attr_type"] in {ORGANIZATION, USER, ENUM}:
                 need_val_to_id_field_map[attr_info["attr_id"]] = {i["name"]: i["id"] for i in attr_info["option"]}
+        return need_val_to_id_field_map, need_update_type_field_map
 
-        # 读取临时文件
-        wb = openpyxl.load_workbook(excel_meta)
+    def open_sheet(self, workbook):
         # 获取第一个工作表
-        sheet1 = wb.worksheets[0]
+        sheet1 = workbook.worksheets[0]
         # 获取工作表名称 就是模型名称
         if sheet1.title != self.model_id:
             raise ValueError(f"Excel sheet name '{sheet1.title}' does not match model_id '{self.model_id}'.")
+        return sheet1
 
-        # 获取键
-        keys = [cell.value for cell in sheet1[3]]  # 3
-        asso_key_map = {i: {} for i in keys if self.model_id in i}
-        result = []
-        # 从第4行第1列开始遍历
-        for row in sheet1.iter_rows(min_row=4, min_col=1):
-            # 创建字典
-            item = {"model_id": self.model_id}
-            inst_name = ""
-            # 遍历每一列
-            for i, cell in enumerate(row):
-                try:
-                    value = ast.literal_eval(cell.value)
-                except Exception:
-                    value = cell.value
-
-                if not value:
-                    continue
+    def count_rows(self, excel_meta) -> int:
+        """数据行数，优先取工作表的尺寸信息，文件未记录尺寸时逐行计数"""
+        wb = openpyxl.load_workbook(excel_meta, read_only=True)
+        try:
+            sheet1 = self.open_sheet(wb)
+            max_row = sheet1.max_row
+            if not max_row or max_row < DATA_START_ROW:
+                max_row = sum(1 for _ in sheet1.iter_rows(values_only=True))
+        finally:
+            wb.close()
+        return max(max_row - DATA_START_ROW + 1, 0)
+
+    def iter_excel_rows(self, excel_meta, skip: int = 0):
+        """
+        以 read_only 模式逐行读取excel，内存占用与文件大小无关
+        每个数据行 yield (实例数据, {关联字段: [关联实例名称]})，空行 yield None；skip 为跳过的数据行数
+        """
+        need_val_to_id_field_map, need_update_type_field_map = self.get_field_maps()
 
-                if keys[i] == "inst_name":
-                    inst_name = value
+        wb = openpyxl.load_workbook(excel_meta, read_only=True)
+        try:
+            sheet1 = self.open_sheet(wb)
+            # 获取键
+            keys = list(next(sheet1.iter_rows(min_row=3, max_row=3, values_only=True), ()))
+            asso_keys = {i for i in keys if isinstance(i, str) and self.model_id in i}
+            # 从第4行第1列开始遍历
+            for values in sheet1.iter_rows(min_row=DATA_START_ROW + skip, min_col=1, values_only=True):
+                yield self.format_row(keys, values, asso_keys, need_val_to_id_field_map, need_update_type_field_map)
+        finally:
+            wb.close()
+
+    def format_row(self, keys, values, asso_keys, need_val_to_id_field_map, need_update_type_field_map):
+        """格式化一行数据"""
+        # 创建字典
+        item = {"model_id": self.model_id}
+        asso_values = {}
+        inst_name = ""
+        # 遍历每一列
+        for i, cell_value in enumerate(values):
+            if i >= len(keys) or keys[i] is None:
+                continue
+            try:
+                value = ast.literal_eval(cell_value)
+            except Exception:
+                value = cell_value
 
-                if keys[i] in asso_key_map:
-                    # 处理关联字段
-                    if not inst_name:
-                        continue
-                    split_value = value.split(",")
-                    asso_key_map[keys[i]].setdefault(inst_name, []).extend(split_value)
+            if not value:
+                continue
+
+            if keys[i] == "inst_name":
+                inst_name = value
+
+            if keys[i] in asso_keys:
+                # 处理关联字段
+                if not inst_name:
                     continue
+                asso_values.setdefault(keys[i], []).extend(str(value).split(","))
+                continue
 
-                # 将需要类型转换的键和值存入字典
-                if keys[i] in need_update_type_field_map:
-                    method = NEED_CONVERSION_TYPE[need_update_type_field_map[keys[i]]]
-                    item[keys[i]] = method(value)
-
-                # 将需要枚举字段name与id反转的建和值存入字典
-                if keys[i] in need_val_to_id_field_map:
-                    if keys[i] in {ORGANIZATION, USER}:
-                        if type(value) != list:
-                            value_list = [value]
-                        else:
-                            value_list = value
-                        enum_id = [need_val_to_id_field_map[keys[i]].get(j) for j in value_list]
+            # 将需要类型转换的键和值存入字典
+            if keys[i] in need_update_type_field_map:
+                method = NEED_CONVERSION_TYPE[need_update_type_field_map[keys[i]]]
+                item[keys[i]] = method(value)
+
+            # 将需要枚举字段name与id反转的建和值存入字典
+            if keys[i] in need_val_to_id_field_map:
+                if keys[i] in {ORGANIZATION, USER}:
+                    if type(value) != list:
+                        value_list = [value]
                     else:
-                        enum_id = need_val_to_id_field_map[keys[i]].get(value)
-                    if enum_id:
-                        item[keys[i]] = enum_id
-                    continue
+                        value_list = value
+                    enum_id = [need_val_to_id_field_map[keys[i]].get(j) for j in value_list]
+                else:
+                    enum_id = need_val_to_id_field_map[keys[i]].get(value)
+                if enum_id:
+                    item[keys[i]] = enum_id
+                continue
 
-                # 将键和值存入字典
-                item[keys[i]] = value
+            # 将键和值存入字典
+            item[keys[i]] = value
 
-            # 将字典添加到结果列表中
-            if not item:
+        # 空行
+        if len(item) == 1 and not asso_values:
+            return None
+        return item, asso_values
+
+    def format_excel_data(self, excel_meta: bytes):
+        """格式化excel"""
+        result, asso_key_map = [], {}
+        for row in self.iter_excel_rows(excel_meta):
+            if row is None:
                 continue
+            item, asso_values = row
+            for asso_key, inst_names in asso_values.items():
+                asso_key_map.setdefault(asso_key, {}).setdefault(item["inst_name"], []).extend(inst_names)
             result.append(item)
         return result, asso_key_map
 
@@ -120,35 +178,136 @@ class Import:
         """实例列表保存"""
 
         with Neo4jClient() as ag:
-            result = ag.batch_create_entity(INSTANCE, inst_list, self.get_check_attr_map(), self.exist_items,
+            result = ag.batch_create_entity(INSTANCE, inst_list, self.check_attr_map, self.exist_items,
                                             self.operator)
         return result
 
-    def inst_list_update(self, inst_list):
-        """实例列表更新"""
-
-        with Neo4jClient() as ag:
-            add_results, update_results = ag.batch_save_entity(INSTANCE, inst_list, self.get_check_attr_map(),
-                                                               self.exist_items, self.operator)
-        return add_results, update_results
-
     def import_inst_list(self, file_stream: bytes):
         """将excel主机数据导入"""
-        inst_list = self.format_excel_data(file_stream)
+        inst_list, _ = self.format_excel_data(file_stream)
         result = self.inst_list_save(inst_list)
         return result
 
+    def prepare(self):
+        """查询模型是否已有实例，整个导入过程只查询一次，之后由新增成功的实例更新"""
+        if self.model_has_items is not None:
+            return
+        with Neo4jClient() as ag:
+            _, count = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": self.model_id}],
+                                       page={"skip": 0, "limit": 1})
+        self.model_has_items = bool(count)
+
+    def load_chunk_items(self, rows: list):
+        """
+        按本批数据的唯一属性值与实例名称查询已有实例，构建本批使用的唯一属性索引、已有实例映射与实例名称映射；
+        之前批次写入的实例已在图数据库中，同样会被查到，内存占用只与批大小有关
+        """
+        unique_attrs = self.check_attr_map[ModelConstraintKey.unique.value]
+        attr_values = {attr: [] for attr in unique_attrs}
+        attr_values.setdefault("inst_name", [])
+        for item, _ in rows:
+            for attr, values in attr_values.items():
+                if item.get(attr) is not None:
+                    values.append(item[attr])
+        with Neo4jClient() as ag:
+            exist_items = ag.query_entity_by_attr_values(INSTANCE, self.model_id, attr_values)
+
+        self.unique_index = UniqueAttrIndex(unique_attrs, exist_items)
+        self.unique_index.has_items = self.unique_index.has_items or self.model_has_items
+        self.item_map = {Neo4jClient.unique_key(item, unique_attrs): item for item in exist_items}
+        self.inst_name_id_map = {self.model_id: {item.get("inst_name"): item["_id"] for item in exist_items}}
+        self.inst_id_name_map = {self.model_id: {item["_id"]: item.get("inst_name") for item in exist_items}}
+
+    def import_chunks(self, excel_meta, skip: int = 0, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """
+        分批导入：每读取 chunk_size 行校验、写入一次，每批完成后 yield 截至当前已处理的数据行数
+        skip 为断点（已处理的数据行数），从断点继续导入时跳过这些行
+        """
+        self.prepare()
+        processed, consumed, chunk = skip, 0, []
+        for row in self.iter_excel_rows(excel_meta, skip):
+            consumed += 1
+            if row is not None:
+                chunk.append(row)
+            if consumed < chunk_size:
+                continue
+            self.import_chunk(chunk)
+            processed += consumed
+            consumed, chunk = 0, []
+            yield processed
+        if consumed:
+            self.import_chunk(chunk)
+            yield processed + consumed
+
+    def import_chunk(self, rows: list):
+        """导入一批数据：实例批量新增/更新，记录变更，再批量创建关联"""
+        if not rows:
+            return
+        unique_attrs = self.check_attr_map[ModelConstraintKey.unique.value]
+        inst_list = [item for item, _ in rows]
+        self.load_chunk_items(rows)
+        with Neo4jClient() as ag:
+            add_results, update_results = ag.batch_save_entity(
+                INSTANCE, inst_list, self.check_attr_map, [], self.operator,
+                item_map=self.item_map, unique_index=self.unique_index,
+            )
+
+        add_changes, update_changes = [], []
+        for i in add_results:
+            if not i["success"]:
+                continue
+            self.model_has_items = True
+            self.add_exist_item(i["data"], unique_attrs)
+            add_changes.append(dict(
+                inst_id=i["data"]["_id"],
+                model_id=i["data"]["model_id"],
+                before_data=i["data"],
+                model_object=OPERATOR_INSTANCE,
+                message=f"导入模型实例. 模型:{self.model_name} 新增模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",  # noqa
+            ))
+        for i in update_results:
+            if not i["success"]:
+                continue
+            before_data = self.item_map.get(Neo4jClient.unique_key(i["data"], unique_attrs), i["data"])
+            self.add_exist_item(i["data"], unique_attrs)
+            update_changes.append(dict(
+                inst_id=i["data"]["_id"],
+                model_id=i["data"]["model_id"],
+                before_data=before_data,
+                model_object=OPERATOR_INSTANCE,
+                message=f"导入模型实例. 模型:{self.model_name} 更新模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",  # noqa
+            ))
+        batch_create_change_record(INSTANCE, CREATE_INST, add_changes, operator=self.operator)
+        batch_create_change_record(INSTANCE, UPDATE_INST, update_changes, operator=self.operator)
+
+        asso_result = []
+        if self.model_asso_map:
+            asso_key_map = {}
+            for item, asso_values in rows:
+                for asso_key, inst_names in asso_values.items():
+                    asso_key_map.setdefault(asso_key, {}).setdefault(item["inst_name"], []).extend(inst_names)
+            asso_result = self.add_asso_data(asso_key_map)
+        self.format_import_result_message(add_results, update_results, asso_result)
+
+    def add_exist_item(self, item: dict, unique_attrs):
+        """新增或更新成功的实例加入本批的已有实例映射，供创建本批关联时查找实例ID"""
+        self.item_map[Neo4jClient.unique_key(item, unique_attrs)] = item
+        self.inst_name_id_map[self.model_id][item.get("inst_name")] = item["_id"]
+        self.inst_id_name_map[self.model_id][item["_id"]] = item.get("inst_name")
+
     def import_inst_list_support_edit(self, file_stream: bytes):
         """将excel主机数据导入"""
-        inst_list, asso_key_map = self.format_excel_data(file_stream)
-        add_results, update_results = self.inst_list_update(inst_list)
+        for _ in self.import_chunks(file_stream):
+            pass
         if not self.model_asso_map:
             logger.warning(f"模型 {self.model_id} 没有关联模型, 无需处理关联数据")
-            return add_results, update_results, []
-        self.format_import_asso_data(asso_key_map)
-        asso_result = self.add_asso_data(asso_key_map)
-        self.format_import_result_message(add_results, update_results, asso_result)
-        return add_results, update_results, asso_result
+        return self.import_result_message
+
+    def add_result_message(self, key: str, success: bool, data: str):
+        result = self.import_result_message[key]
+        result["success" if success else "error"] += 1
+        if self.message_limit is None or len(result["data"]) < self.message_limit:
+            result["data"].append(data)
 
     def format_import_result_message(self, add_results, update_results, asso_result):
         """
@@ -162,58 +321,37 @@ class Import:
             inst_name = item["data"].get("inst_name", "")
             if item.get("success", False):
                 data = "实例 {} 新增成功".format(inst_name)
-                self.import_result_message["add"]["success"] += 1
             else:
                 data = "实例 {} 新增失败: {}".format(inst_name, item.get("error", "未知错误"))
-                self.import_result_message["add"]["error"] += 1
-            self.import_result_message["add"]["data"].append(data)
+            self.add_result_message("add", item.get("success", False), data)
 
         for item in update_results:
             inst_name = item["data"].get("inst_name", "")
             if item.get("success", False):
                 data = "实例 {} 更新成功".format(inst_name)
-                self.import_result_message["update"]["success"] += 1
             else:
                 data = "实例 {} 更新失败: {}".format(inst_name, item.get("message", "未知错误"))
-                self.import_result_message["update"]["error"] += 1
-            self.import_result_message["update"]["data"].append(data)
+            self.add_result_message("update", item.get("success", False), data)
 
         for item in asso_result:
             if item.get("success", False):
                 data = item.get("message", "关联数据处理成功")
-                self.import_result_message["asso"]["success"] += 1
             else:
                 data = item.get("message", "关联数据处理失败")
-                self.import_result_message["asso"]["error"] += 1
-            self.import_result_message["asso"]["data"].append(data)
-
-    def format_import_asso_data(self, asso_key_map):
-        """
-        格式化关联数据
-        :param asso_key_map: 关联数据键值对
-        """
-        if not asso_key_map:
+            self.add_result_message("asso", item.get("success", False), data)
+
+    def load_inst_name_map(self, model_id: str, inst_names: list):
+        """按名称加载关联模型的实例名称与ID映射，只查询本批用到且尚未加载的名称"""
+        name_id_map = self.inst_name_id_map.setdefault(model_id, {})
+        id_name_map = self.inst_id_name_map.setdefault(model_id, {})
+        missing = list({name for name in inst_names if name not in name_id_map})
+        if not missing:
             return
-
-        model_asso_map = {
-            i["model_asst_id"]: i["src_model_id"] if self.model_id != i["src_model_id"] else i["dst_model_id"] for i in
-            self.model_asso_map.values()}
-
         with Neo4jClient() as ag:
-            # 获取当前模型的实例名称与ID映射
-            exist_items, _ = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": self.model_id}])
-            self.inst_name_id_map[self.model_id] = {item["inst_name"]: item["_id"] for item in exist_items}
-            self.inst_id_name_map[self.model_id] = {item["_id"]: item["inst_name"] for item in exist_items}
-
-            # 获取关联模型的实例名称与ID映射
-            for asso_key, inst_name_list in asso_key_map.items():
-                if not inst_name_list:
-                    continue
-                src_model = model_asso_map[asso_key]
-                exist_items, _ = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": src_model}])
-                self.inst_name_id_map[src_model] = {item["inst_name"]: item["_id"] for item in exist_items}
-                # 反转实例名称与ID映射
-                self.inst_id_name_map[src_model] = {item["_id"]: item["inst_name"] for item in exist_items}
+            exist_items = ag.query_entity_by_attr_values(INSTANCE, model_id, {"inst_name": missing})
+        name_id_map.update({item["inst_name"]: item["_id"] for item in exist_items})
+        # 反转实例名称与ID映射
+        id_name_map.update({item["_id"]: item["inst_name"] for item in exist_items})
 
     def get_model_asso_map(self):
         """
@@ -259,19 +397,22 @@ class Import:
             asst_id = asso_info["asst_id"]
             src_model_id = asso_info["src_model_id"]
             dst_model_id = asso_info["dst_model_id"]
-
-            for _model_src_inst_name, _dst_inst_name_list in inst_name_list.items():
-                # 导入模型的实例名称的ID 源ID
-                _model_src_inst_name_id = self.inst_name_id_map[self.model_id].get(_model_src_inst_name)
-                if not _model_src_inst_name_id:
+            # 导入的模型是否为源模型，是则关联实例为目标实例，否则关联实例为源实例
+            is_src = self.model_id == src_model_id
+            # 关联实例的模型ID
+            _asso_model_id = dst_model_id if is_src else src_model_id
+            self.load_inst_name_map(_asso_model_id, [name for names in inst_name_list.values() for name in names])
+
+            for _model_inst_name, _asso_inst_name_list in inst_name_list.items():
+                # 导入模型的实例名称的ID
+                _model_inst_id = self.inst_name_id_map[self.model_id].get(_model_inst_name)
+                if not _model_inst_id:
                     continue
-                # 目标模型ID
-                _dst_inst_model_id = dst_model_id if self.model_id == src_model_id else src_model_id
 
-                for dst_inst_name in _dst_inst_name_list:
-                    # 目标模型的实例名称的ID
-                    _dst_inst_id = self.inst_name_id_map[_dst_inst_model_id].get(dst_inst_name)
-                    if not _dst_inst_id:
+                for asso_inst_name in _asso_inst_name_list:
+                    # 关联模型的实例名称的ID
+                    _asso_inst_id = self.inst_name_id_map[_asso_model_id].get(asso_inst_name)
+                    if not _asso_inst_id:
                         continue
                     add_asso_list.append(
                         dict(
@@ -279,63 +420,79 @@ class Import:
                             src_model_id=src_model_id,
                             dst_model_id=dst_model_id,
                             asst_id=asst_id,
-                            src_inst_id=_model_src_inst_name_id,
-                            dst_inst_id=_dst_inst_id
+                            src_inst_id=_model_inst_id if is_src else _asso_inst_id,
+                            dst_inst_id=_asso_inst_id if is_src else _model_inst_id,
                         )
                     )
 
         if not add_asso_list:
             return []
 
-        result = []
-        for add_asso in add_asso_list:
+        return self.bulk_instance_association_create(add_asso_list, operator=self.operator)
+
+    def check_asso_mapping(self, data: dict, claimed: set):
+        """校验关联约束，同一批次中已通过校验的关联同样占用约束"""
+        from apps.cmdb.services.instance import InstanceManage
+
+        mapping = ModelManage.model_association_info_search(data["model_asst_id"]).get("mapping")
+        keys = []
+        if mapping in {"1:n", "1:1"}:
+            keys.append(("dst", data["model_asst_id"], data["dst_inst_id"]))
+        if mapping in {"n:1", "1:1"}:
+            keys.append(("src", data["model_asst_id"], data["src_inst_id"]))
+        if any(key in claimed for key in keys):
+            raise BaseAppException("instance already exists association!")
+        InstanceManage.check_asso_mapping(data)
+        claimed.update(keys)
+
+    def bulk_instance_association_create(self, asso_list: list, operator: str) -> list:
+        """批量创建实例关联：逐条校验关联约束后通过 UNWIND 批量创建，变更记录一次写入"""
+        result = [None] * len(asso_list)
+        edges, claimed = [], set()
+        for index, data in enumerate(asso_list):
+            src_inst_name = self.inst_id_name_map[data["src_model_id"]].get(data["src_inst_id"])
+            dst_inst_name = self.inst_id_name_map[data["dst_model_id"]].get(data["dst_inst_id"])
+            names = (src_inst_name, dst_inst_name, data["model_asst_id"])
             try:
-                asso = self.instance_association_create(add_asso, operator=self.operator)
-            except Exception as err:
-                asso = {"success": False, "message": "创建关联失败: {}".format(err)}
-            result.append(asso)
-        return result
-
-    def instance_association_create(self, data: dict, operator: str):
-        """创建实例关联"""
-
-        # 校验关联约束
-        model_asst_id = data["model_asst_id"]
-        src_inst_name = self.inst_id_name_map[data["src_model_id"]][data["src_inst_id"]]
-        dst_inst_name = self.inst_id_name_map[data["dst_model_id"]][data["dst_inst_id"]]
+                self.check_asso_mapping(data, claimed)
+            except Exception:
+                import traceback
+                logger.error("校验关联约束失败: {}".format(traceback.format_exc()))
+                result[index] = {"success": False,
+                                 "message": "【{}】与【{}】的关联关系【{}】创建失败！校验关联约束失败! ".format(*names)}
+                continue
+            edges.append((index, data, names))
 
-        try:
-            from apps.cmdb.services.instance import InstanceManage
-            InstanceManage.check_asso_mapping(data)
-        except Exception as err:
-            import traceback
-            logger.error("校验关联约束失败: {}".format(traceback.format_exc()))
-            return {"success": False,
-                    "message": "【{}】与【{}】的关联关系【{}】创建失败！校验关联约束失败! ".format(src_inst_name, dst_inst_name,
-                                                                                          model_asst_id)}
+        if not edges:
+            return result
 
         with Neo4jClient() as ag:
-            try:
-                edge = ag.create_edge(
-                    INSTANCE_ASSOCIATION,
-                    data["src_inst_id"],
-                    INSTANCE,
-                    data["dst_inst_id"],
-                    INSTANCE,
-                    data,
-                    "model_asst_id",
-                )
-            except BaseAppException as e:
-                if e.message == "edge already exists":
-                    message = "关联 【{}】与【{}】的关联关系【{}】 已存在".format(src_inst_name, dst_inst_name, model_asst_id)
+            created = ag.bulk_create_edge(
+                INSTANCE_ASSOCIATION, INSTANCE, INSTANCE, [data for _, data, _ in edges], "model_asst_id",
+                src_key="src_inst_id", dst_key="dst_inst_id",
+            )
+            entity_ids = {
+                inst_id
+                for (_, data, _), (edge, _) in zip(edges, created) if edge is not None
+                for inst_id in (data["src_inst_id"], data["dst_inst_id"])
+            }
+            entities = {i["_id"]: i for i in ag.query_entity_by_ids(list(entity_ids))} if entity_ids else {}
+
+        change_records = []
+        for (index, data, names), (edge, error) in zip(edges, created):
+            if edge is None:
+                if getattr(error, "message", None) == "edge already exists":
+                    message = "关联 【{}】与【{}】的关联关系【{}】 已存在".format(*names)
                 else:
-                    message = "【{}】与【{}】的关联关系【{}】创建失败！".format(src_inst_name, dst_inst_name, model_asst_id)
-                return {"success": False, "message": message}
-
-        asso_info = InstanceManage.instance_association_by_asso_id(edge["_id"])
-        message = f"创建模型关联关系. 原模型: {asso_info['src']['model_id']} 原模型实例: {asso_info['src']['inst_name']}  目标模型ID: {asso_info['dst']['model_id']} 目标模型实例: {asso_info['dst'].get('inst_name') or asso_info['dst'].get('ip_addr', '')}"
-        create_change_record_by_asso(INSTANCE_ASSOCIATION, CREATE_INST_ASST, asso_info, message=message,
-                                     operator=operator)
-
-        return {"success": True, "data": edge,
-                "message": "【{}】与【{}】的关联关系【{}】创建成功".format(src_inst_name, dst_inst_name, model_asst_id)}
+                    message = "【{}】与【{}】的关联关系【{}】创建失败！".format(*names)
+                result[index] = {"success": False, "message": message}
+                continue
+            src = entities.get(data["src_inst_id"], {})
+            dst = entities.get(data["dst_inst_id"], {})
+            message = f"创建模型关联关系. 原模型: {src.get('model_id')} 原模型实例: {src.get('inst_name')}  目标模型ID: {dst.get('model_id')} 目标模型实例: {dst.get('inst_name') or dst.get('ip_addr', '')}"  # noqa
+            change_records.append((dict(src=src, edge=edge, dst=dst), message))
+            result[index] = {"success": True, "data": edge,
+                             "message": "【{}】与【{}】的关联关系【{}】创建成功".format(*names)}
+
+        batch_create_change_record_by_asso(INSTANCE_ASSOCIATION, CREATE_INST_ASST, change_records, operator=operator)
+        return result
@@ -27,18 +27,16 @@ def batch_create_change_record(label, _type, change_records, operator=""):
 
 def create_change_record_by_asso(label, _type, data, operator="", message=""):
     """创建关联关系变更记录"""
+    batch_create_change_record_by_asso(label, _type, [(data, message)], operator=operator)
 
-    change_data = {"operator": operator}
-
-    if _type == CREATE_INST_ASST:
-        change_data["after_data"] = data
-    else:
-        change_data["before_data"] = data
 
+def batch_create_change_record_by_asso(label, _type, asso_list, operator=""):
+    """批量创建关联关系变更记录，asso_list 为 [(关联信息, 操作信息)]"""
+    data_key = "after_data" if _type == CREATE_INST_ASST else "before_data"
     batch_change_data = [
         ChangeRecord(inst_id=inst_info["_id"], model_id=inst_info["model_id"], model_object=OPERATOR_INSTANCE,
-                     message=message, label=label, type=_type,
-                     **change_data)
+                     message=message, label=label, type=_type, operator=operator, **{data_key: data})
+        for data, message in asso_list
         for inst_info in [data["src"], data["dst"]]
         if inst_info.get("model_id")
     ]
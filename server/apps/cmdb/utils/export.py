@@ -1,15 +1,22 @@
+import tempfile
 from io import BytesIO
 
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 
-from apps.cmdb.constants import ENUM, ORGANIZATION, USER, ASSOCIATION_TYPE, ATTR_TYPE_MAP
+from apps.cmdb.constants import ENUM, ORGANIZATION, USER, ASSOCIATION_TYPE, ATTR_TYPE_MAP, INSTANCE
 from apps.cmdb.services.model import ModelManage
 
 
 class Export:
+    """
+    实例导出，使用 openpyxl 的 write_only 模式，数据行逐行写入临时文件，内存占用与导出数量无关
+    write_only 模式的工作簿只能保存一次，每个 Export 对象只生成一个文件
+    """
+
     def __init__(self, attrs, model_id: str = "", association: list = []):
         self.attrs = attrs
         self.model_id = model_id
@@ -17,31 +24,37 @@ class Export:
         self.association_type_map = {}
         self.model_name_map = {}
         self.model_asso_id_map = {}
+        self.sheet = None
         if self.association:
             self.association_type_map = {i["asst_id"]: i["asst_name"] for i in ASSOCIATION_TYPE}
             self.set_model_name_map()
+        # 找出枚举属性
+        self.enum_field_dict = {
+            attr_info["attr_id"]: {i["id"]: i["name"] for i in attr_info["option"]}
+            for attr_info in self.attrs
+            if attr_info["attr_type"] in {ORGANIZATION, USER, ENUM}
+        }
 
     def set_model_name_map(self):
         models = ModelManage.search_model()
         for model in models:
             self.model_name_map[model["model_id"]] = model["model_name"]
 
-    def set_row_color(self, sheet, row_num, color):
-        """行添加颜色"""
-        for cell in sheet[row_num]:
-            cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-
-    def set_cell_color(self, sheet, row, col, color):
-        """给指定单元格添加颜色"""
-        cell = sheet.cell(row=row, column=col)
-        cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+    def colored_row(self, sheet, values, color, first_color):
+        """生成带颜色的行，首列单独设置颜色"""
+        row = []
+        for index, value in enumerate(values):
+            cell = WriteOnlyCell(sheet, value=value)
+            _color = first_color if index == 0 else color
+            cell.fill = PatternFill(start_color=_color, end_color=_color, fill_type="solid")
+            row.append(cell)
+        return row
 
     def generate_header(self):
         """创建Excel文件, 设置属性与样式"""
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
+        workbook = openpyxl.Workbook(write_only=True)
         # 设置sheet名称为model_id
-        sheet.title = self.model_id
+        sheet = workbook.create_sheet(title=self.model_id)
         sheet.sheet_format.defaultColWidth = 20
         sheet.sheet_format.defaultRowHeight = 15
         attrs_name, attrs_type, attrs_id, index = ["字段名(请勿编辑)"], ["字段类型(请勿编辑)"], [
@@ -53,7 +66,7 @@ class Export:
             attrs_id.append(attr_info["attr_id"])
             index += 1
             if attr_info["attr_type"] == ENUM:
-                sheet.add_data_validation(
+                sheet.data_validations.append(
                     self.set_enum_validation_by_sheet_data(workbook, attr_info["attr_name"], attr_info["option"], index)
                 )
             attrs_type.append(ATTR_TYPE_MAP[attr_info["attr_type"]])
@@ -70,16 +83,11 @@ class Export:
             attrs_id.append(model_asst_id)
             self.model_asso_id_map[model_asst_id] = {_asst_model: model_asst_id}
 
-        sheet.append(attrs_name)
-        sheet.append(attrs_type)
-        sheet.append(attrs_id)
-        self.set_row_color(sheet, 1, "92D050")
-        self.set_row_color(sheet, 2, "C6EFCE")
-        self.set_row_color(sheet, 3, "C6EFCE")
-        # 给第一第二第三行的第一列添加橘黄色
-        self.set_cell_color(sheet, 1, 1, "FFA500")  # A1
-        self.set_cell_color(sheet, 2, 1, "FFA500")  # A2
-        self.set_cell_color(sheet, 3, 1, "FFA500")  # A3
+        # 前三行的第一列为橘黄色
+        sheet.append(self.colored_row(sheet, attrs_name, "92D050", "FFA500"))
+        sheet.append(self.colored_row(sheet, attrs_type, "C6EFCE", "FFA500"))
+        sheet.append(self.colored_row(sheet, attrs_id, "C6EFCE", "FFA500"))
+        self.sheet = sheet
 
         return workbook
 
@@ -90,18 +98,25 @@ class Export:
         file_stream.seek(0)
         return file_stream
 
+    def return_tempfile(self, workbook):
+        """保存到临时文件并返回文件对象，文件关闭后自动删除"""
+        file_stream = tempfile.TemporaryFile(suffix=".xlsx")
+        workbook.save(file_stream)
+        file_stream.seek(0)
+        return file_stream
+
     def set_enum_validation_by_sheet_data(self, workbook, filed_name, option, index):
         """设置枚举值, 通过sheet数据, 单选"""
         value_list = [i["name"] for i in option]
 
         # 将枚举数据放入sheet页
         filed_sheet = workbook.create_sheet(title=filed_name)
-        for r, v in enumerate(value_list, start=1):
-            filed_sheet.cell(row=r, column=1, value=v)
+        for v in value_list:
+            filed_sheet.append([v])
 
         # 创建 DataValidation 对象
         col = get_column_letter(index)
-        last_row = len(filed_sheet["A"])
+        last_row = max(len(value_list), 1)
         dv = DataValidation(type="list", formula1=f"='{filed_sheet.title}'!$A$1:$A{last_row}")
         dv.sqref = f"{col}3:{col}999"
 
@@ -112,55 +127,53 @@ class Export:
         workbook = self.generate_header()
         return self.return_bytesio(workbook)
 
-    def export_inst_list(self, inst_list):
-        """导出实例列表"""
+    def format_inst_row(self, inst_info, asso_names: dict):
+        """实例转换为一行数据，asso_names 为 {模型关联ID: [关联实例名称]}"""
+        sheet_data = [""]
+        for attr in self.attrs:
+            if attr["attr_type"] in {ORGANIZATION, USER}:
+                attr_id_value = inst_info.get(attr["attr_id"], '')
+                #  TODO 目前只支持单选组织和用户，所以导出返回str即可 若支持单选则返回[]
+                if isinstance(attr_id_value, list) and len(attr_id_value) > 0:
+                    attr_id_value = attr_id_value[0]
+                sheet_data.append(
+                    str(self.enum_field_dict[attr["attr_id"]].get(attr_id_value))
+                )
+                continue
+
+            _value = inst_info.get(attr["attr_id"])
+            if attr["attr_type"] == ENUM:
+                _value = self.enum_field_dict[attr["attr_id"]].get(_value)
+            sheet_data.append(_value)
+
+        for association in self.association:
+            sheet_data.append(",".join(asso_names.get(association['model_asst_id'], [])))
+        return sheet_data
+
+    def export_inst_pages(self, pages, progress=None):
+        """
+        按页导出实例，pages 为逐页产出实例列表的可迭代对象
+        每页的关联实例名称一次查询得出；progress(已导出数量) 在每页写入后回调
+        """
+        from apps.cmdb.graph.neo4j import Neo4jClient
+
         workbook = self.generate_header()
-        # 找出枚举属性
-        enum_field_dict = {
-            attr_info["attr_id"]: {i["id"]: i["name"] for i in attr_info["option"]}
-            for attr_info in self.attrs
-            if attr_info["attr_type"] in {ORGANIZATION, USER, ENUM}
-        }
-        for inst_info in inst_list:
-            sheet_data = [""]
-            for attr in self.attrs:
-                if attr["attr_type"] in {ORGANIZATION, USER}:
-                    # attr_id_value = inst_info.get(attr["attr_id"], [])
-                    # if not isinstance(attr_id_value, list):
-                    #     attr_id_value = [attr_id_value]
-                    # sheet_data.append(
-                    #     str([enum_field_dict[attr["attr_id"]].get(i) for i in attr_id_value])
-                    # )
-                    attr_id_value = inst_info.get(attr["attr_id"], '')
-                    #  TODO 目前只支持单选组织和用户，所以导出返回str即可 若支持单选则返回[]
-                    if isinstance(attr_id_value, list) and len(attr_id_value) > 0:
-                        attr_id_value = attr_id_value[0]
-                    sheet_data.append(
-                        str(enum_field_dict[attr["attr_id"]].get(attr_id_value))
+        model_asst_ids = [i["model_asst_id"] for i in self.association]
+        exported = 0
+        for inst_list in pages:
+            asso_names_map = {}
+            if model_asst_ids and inst_list:
+                with Neo4jClient() as ag:
+                    asso_names_map = ag.query_asso_inst_names(
+                        INSTANCE, [i["_id"] for i in inst_list], model_asst_ids
                     )
-                    continue
-
-                _value = inst_info.get(attr["attr_id"])
-                if attr["attr_type"] == ENUM:
-                    _value = enum_field_dict[attr["attr_id"]].get(_value)
-                sheet_data.append(_value)
-            # 查询当前实例的全部关联关系数据
-            self.format_inst_asst_name(inst_info, sheet_data)
-            workbook.active.append(sheet_data)
-        return self.return_bytesio(workbook)
+            for inst_info in inst_list:
+                self.sheet.append(self.format_inst_row(inst_info, asso_names_map.get(inst_info["_id"], {})))
+            exported += len(inst_list)
+            if progress:
+                progress(exported)
+        return self.return_tempfile(workbook)
 
-    def format_inst_asst_name(self, inst_info, sheet_data):
-        from apps.cmdb.services.instance import InstanceManage
-        inst_id = inst_info["_id"]
-        asso_insts = InstanceManage.instance_association_instance_list(self.model_id, int(inst_id))
-        model_asst_name_map = {}
-        for asso_inst in asso_insts:
-            model_asst_id = asso_inst["model_asst_id"]
-            model_asst_name_map[model_asst_id] = [inst["inst_name"] for inst in asso_inst["inst_list"]]
-        for association in self.association:
-            model_asst_id = association['model_asst_id']
-            if model_asst_id in model_asst_name_map:
-                data = ",".join(model_asst_name_map[model_asst_id])
-            else:
-                data = ""
-            sheet_data.append(data)
+    def export_inst_list(self, inst_list):
+        """导出实例列表"""
+        return self.export_inst_pages([inst_list])
@@ -1,11 +1,12 @@
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 
-from apps.cmdb.constants import PERMISSION_INSTANCES, OPERATE, VIEW
+from apps.cmdb.constants import PERMISSION_INSTANCES, OPERATE, VIEW, InstanceJobStatus, InstanceJobType
 from apps.cmdb.services.instance import InstanceManage
+from apps.cmdb.services.instance_job import InstanceJobManage
 from apps.cmdb.services.model import ModelManage
 from apps.cmdb.utils.base import format_group_params, get_cmdb_rules
 from apps.cmdb.utils.permisssion_util import CmdbRulesFormatUtil
@@ -465,9 +466,12 @@ class InstanceViewSet(viewsets.ViewSet):
     @HasPermission("asset_info-Add")
     @action(methods=["post"], detail=False, url_path=r"(?P<model_id>.+?)/inst_import")
     def inst_import(self, request, model_id):
+        file = request.data.get("file")
+        if not file:
+            return WebUtils.response_error(error_message="import file is required")
         import_message = InstanceManage().inst_import_support_edit(
             model_id=model_id,
-            file_stream=request.data.get("file").file,
+            file_stream=file.file,
             operator=request.user.username,
         )
         return JsonResponse({"data": [], "result": True, "message": import_message})
@@ -534,9 +538,7 @@ class InstanceViewSet(viewsets.ViewSet):
         attr_list = request.data.get("attr_list", [])
         association_list = request.data.get("association_list", [])
         inst_ids = request.data.get("inst_ids", [])
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = f"attachment;filename={f'{model_id}_export.xlsx'}"
-        response.write(InstanceManage.inst_export(
+        file_stream = InstanceManage.inst_export(
             model_id,
             inst_ids,
             format_group_params(request.COOKIES.get("current_team")),
@@ -545,9 +547,130 @@ class InstanceViewSet(viewsets.ViewSet):
             request.user.username,
             attr_list=attr_list,
             association_list=association_list
-        ).read())
+        )
+        response = FileResponse(
+            file_stream, content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        response["Content-Disposition"] = f"attachment;filename={f'{model_id}_export.xlsx'}"
         return response
 
+    @swagger_auto_schema(
+        operation_id="inst_import_job",
+        operation_description="创建实例导入任务（异步执行，适用于大文件）",
+        manual_parameters=[
+            openapi.Parameter(
+                "model_id",
+                openapi.IN_PATH,
+                description="模型ID",
+                type=openapi.TYPE_STRING,
+            )
+        ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "file": openapi.Schema(
+                    type=openapi.TYPE_FILE,
+                    format=openapi.FORMAT_BINARY,
+                    description="文件",
+                ),
+            },
+            required=["file"],
+        ),
+    )
+    @HasPermission("asset_info-Add")
+    @action(methods=["post"], detail=False, url_path=r"(?P<model_id>.+?)/inst_import_job")
+    def inst_import_job(self, request, model_id):
+        file = request.data.get("file")
+        if not file:
+            return WebUtils.response_error(error_message="import file is required")
+        job = InstanceJobManage.create_import_job(model_id, file, request.user.username)
+        return WebUtils.response_success(job.to_dict())
+
+    @swagger_auto_schema(
+        operation_id="inst_export_job",
+        operation_description="创建实例导出任务（异步执行，适用于大批量导出）",
+        manual_parameters=[
+            openapi.Parameter(
+                "model_id",
+                openapi.IN_PATH,
+                description="模型ID",
+                type=openapi.TYPE_STRING,
+            )
+        ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "inst_ids": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                                           description="实例ID"),
+                "attr_list": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                            description="导出的属性"),
+                "association_list": openapi.Schema(type=openapi.TYPE_ARRAY,
+                                                   items=openapi.Schema(type=openapi.TYPE_STRING),
+                                                   description="导出的关联"),
+            },
+        ),
+    )
+    @HasPermission("asset_info-View")
+    @action(methods=["post"], detail=False, url_path=r"(?P<model_id>.+?)/inst_export_job")
+    def inst_export_job(self, request, model_id):
+        rules = get_cmdb_rules(request=request, permission_key=PERMISSION_INSTANCES)
+        model_permission_map = CmdbRulesFormatUtil.format_permission_map(rules=rules, model_id=model_id).get(model_id,
+                                                                                                             {})
+        inst_name_permission_map = model_permission_map.get("permission_map", {})
+        select_all = model_permission_map.get("select_all", False)
+        params = dict(
+            ids=request.data.get("inst_ids", []),
+            user_groups=format_group_params(request.COOKIES.get("current_team")),
+            roles=request.user.roles,
+            inst_names=[] if select_all else list(inst_name_permission_map.keys()),
+            created=request.user.username,
+            attr_list=request.data.get("attr_list", []),
+            association_list=request.data.get("association_list", []),
+        )
+        job = InstanceJobManage.create_export_job(model_id, params, request.user.username)
+        return WebUtils.response_success(job.to_dict())
+
+    @swagger_auto_schema(
+        operation_id="inst_job_detail",
+        operation_description="查询实例导入导出任务的状态与进度",
+        manual_parameters=[
+            openapi.Parameter("job_id", openapi.IN_PATH, description="任务ID", type=openapi.TYPE_INTEGER)
+        ],
+    )
+    @HasPermission("asset_info-View")
+    @action(methods=["get"], detail=False, url_path=r"inst_job/(?P<job_id>\d+)")
+    def inst_job_detail(self, request, job_id):
+        job = InstanceJobManage.get_job(int(job_id), request.user.username)
+        return WebUtils.response_success(job.to_dict())
+
+    @swagger_auto_schema(
+        operation_id="inst_job_retry",
+        operation_description="重新执行失败的实例导入导出任务，导入任务从断点继续",
+        manual_parameters=[
+            openapi.Parameter("job_id", openapi.IN_PATH, description="任务ID", type=openapi.TYPE_INTEGER)
+        ],
+    )
+    @HasPermission("asset_info-View")
+    @action(methods=["post"], detail=False, url_path=r"inst_job/(?P<job_id>\d+)/retry")
+    def inst_job_retry(self, request, job_id):
+        job = InstanceJobManage.retry_job(int(job_id), request.user.username)
+        return WebUtils.response_success(job.to_dict())
+
+    @swagger_auto_schema(
+        operation_id="inst_job_download",
+        operation_description="下载实例导出任务生成的文件",
+        manual_parameters=[
+            openapi.Parameter("job_id", openapi.IN_PATH, description="任务ID", type=openapi.TYPE_INTEGER)
+        ],
+    )
+    @HasPermission("asset_info-View")
+    @action(methods=["get"], detail=False, url_path=r"inst_job/(?P<job_id>\d+)/download")
+    def inst_job_download(self, request, job_id):
+        job = InstanceJobManage.get_job(int(job_id), request.user.username)
+        if job.job_type != InstanceJobType.EXPORT or job.status != InstanceJobStatus.SUCCESS or not job.file:
+            return WebUtils.response_error(error_message="export file is not ready")
+        return WebUtils.response_file(job.file.open("rb"), f"{job.model_id}_export.xlsx")
+
     @swagger_auto_schema(
         operation_id="instance_fulltext_search",
         operation_description="实例全文检索",
@@ -556,6 +679,8 @@ class InstanceViewSet(viewsets.ViewSet):
             properties={
                 "search": openapi.Schema(type=openapi.TYPE_STRING, description="检索内容"),
                 "model_id": openapi.Schema(type=openapi.TYPE_STRING, description="模型ID"),
+                "page": openapi.Schema(type=openapi.TYPE_INTEGER, description="第几页，不传时返回全部结果"),
+                "page_size": openapi.Schema(type=openapi.TYPE_INTEGER, description="每页条目数"),
             },
             required=["search"],
         ),
@@ -565,12 +690,16 @@ class InstanceViewSet(viewsets.ViewSet):
     def fulltext_search(self, request):
         # TODO 权限补充上创建人是自己的条件
         rules = get_cmdb_rules(request=request, permission_key=PERMISSION_INSTANCES)
+        page = request.data.get("page")
         result = InstanceManage.fulltext_search(
             format_group_params(request.COOKIES.get("current_team")),
             request.user.roles,
             request.data.get("search", ""),
             rules,
-            created=request.user.username
+            created=request.user.username,
+            model_id=request.data.get("model_id") or None,
+            page=int(page) if page else None,
+            page_size=int(request.data.get("page_size", 10)),
         )
         return WebUtils.response_success(result)
 
@@ -585,6 +714,10 @@ class InstanceViewSet(viewsets.ViewSet):
                 type=openapi.TYPE_STRING,
             ),
             openapi.Parameter("inst_id", openapi.IN_PATH, description="实例ID", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("depth", openapi.IN_QUERY, description="展开层数，默认按系统配置",
+                              type=openapi.TYPE_INTEGER),
+            openapi.Parameter("direction", openapi.IN_QUERY, description="只查询一个方向：src 下游，dst 上游",
+                              type=openapi.TYPE_STRING),
         ],
     )
     @action(
@@ -609,7 +742,13 @@ class InstanceViewSet(viewsets.ViewSet):
                 return WebUtils.response_error(response_data=[], error_message="抱歉！您没有此实例的权限",
                                                status_code=status.HTTP_403_FORBIDDEN)
 
-        result = InstanceManage.topo_search(int(inst_id))
+        depth = request.GET.get("depth")
+        direction = request.GET.get("direction")
+        result = InstanceManage.topo_search(
+            int(inst_id),
+            depth=int(depth) if depth and depth.isdigit() else None,
+            direction=direction if direction in ("src", "dst") else None,
+        )
         return WebUtils.response_success(result)
 
     @swagger_auto_schema(
@@ -7,6 +7,7 @@ from django.db import IntegrityError
 from django.utils import translation
 
 from apps.base.models import User, UserAPISecret
+from apps.core.services.auth_cache import auth_cache
 from apps.rpc.system_mgmt import SystemMgmt
 
 logger = logging.getLogger("app")
@@ -63,7 +64,7 @@ class AuthBackend(ModelBackend):
                 return None
 
             self._handle_user_locale(user_info)
-            rules = self._get_user_rules(request, user_info)
+            rules = self._get_user_rules(request, user_info, token)
 
             return self.set_user_info(request, user_info, rules)
 
@@ -72,13 +73,19 @@ class AuthBackend(ModelBackend):
             return None
 
     def _verify_token_with_system_mgmt(self, token: str) -> Optional[Dict[str, Any]]:
-        """使用SystemMgmt验证token"""
+        """使用SystemMgmt验证token，校验成功的结果按token缓存"""
+        token_hash = auth_cache.hash_token(token)
+        result = auth_cache.get("token", token_hash)
+        if result is not None:
+            return result
+
         try:
             client = SystemMgmt()
             result = client.verify_token(token)
             if not result.get("result"):
                 return None
 
+            auth_cache.set("token", token_hash, value=result, expires_at=(result.get("data") or {}).get("expires_at"))
             return result
 
         except Exception as e:
@@ -100,8 +107,8 @@ class AuthBackend(ModelBackend):
         except Exception:
             pass  # 忽略locale设置失败
 
-    def _get_user_rules(self, request, user_info: Dict[str, Any]) -> Dict[str, Any]:
-        """获取用户规则权限"""
+    def _get_user_rules(self, request, user_info: Dict[str, Any], token: str = "") -> Dict[str, Any]:
+        """获取用户规则权限，按token和当前组织缓存"""
         if not request or not hasattr(request, "COOKIES"):
             return {}
 
@@ -111,10 +118,18 @@ class AuthBackend(ModelBackend):
         if not current_group or not username:
             return {}
 
+        cache_parts = (auth_cache.hash_token(token), str(current_group)) if token else None
+        if cache_parts:
+            rules = auth_cache.get("rules", *cache_parts)
+            if rules is not None:
+                return rules
+
         try:
             client = SystemMgmt()
-            rules = client.get_user_rules(current_group, username)
-            return rules or {}
+            rules = client.get_user_rules(current_group, username) or {}
+            if cache_parts:
+                auth_cache.set("rules", *cache_parts, value=rules, expires_at=user_info.get("expires_at"))
+            return rules
         except Exception as e:
             logger.error(f"Failed to get user rules for {username}: {e}")
             return {}
@@ -0,0 +1,130 @@
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+import nats_client
+from apps.core.utils.local_cache import LocalTTLCache
+
+logger = logging.getLogger("app")
+
+AUTH_CACHE_PREFIX = "auth-cache"
+AUTH_CACHE_VERSION_KEY = f"{AUTH_CACHE_PREFIX}:version"
+# NATS 广播主题，不走消息组，所有订阅进程都会收到
+AUTH_CACHE_INVALIDATE_METHOD = "auth_cache_invalidate"
+
+
+class AuthCache:
+    """
+    认证信息两级缓存：进程内LRU + Django共享缓存
+    - token校验结果按token哈希缓存，用户规则按token哈希+当前组织缓存
+    - 缓存时间不超过token的剩余有效期
+    - system_mgmt中角色、组织、菜单变更时通过 invalidate() 递增共享版本号并经NATS广播清空各进程的本地缓存
+    """
+
+    def __init__(self):
+        self.local = LocalTTLCache(getattr(settings, "AUTH_LOCAL_CACHE_SIZE", 2048))
+        self._subscribed_pid = None
+        self._subscribe_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "AUTH_CACHE_ENABLED", True)
+
+    @property
+    def shared(self):
+        return caches["default"]
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _version(self) -> int:
+        try:
+            return self.shared.get_or_set(AUTH_CACHE_VERSION_KEY, 1, None)
+        except Exception as e:
+            logger.warning(f"Failed to read auth cache version: {e}")
+            return 0
+
+    def _ttl(self, expires_at: Optional[float] = None) -> int:
+        ttl = getattr(settings, "AUTH_TOKEN_CACHE_TTL", 300)
+        if expires_at:
+            ttl = min(ttl, int(expires_at - time.time()))
+        return ttl
+
+    def get(self, kind: str, *parts: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        self._ensure_subscribed()
+        local_key = ":".join((kind,) + parts)
+        value = self.local.get(local_key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        try:
+            item = self.shared.get(f"{AUTH_CACHE_PREFIX}:{self._version()}:{local_key}")
+        except Exception as e:
+            logger.warning(f"Failed to read auth cache: {e}")
+            return None
+        if item is None:
+            return None
+        expires_at, value = item
+        ttl = self._ttl(expires_at)
+        if ttl <= 0:
+            return None
+        self.local.set(local_key, value, min(ttl, getattr(settings, "AUTH_LOCAL_CACHE_TTL", 30)))
+        return copy.deepcopy(value)
+
+    def set(self, kind: str, *parts: str, value: Any, expires_at: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        ttl = self._ttl(expires_at)
+        if ttl <= 0:
+            return
+        local_key = ":".join((kind,) + parts)
+        value = copy.deepcopy(value)
+        self.local.set(local_key, value, min(ttl, getattr(settings, "AUTH_LOCAL_CACHE_TTL", 30)))
+        try:
+            self.shared.set(f"{AUTH_CACHE_PREFIX}:{self._version()}:{local_key}", (expires_at, value), ttl)
+        except Exception as e:
+            logger.warning(f"Failed to write auth cache: {e}")
+
+    def invalidate(self) -> None:
+        """使所有进程的认证缓存失效"""
+        self.local.clear()
+        try:
+            self.shared.incr(AUTH_CACHE_VERSION_KEY)
+        except ValueError:
+            self.shared.set(AUTH_CACHE_VERSION_KEY, 2, None)
+        except Exception as e:
+            logger.warning(f"Failed to bump auth cache version: {e}")
+        try:
+            nats_client.publish_sync(settings.NATS_NAMESPACE, AUTH_CACHE_INVALIDATE_METHOD)
+        except Exception as e:
+            logger.warning(f"Failed to broadcast auth cache invalidation: {e}")
+
+    async def _on_invalidate(self, msg) -> None:
+        self.local.clear()
+
+    def _ensure_subscribed(self) -> None:
+        """每个进程（含fork出的子进程）订阅一次失效广播，订阅失败时仅依赖本地缓存的短TTL"""
+        pid = os.getpid()
+        if self._subscribed_pid == pid or not nats_client.pool_enabled():
+            return
+        with self._subscribe_lock:
+            if self._subscribed_pid == pid:
+                return
+            self._subscribed_pid = pid
+            try:
+                nats_client.subscribe_sync(settings.NATS_NAMESPACE, AUTH_CACHE_INVALIDATE_METHOD, self._on_invalidate)
+            except Exception as e:
+                logger.warning(f"Failed to subscribe auth cache invalidation: {e}")
+
+
+auth_cache = AuthCache()
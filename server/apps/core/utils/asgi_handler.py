@@ -0,0 +1,74 @@
+import asyncio
+
+import django
+from asgiref.sync import sync_to_async
+from django.core import signals
+from django.core.exceptions import RequestAborted
+from django.core.handlers.asgi import ASGIHandler
+from django.http import FileResponse
+from django.urls import set_script_prefix
+
+
+class DisconnectAwareASGIHandler(ASGIHandler):
+    """
+    读取完请求体后继续监听客户端断开（Django 5.0 起内置的行为）
+    Django 4.2 在客户端断开后仍会把响应生成完，流式对话会一直占用上游连接直到模型输出结束；
+    这里在客户端断开时取消正在处理的请求，流式响应的异步生成器随之退出并中止上游请求
+    """
+
+    async def handle(self, scope, receive, send):
+        if django.VERSION >= (5, 0):
+            return await super().handle(scope, receive, send)
+        try:
+            body_file = await self.read_body(receive)
+        except RequestAborted:
+            return
+        set_script_prefix(self.get_script_prefix(scope))
+        await sync_to_async(signals.request_started.send, thread_sensitive=True)(sender=self.__class__, scope=scope)
+        request, error_response = self.create_request(scope, body_file)
+        if request is None:
+            body_file.close()
+            await self.send_response(error_response, send)
+            return
+
+        responses = []
+
+        async def process_request():
+            response = await self.get_response_async(request)
+            response._handler_class = self.__class__
+            if isinstance(response, FileResponse):
+                response.block_size = self.chunk_size
+            responses.append(response)
+            await self.send_response(response, send)
+
+        tasks = [
+            asyncio.ensure_future(self.listen_for_disconnect(receive)),
+            asyncio.ensure_future(process_request()),
+        ]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        aborted = False
+        for task in tasks:
+            if task.done():
+                try:
+                    task.result()
+                except RequestAborted:
+                    aborted = True
+                except AssertionError:
+                    body_file.close()
+                    raise
+            else:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        # 取消后 send_response 不会执行到 response.close()，这里补上以触发 request_finished（归还数据库连接等）
+        if aborted and responses:
+            await sync_to_async(responses[0].close, thread_sensitive=True)()
+
+    async def listen_for_disconnect(self, receive):
+        """请求体读取完成后，再收到的消息只能是断开连接"""
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise RequestAborted()
+        raise AssertionError("Invalid ASGI message after request body: %s" % message["type"])
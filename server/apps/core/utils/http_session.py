@@ -0,0 +1,23 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_session_local = threading.local()
+
+
+def get_pooled_session(pool_size: int) -> requests.Session:
+    """进程内每个线程按连接池大小复用一个带连接池的会话，fork 后的子进程重新创建"""
+    sessions = getattr(_session_local, "sessions", None)
+    if sessions is None or getattr(_session_local, "pid", None) != os.getpid():
+        sessions = _session_local.sessions = {}
+        _session_local.pid = os.getpid()
+    session = sessions.get(pool_size)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        sessions[pool_size] = session
+    return session
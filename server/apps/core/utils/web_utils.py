@@ -1,14 +1,68 @@
+import asyncio
 import io
 
-from django.http import JsonResponse, FileResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
 from rest_framework import status
 
 
+# 流式 JSON 每次输出的最小字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json(obj, encoder, max_depth=4):
+    """
+    逐段编码 JSON：前 max_depth 层的 dict/list 展开输出，更深的对象整体交给 C 编码器，
+    拼接结果与 JsonResponse 的输出一致
+    """
+    if max_depth > 0 and isinstance(obj, dict) and all(isinstance(key, str) for key in obj):
+        yield "{"
+        for index, (key, value) in enumerate(obj.items()):
+            yield f"{', ' if index else ''}{encoder.encode(key)}: "
+            yield from iter_json(value, encoder, max_depth - 1)
+        yield "}"
+    elif max_depth > 0 and isinstance(obj, (list, tuple)):
+        yield "["
+        for index, value in enumerate(obj):
+            if index:
+                yield ", "
+            yield from iter_json(value, encoder, max_depth - 1)
+        yield "]"
+    else:
+        yield encoder.encode(obj)
+
+
+def iter_json_chunks(obj, chunk_size=STREAM_CHUNK_SIZE):
+    """把逐段编码的结果合并为不小于 chunk_size 的块"""
+    buffer, size = [], 0
+    for part in iter_json(obj, DjangoJSONEncoder()):
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+async def _aiter_chunks(chunks):
+    """ASGI 下以异步迭代器输出，每块之间让出事件循环"""
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0)
+
+
 class WebUtils:
     @staticmethod
     def response_success(response_data={}, message=""):
         return JsonResponse({"data": response_data, "result": True, "message": message}, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def response_stream_success(response_data={}, message=""):
+        """与 response_success 返回相同的 JSON，边编码边输出，大结果不再先拼成完整字符串"""
+        content = iter_json_chunks({"data": response_data, "result": True, "message": message})
+        return StreamingHttpResponse(_aiter_chunks(content), content_type="application/json", status=status.HTTP_200_OK)
+
     @staticmethod
     def response_error(response_data={}, error_message="", status_code=status.HTTP_400_BAD_REQUEST):
         return JsonResponse({"data": response_data, "result": False, "message": error_message}, status=status_code)
@@ -0,0 +1,11 @@
+from celery.schedules import crontab
+
+from apps.monitor.constants import MONITOR_POLICY_BATCH_SCAN_ENABLED
+
+CELERY_BEAT_SCHEDULE = {}
+
+if MONITOR_POLICY_BATCH_SCAN_ENABLED:
+    CELERY_BEAT_SCHEDULE["scan_due_policies_task"] = {
+        "task": "apps.monitor.tasks.monitor_policy.scan_due_policies_task",
+        "schedule": crontab(minute="*"),  # 每分钟扫描一次到期策略
+    }
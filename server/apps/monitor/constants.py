@@ -4,6 +4,13 @@ import os
 VICTORIAMETRICS_HOST = os.getenv("VICTORIAMETRICS_HOST")
 VICTORIAMETRICS_USER = os.getenv("VICTORIAMETRICS_USER")
 VICTORIAMETRICS_PWD = os.getenv("VICTORIAMETRICS_PWD")
+# 查询 victoriametrics 的连接池大小
+VICTORIAMETRICS_POOL_SIZE = int(os.getenv("VICTORIAMETRICS_POOL_SIZE", 10))
+
+# 监控策略批量扫描：开启后由每分钟的批量任务统一扫描到期策略，单策略定时任务不再执行
+MONITOR_POLICY_BATCH_SCAN_ENABLED = os.getenv("MONITOR_POLICY_BATCH_SCAN_ENABLED", "False").lower() == "true"
+# 合并到一次 PromQL 查询中的子查询数量上限
+MONITOR_POLICY_BATCH_MAX_QUERIES = int(os.getenv("MONITOR_POLICY_BATCH_MAX_QUERIES", 20))
 
 MONITOR_OBJ_KEYS = ["name", "type", "default_metric", "instance_id_keys", "supplementary_indicators"]
 
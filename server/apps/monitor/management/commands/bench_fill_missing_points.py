@@ -0,0 +1,85 @@
+import copy
+import random
+import time
+
+import pandas as pd
+from django.core.management import BaseCommand
+
+from apps.monitor.services.metrics import Metrics
+
+
+def legacy_fill_missing_points(start, end, step, data_list):
+    """DataFrame 合并 + iterrows 的原实现，用于对比耗时和结果"""
+    for item in data_list:
+        values = item["values"]
+        if not values:
+            continue
+        original_df = pd.DataFrame(values, columns=["timestamp", "value"])
+        original_df["timestamp"] = pd.to_datetime(original_df["timestamp"].astype(float), unit="s")
+        original_df.set_index("timestamp", inplace=True)
+        full_time_index = pd.date_range(
+            start=pd.to_datetime(start, unit="s"),
+            end=pd.to_datetime(end, unit="s"),
+            freq=f"{step}s"
+        )
+        full_df = pd.DataFrame(index=full_time_index, columns=["value"])
+        full_df["value"] = None
+        all_df = pd.concat([original_df, full_df])
+        all_df = all_df[~all_df.index.duplicated(keep='first')]
+        all_df.sort_index(inplace=True)
+        result_values = []
+        for ts, row in all_df.iterrows():
+            value = row["value"]
+            if pd.isna(value):
+                value = None
+            result_values.append([ts.timestamp(), value])
+        item["values"] = result_values
+
+
+class Command(BaseCommand):
+    help = "对比范围查询补点的原实现与 NumPy 实现的耗时和结果（纯内存，不访问 VictoriaMetrics）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, default=500, help="序列数量")
+        parser.add_argument("--hours", type=int, default=24, help="查询时间范围（小时）")
+        parser.add_argument("--step", type=int, default=60, help="步长（秒）")
+        parser.add_argument("--missing_ratio", type=float, default=0.1, help="缺失点比例")
+        parser.add_argument("--unaligned", action="store_true", help="原始点不落在补点时间轴上（毫秒级起始时间）")
+        parser.add_argument("--skip_legacy", action="store_true", help="跳过原实现")
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        step = options["step"]
+        end = int(time.time()) // step * step
+        start = end - options["hours"] * 3600
+        offset = 0.123 if options["unaligned"] else 0
+        points = (end - start) // step + 1
+        data_list = [
+            {
+                "metric": {"instance_id": f"host-{i}"},
+                "values": [
+                    [start + step * j, str(round(rng.uniform(0, 100), 2))]
+                    for j in range(points) if rng.random() >= options["missing_ratio"]
+                ],
+            }
+            for i in range(options["series"])
+        ]
+        start, end = start + offset, end + offset
+
+        filled = copy.deepcopy(data_list)
+        begin = time.perf_counter()
+        Metrics.fill_missing_points(start, end, step, filled)
+        numpy_cost = time.perf_counter() - begin
+        self.stdout.write(f"series={options['series']} points={points} step={step}s")
+        self.stdout.write(f"numpy : {numpy_cost:.3f}s")
+
+        if options["skip_legacy"]:
+            return
+
+        legacy = copy.deepcopy(data_list)
+        begin = time.perf_counter()
+        legacy_fill_missing_points(start, end, step, legacy)
+        legacy_cost = time.perf_counter() - begin
+        self.stdout.write(
+            f"legacy: {legacy_cost:.3f}s speedup={legacy_cost / numpy_cost:.1f}x identical={legacy == filled}"
+        )
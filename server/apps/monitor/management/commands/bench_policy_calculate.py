@@ -0,0 +1,98 @@
+import random
+import time
+from string import Template
+
+import pandas as pd
+from django.core.management import BaseCommand
+
+from apps.monitor.constants import THRESHOLD_METHODS
+from apps.monitor.tasks.task_utils.policy_calculate import vm_to_dataframe, calculate_alerts
+
+ALERT_NAME = "${metric_instance_name} cpu usage ${metric_instance_id} is high"
+THRESHOLDS = [
+    {"level": "critical", "method": ">=", "value": 90},
+    {"level": "error", "method": ">=", "value": 80},
+    {"level": "warning", "method": ">", "value": 70},
+]
+
+
+def legacy_vm_to_dataframe(vm_data, instance_id_keys):
+    """逐行 apply 生成 instance_id 的原实现，用于对比"""
+    df = pd.json_normalize(vm_data, sep="_")
+    selected_cols = [f"metric_{key}" for key in instance_id_keys]
+    df["instance_id"] = df[selected_cols].apply(lambda row: tuple(row), axis=1)
+    return df
+
+
+def legacy_calculate_alerts(alert_name, df, thresholds, n=1):
+    """iterrows 逐行计算的原实现，用于对比耗时和结果"""
+    alert_events, info_events = [], []
+    for _, row in df.iterrows():
+        instance_id = str(row["instance_id"])
+        values = row["values"][-n:]
+        if len(values) < n:
+            continue
+        raw_data = row.to_dict()
+        raw_data["values"] = values
+        alert_triggered = False
+        for threshold_info in thresholds:
+            method = THRESHOLD_METHODS.get(threshold_info["method"])
+            if all(method(float(v[1]), threshold_info["value"]) for v in values):
+                alert_events.append({
+                    "instance_id": instance_id,
+                    "value": values[-1][1],
+                    "timestamp": values[-1][0],
+                    "level": threshold_info["level"],
+                    "content": Template(alert_name).safe_substitute(raw_data),
+                    "raw_data": raw_data,
+                })
+                alert_triggered = True
+                break
+        if not alert_triggered:
+            info_events.append({
+                "instance_id": instance_id,
+                "value": values[-1][1],
+                "timestamp": values[-1][0],
+                "level": "info",
+                "content": "info",
+            })
+    return alert_events, info_events
+
+
+class Command(BaseCommand):
+    help = "对比告警阈值计算逐行实现与向量化实现的耗时（纯内存，不访问 VictoriaMetrics）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, default=50000, help="序列数量")
+        parser.add_argument("--points", type=int, default=3, help="每个序列的数据点数，同时作为窗口长度 n")
+        parser.add_argument("--skip_legacy", action="store_true", help="跳过原实现")
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        now = int(time.time())
+        points = options["points"]
+        vm_data = [
+            {
+                "metric": {"instance_id": f"host-{i}", "instance_name": f"name-{i}"},
+                "values": [[now - 60 * (points - j), str(round(rng.uniform(0, 100), 2))] for j in range(points)],
+            }
+            for i in range(options["series"])
+        ]
+        keys = ["instance_id"]
+
+        start = time.perf_counter()
+        df = vm_to_dataframe(vm_data, keys)
+        alert_events, info_events = calculate_alerts(ALERT_NAME, df, THRESHOLDS, n=points)
+        vectorized = time.perf_counter() - start
+        self.stdout.write(f"series={options['series']} points={points}")
+        self.stdout.write(f"vectorized: {vectorized:.3f}s alerts={len(alert_events)} info={len(info_events)}")
+
+        if options["skip_legacy"]:
+            return
+
+        start = time.perf_counter()
+        legacy_df = legacy_vm_to_dataframe(vm_data, keys)
+        legacy_alerts, legacy_info = legacy_calculate_alerts(ALERT_NAME, legacy_df, THRESHOLDS, n=points)
+        legacy = time.perf_counter() - start
+        same = legacy_alerts == alert_events and legacy_info == info_events
+        self.stdout.write(f"legacy    : {legacy:.3f}s speedup={legacy / vectorized:.1f}x identical={same}")
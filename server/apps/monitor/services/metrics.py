@@ -1,7 +1,23 @@
-import pandas as pd
+import numpy as np
 
 from apps.monitor.utils.victoriametrics_api import VictoriaMetricsAPI
 
+NS_PER_SECOND = 10 ** 9
+
+
+def seconds_to_ns(seconds):
+    """秒级时间戳（float 或数组）转换为纳秒整数，与 pd.to_datetime(unit="s") 的换算结果一致"""
+    return np.round(np.asarray(seconds, dtype=np.float64) * NS_PER_SECOND).astype(np.int64)
+
+
+def ns_to_timestamps(ns):
+    """纳秒时间戳转换为秒级 float 列表（保留到微秒，与 pd.Timestamp.timestamp() 一致）"""
+    seconds = (ns / NS_PER_SECOND).tolist()
+    if np.all(ns % 1000 == 0):
+        # 微秒整数倍时除法结果已是最接近的浮点数，无需逐个 round
+        return seconds
+    return [round(second, 6) for second in seconds]
+
 
 class Metrics:
     @staticmethod
@@ -21,46 +37,45 @@ class Metrics:
     @staticmethod
     def fill_missing_points(start, end, step, data_list):
         """
-        Fill missing time points in the `values` field for multiple instances using pandas frequency inference.
+        Fill missing time points in the `values` field for multiple instances.
+        The full time range is start + k * step (k >= 0, <= end). Original points are kept (the first one wins
+        for duplicated timestamps), missing slots are filled with None and the result is sorted by timestamp.
         :param start: Start timestamp in seconds (float)
         :param end: End timestamp in seconds (float)
         :param step: Time interval (seconds) (int)
         :param data_list: Data list, format [{"metric": dict, "values": [[timestamp, value], ...]}, ...]
         :return: Updated data list with missing points filled in `values`
         """
+        start_ns = int(seconds_to_ns(float(start)))
+        end_ns = int(seconds_to_ns(float(end)))
+        step_ns = int(round(float(step) * NS_PER_SECOND))
+        slot_count = max((end_ns - start_ns) // step_ns + 1, 0)
+        slot_ns = start_ns + np.arange(slot_count, dtype=np.int64) * step_ns
+        # 完整时间轴对所有序列相同，只换算一次
+        slot_timestamps = ns_to_timestamps(slot_ns)
+
         for item in data_list:
             values = item["values"]
 
             if not values:
                 continue
 
-            # Convert original values to DataFrame
-            original_df = pd.DataFrame(values, columns=["timestamp", "value"])
-            original_df["timestamp"] = pd.to_datetime(original_df["timestamp"].astype(float), unit="s")
-            original_df.set_index("timestamp", inplace=True)
-
-            # Create complete time range DataFrame (start and end are now in seconds)
-            full_time_index = pd.date_range(
-                start=pd.to_datetime(start, unit="s"),
-                end=pd.to_datetime(end, unit="s"),
-                freq=f"{step}S"
-            )
-            full_df = pd.DataFrame(index=full_time_index, columns=["value"])
-            full_df["value"] = None
+            original_ns = seconds_to_ns([value[0] for value in values])
+            original_values = np.empty(len(values), dtype=object)
+            # NaN 转为 None，其余值原样保留
+            original_values[:] = [None if value[1] is None or value[1] != value[1] else value[1] for value in values]
 
-            # Concatenate and sort all timestamps
-            all_df = pd.concat([original_df, full_df])
-            all_df = all_df[~all_df.index.duplicated(keep='first')]  # Keep original values for duplicates
-            all_df.sort_index(inplace=True)
-
-            # Convert back to the original `values` format
-            result_values = []
-            for ts, row in all_df.iterrows():
-                timestamp_float = ts.timestamp()
-                value = row["value"]
-                # Convert NaN to None, keep original values
-                if pd.isna(value):
-                    value = None
-                result_values.append([timestamp_float, value])
+            offsets = original_ns - start_ns
+            if slot_count and np.all((offsets >= 0) & (offsets % step_ns == 0) & (offsets < slot_count * step_ns)):
+                # 原始点都落在时间轴上：按偏移直接算出槽位下标，写入预分配数组，无需排序合并
+                slot_index, first = np.unique(offsets // step_ns, return_index=True)
+                result_values = np.full(slot_count, None, dtype=object)
+                result_values[slot_index] = original_values[first]
+                item["values"] = [list(point) for point in zip(slot_timestamps, result_values.tolist())]
+                continue
 
-            item["values"] = result_values
+            # 原始点不在时间轴上：合并后去重排序，np.unique 返回的是每个时间戳首次出现的位置，即原始值优先
+            all_ns = np.concatenate([original_ns, slot_ns])
+            all_values = np.concatenate([original_values, np.full(slot_count, None, dtype=object)])
+            merged_ns, first = np.unique(all_ns, return_index=True)
+            item["values"] = [list(point) for point in zip(ns_to_timestamps(merged_ns), all_values[first].tolist())]
@@ -1,2 +1,2 @@
 from apps.monitor.tasks.grouping_rule import sync_instance_and_group
-from apps.monitor.tasks.monitor_policy import scan_policy_task
+from apps.monitor.tasks.monitor_policy import scan_policy_task, scan_due_policies_task
@@ -4,13 +4,13 @@ from datetime import datetime, timezone
 from django.db.models import F
 
 from apps.core.exceptions.base_app_exception import BaseAppException
-from apps.monitor.constants import LEVEL_WEIGHT, THRESHOLD, NO_DATA
+from apps.monitor.constants import LEVEL_WEIGHT, THRESHOLD, NO_DATA, MONITOR_POLICY_BATCH_SCAN_ENABLED
 from apps.monitor.models import MonitorPolicy, MonitorInstanceOrganization, MonitorAlert, MonitorEvent, MonitorInstance, \
     Metric, MonitorEventRawData
+from apps.monitor.tasks.task_utils.batch_query import QuerySpec, execute_batched, execute_query
 from apps.monitor.tasks.task_utils.metric_query import format_to_vm_filter
 from apps.monitor.tasks.task_utils.policy_calculate import vm_to_dataframe, calculate_alerts
 from apps.monitor.utils.system_mgmt_api import SystemMgmtUtils
-from apps.monitor.utils.victoriametrics_api import VictoriaMetricsAPI
 from apps.core.logger import celery_logger as logger
 
 
@@ -23,6 +23,11 @@ def scan_policy_task(policy_id):
     if not policy_obj:
         raise BaseAppException(f"No MonitorPolicy found with id {policy_id}")
 
+    if MONITOR_POLICY_BATCH_SCAN_ENABLED:
+        # 已由 scan_due_policies_task 统一扫描
+        logger.info(f"policy batch scan enabled, skip single policy scan, [{policy_id}]")
+        return
+
     if policy_obj.enable:
         if not policy_obj.last_run_time:
             policy_obj.last_run_time = datetime.now(timezone.utc)
@@ -37,71 +42,84 @@ def scan_policy_task(policy_id):
     logger.info(f"end to update monitor instance grouping rule, [{policy_id}]")
 
 
-def _sum(metric_query, start, end, step, group_by):
-    query = f"sum({metric_query}) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
-
-
-def _avg(metric_query, start, end, step, group_by):
-    query = f"avg({metric_query}) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
-
-
-def _max(metric_query, start, end, step, group_by):
-    query = f"max({metric_query}) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
-
-
-def _min(metric_query, start, end, step, group_by):
-    query = f"min({metric_query}) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
-
-
-def _count(metric_query, start, end, step, group_by):
-    query = f"count({metric_query}) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
-
-
-# def last_over_time(metric_query, start, end, step, group_by):
-#     query = f"any(last_over_time({metric_query})) by ({group_by})"
-#     metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-#     return metrics
-
-def last_over_time(metric_query, start, end, step, group_by):
-    query = f"any(last_over_time({metric_query})) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query(query, step, end)
-    for data in metrics.get("data", {}).get("result", []):
-        data["values"] = [data["value"]]
-    return metrics
+@shared_task
+def scan_due_policies_task():
+    """
+    批量扫描到期的监控策略
+    到期策略的聚合查询按时间范围和步长分组合并为少量 PromQL，结果回填给各策略后再分别计算告警
+    """
+    if not MONITOR_POLICY_BATCH_SCAN_ENABLED:
+        return {}
+
+    now = datetime.now(timezone.utc)
+    tick = now.replace(second=0, microsecond=0)
+    due_policies = []
+    for policy_obj in MonitorPolicy.objects.filter(enable=True).select_related("monitor_object"):
+        try:
+            # 到期判断与最后执行时间的推进使用同一间隔（检测频率），汇聚周期只决定查询的时间范围
+            interval = period_to_seconds(policy_obj.schedule)
+            if policy_obj.last_run_time and policy_obj.last_run_time.timestamp() + interval > tick.timestamp():
+                continue
+            last_run_time = policy_obj.last_run_time or now
+            last_run_time = datetime.fromtimestamp(last_run_time.timestamp() + interval, tz=timezone.utc)
+            # 追上当前时间的策略统一对齐到本轮时间点，使查询的时间范围相同从而可以合并
+            if last_run_time > tick or (tick - last_run_time).total_seconds() < BATCH_ALIGN_SECONDS:
+                last_run_time = tick
+            policy_obj.last_run_time = last_run_time
+            due_policies.append(policy_obj)
+        except Exception as e:
+            logger.error(f"check policy schedule failed, [{policy_obj.id}]: {e}")
 
+    if not due_policies:
+        return {}
+    MonitorPolicy.objects.bulk_update(due_policies, ["last_run_time"], batch_size=200)
 
-def max_over_time(metric_query, start, end, step, group_by):
-    query = f"any(max_over_time({metric_query})) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
+    scans, specs = [], []
+    for policy_obj in due_policies:
+        try:
+            scan = MonitorPolicyScan(policy_obj)
+            specs.extend(scan.planned_queries())
+            scans.append(scan)
+        except Exception as e:
+            logger.error(f"prepare policy scan failed, [{policy_obj.id}]: {e}")
 
+    metrics_cache, requests_count = execute_batched(specs)
+    for scan in scans:
+        scan.metrics_cache = metrics_cache
+        try:
+            scan.run()
+        except Exception as e:
+            logger.error(f"policy scan failed, [{scan.policy.id}]: {e}")
 
-def min_over_time(metric_query, start, end, step, group_by):
-    query = f"any(min_over_time({metric_query})) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
+    stats = {
+        "policies": len(scans),
+        "queries": len(specs),
+        "requests": requests_count,
+        "queries_saved": len(specs) - requests_count,
+    }
+    logger.info(f"batch scan policies completed: {stats}")
+    return stats
 
 
-def avg_over_time(metric_query, start, end, step, group_by):
-    query = f"any(avg_over_time({metric_query})) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
+# 批量扫描时，距本轮时间点不足该秒数的策略对齐到本轮时间点
+BATCH_ALIGN_SECONDS = 60
 
+# 聚合算法对应的 PromQL 模板
+METHOD = {
+    "sum": "sum({query}) by ({group_by})",
+    "avg": "avg({query}) by ({group_by})",
+    "max": "max({query}) by ({group_by})",
+    "min": "min({query}) by ({group_by})",
+    "count": "count({query}) by ({group_by})",
+    "max_over_time": "any(max_over_time({query})) by ({group_by})",
+    "min_over_time": "any(min_over_time({query})) by ({group_by})",
+    "avg_over_time": "any(avg_over_time({query})) by ({group_by})",
+    "sum_over_time": "any(sum_over_time({query})) by ({group_by})",
+    "last_over_time": "any(last_over_time({query})) by ({group_by})",
+}
 
-def sum_over_time(metric_query, start, end, step, group_by):
-    query = f"any(sum_over_time({metric_query})) by ({group_by})"
-    metrics = VictoriaMetricsAPI().query_range(query, start, end, step)
-    return metrics
+# 使用即时查询的算法，只取结束时间点的值
+INSTANT_METHODS = {"last_over_time"}
 
 
 def period_to_seconds(period):
@@ -118,23 +136,11 @@ def period_to_seconds(period):
         raise BaseAppException(f"invalid period type: {period['type']}")
 
 
-METHOD = {
-    "sum": _sum,
-    "avg": _avg,
-    "max": _max,
-    "min": _min,
-    "count": _count,
-    "max_over_time": max_over_time,
-    "min_over_time": min_over_time,
-    "avg_over_time": avg_over_time,
-    "sum_over_time": sum_over_time,
-    "last_over_time": last_over_time,
-}
-
-
 class MonitorPolicyScan:
-    def __init__(self, policy):
+    def __init__(self, policy, metrics_cache=None):
         self.policy = policy
+        # 批量扫描时预先查询好的聚合结果 {QuerySpec: metrics}
+        self.metrics_cache = metrics_cache if metrics_cache is not None else {}
         self.instances_map = self.instances_map()
         self.active_alerts = self.get_active_alerts()
         self.instance_id_keys = None
@@ -196,8 +202,8 @@ class MonitorPolicyScan:
             query = query.replace("__$labels__", vm_filter_str)
             return query
 
-    def query_aggregration_metrics(self, period, points=1):
-        """查询指标"""
+    def aggregation_query_spec(self, period, points=1):
+        """构建聚合查询"""
         end_timestamp = int(self.policy.last_run_time.timestamp())
         period_seconds = period_to_seconds(period)
         start_timestamp = end_timestamp - period_seconds
@@ -205,11 +211,35 @@ class MonitorPolicyScan:
         query = self.format_pmq()
 
         step = self.for_mat_period(period, points)
-        method = METHOD.get(self.policy.algorithm)
-        if not method:
+        template = METHOD.get(self.policy.algorithm)
+        if not template:
             raise BaseAppException("invalid algorithm method")
         group_by = ",".join(self.instance_id_keys)
-        return method(query, start_timestamp, end_timestamp, step, group_by)
+        expression = template.format(query=query, group_by=group_by)
+        return QuerySpec(expression, start_timestamp, end_timestamp, step, self.policy.algorithm in INSTANT_METHODS)
+
+    def query_aggregration_metrics(self, period, points=1):
+        """查询指标"""
+        spec = self.aggregation_query_spec(period, points)
+        if spec in self.metrics_cache:
+            return self.metrics_cache[spec]
+        return execute_query(spec)
+
+    def planned_queries(self):
+        """本次运行需要执行的聚合查询，与 run 中的查询一一对应"""
+        if self.policy.source and not self.instances_map:
+            return []
+        self.set_monitor_obj_instance_key()
+
+        specs = []
+        if THRESHOLD in self.policy.enable_alerts:
+            specs.append(self.aggregation_query_spec(self.policy.period))
+        if NO_DATA in self.policy.enable_alerts:
+            if self.policy.no_data_period and self.policy.source:
+                specs.append(self.aggregation_query_spec(self.policy.no_data_period))
+            if self.policy.no_data_recovery_period:
+                specs.append(self.aggregation_query_spec(self.policy.no_data_recovery_period))
+        return specs
 
     def set_monitor_obj_instance_key(self):
         """获取监控对象实例key"""
@@ -452,7 +482,8 @@ class MonitorPolicyScan:
         if self.policy.source and not self.instances_map:
             return
 
-        self.set_monitor_obj_instance_key()
+        if self.instance_id_keys is None:
+            self.set_monitor_obj_instance_key()
 
         if THRESHOLD in self.policy.enable_alerts:
             # 告警事件
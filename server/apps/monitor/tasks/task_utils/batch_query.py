@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
+
+from apps.monitor.constants import MONITOR_POLICY_BATCH_MAX_QUERIES
+from apps.monitor.utils.victoriametrics_api import VictoriaMetricsAPI
+from apps.core.logger import celery_logger as logger
+
+# 合并查询时标记子查询序号的标签，结果回填前去掉；__ 开头的标签为保留标签，不能使用
+BATCH_QUERY_LABEL = "bk_batch_query_index"
+
+
+class QuerySpec(NamedTuple):
+    """一次聚合查询，相同的查询语句和时间范围可以共用结果"""
+    expression: str
+    start: int
+    end: int
+    step: str
+    instant: bool = False
+
+
+def execute_query(spec: QuerySpec, expression: str = None) -> dict:
+    """执行单个查询，即时查询的结果转换为与范围查询相同的 values 格式"""
+    expression = expression or spec.expression
+    if spec.instant:
+        metrics = VictoriaMetricsAPI().query(expression, spec.step, spec.end)
+        for data in metrics.get("data", {}).get("result", []):
+            data["values"] = [data["value"]]
+        return metrics
+    return VictoriaMetricsAPI().query_range(expression, spec.start, spec.end, spec.step)
+
+
+def combine_expressions(expressions: List[str]) -> str:
+    """为每个子查询打上序号标签后用 or 合并，标签不同的序列之间不会互相覆盖"""
+    return " or ".join(
+        f'label_replace({expression}, "{BATCH_QUERY_LABEL}", "{index}", "", "")'
+        for index, expression in enumerate(expressions)
+    )
+
+
+def split_combined_result(metrics: dict, size: int) -> List[dict]:
+    """按序号标签把合并查询的结果拆回各个子查询"""
+    data = metrics.get("data", {})
+    results = [[] for _ in range(size)]
+    for series in data.get("result", []):
+        index = series.get("metric", {}).pop(BATCH_QUERY_LABEL, None)
+        if index is None or not index.isdigit() or int(index) >= size:
+            continue
+        results[int(index)].append(series)
+    return [
+        {**metrics, "data": {**data, "result": result}}
+        for result in results
+    ]
+
+
+def execute_batched(specs: List[QuerySpec], max_queries: int = None) -> Tuple[Dict[QuerySpec, dict], int]:
+    """
+    批量执行查询：相同的查询只执行一次，时间范围与步长相同的查询合并为一条 PromQL
+
+    Returns:
+        (每个查询的结果, 实际发出的请求数)，执行失败的查询不在结果中
+    """
+    max_queries = max_queries or MONITOR_POLICY_BATCH_MAX_QUERIES
+    groups = OrderedDict()
+    for spec in OrderedDict.fromkeys(specs):
+        groups.setdefault((spec.start, spec.end, spec.step, spec.instant), []).append(spec)
+
+    results, requests_count = {}, 0
+    for group in groups.values():
+        for i in range(0, len(group), max_queries):
+            chunk = group[i:i + max_queries]
+            if len(chunk) > 1:
+                requests_count += 1
+                try:
+                    combined = execute_query(chunk[0], combine_expressions([spec.expression for spec in chunk]))
+                    results.update(zip(chunk, split_combined_result(combined, len(chunk))))
+                    continue
+                except Exception as e:
+                    logger.warning(f"combined query failed, fallback to single queries: {e}")
+            # 单个查询或合并查询失败时逐个执行
+            for spec in chunk:
+                requests_count += 1
+                try:
+                    results[spec] = execute_query(spec)
+                except Exception as e:
+                    logger.error(f"query failed: {spec.expression}, {e}")
+    return results, requests_count
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from string import Template
 
@@ -20,52 +21,77 @@ def vm_to_dataframe(vm_data, instance_id_keys=None):
 
     # 生成instance_id（拼接选定的维度字段）
     # df["instance_id"] = df[selected_cols].astype(str).agg("_".join, axis=1)
-    df["instance_id"] = df[selected_cols].apply(lambda row: tuple(row), axis=1)
+    columns = [df[col].tolist() for col in selected_cols if col in df.columns]
+    instance_ids = list(zip(*columns)) if columns else [()] * len(df)
+    df["instance_id"] = pd.Series(instance_ids, index=df.index, dtype=object)
 
     return df
 
 
+def _threshold_matches(window_values, thresholds):
+    """
+    对所有序列的窗口值一次性计算各级阈值
+
+    Args:
+        window_values: 形状为 (序列数, n) 的数值矩阵
+        thresholds: 阈值配置，按配置顺序优先匹配
+
+    Returns:
+        (是否触发, 触发的阈值下标)
+    """
+    matches = np.zeros((window_values.shape[0], len(thresholds)), dtype=bool)
+    for index, threshold_info in enumerate(thresholds):
+        method = THRESHOLD_METHODS.get(threshold_info["method"])
+        if not method:
+            raise BaseAppException(f"Invalid threshold method: {threshold_info['method']}")
+        # 窗口内所有点都满足阈值才算触发
+        matches[:, index] = np.asarray(method(window_values, threshold_info["value"])).all(axis=1)
+
+    triggered = matches.any(axis=1)
+    # argmax 取第一个满足的阈值，与逐个阈值匹配到即停止的顺序一致
+    return triggered, matches.argmax(axis=1)
+
+
 def calculate_alerts(alert_name, df, thresholds, n=1):
     """计算告警事件"""
     alert_events, info_events = [], []
-
-    # 遍历每一行数据（每个 instance_id）
-    for _, row in df.iterrows():
-        instance_id = str(row["instance_id"])
-
-        # 取最近 n 个数据点，保证窗口长度为 n
-        values = row["values"][-n:]
-        if len(values) < n:
-            continue
-
-        raw_data = row.to_dict()
-        raw_data["values"] = values
-        # 计算该窗口是否满足阈值
-        alert_triggered = False
-        for threshold_info in thresholds:
-            method = THRESHOLD_METHODS.get(threshold_info["method"])
-            if not method:
-                raise BaseAppException(f"Invalid threshold method: {threshold_info['method']}")
-
-            # 解析值并检查是否满足阈值
-            if all(method(float(v[1]), threshold_info["value"]) for v in values):
-                # 生成告警事件
-                template = Template(alert_name)
-                content = template.safe_substitute(raw_data)
-
-                event = {
-                    "instance_id": instance_id,
-                    "value": values[-1][1],  # 最后一个时间点的值
-                    "timestamp": values[-1][0],  # 最后一个时间点的时间戳
-                    "level": threshold_info["level"],
-                    "content": content,
-                    "raw_data": raw_data,  # 记录最近 n 个匹配的原始数据
-                }
-                alert_events.append(event)
-                alert_triggered = True
-                break  # 一旦匹配，跳出阈值循环
-
-        if not alert_triggered:
+    if df.empty:
+        return alert_events, info_events
+
+    # 取最近 n 个数据点，保证窗口长度为 n
+    windows = [values[-n:] for values in df["values"].tolist()]
+    positions = [i for i, values in enumerate(windows) if len(values) >= n]
+    if not positions:
+        return alert_events, info_events
+
+    window_values = np.array([[v[1] for v in windows[i]] for i in positions], dtype=float).reshape(len(positions), n)
+    if thresholds:
+        triggered, threshold_index = _threshold_matches(window_values, thresholds)
+    else:
+        triggered, threshold_index = np.zeros(len(positions), dtype=bool), np.zeros(len(positions), dtype=int)
+
+    # 只为触发告警的序列生成原始数据和告警内容
+    template = Template(alert_name)
+    fired_positions = [position for position, fired in zip(positions, triggered) if fired]
+    fired_records = iter(df.iloc[fired_positions].to_dict("records")) if fired_positions else iter(())
+
+    instance_ids = df["instance_id"].tolist()
+    for k, position in enumerate(positions):
+        values = windows[position]
+        instance_id = str(instance_ids[position])
+
+        if triggered[k]:
+            raw_data = next(fired_records)
+            raw_data["values"] = values
+            alert_events.append({
+                "instance_id": instance_id,
+                "value": values[-1][1],  # 最后一个时间点的值
+                "timestamp": values[-1][0],  # 最后一个时间点的时间戳
+                "level": thresholds[threshold_index[k]]["level"],
+                "content": template.safe_substitute(raw_data),
+                "raw_data": raw_data,  # 记录最近 n 个匹配的原始数据
+            })
+        else:
             # 记录 info 事件
             info_events.append({
                 "instance_id": instance_id,
@@ -75,4 +101,4 @@ def calculate_alerts(alert_name, df, thresholds, n=1):
                 "content": "info",
             })
 
-    return alert_events, info_events
\ No newline at end of file
+    return alert_events, info_events
@@ -1,6 +1,6 @@
-import requests
-
-from apps.monitor.constants import VICTORIAMETRICS_HOST, VICTORIAMETRICS_USER, VICTORIAMETRICS_PWD
+from apps.core.utils.http_session import get_pooled_session
+from apps.monitor.constants import VICTORIAMETRICS_HOST, VICTORIAMETRICS_USER, VICTORIAMETRICS_PWD, \
+    VICTORIAMETRICS_POOL_SIZE
 
 
 class VictoriaMetricsAPI:
@@ -8,6 +8,7 @@ class VictoriaMetricsAPI:
         self.host = VICTORIAMETRICS_HOST
         self.username = VICTORIAMETRICS_USER
         self.password = VICTORIAMETRICS_PWD
+        self.session = get_pooled_session(VICTORIAMETRICS_POOL_SIZE)
 
     def query(self, query, step="5m", time=None):
         params = {"query": query}
@@ -15,7 +16,7 @@ class VictoriaMetricsAPI:
             params["step"] = step
         if time:
             params["time"] = time
-        response = requests.get(
+        response = self.session.get(
             f"{self.host}/api/v1/query",
             params=params,
             auth=(self.username, self.password),
@@ -24,7 +25,7 @@ class VictoriaMetricsAPI:
         return response.json()
 
     def query_range(self, query, start, end, step="5m"):
-        response = requests.get(
+        response = self.session.get(
             f"{self.host}/api/v1/query_range",
             params={"query": query, "start": start, "end": end, "step": step},
             auth=(self.username, self.password),
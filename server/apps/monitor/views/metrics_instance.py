@@ -39,4 +39,4 @@ class MetricsInstanceVieSet(viewsets.ViewSet):
             request.GET.get('end'),
             request.GET.get('step'),
         )
-        return WebUtils.response_success(data)
+        return WebUtils.response_stream_success(data)
@@ -2,6 +2,15 @@ import os
 
 # REMOTE_SERVICE
 METIS_SERVER_URL = os.getenv("METIS_SERVER_URL", "http://rag-server-api/")
+# 流式对话代理到 METIS 的连接池与超时（秒），每个事件循环共用一个连接池
+METIS_SSE_MAX_CONNECTIONS = int(os.getenv("METIS_SSE_MAX_CONNECTIONS", 500))
+METIS_SSE_MAX_KEEPALIVE = int(os.getenv("METIS_SSE_MAX_KEEPALIVE", 50))
+METIS_SSE_CONNECT_TIMEOUT = float(os.getenv("METIS_SSE_CONNECT_TIMEOUT", 10))
+METIS_SSE_READ_TIMEOUT = float(os.getenv("METIS_SSE_READ_TIMEOUT", 300))
+# 上游无数据时向客户端发送心跳注释帧的间隔（秒），防止代理/浏览器因空闲断开连接
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", 15))
+# 团队 token 用量先累加在缓存中，按该间隔（秒）批量写入数据库
+TOKEN_USAGE_FLUSH_INTERVAL = float(os.getenv("TOKEN_USAGE_FLUSH_INTERVAL", 10))
 # BOT 环境变量
 KUBE_NAMESPACE = os.getenv("KUBE_NAMESPACE", "lite")
 MUNCHKIN_BASE_URL = os.getenv("MUNCHKIN_BASE_URL", "http://munchkin")
@@ -15,9 +15,9 @@ from apps.opspilot.models import (
     KnowledgeDocument,
     LLMModel,
     SkillTools,
-    TeamTokenUseInfo,
     TokenConsumption,
 )
+from apps.opspilot.quota_rule_mgmt.token_usage import TokenUsageBuffer
 from apps.opspilot.utils.chat_server_helper import ChatServerHelper
 
 
@@ -209,12 +209,7 @@ class LLMService:
 
         # 更新团队令牌使用信息
         used_token = result["prompt_tokens"] + result["completion_tokens"]
-        team_info, is_created = TeamTokenUseInfo.objects.get_or_create(
-            group=group, llm_model=llm_model.name, defaults={"used_token": used_token}
-        )
-        if not is_created:
-            team_info.used_token += used_token
-            team_info.save()
+        TokenUsageBuffer.record(group, llm_model.name, used_token)
 
         # 处理内容（可选隐藏思考过程）
         if not show_think:
@@ -1,6 +1,7 @@
 from django.db.models import Q
 
 from apps.opspilot.models import Bot, FileKnowledge, LLMSkill, QuotaRule, TeamTokenUseInfo
+from apps.opspilot.quota_rule_mgmt.token_usage import TokenUsageBuffer
 
 
 def get_quota_client(request):
@@ -105,6 +106,8 @@ class QuotaUtils(object):
         used_token_map = dict(
             TeamTokenUseInfo.objects.filter(group__contains=self.team).values_list("llm_model", "used_token")
         )
+        for llm_model, pending in TokenUsageBuffer.pending_usage(self.team, llm_model_token_set).items():
+            used_token_map[llm_model] = used_token_map.get(llm_model, 0) + pending
         return_data = {}
         for llm_model, value in llm_model_token_set.items():
             return_data[llm_model] = {
@@ -137,5 +140,7 @@ class QuotaUtils(object):
             )
         )
         used_token = sum(used_token) if used_token else 0
+        # 加上尚未落库的用量
+        used_token += TokenUsageBuffer.pending_usage(current_team, [llm_model]).get(llm_model, 0)
         all_token = min(llm_model_list) if llm_model_list else 0
         return all_token - used_token
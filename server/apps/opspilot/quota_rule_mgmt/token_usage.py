@@ -0,0 +1,150 @@
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.logger import opspilot_logger as logger
+from apps.opspilot.quota_rule_mgmt.models import TeamTokenUseInfo
+
+TOKEN_USAGE_PENDING_KEY = "opspilot:token_usage:pending:{group}:{llm_model}"
+TOKEN_USAGE_FLUSH_LOCK_KEY = "opspilot:token_usage:flush_lock:{group}:{llm_model}"
+# 落库锁的过期时间（秒），持锁进程异常退出后锁自动释放
+TOKEN_USAGE_FLUSH_LOCK_TIMEOUT = 60
+
+
+class TokenUsageBuffer:
+    """
+    团队 token 用量记账
+    每次对话的用量先以原子自增（Redis 下为 INCRBY）累加到 Django 缓存中的待落库增量，
+    按 TOKEN_USAGE_FLUSH_INTERVAL 批量用 F() 表达式写入 TeamTokenUseInfo，并发对话不会丢失更新；
+    配额检查读取"已落库用量 + 待落库增量"，未落库的用量同样计入
+    落库时按团队、模型在缓存中加锁（add 原子占位），持锁后先扣减增量再写数据库，写库失败时把增量加回，
+    多个进程同时落库也不会重复计入；缓存不可用时直接写数据库
+    进程退出时落库一次；异常退出遗留的增量在任一进程再次记录同一团队、模型时一并落库
+    """
+
+    lock = threading.Lock()
+    flush_lock = threading.Lock()
+    # 本进程记录过、可能有待落库增量的 (group, llm_model)
+    dirty = set()
+    last_flush = time.monotonic()
+
+    @staticmethod
+    def pending_key(group, llm_model: str) -> str:
+        return TOKEN_USAGE_PENDING_KEY.format(group=group, llm_model=llm_model)
+
+    @classmethod
+    def record(cls, group, llm_model: str, used_token: int) -> None:
+        """记录一次对话的 token 用量"""
+        if used_token <= 0:
+            return
+        group = str(group)
+        try:
+            key = cls.pending_key(group, llm_model)
+            cache.add(key, 0, None)
+            cache.incr(key, used_token)
+        except Exception as e:
+            logger.warning(f"Failed to buffer token usage, write through: {e}")
+            cls.save_usage({(group, llm_model): used_token})
+            return
+        with cls.lock:
+            cls.dirty.add((group, llm_model))
+        if time.monotonic() - cls.last_flush >= settings.TOKEN_USAGE_FLUSH_INTERVAL:
+            cls.flush()
+
+    @classmethod
+    def flush(cls) -> None:
+        """把本进程记录过的待落库增量写入数据库，同一时刻每个进程只有一个线程执行"""
+        if not cls.flush_lock.acquire(blocking=False):
+            return
+        try:
+            cls.last_flush = time.monotonic()
+            with cls.lock:
+                pairs, cls.dirty = cls.dirty, set()
+            if pairs:
+                cls.flush_pairs(pairs)
+        finally:
+            cls.flush_lock.release()
+
+    @classmethod
+    def flush_pairs(cls, pairs: set) -> None:
+        """落库指定 (group, llm_model) 的待落库增量，未能落库的重新标记为待落库"""
+        retry = set()
+        locks = {}
+        claimed = {}
+        try:
+            for pair in pairs:
+                lock_key = TOKEN_USAGE_FLUSH_LOCK_KEY.format(group=pair[0], llm_model=pair[1])
+                try:
+                    if not cache.add(lock_key, 1, TOKEN_USAGE_FLUSH_LOCK_TIMEOUT):
+                        # 其他进程正在落库同一团队、模型，下次再检查
+                        retry.add(pair)
+                        continue
+                    locks[pair] = lock_key
+                    key = cls.pending_key(*pair)
+                    delta = cache.get(key)
+                    if delta:
+                        # 持锁期间只有本进程扣减，对话只会继续自增，扣减后的值不会小于 0
+                        cache.decr(key, delta)
+                        claimed[pair] = delta
+                except Exception as e:
+                    logger.warning(f"Failed to claim pending token usage {pair}: {e}")
+                    retry.add(pair)
+            if not claimed:
+                return
+            try:
+                cls.save_usage(claimed)
+            except Exception as e:
+                logger.exception(f"Failed to flush token usage: {e}")
+                for pair, delta in claimed.items():
+                    try:
+                        key = cls.pending_key(*pair)
+                        cache.add(key, 0, None)
+                        cache.incr(key, delta)
+                    except Exception as restore_error:
+                        logger.error(f"Failed to restore token usage {pair} {delta}: {restore_error}")
+                retry |= set(claimed)
+        finally:
+            if locks:
+                try:
+                    cache.delete_many(list(locks.values()))
+                except Exception as e:
+                    logger.warning(f"Failed to release token usage flush lock: {e}")
+            if retry:
+                with cls.lock:
+                    cls.dirty |= retry
+
+    @staticmethod
+    def save_usage(deltas: dict) -> None:
+        """deltas 为 {(group, llm_model): 用量增量}，不存在的记录先补齐再统一自增"""
+        with transaction.atomic():
+            TeamTokenUseInfo.objects.bulk_create(
+                [TeamTokenUseInfo(group=group, llm_model=llm_model, used_token=0) for group, llm_model in deltas],
+                ignore_conflicts=True,
+            )
+            now = timezone.now()
+            for (group, llm_model), delta in deltas.items():
+                TeamTokenUseInfo.objects.filter(group=group, llm_model=llm_model).update(
+                    used_token=F("used_token") + delta, updated_at=now
+                )
+
+    @classmethod
+    def pending_usage(cls, group, llm_models) -> dict:
+        """读取团队各模型的待落库用量，返回 {llm_model: 用量}"""
+        keys = {cls.pending_key(str(group), llm_model): llm_model for llm_model in llm_models}
+        if not keys:
+            return {}
+        try:
+            pending = cache.get_many(list(keys))
+        except Exception as e:
+            logger.warning(f"Failed to read pending token usage: {e}")
+            return {}
+        return {keys[key]: value for key, value in pending.items() if value}
+
+
+atexit.register(TokenUsageBuffer.flush)
@@ -0,0 +1,67 @@
+from unittest import mock
+
+import pytest
+
+from apps.opspilot.quota_rule_mgmt.models import TeamTokenUseInfo
+from apps.opspilot.quota_rule_mgmt.token_usage import TokenUsageBuffer
+
+GROUP = "1"
+LLM_MODEL = "gpt-4o"
+
+
+@pytest.fixture(autouse=True)
+def use_locmem_cache_backend(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "token-usage-test",
+        }
+    }
+    settings.TOKEN_USAGE_FLUSH_INTERVAL = 3600
+    TokenUsageBuffer.dirty = set()
+
+
+def used_token():
+    info = TeamTokenUseInfo.objects.filter(group=GROUP, llm_model=LLM_MODEL).first()
+    return info.used_token if info else 0
+
+
+@pytest.mark.django_db
+def test_concurrent_flush_applies_usage_once():
+    """第一个进程落库过程中第二个进程落库同一团队、模型，用量只计入一次"""
+    save_usage = TokenUsageBuffer.save_usage
+    second_worker_calls = []
+
+    def save_usage_with_second_worker(deltas):
+        if not second_worker_calls:
+            # 模拟另一个进程：对话继续记账，并在第一个进程写库前落库
+            TokenUsageBuffer.record(GROUP, LLM_MODEL, 50)
+            second_worker_calls.append(deltas)
+            TokenUsageBuffer.flush_pairs({(GROUP, LLM_MODEL)})
+        save_usage(deltas)
+
+    TokenUsageBuffer.record(GROUP, LLM_MODEL, 100)
+    with mock.patch.object(TokenUsageBuffer, "save_usage", side_effect=save_usage_with_second_worker):
+        TokenUsageBuffer.flush()
+
+    assert used_token() == 100
+    assert TokenUsageBuffer.pending_usage(GROUP, [LLM_MODEL]) == {LLM_MODEL: 50}
+    assert (GROUP, LLM_MODEL) in TokenUsageBuffer.dirty
+
+    TokenUsageBuffer.flush()
+    assert used_token() == 150
+    assert TokenUsageBuffer.pending_usage(GROUP, [LLM_MODEL]) == {}
+
+
+@pytest.mark.django_db
+def test_failed_flush_restores_pending_usage():
+    TokenUsageBuffer.record(GROUP, LLM_MODEL, 100)
+    with mock.patch.object(TokenUsageBuffer, "save_usage", side_effect=RuntimeError("db unavailable")):
+        TokenUsageBuffer.flush()
+
+    assert used_token() == 0
+    assert TokenUsageBuffer.pending_usage(GROUP, [LLM_MODEL]) == {LLM_MODEL: 100}
+
+    TokenUsageBuffer.flush()
+    assert used_token() == 100
+    assert TokenUsageBuffer.pending_usage(GROUP, [LLM_MODEL]) == {}
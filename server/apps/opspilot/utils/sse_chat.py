@@ -4,9 +4,11 @@ import time
 import os
 import asyncio
 import threading
+import weakref
 from typing import AsyncGenerator
 
-import requests
+import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import StreamingHttpResponse
 
@@ -15,7 +17,7 @@ from apps.opspilot.bot_mgmt.utils import insert_skill_log
 from apps.opspilot.enum import SkillTypeChoices
 from apps.opspilot.model_provider_mgmt.models import LLMModel
 from apps.opspilot.model_provider_mgmt.services.llm_service import llm_service
-from apps.opspilot.quota_rule_mgmt.models import TeamTokenUseInfo
+from apps.opspilot.quota_rule_mgmt.token_usage import TokenUsageBuffer
 from apps.opspilot.utils.chat_server_helper import ChatServerHelper
 
 
@@ -231,8 +233,73 @@ def _process_sse_line(
         )
 
 
-def _generate_sse_stream(url, headers, chat_kwargs, skill_name, show_think):
-    """生成SSE流式数据"""
+# 心跳帧为 SSE 注释行，客户端按规范忽略，只用于保持连接活跃
+SSE_HEARTBEAT_FRAME = ": heartbeat\n\n"
+
+# 每个事件循环共用一个到 METIS 的连接池，httpx 的连接不能跨事件循环使用
+_metis_clients = weakref.WeakKeyDictionary()
+
+
+def _get_metis_client() -> httpx.AsyncClient:
+    """获取当前事件循环的 METIS 异步客户端"""
+    loop = asyncio.get_running_loop()
+    client = _metis_clients.get(loop)
+    if client is None or client.is_closed:
+        # SSL验证配置 - 从环境变量读取
+        ssl_verify = os.getenv("METIS_SSL_VERIFY", "false").lower() == "true"
+        client = httpx.AsyncClient(
+            verify=ssl_verify,
+            timeout=httpx.Timeout(
+                settings.METIS_SSE_READ_TIMEOUT,
+                connect=settings.METIS_SSE_CONNECT_TIMEOUT,
+                pool=settings.METIS_SSE_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.METIS_SSE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.METIS_SSE_MAX_KEEPALIVE,
+            ),
+        )
+        _metis_clients[loop] = client
+    return client
+
+
+async def _aiter_with_heartbeat(async_iterable, interval):
+    """
+    逐项转发异步迭代器的数据，超过 interval 秒没有新数据时产出 None，由调用方输出心跳帧
+    同一时刻最多预读一项，下游未消费前不会继续读取上游，上游的读取速度受客户端接收速度约束
+    """
+    iterator = async_iterable.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            task, pending = pending, None
+            try:
+                item = task.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        # 客户端断开或提前结束时取消未完成的读取，等待其退出后再由调用方关闭上游连接
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration, Exception):
+                pass
+
+
+async def _generate_sse_stream(url, headers, chat_kwargs, skill_name, show_think):
+    """
+    生成SSE流式数据
+    通过异步客户端读取 METIS 的流式响应，不阻塞事件循环；生成器被关闭或取消（客户端断开）时，
+    退出 client.stream 上下文会中止上游请求
+    """
     accumulated_content = ""
     prompt_tokens = 0
     completion_tokens = 0
@@ -242,41 +309,41 @@ def _generate_sse_stream(url, headers, chat_kwargs, skill_name, show_think):
     has_think_tags = True
     sse_headers = {**headers, "Accept": "text/event-stream", "Cache-Control": "no-cache", "Connection": "keep-alive"}
 
-    # SSL验证配置 - 从环境变量读取
-    ssl_verify = os.getenv("METIS_SSL_VERIFY", "false").lower() == "true"
-    
     try:
-        res = requests.post(url, headers=sse_headers, json=chat_kwargs, timeout=300, verify=ssl_verify, stream=True)
-        res.raise_for_status()
-
-        for line in res.iter_lines(decode_unicode=True):
-            result = _process_sse_line(
-                line,
-                accumulated_content,
-                prompt_tokens,
-                completion_tokens,
-                think_buffer,
-                in_think_block,
-                is_first_content,
-                show_think,
-                has_think_tags,
-            )
-            (
-                accumulated_content,
-                prompt_tokens,
-                completion_tokens,
-                think_buffer,
-                in_think_block,
-                is_first_content,
-                output,
-                has_think_tags,
-            ) = result
-
-            if output == "DONE":
-                break
-            elif output:
-                stream_chunk = _create_stream_chunk(output, skill_name)
-                yield f"data: {json.dumps(stream_chunk)}\n\n"
+        async with _get_metis_client().stream("POST", url, headers=sse_headers, json=chat_kwargs) as res:
+            res.raise_for_status()
+
+            async for line in _aiter_with_heartbeat(res.aiter_lines(), settings.SSE_HEARTBEAT_INTERVAL):
+                if line is None:
+                    yield SSE_HEARTBEAT_FRAME
+                    continue
+                result = _process_sse_line(
+                    line,
+                    accumulated_content,
+                    prompt_tokens,
+                    completion_tokens,
+                    think_buffer,
+                    in_think_block,
+                    is_first_content,
+                    show_think,
+                    has_think_tags,
+                )
+                (
+                    accumulated_content,
+                    prompt_tokens,
+                    completion_tokens,
+                    think_buffer,
+                    in_think_block,
+                    is_first_content,
+                    output,
+                    has_think_tags,
+                ) = result
+
+                if output == "DONE":
+                    break
+                elif output:
+                    stream_chunk = _create_stream_chunk(output, skill_name)
+                    yield f"data: {json.dumps(stream_chunk)}\n\n"
 
         # 处理剩余缓冲区内容
         if not show_think and not in_think_block and think_buffer:
@@ -298,7 +365,7 @@ def _generate_sse_stream(url, headers, chat_kwargs, skill_name, show_think):
 
 
 def _create_async_compatible_generator(sync_generator):
-    """创建与 ASGI 兼容的异步生成器"""
+    """创建与 ASGI 兼容的异步生成器，只用于不会阻塞的同步生成器（如固定的错误信息）"""
     async def async_wrapper():
         """异步包装器"""
         try:
@@ -331,14 +398,15 @@ def stream_chat(params, skill_name, kwargs, current_ip, user_message, skill_id=N
     total_prompt_tokens = 0
     total_completion_tokens = 0
 
-    def generate_stream():
+    headers = ChatServerHelper.get_chat_server_header()
+
+    async def generate_stream():
         nonlocal final_content, total_prompt_tokens, total_completion_tokens
 
         try:
-            headers = ChatServerHelper.get_chat_server_header()
             stream_gen = _generate_sse_stream(url, headers, chat_kwargs, skill_name, show_think)
 
-            for chunk in stream_gen:
+            async for chunk in stream_gen:
                 if isinstance(chunk, tuple) and chunk[0] == "STATS":
                     # 收集统计信息
                     _, final_content, total_prompt_tokens, total_completion_tokens = chunk
@@ -354,9 +422,7 @@ def stream_chat(params, skill_name, kwargs, current_ip, user_message, skill_id=N
             error_chunk = _create_error_chunk(f"聊天错误: {str(e)}", skill_name)
             yield f"data: {json.dumps(error_chunk)}\n\n"
 
-    # 使用异步兼容生成器来避免 StreamingHttpResponse 警告
-    async_compatible_generator = _create_async_compatible_generator(generate_stream())
-    response = StreamingHttpResponse(async_compatible_generator, content_type="text/event-stream")
+    response = StreamingHttpResponse(generate_stream(), content_type="text/event-stream")
     response["Cache-Control"] = "no-cache, no-store, must-revalidate"
     response["X-Accel-Buffering"] = "no"  # Nginx
     # response["Pragma"] = "no-cache"
@@ -383,13 +449,13 @@ def stream_chat(params, skill_name, kwargs, current_ip, user_message, skill_id=N
 
 
 def _wrap_async_generator_with_callback(async_generator, callback):
-    """包装异步生成器，在完成后执行回调"""
+    """包装异步生成器，在完成或客户端断开后执行回调，回调中有数据库操作，放到线程中执行"""
     async def wrapped_generator():
         try:
             async for item in async_generator:
                 yield item
         finally:
-            callback()
+            await sync_to_async(callback)()
     
     return wrapped_generator()
 
@@ -423,12 +489,7 @@ def _log_and_update_tokens(
 
         # 更新token使用量
         used_token = final_stats["prompt_tokens"] + final_stats["completion_tokens"]
-        team_info, is_created = TeamTokenUseInfo.objects.get_or_create(
-            group=group, llm_model=llm_model.name, defaults={"used_token": used_token}
-        )
-        if not is_created:
-            team_info.used_token += used_token
-            team_info.save()
+        TokenUsageBuffer.record(group, llm_model.name, used_token)
 
     except Exception as e:
         logger.error(f"Log and token update error: {e}")
@@ -1,4 +1,3 @@
-import asyncio
 import os
 
 import nats_client
@@ -13,11 +12,11 @@ class RpcClient(object):
         self.namespace = namespace
 
     def run(self, method_name, *args, **kwargs):
-        return_data = asyncio.run(nats_client.request(self.namespace, method_name, *args, **kwargs))
+        return_data = nats_client.request_sync(self.namespace, method_name, *args, **kwargs)
         return return_data
 
     def request(self, method_name, **kwargs):
-        return_data = asyncio.run(nats_client.nat_request(self.namespace, method_name, **kwargs))
+        return_data = nats_client.nat_request_sync(self.namespace, method_name, **kwargs)
         return return_data
 
 
@@ -45,8 +44,7 @@ class OperationAnalysisRpc(RpcClient):
         self.server = kwargs.pop("server", "")
 
     def run(self, method_name, *args, **kwargs):
-        return_data = asyncio.run(
-            nats_client.request_v2(self.namespace, method_name, server=self.server, *args, **kwargs))
+        return_data = nats_client.request_v2_sync(self.namespace, method_name, server=self.server, *args, **kwargs)
         return return_data
 
 
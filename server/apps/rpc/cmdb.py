@@ -31,3 +31,12 @@ class CMDB(object):
         """
         return_data = self.client.run("search_instances", **kwargs)
         return return_data
+
+    def search_instances_batch(self, **kwargs):
+        """
+        告警丰富批量查询CMDB接口
+        :param queries: [{"model_id": "host", "_id": 1} 或 {"model_id": "host", "inst_name": "xx"}]
+        :return: 与 queries 一一对应的实例列表
+        """
+        return_data = self.client.run("search_instances_batch", **kwargs)
+        return return_data
@@ -7,3 +7,6 @@ class HandleConfig(AppConfig):
     #
     def ready(self):
         import apps.system_mgmt.nats_api  # noqa
+        from apps.system_mgmt.signals.auth_cache import connect_signals
+
+        connect_signals()
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import io
 import os
 import time
@@ -13,6 +14,7 @@ from django.utils import timezone
 import nats_client
 from apps.core.backends import cache
 from apps.core.logger import system_mgmt_logger as logger
+from apps.core.services.auth_cache import auth_cache
 from apps.system_mgmt.guest_menus import CMDB_MENUS, MONITOR_MENUS, OPSPILOT_GUEST_MENUS
 from apps.system_mgmt.models import (
     App,
@@ -48,9 +50,20 @@ def _verify_token(token):
     user = User.objects.filter(id=user_info["user_id"]).first()
     if not user:
         raise Exception("User not found")
+    user.token_expires_at = user_info["login_time"] + login_expired_time
     return user
 
 
+def _get_group_tree(is_superuser, group_ids):
+    """组织树只随组织变更而变化，按用户可见组织缓存，组织变更时随认证缓存一起失效"""
+    cache_key = "all" if is_superuser else hashlib.md5(",".join(map(str, sorted(group_ids))).encode()).hexdigest()
+    groups_data = auth_cache.get("group_tree", cache_key)
+    if groups_data is None:
+        groups_data = GroupUtils.build_group_tree(Group.objects.all(), is_superuser, group_ids)
+        auth_cache.set("group_tree", cache_key, value=groups_data)
+    return groups_data
+
+
 @nats_client.register
 def get_pilot_permission_by_token(token, bot_id, group_list):
     try:
@@ -98,10 +111,9 @@ def verify_token(token):
         group_list = group_list.filter(id__in=user.group_list)
     # groups = GroupUtils.build_group_tree(group_list)
     groups = list(group_list.values("id", "name", "parent_id"))
-    queryset = Group.objects.all()
 
     # 构建嵌套组结构
-    groups_data = GroupUtils.build_group_tree(queryset, is_superuser, [i["id"] for i in groups])
+    groups_data = _get_group_tree(is_superuser, [i["id"] for i in groups])
     menus = cache.get(f"menus-user:{user.id}")
     if not menus:
         menus = {}
@@ -128,6 +140,7 @@ def verify_token(token):
             "role_ids": user.role_list,
             "locale": user.locale,
             "permission": menus,
+            "expires_at": user.token_expires_at,
         },
     }
 
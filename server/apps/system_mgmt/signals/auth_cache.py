@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.core.services.auth_cache import auth_cache
+from apps.system_mgmt.models import Group, GroupDataRule, Menu, Role, SystemSettings, User, UserRule
+
+# 影响token校验结果的用户字段，其余字段（如last_login、otp_secret）变更时无需清理缓存
+USER_AUTH_FIELDS = ["username", "display_name", "email", "disabled", "locale", "group_list", "role_list", "domain"]
+
+
+def invalidate_auth_cache():
+    """角色、组织、菜单、数据权限变更后在事务提交时清理各进程的认证缓存"""
+    transaction.on_commit(auth_cache.invalidate)
+
+
+def _on_change(sender, **kwargs):
+    invalidate_auth_cache()
+
+
+def _on_user_pre_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields).intersection(USER_AUTH_FIELDS):
+        instance._auth_changed = False
+        return
+    if instance.pk is None:
+        instance._auth_changed = False
+        return
+    old = User.objects.filter(pk=instance.pk).values(*USER_AUTH_FIELDS).first()
+    instance._auth_changed = old is None or any(old[field] != getattr(instance, field) for field in USER_AUTH_FIELDS)
+
+
+def _on_user_post_save(sender, instance, created, **kwargs):
+    if getattr(instance, "_auth_changed", False):
+        invalidate_auth_cache()
+
+
+def connect_signals():
+    for model in (Group, Role, Menu, UserRule, GroupDataRule, SystemSettings):
+        post_save.connect(_on_change, sender=model, dispatch_uid=f"auth_cache_save_{model.__name__}")
+        post_delete.connect(_on_change, sender=model, dispatch_uid=f"auth_cache_delete_{model.__name__}")
+    pre_save.connect(_on_user_pre_save, sender=User, dispatch_uid="auth_cache_user_pre_save")
+    post_save.connect(_on_user_post_save, sender=User, dispatch_uid="auth_cache_user_post_save")
+    post_delete.connect(_on_change, sender=User, dispatch_uid="auth_cache_delete_User")
@@ -3,6 +3,7 @@ from celery import shared_task
 from apps.core.logger import system_mgmt_logger as logger
 from apps.rpc.base import RpcClient
 from apps.system_mgmt.models import Group, LoginModule, User
+from apps.system_mgmt.signals.auth_cache import invalidate_auth_cache
 
 
 @shared_task
@@ -36,6 +37,8 @@ def sync_user_and_groups(user_list, group_list, login_module):
         default_role = login_module.other_config.get("default_roles", [])
         synced_users = _sync_users(user_list, group_id_mapping, domain, default_role)
         logger.info(f"Successfully synced {len(synced_users)} users")
+        # 批量写入不会触发模型信号，需要手动清理认证缓存
+        invalidate_auth_cache()
         return {"result": True, "data": {"synced_users": len(synced_users), "synced_groups": len(group_id_mapping)}}
     except Exception as e:
         logger.exception(f"Error syncing users and groups: {e}")
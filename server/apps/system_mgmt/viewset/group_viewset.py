@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from apps.core.decorators.api_permission import HasPermission
 from apps.system_mgmt.models import Group, User
 from apps.system_mgmt.serializers.group_serializer import GroupSerializer
+from apps.system_mgmt.signals.auth_cache import invalidate_auth_cache
 from apps.system_mgmt.utils.group_utils import GroupUtils
 from apps.system_mgmt.utils.viewset_utils import ViewSetUtils
 
@@ -63,6 +64,7 @@ class GroupViewSet(ViewSetUtils):
             if request.data.get("group_id") not in groups:
                 return JsonResponse({"result": False, "message": _("You do not have permission to edit this group.")})
         Group.objects.filter(id=request.data.get("group_id")).update(name=request.data.get("group_name"))
+        invalidate_auth_cache()
         return JsonResponse({"result": True})
 
     @action(detail=False, methods=["POST"])
@@ -7,6 +7,7 @@ from apps.core.decorators.api_permission import HasPermission
 from apps.system_mgmt.models import Menu, Role, User
 from apps.system_mgmt.serializers.role_serializer import RoleSerializer
 from apps.system_mgmt.services.role_manage import RoleManage
+from apps.system_mgmt.signals.auth_cache import invalidate_auth_cache
 from apps.system_mgmt.utils.viewset_utils import ViewSetUtils
 
 
@@ -100,6 +101,7 @@ class RoleViewSet(ViewSetUtils):
     @HasPermission("application_role-Edit")
     def update_role(self, request):
         Role.objects.filter(id=request.data.get("role_id")).update(name=request.data.get("role_name"))
+        invalidate_auth_cache()
         return JsonResponse({"result": True})
 
     @action(detail=False, methods=["POST"])
@@ -112,6 +114,7 @@ class RoleViewSet(ViewSetUtils):
             if pk not in i.role_list:
                 i.role_list.append(int(pk))
         User.objects.bulk_update(user_list, ["role_list"], batch_size=100)
+        invalidate_auth_cache()
         return JsonResponse({"result": True})
 
     @action(detail=False, methods=["POST"])
@@ -124,6 +127,7 @@ class RoleViewSet(ViewSetUtils):
             if pk in i.role_list:
                 i.role_list.remove(pk)
         User.objects.bulk_update(user_list, ["role_list"], batch_size=100)
+        invalidate_auth_cache()
         return JsonResponse({"result": True})
 
     @action(detail=False, methods=["POST"])
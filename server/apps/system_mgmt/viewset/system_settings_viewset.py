@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 
 from apps.system_mgmt.models.system_settings import SystemSettings
 from apps.system_mgmt.serializers.system_settings_serializer import SystemSettingsSerializer
+from apps.system_mgmt.signals.auth_cache import invalidate_auth_cache
 
 
 class SystemSettingsViewSet(viewsets.ModelViewSet):
@@ -22,4 +23,5 @@ class SystemSettingsViewSet(viewsets.ModelViewSet):
         for i in sys_set:
             i.value = kwargs.get(i.key, i.value)
         SystemSettings.objects.bulk_update(sys_set, ["value"])
+        invalidate_auth_cache()
         return JsonResponse({"result": True})
@@ -10,6 +10,7 @@ from apps.core.logger import system_mgmt_logger as logger
 from apps.system_mgmt.models import Group, Role, User, UserRule
 from apps.system_mgmt.serializers.user_serializer import UserSerializer
 from apps.system_mgmt.services.role_manage import RoleManage
+from apps.system_mgmt.signals.auth_cache import invalidate_auth_cache
 from apps.system_mgmt.utils.viewset_utils import ViewSetUtils
 
 
@@ -103,6 +104,7 @@ class UserViewSet(ViewSetUtils):
                 if rules:
                     add_rule = [UserRule(username=kwargs["username"], group_rule_id=i) for i in rules]
                     UserRule.objects.bulk_create(add_rule, batch_size=100)
+                    invalidate_auth_cache()
             return JsonResponse({"result": True})
         except Exception as e:
             logger.exception(e)
@@ -157,6 +159,7 @@ class UserViewSet(ViewSetUtils):
                 role_list=params.get("roles"),
             )
             cache.delete_many(keys)
+            invalidate_auth_cache()
         return JsonResponse({"result": True})
 
     @action(detail=True, methods=["POST"])
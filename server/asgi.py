@@ -1,9 +1,13 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 from dotenv import load_dotenv
 
 load_dotenv()
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from apps.core.utils.asgi_handler import DisconnectAwareASGIHandler  # noqa: E402
+
+application = DisconnectAwareASGIHandler()
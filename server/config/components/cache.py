@@ -23,3 +23,9 @@ if REDIS_CACHE_URL:
     CACHES["default"] = CACHES["redis"]
 else:
     CACHES["default"] = CACHES["locmem"]
+
+# 认证缓存：token校验结果与用户规则的两级缓存（进程内LRU + default缓存）
+AUTH_CACHE_ENABLED = os.environ.get("AUTH_CACHE_ENABLED", "True").lower() == "true"
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", 300))
+AUTH_LOCAL_CACHE_TTL = int(os.environ.get("AUTH_LOCAL_CACHE_TTL", 30))
+AUTH_LOCAL_CACHE_SIZE = int(os.environ.get("AUTH_LOCAL_CACHE_SIZE", 2048))
@@ -3,3 +3,5 @@ import os
 NATS_SERVERS = os.getenv("NATS_SERVERS", "")
 NATS_NAMESPACE = os.getenv("NATS_NAMESPACE", "bk_lite")
 NATS_JETSTREAM_ENABLED = False
+# 复用进程内常驻的 NATS 连接（每个 server 一个），关闭后退回到每次请求新建连接
+NATS_POOL_ENABLED = os.getenv("NATS_POOL_ENABLED", "True").lower() == "true"
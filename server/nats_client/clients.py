@@ -1,5 +1,6 @@
-__all__ = ["nat_request", "request", "request_sync", "publish", "publish_sync", "js_publish", "js_publish_sync",
-           "request_v2"]
+__all__ = ["nat_request", "nat_request_sync", "request", "request_sync", "publish", "publish_sync", "js_publish",
+           "js_publish_sync", "request_v2", "request_v2_sync", "subscribe", "subscribe_sync", "connection_manager",
+           "pool_enabled"]
 
 import asyncio
 import functools
@@ -8,22 +9,23 @@ import json
 import jsonpickle
 from django.conf import settings
 from nats.aio.client import Client
+from nats.errors import ConnectionClosedError, StaleConnectionError, UnexpectedEOF
 
 from .exceptions import NatsClientException
+from .pool import connection_manager
 from .types import ResponseType
 from .utils import parse_arguments
 
 DEFAULT_REQUEST_TIMEOUT = 60
 
+# Errors after which a pooled connection can't be trusted anymore
+TRANSPORT_ERRORS = (ConnectionClosedError, StaleConnectionError, UnexpectedEOF, ConnectionError)
+
 
 async def nat_request(namespace: str, method_name: str, _timeout: float = None, _raw=False, **kwargs) -> ResponseType:
     payload = json.dumps(kwargs).encode()
-    nc = await get_nc_client()
     timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
-    try:
-        response = await nc.request(f"{namespace}.{method_name}", payload, timeout=timeout)
-    finally:
-        await nc.close()
+    response = await _send_request(f"{namespace}.{method_name}", payload, timeout)
     data = response.data.decode()
     parsed = json.loads(data)
     return parsed
@@ -49,18 +51,46 @@ async def get_nc_client(nc: Client = None, server: str = "") -> Client:
     return nc
 
 
+def pool_enabled() -> bool:
+    return getattr(settings, "NATS_POOL_ENABLED", True)
+
+
+async def _pooled_call(servers, func):
+    nc = await connection_manager.get_connection(servers)
+    try:
+        return await func(nc)
+    except TRANSPORT_ERRORS:
+        connection_manager.discard(servers)
+        raise
+
+
+async def _call(func, server: str = ""):
+    """Run `func(nc)` on a pooled connection, or on a one-shot connection when pooling is disabled."""
+    if not pool_enabled():
+        nc = await get_nc_client(server=server)
+        try:
+            return await func(nc)
+        finally:
+            await nc.close()
+
+    servers = [server] if server else get_default_nats_server()
+    return await connection_manager.submit(_pooled_call(servers, func))
+
+
+async def _send_request(subject: str, payload: bytes, timeout: float, server: str = ""):
+    async def _request(nc: Client):
+        return await nc.request(subject, payload, timeout=timeout)
+
+    return await _call(_request, server=server)
+
+
 async def request(
         namespace: str, method_name: str, *args, _timeout: float = None, _raw=False, **kwargs
 ) -> ResponseType:
     payload = parse_arguments(args, kwargs)
 
-    nc = await get_nc_client()
-
     timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
-    try:
-        response = await nc.request(f"{namespace}.{method_name}", payload, timeout=timeout)
-    finally:
-        await nc.close()
+    response = await _send_request(f"{namespace}.{method_name}", payload, timeout)
 
     data = response.data.decode()
     parsed = json.loads(data)
@@ -85,13 +115,8 @@ async def request_v2(
 ) -> ResponseType:
     payload = parse_arguments(args, kwargs)
 
-    nc = await get_nc_client(server=server)
-
     timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
-    try:
-        response = await nc.request(f"{namespace}.{method_name}", payload, timeout=timeout)
-    finally:
-        await nc.close()
+    response = await _send_request(f"{namespace}.{method_name}", payload, timeout, server=server)
 
     data = response.data.decode()
     parsed = json.loads(data)
@@ -111,27 +136,52 @@ async def request_v2(
     return parsed["result"]
 
 
+def _run_sync(coro):
+    """Run a client coroutine from sync code, directly on the pool loop when pooling is enabled."""
+    if pool_enabled():
+        return connection_manager.run(coro)
+    return asyncio.run(coro)
+
+
 def request_sync(*args, **kwargs):
-    return asyncio.run(request(*args, **kwargs))
+    return _run_sync(request(*args, **kwargs))
+
+
+def request_v2_sync(*args, **kwargs):
+    return _run_sync(request_v2(*args, **kwargs))
+
+
+def nat_request_sync(*args, **kwargs):
+    return _run_sync(nat_request(*args, **kwargs))
 
 
 async def publish(namespace: str, method_name: str, *args, _js=False, **kwargs) -> None:
     payload = parse_arguments(args, kwargs)
 
-    nc = await get_nc_client()
-
-    try:
+    async def _publish(nc: Client):
         if _js:
             js = nc.jetstream()
             await js.publish(f"{namespace}.js.{method_name}", payload)
         else:
             await nc.publish(f"{namespace}.{method_name}", payload)
-    finally:
-        await nc.close()
+            # A one-shot connection flushed on close; a pooled one has to be flushed explicitly
+            await nc.flush()
+
+    await _call(_publish)
 
 
 def publish_sync(*args, **kwargs):
-    return asyncio.run(publish(*args, **kwargs))
+    return _run_sync(publish(*args, **kwargs))
+
+
+async def subscribe(namespace: str, method_name: str, cb, server: str = "") -> None:
+    """Broadcast subscription (no queue group) on the pooled connection; `cb` receives the raw message."""
+    servers = [server] if server else get_default_nats_server()
+    await connection_manager.submit(connection_manager.subscribe(servers, f"{namespace}.{method_name}", cb))
+
+
+def subscribe_sync(*args, **kwargs):
+    return connection_manager.run(subscribe(*args, **kwargs))
 
 
 js_publish = functools.partial(publish, _js=True)
@@ -0,0 +1,186 @@
+__all__ = ["ConnectionManager", "connection_manager"]
+
+import asyncio
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from nats.aio.client import Client
+
+
+class ConnectionManager:
+    """Process-wide pool of long-lived NATS connections.
+
+    One connection is kept per server URL and all of them live on a dedicated
+    background event loop thread, so sync callers (Django views, Celery tasks)
+    can reuse them without paying a TCP/NATS handshake per request. The state
+    is reset in forked children because sockets and threads don't survive fork.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._loop = None
+        self._thread = None
+        self._connections = {}
+        self._connect_locks = {}
+        self._subscriptions = {}
+        self.metrics = defaultdict(int)
+
+    def _after_fork(self):
+        # The parent's loop thread doesn't exist in the child; drop everything without closing
+        # the inherited sockets, the parent still owns them.
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._pid != os.getpid():
+            self._after_fork()
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._run_loop, args=(loop,), name="nats-client-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def run(self, coro, timeout: float = None):
+        """Run a coroutine on the connection loop from sync code and wait for its result."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    async def submit(self, coro):
+        """Await a coroutine on the connection loop from any other event loop."""
+        if self.in_loop():
+            return await coro
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    @staticmethod
+    def _key(servers) -> str:
+        # NATS_SERVERS may be a comma separated string as well as a list
+        return servers if isinstance(servers, str) else ",".join(servers)
+
+    @staticmethod
+    def _usable(nc: Client) -> bool:
+        # While reconnecting the client buffers outgoing messages, so the connection is still worth reusing
+        return nc.is_connected or nc.is_reconnecting
+
+    async def get_connection(self, servers: list) -> Client:
+        """Return the pooled connection for `servers`, connecting it on first use. Must run on the pool loop."""
+        key = self._key(servers)
+        nc = self._connections.get(key)
+        if nc is not None and self._usable(nc):
+            self.metrics["hits"] += 1
+            return nc
+
+        lock = self._connect_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            nc = self._connections.get(key)
+            if nc is not None and self._usable(nc):
+                self.metrics["hits"] += 1
+                return nc
+            if nc is not None:
+                # The client gave up reconnecting on its own: replace it.
+                self.metrics["reconnects"] += 1
+                await self._close_quietly(nc)
+            nc = await self._connect(servers)
+            self._connections[key] = nc
+            self.metrics["connects"] += 1
+            return nc
+
+    async def _connect(self, servers: list) -> Client:
+        options = dict(getattr(settings, "NATS_OPTIONS", {}))
+        user_reconnected_cb = options.pop("reconnected_cb", None)
+        user_disconnected_cb = options.pop("disconnected_cb", None)
+
+        async def reconnected_cb():
+            self.metrics["reconnects"] += 1
+            if user_reconnected_cb is not None:
+                await user_reconnected_cb()
+
+        async def disconnected_cb():
+            self.metrics["disconnects"] += 1
+            if user_disconnected_cb is not None:
+                await user_disconnected_cb()
+
+        nc = Client()
+        await nc.connect(
+            servers=servers, reconnected_cb=reconnected_cb, disconnected_cb=disconnected_cb, **options
+        )
+        # A replaced connection loses its subscriptions, replay them on the new one
+        for subject, cb in self._subscriptions.get(self._key(servers), []):
+            await nc.subscribe(subject, cb=cb)
+        return nc
+
+    async def subscribe(self, servers: list, subject: str, cb):
+        """Subscribe `cb` on the pooled connection, kept across connection replacement. Must run on the pool loop."""
+        subscriptions = self._subscriptions.setdefault(self._key(servers), [])
+        if (subject, cb) in subscriptions:
+            return
+        nc = await self.get_connection(servers)
+        subscriptions.append((subject, cb))
+        await nc.subscribe(subject, cb=cb)
+
+    def discard(self, servers: list):
+        """Forget a connection after a transport error so the next call reconnects. Must run on the pool loop."""
+        nc = self._connections.pop(self._key(servers), None)
+        if nc is not None:
+            self.metrics["errors"] += 1
+            asyncio.ensure_future(self._close_quietly(nc))
+
+    @staticmethod
+    async def _close_quietly(nc: Client):
+        try:
+            await nc.close()
+        except Exception:  # noqa
+            pass
+
+    def close(self):
+        """Close every pooled connection and stop the loop thread."""
+        if self._loop is None or self._pid != os.getpid():
+            return
+
+        async def _close_all():
+            for nc in list(self._connections.values()):
+                await self._close_quietly(nc)
+            self._connections.clear()
+
+        self.run(_close_all())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "pid": self._pid,
+            "connections": sum(1 for nc in self._connections.values() if nc.is_connected),
+            "hits": self.metrics["hits"],
+            "connects": self.metrics["connects"],
+            "reconnects": self.metrics["reconnects"],
+            "disconnects": self.metrics["disconnects"],
+            "errors": self.metrics["errors"],
+        }
+
+
+connection_manager = ConnectionManager()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=connection_manager._after_fork)
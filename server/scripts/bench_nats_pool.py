@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+对比 nats_client 每次新建连接与连接池复用两种模式下的同步 RPC 吞吐（calls/s）
+
+需要本地运行 nats-server，例如: docker run -p 4222:4222 nats
+用法: python scripts/bench_nats_pool.py --server nats://127.0.0.1:4222 --calls 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+NAMESPACE = "bench"
+
+
+def start_echo_responder(server, ready):
+    """在独立线程中启动一个回显服务，模拟 nats_listener 的响应格式"""
+    from nats.aio.client import Client
+
+    async def main():
+        nc = Client()
+        await nc.connect(servers=[server])
+
+        async def handler(msg):
+            await msg.respond(json.dumps({"success": True, "result": json.loads(msg.data)}).encode())
+
+        await nc.subscribe(f"{NAMESPACE}.echo", cb=handler)
+        ready.set()
+        while True:
+            await asyncio.sleep(3600)
+
+    threading.Thread(target=lambda: asyncio.run(main()), daemon=True).start()
+
+
+def bench(calls, pooled):
+    from django.conf import settings
+
+    import nats_client
+    from apps.rpc.base import RpcClient
+
+    settings.NATS_POOL_ENABLED = pooled
+    client = RpcClient(namespace=NAMESPACE)
+    client.run("echo", ping=0)  # 预热
+
+    start = time.perf_counter()
+    for i in range(calls):
+        client.run("echo", ping=i)
+    elapsed = time.perf_counter() - start
+    return calls / elapsed, nats_client.connection_manager.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", default="nats://127.0.0.1:4222")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    settings.configure(NATS_SERVERS=[args.server], NATS_REQUEST_TIMEOUT=5)
+
+    ready = threading.Event()
+    start_echo_responder(args.server, ready)
+    ready.wait(10)
+
+    legacy_rate, _ = bench(args.calls, pooled=False)
+    pooled_rate, stats = bench(args.calls, pooled=True)
+    print(f"per-call connection: {legacy_rate:10.1f} calls/s")
+    print(f"pooled connection  : {pooled_rate:10.1f} calls/s  ({pooled_rate / legacy_rate:.1f}x)")
+    print(f"pool stats         : {stats}")
+
+
+if __name__ == "__main__":
+    main()